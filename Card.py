@@ -2,13 +2,61 @@
 # OS support: -REPLACE WITH YOUR OS SUPPORT-
 # Description: Defines Card and CardCollection classes for managing Pokemon card data.
 import sqlite3
+import hashlib
 import json
+import os
+import pickle
 import re
-from typing import Dict, List, Optional, Union, Any, Tuple
+import heapq
+import itertools
+import struct
+import sys
+import tempfile
+import unicodedata
+from typing import Dict, List, Optional, Union, Any, Tuple, Set
+
+
+def _intern(value: Any) -> Any:
+    """Intern repeated categorical strings so every card shares one copy."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _value_size(value: Any) -> int:
+    """``sys.getsizeof`` including the items of nested lists and dicts (card attack lists)."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_value_size(key) + _value_size(item) for key, item in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(_value_size(item) for item in value)
+    return size
+
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize_search_text(text: str) -> str:
+    """Lowercase, strip accents and collapse punctuation to single spaces."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(_NON_WORD.sub(" ", stripped.casefold()).split())
 
 
 class Card:
-    """A class representing a Pokemon TCG Pocket card."""
+    """A class representing a Pokemon TCG Pocket card.
+
+    Uses ``__slots__`` and interned categorical strings to keep a full catalog
+    compact. Flags derived from ``card_type`` and ``name`` (stage, ex, trainer
+    subtype) are computed once when either attribute is assigned.
+    """
+
+    __slots__ = (
+        "id", "_name", "energy_type", "rarity", "pack", "set_name", "set_code",
+        "card_number", "card_number_str", "_card_type", "hp", "flavor_text",
+        "abilities", "attacks", "weakness", "retreat_cost", "illustrator",
+        "original_image_url", "firebase_image_url", "set_release_order",
+        "_is_pokemon", "_is_trainer", "_is_basic", "_is_evolution",
+        "_evolution_stage", "_evolves_from", "_trainer_subtype", "_is_ex",
+    )
 
     def __init__(
         self,
@@ -34,17 +82,22 @@ class Card:
         set_release_order: Optional[int] = None,  # New field for automatic set priority
     ):
         """Initialize a Card object with provided attributes."""
+        # Derived flags read both name and card_type, so seed them before assigning either
+        self._name = ""
+        self._card_type = ""
+
         self.id = id
         self.name = name
-        self.energy_type = energy_type
-        self.rarity = rarity
-        self.pack = pack
+        self.energy_type = _intern(energy_type)
+        self.rarity = _intern(rarity)
+        self.pack = _intern(pack)
 
-        self.set_name = set_name.strip()
+        set_name = set_name.strip()
         if "(" in set_name:
-            self.set_name = re.sub(r"\s*\([A-Za-z0-9\-]+\)\s*$", "", set_name).strip()
+            set_name = re.sub(r"\s*\([A-Za-z0-9\-]+\)\s*$", "", set_name).strip()
+        self.set_name = _intern(set_name)
 
-        self.set_code = set_code
+        self.set_code = _intern(set_code)
         self.card_number = card_number  # Integer or None
         self.card_number_str = card_number_str  # Original string
         self.card_type = re.sub(r"\s+", " ", card_type.strip()) if card_type else ""
@@ -63,14 +116,70 @@ class Card:
         else:
             self.attacks = attacks
 
-        self.weakness = weakness
+        self.weakness = _intern(weakness)
         self.retreat_cost = retreat_cost
-        self.illustrator = illustrator
+        self.illustrator = _intern(illustrator)
 
         self.original_image_url = original_image_url
         self.firebase_image_url = firebase_image_url
         self.set_release_order = set_release_order
 
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @name.setter
+    def name(self, value: str) -> None:
+        self._name = value
+        self._update_derived_flags()
+
+    @property
+    def card_type(self) -> str:
+        return self._card_type
+
+    @card_type.setter
+    def card_type(self, value: str) -> None:
+        self._card_type = _intern(value)
+        self._update_derived_flags()
+
+    def _update_derived_flags(self) -> None:
+        card_type = self._card_type or ""
+        is_pokemon = "Pokémon" in card_type
+        is_trainer = "Trainer" in card_type
+
+        self._is_pokemon = is_pokemon
+        self._is_trainer = is_trainer
+        self._is_basic = is_pokemon and "Basic" in card_type
+        self._is_evolution = is_pokemon and (
+            "Stage 1" in card_type or "Stage 2" in card_type
+        )
+
+        evolution_stage = None
+        if is_pokemon:
+            if "Basic" in card_type:
+                evolution_stage = 0
+            elif "Stage 1" in card_type:
+                evolution_stage = 1
+            elif "Stage 2" in card_type:
+                evolution_stage = 2
+        self._evolution_stage = evolution_stage
+
+        evolves_from = None
+        if self._is_evolution and "Evolves from" in card_type:
+            parts = card_type.split("Evolves from")
+            if len(parts) > 1:
+                evolves_from = parts[1].strip()
+        self._evolves_from = evolves_from
+
+        trainer_subtype = None
+        if is_trainer and "-" in card_type:
+            trainer_subtype = _intern(card_type.split("-")[1].strip())
+        self._trainer_subtype = trainer_subtype
+
+        # EX rule shared with the deck builder search: name ends in " ex" or card_type says so
+        name = self._name.lower() if self._name else ""
+        self._is_ex = name.endswith(" ex") or "pokemon - ex" in card_type.lower()
+
     @property
     def display_image_path(self) -> Optional[str]:
         if self.firebase_image_url:
@@ -79,49 +188,35 @@ class Card:
 
     @property
     def is_pokemon(self) -> bool:
-        return "Pokémon" in self.card_type
+        return self._is_pokemon
 
     @property
     def is_trainer(self) -> bool:
-        return "Trainer" in self.card_type
+        return self._is_trainer
 
     @property
     def is_basic(self) -> bool:
-        return self.is_pokemon and "Basic" in self.card_type
+        return self._is_basic
 
     @property
     def is_evolution(self) -> bool:
-        return self.is_pokemon and (
-            "Stage 1" in self.card_type or "Stage 2" in self.card_type
-        )
+        return self._is_evolution
+
+    @property
+    def is_ex(self) -> bool:
+        return self._is_ex
 
     @property
     def evolution_stage(self) -> Optional[int]:
-        if not self.is_pokemon:
-            return None
-        if "Basic" in self.card_type:
-            return 0
-        elif "Stage 1" in self.card_type:
-            return 1
-        elif "Stage 2" in self.card_type:
-            return 2
-        return None
+        return self._evolution_stage
 
     @property
     def evolves_from(self) -> Optional[str]:
-        if self.is_evolution and "Evolves from" in self.card_type:
-            parts = self.card_type.split("Evolves from")
-            if len(parts) > 1:
-                return parts[1].strip()
-        return None
+        return self._evolves_from
 
     @property
     def trainer_subtype(self) -> Optional[str]:
-        if not self.is_trainer:
-            return None
-        if "-" in self.card_type:
-            return self.card_type.split("-")[1].strip()
-        return None
+        return self._trainer_subtype
 
     def get_attack(self, attack_name: str) -> Optional[Dict[str, Any]]:
         for attack in self.attacks:
@@ -165,6 +260,32 @@ class Card:
             "set_release_order": self.set_release_order,
         }
 
+    @classmethod
+    def from_firestore(cls, card_data: Dict[str, Any], set_release_order: Optional[int] = None) -> "Card":
+        """Build a card from a ``set_cards`` document."""
+        return cls(
+            id=int(card_data["id"]),
+            name=card_data.get("name", ""),
+            energy_type=card_data.get("energy_type", ""),
+            set_name=card_data.get("set_name", ""),
+            set_code=card_data.get("set_code", ""),
+            card_number=card_data.get("card_number"),
+            card_number_str=card_data.get("card_number_str", ""),
+            card_type=card_data.get("card_type", ""),
+            hp=card_data.get("hp"),
+            attacks=card_data.get("attacks", []),
+            weakness=card_data.get("weakness"),
+            retreat_cost=card_data.get("retreat_cost"),
+            illustrator=card_data.get("illustrator"),
+            firebase_image_url=card_data.get("firebase_image_url"),
+            rarity=card_data.get("rarity", ""),
+            pack=card_data.get("pack", ""),
+            original_image_url=card_data.get("original_image_url"),
+            flavor_text=card_data.get("flavor_text"),
+            abilities=card_data.get("abilities", []),
+            set_release_order=set_release_order,
+        )
+
     def __str__(self) -> str:
         card_info = f"{self.name} ({self.set_name} {self.card_number_str})"  # Use card_number_str
         if self.is_pokemon and self.energy_type:
@@ -179,20 +300,775 @@ class Card:
         return f"Card(id={self.id}, name='{self.name}', energy_type='{self.energy_type}', set_code='{self.set_code}', card_number_str='{self.card_number_str}')"  # Use card_number_str
 
 
+class CardIndex:
+    """Inverted index over card attributes for a CardCollection.
+
+    Each posting is an integer bitset where bit N marks the card at position N
+    in ``CardCollection.cards``. Combining filters is a handful of C-level
+    AND/OR operations, and only the matching positions are ever visited.
+    """
+
+    # Tags matched as substrings of card_type (stage keywords from the deck builder search)
+    STAGE_TAGS = ("Basic", "Stage 1", "Stage 2", "Ultra Beast", "Item", "Supporter", "Tool")
+    FIELDS = (
+        "set_code", "set_name", "energy_type", "rarity", "category", "stage",
+        "trainer_subtype", "is_ex", "number", "card_type", "name",
+    )
+    # Fields keyed by (set_code, number) that identify a single card; stored as
+    # set_code -> number -> position rather than one catalog-wide bitset per card
+    UNIQUE_FIELDS = frozenset(("number",))
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[Any, int]] = {field: {} for field in self.FIELDS}
+        self._all = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def all_mask(self) -> int:
+        return self._all
+
+    def _keys(self, card: Card):
+        card_type = card.card_type or ""
+        yield "set_code", card.set_code
+        yield "set_name", card.set_name
+        yield "energy_type", card.energy_type
+        yield "rarity", card.rarity
+        yield "is_ex", card.is_ex
+        yield "number", (card.set_code, card.card_number_str)
+        yield "card_type", card_type
+        yield "name", card.name.lower() if card.name else ""
+        if "Pokémon" in card_type:
+            yield "category", "Pokémon"
+        if "Trainer" in card_type:
+            yield "category", "Trainer"
+        for tag in self.STAGE_TAGS:
+            if tag in card_type:
+                yield "stage", tag
+        if card.trainer_subtype:
+            yield "trainer_subtype", card.trainer_subtype
+
+    def add(self, position: int, card: Card) -> None:
+        bit = 1 << position
+        self._all |= bit
+        self._size += 1
+        for field, value in self._keys(card):
+            postings = self._postings[field]
+            if field in self.UNIQUE_FIELDS:
+                group, key = value
+                postings.setdefault(group, {}).setdefault(key, position)
+            else:
+                postings[value] = postings.get(value, 0) | bit
+
+    def remove(self, position: int, card: Card) -> None:
+        """Clear ``card`` (previously added at ``position``) from every posting."""
+        bit = 1 << position
+        self._all &= ~bit
+        self._size -= 1
+        for field, value in self._keys(card):
+            postings = self._postings[field]
+            if field in self.UNIQUE_FIELDS:
+                group, key = value
+                positions = postings.get(group)
+                if positions and positions.get(key) == position:
+                    del positions[key]
+                    if not positions:
+                        del postings[group]
+            else:
+                bits = postings.get(value, 0) & ~bit
+                if bits:
+                    postings[value] = bits
+                else:
+                    postings.pop(value, None)
+
+    def copy(self) -> "CardIndex":
+        clone = CardIndex()
+        for field, postings in self._postings.items():
+            if field in self.UNIQUE_FIELDS:
+                clone._postings[field] = {group: dict(positions) for group, positions in postings.items()}
+            else:
+                clone._postings[field] = dict(postings)
+        clone._all = self._all
+        clone._size = self._size
+        return clone
+
+    def _posting(self, field: str, value: Any) -> int:
+        if field in self.UNIQUE_FIELDS:
+            group, key = value
+            position = self._postings[field].get(group, {}).get(key)
+            return 0 if position is None else 1 << position
+        return self._postings[field].get(value, 0)
+
+    def mask(self, field: str, values: Any) -> int:
+        """Bitset of cards whose ``field`` equals any of ``values``.
+
+        Tuples are single keys (see ``number``); pass a list or set to match several values.
+        """
+        if isinstance(values, (list, set, frozenset)):
+            result = 0
+            for value in values:
+                result |= self._posting(field, value)
+            return result
+        return self._posting(field, values)
+
+    def mask_containing(self, field: str, text: str, case_sensitive: bool = True) -> int:
+        """Bitset of cards whose ``field`` contains ``text``.
+
+        Scans the distinct values of the field (a few dozen card types, a few
+        hundred names) instead of every card.
+        """
+        if not case_sensitive:
+            text = text.lower()
+        result = 0
+        for value, bits in self._bitsets(field):
+            haystack = value if case_sensitive else value.lower()
+            if text in haystack:
+                result |= bits
+        return result
+
+    def _bitsets(self, field: str):
+        if field in self.UNIQUE_FIELDS:
+            return (
+                ((group, key), 1 << position)
+                for group, positions in self._postings[field].items()
+                for key, position in positions.items()
+            )
+        return self._postings[field].items()
+
+    def values_within(self, field: str, mask: int) -> List[Any]:
+        """Distinct values of ``field`` among the cards in ``mask``."""
+        return [value for value, bits in self._bitsets(field) if bits & mask]
+
+    def counts(self, field: str) -> Dict[Any, int]:
+        """Number of cards per value of ``field``."""
+        return {value: bits.bit_count() for value, bits in self._bitsets(field) if bits}
+
+    @staticmethod
+    def positions(mask: int):
+        """Yield set bit positions in ascending order."""
+        while mask:
+            low = mask & -mask
+            yield low.bit_length() - 1
+            mask ^= low
+
+
+class CardSearchIndex:
+    """Typo-tolerant text search over card names, attack names and ability names.
+
+    Every distinct normalized string is indexed once and maps to the bitset
+    of cards using it, per field. Substring matches come from intersecting a
+    trigram table over those strings; words within one or two edits of a
+    query term (found through the deletion neighbourhoods of the vocabulary)
+    match as typos with a lower score.
+    """
+
+    FIELDS = ("name", "attack", "ability")
+    FIELD_WEIGHTS = {"name": 3.0, "attack": 1.0, "ability": 1.0}
+    # Match quality per term, before the field weight
+    EXACT, PREFIX, WORD_PREFIX, SUBSTRING, TYPO = 1.0, 0.9, 0.8, 0.6, 0.5
+    TERM_CACHE_SIZE = 4096
+
+    def __init__(self, cards: List[Card]):
+        self._cards = cards
+        self._values: List[str] = []
+        self._value_ids: Dict[str, int] = {}
+        self._bits: Dict[str, Dict[int, int]] = {field: {} for field in self.FIELDS}
+        self._grams: Dict[str, Set[int]] = {}
+        self._word_values: Dict[str, Set[int]] = {}
+        self._deletes: Dict[str, Set[str]] = {}
+        self._initials: Dict[str, Set[int]] = {}
+        self._field_value_ids: Dict[Tuple[str, ...], Set[int]] = {}
+        self._term_cache: Dict[Tuple[Any, ...], List[Tuple[float, int]]] = {}
+        self._all = 0
+        for position, card in enumerate(cards):
+            self._add(position, card)
+        # Tie-break order for equal scores: shorter names, newer sets, lower ids
+        self._order = sorted(
+            range(len(cards)),
+            key=lambda position: (
+                len(cards[position].name or ""),
+                -(cards[position].set_release_order or 0),
+                cards[position].id or 0,
+            ),
+        )
+        self._rank = [0] * len(cards)
+        for rank, position in enumerate(self._order):
+            self._rank[position] = rank
+
+    def __len__(self) -> int:
+        return len(self._cards)
+
+    @staticmethod
+    def _texts(card: Card):
+        yield "name", card.name
+        for attack in card.attacks or ():
+            if isinstance(attack, dict) and attack.get("name"):
+                yield "attack", attack["name"]
+        for ability in card.abilities or ():
+            if isinstance(ability, dict) and ability.get("name"):
+                yield "ability", ability["name"]
+
+    def _add(self, position: int, card: Card) -> None:
+        bit = 1 << position
+        self._all |= bit
+        for field, text in self._texts(card):
+            value = normalize_search_text(text)
+            if not value:
+                continue
+            value_id = self._value_ids.get(value)
+            if value_id is None:
+                value_id = self._value_ids[value] = len(self._values)
+                self._values.append(value)
+                self._index_value(value_id, value)
+            postings = self._bits[field]
+            postings[value_id] = postings.get(value_id, 0) | bit
+
+    def _index_value(self, value_id: int, value: str) -> None:
+        # Every 1- to 3-character substring, so terms of any length have candidates
+        for size in (1, 2, 3):
+            for start in range(len(value) - size + 1):
+                self._grams.setdefault(value[start:start + size], set()).add(value_id)
+        for word in value.split():
+            self._initials.setdefault(word[0], set()).add(value_id)
+            if word not in self._word_values:
+                self._word_values[word] = set()
+                # Deep enough for any term allowed to reach this word (see _max_edits)
+                depth = 2 if len(word) >= 6 else 1 if len(word) >= 3 else 0
+                for variant in self._deletions(word, depth):
+                    self._deletes.setdefault(variant, set()).add(word)
+            self._word_values[word].add(value_id)
+
+    @staticmethod
+    def _deletions(word: str, depth: int) -> Set[str]:
+        """``word`` and every string reachable from it by up to ``depth`` deletions."""
+        variants = {word}
+        frontier = {word}
+        for _ in range(depth):
+            frontier = {variant[:i] + variant[i + 1:] for variant in frontier for i in range(len(variant))}
+            variants |= frontier
+        return variants
+
+    @staticmethod
+    def _max_edits(term: str) -> int:
+        if len(term) >= 8:
+            return 2
+        return 1 if len(term) >= 4 else 0
+
+    @staticmethod
+    def _edit_distance(a: str, b: str, limit: int) -> int:
+        """Optimal string alignment distance, or ``limit + 1`` once it is exceeded."""
+        if abs(len(a) - len(b)) > limit:
+            return limit + 1
+        before = None
+        previous = list(range(len(b) + 1))
+        for i, char_a in enumerate(a, 1):
+            current = [i] + [0] * len(b)
+            row_min = i
+            for j, char_b in enumerate(b, 1):
+                value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b))
+                if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                    value = min(value, before[j - 2] + 1)
+                current[j] = value
+                if value < row_min:
+                    row_min = value
+            if row_min > limit:
+                return limit + 1
+            before, previous = previous, current
+        return previous[-1]
+
+    def _substring_candidates(self, term: str) -> Set[int]:
+        if len(term) <= 3:
+            return self._grams.get(term, set())
+        grams = sorted(
+            (self._grams.get(term[start:start + 3], set()) for start in range(len(term) - 2)),
+            key=len,
+        )
+        return set.intersection(*grams)
+
+    def _typo_words(self, term: str) -> Dict[str, int]:
+        """Vocabulary words within the allowed edit distance of ``term``."""
+        limit = self._max_edits(term)
+        if not limit or " " in term:
+            return {}
+        # Strings within k edits share a string reachable by k deletions from each
+        candidates: Set[str] = set()
+        for variant in self._deletions(term, limit):
+            candidates.update(self._deletes.get(variant, ()))
+        matches = {}
+        for word in candidates:
+            if word != term and abs(len(word) - len(term)) <= limit:
+                edits = self._edit_distance(term, word, limit)
+                if edits <= limit:
+                    matches[word] = edits
+        return matches
+
+    def _field_values(self, fields) -> Set[int]:
+        """Ids of the strings used by any of ``fields``."""
+        field_values = self._field_value_ids.get(fields)
+        if field_values is None:
+            field_values = self._field_value_ids[fields] = set().union(*(self._bits[field] for field in fields))
+        return field_values
+
+    def _term_matches(self, term: str, fields, fuzzy: bool, prefix_only: bool = False) -> List[Tuple[float, int]]:
+        """(quality, value id) pairs for one normalized term within ``fields``, best first."""
+        key = (term, fields, fuzzy, prefix_only)
+        cached = self._term_cache.get(key)
+        if cached is not None:
+            return cached
+
+        qualities: Dict[int, float] = {}
+        candidates = self._initials.get(term, set()) if prefix_only else self._substring_candidates(term)
+        for value_id in candidates & self._field_values(fields):
+            value = self._values[value_id]
+            if value == term:
+                qualities[value_id] = self.EXACT
+            elif value.startswith(term):
+                qualities[value_id] = self.PREFIX
+            elif f" {term}" in value:
+                qualities[value_id] = self.WORD_PREFIX
+            elif term in value and not prefix_only:
+                qualities[value_id] = self.SUBSTRING
+        if fuzzy:
+            for word, edits in self._typo_words(term).items():
+                quality = self.TYPO - 0.1 * (edits - 1)
+                for value_id in self._word_values[word] & self._field_values(fields):
+                    if qualities.get(value_id, 0) < quality:
+                        qualities[value_id] = quality
+
+        matches = sorted(((quality, value_id) for value_id, quality in qualities.items()), reverse=True)
+        if len(self._term_cache) >= self.TERM_CACHE_SIZE:
+            self._term_cache.clear()
+        self._term_cache[key] = matches
+        return matches
+
+    def _term_tiers(self, term: str, fields, fuzzy: bool, prefix_only: bool = False) -> List[Tuple[float, int]]:
+        """Disjoint (score, card bitset) tiers for one term, best first.
+
+        Each card is only in the tier of its best match across ``fields``.
+        """
+        by_score: Dict[float, int] = {}
+        for quality, value_id in self._term_matches(term, tuple(fields), fuzzy, prefix_only):
+            for field in fields:
+                bits = self._bits[field].get(value_id)
+                if bits:
+                    score = round(quality * self.FIELD_WEIGHTS[field], 6)
+                    by_score[score] = by_score.get(score, 0) | bits
+        tiers = []
+        seen = 0
+        for score in sorted(by_score, reverse=True):
+            bits = by_score[score] & ~seen
+            if bits:
+                tiers.append((score, bits))
+                seen |= bits
+        return tiers
+
+    def match_mask(self, text: str, fields=("name",), fuzzy: bool = False, within: Optional[int] = None) -> int:
+        """Bitset of cards where every term of ``text`` matches one of ``fields``."""
+        mask = self._all if within is None else within & self._all
+        for term in normalize_search_text(text).split():
+            term_mask = 0
+            for _, bits in self._term_tiers(term, fields, fuzzy):
+                term_mask |= bits
+            mask &= term_mask
+            if not mask:
+                break
+        return mask
+
+    def search(
+        self,
+        text: str,
+        limit: int = 20,
+        fields=FIELDS,
+        fuzzy: bool = True,
+        within: Optional[int] = None,
+    ) -> List[Tuple[int, float]]:
+        """Top ``limit`` (position, score) pairs for ``text``, most relevant first.
+
+        A card must match every term; its score sums each term's best match.
+        Single-character terms only match at the start of a word. Ties prefer
+        shorter names, newer sets and then lower ids.
+
+        Cards are grouped into disjoint tiers of equal score as bitsets, so
+        only the positions on the returned page are ever visited.
+        """
+        terms = normalize_search_text(text).split()
+        mask = self._all if within is None else within & self._all
+        if not terms or not mask or limit <= 0:
+            return []
+
+        combined = [(0.0, mask)]
+        for term in terms:
+            tiers = self._term_tiers(term, fields, fuzzy, prefix_only=len(term) == 1)
+            by_score: Dict[float, int] = {}
+            for base_score, base_bits in combined:
+                for score, bits in tiers:
+                    hit = base_bits & bits
+                    if hit:
+                        total = round(base_score + score, 6)
+                        by_score[total] = by_score.get(total, 0) | hit
+            if not by_score:
+                return []
+            combined = sorted(by_score.items(), reverse=True)
+
+        results: List[Tuple[int, float]] = []
+        for score, bits in combined:
+            need = limit - len(results)
+            if need <= 0:
+                break
+            results.extend((position, score) for position in self._best_positions(bits, need))
+        return results
+
+    def _best_positions(self, bits: int, count: int) -> List[int]:
+        """The ``count`` positions in ``bits`` that come first in tie-break order."""
+        if bits.bit_count() <= 4 * count:
+            return sorted(CardIndex.positions(bits), key=self._rank.__getitem__)[:count]
+        found = []
+        for position in self._order:
+            if bits >> position & 1:
+                found.append(position)
+                if len(found) == count:
+                    break
+        return found
+
+
 class CardCollection:
+    # Snapshot layout: magic, format, marker length, marker, sha256(payload), payload
+    SNAPSHOT_MAGIC = b"PVPCARDS"
+    SNAPSHOT_FORMAT = 1
+    _SNAPSHOT_HEADER = struct.Struct(">8sHH")
+
     def __init__(self):
         self.cards: List[Card] = []
         self.cards_by_id: Dict[int, Card] = {}
         self.cards_by_name: Dict[str, List[Card]] = {}
+        self._index = CardIndex()
+        self._search_index: Optional[CardSearchIndex] = None
+        self._set_metadata: Optional[List[Dict[str, Any]]] = None
+        self._sort_orders: Optional[Dict[str, Tuple[List[int], List[int]]]] = None
+        self._positions: Optional[Dict[int, int]] = None
+        self._frozen = False
+        self._version: Optional[str] = None
+        self.catalog_marker: Optional[str] = None
+        # Set document id -> (set_name, release_order, card_count, updated_at) at load time
+        self.set_fingerprints: Dict[str, Tuple[Any, ...]] = {}
+
+    @property
+    def is_frozen(self) -> bool:
+        return getattr(self, "_frozen", False)
+
+    def freeze(self) -> None:
+        """Mark the collection read-only so it can be shared between requests."""
+        self._frozen = True
+
+    def _check_mutable(self) -> None:
+        if self.is_frozen:
+            raise RuntimeError("CardCollection is frozen; build a new collection instead")
+
+    @property
+    def version(self) -> str:
+        """Content hash of the catalog, stable across processes.
+
+        Identical card data always yields the same version, so it can key
+        derived caches (rendered JSON, response validators) shared between
+        instances.
+        """
+        version = getattr(self, "_version", None)
+        if version is None:
+            version = self._version = self._compute_version()
+        return version
+
+    def _compute_version(self) -> str:
+        digest = hashlib.sha256()
+        for card in self.cards:
+            digest.update(json.dumps(card.to_dict(), sort_keys=True, default=str).encode("utf-8"))
+            digest.update(b"\n")
+        return digest.hexdigest()[:16]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Rebuilt on first use, cheaper than pickling its trigram tables
+        state.pop("_search_index", None)
+        # Sort orders depend on the caller's key functions, which may change between deploys
+        state.pop("_sort_orders", None)
+        state.pop("_positions", None)
+        state.pop("_size_estimate", None)
+        return state
+
+    def __sizeof__(self) -> int:
+        """Approximate bytes held by the cards and lookup maps.
+
+        Walks the cards without serializing them; memoized once the
+        collection is frozen, so sizing a shared catalog is paid once.
+        """
+        size = getattr(self, "_size_estimate", None)
+        if size is not None and self.is_frozen:
+            return size
+        size = object.__sizeof__(self) + sum(
+            sys.getsizeof(mapping) for mapping in (self.cards, self.cards_by_id, self.cards_by_name)
+        )
+        for card in self.cards:
+            size += sys.getsizeof(card) + sum(_value_size(getattr(card, slot, None)) for slot in Card.__slots__)
+        if self.is_frozen:
+            self._size_estimate = size
+        return size
+
+    @property
+    def search_index(self) -> CardSearchIndex:
+        """Text search index over ``cards``, built on first use."""
+        search_index = getattr(self, "_search_index", None)
+        if search_index is None or len(search_index) != len(self.cards):
+            search_index = self._search_index = CardSearchIndex(self.cards)
+        return search_index
+
+    def sort_order(self, name: str, key, reverse: bool = False) -> Tuple[List[int], List[int]]:
+        """All positions stably sorted by ``key``, plus each position's rank in that order.
+
+        Memoized per collection under ``name``, which must identify the key
+        function and direction. Because the sort is stable, filtering this
+        order gives the same result as sorting the filtered cards.
+        """
+        sort_orders = getattr(self, "_sort_orders", None)
+        if sort_orders is None:
+            sort_orders = self._sort_orders = {}
+        materialized = sort_orders.get(name)
+        if materialized is None:
+            cards = self.cards
+            order = sorted(range(len(cards)), key=lambda position: key(cards[position]), reverse=reverse)
+            rank = [0] * len(order)
+            for position_rank, position in enumerate(order):
+                rank[position] = position_rank
+            materialized = sort_orders[name] = (order, rank)
+        return materialized
+
+    def select_sorted(self, mask: int, sort_order: Tuple[List[int], List[int]], start: int, stop: int) -> List[Card]:
+        """Cards ``start:stop`` of the cards in ``mask`` arranged by ``sort_order``.
+
+        Only the requested page is selected: the presorted order is walked
+        until the page fills when matches are dense, and only the matching
+        positions are ranked when they are sparse.
+        """
+        order, rank = sort_order
+        cards = self.cards
+        count = mask.bit_count()
+        # Same bounds as slicing the full sorted list
+        start, stop, _ = slice(start, stop).indices(count)
+        if start >= stop:
+            return []
+        if mask == self.index.all_mask:
+            return [cards[position] for position in order[start:stop]]
+        if stop * len(order) < count * count:
+            selected = []
+            for position in order:
+                if mask >> position & 1:
+                    selected.append(position)
+                    if len(selected) == stop:
+                        break
+        else:
+            selected = heapq.nsmallest(stop, CardIndex.positions(mask), key=rank.__getitem__)
+        return [cards[position] for position in selected[start:]]
+
+    def select_after(self, mask: int, sort_order: Optional[Tuple[List[int], List[int]]],
+                     after: Optional[int], count: int) -> List[Card]:
+        """Up to ``count`` cards of ``mask`` that come after position ``after`` in ``sort_order``.
+
+        The keyset counterpart of ``select_sorted``: ``after`` is the position
+        of the last card already served (None for the first page) and a
+        ``sort_order`` of None means collection order. The work depends on
+        the page size and filter density, not on how deep the page is.
+        """
+        cards = self.cards
+        if count <= 0:
+            return []
+        if sort_order is None:
+            if after is not None:
+                mask &= -1 << (after + 1)
+            return [cards[position] for position in itertools.islice(CardIndex.positions(mask), count)]
+
+        order, rank = sort_order
+        start = 0 if after is None else rank[after] + 1
+        if mask == self.index.all_mask:
+            return [cards[position] for position in order[start:start + count]]
+        matches = mask.bit_count()
+        if count * len(order) < matches * matches:
+            selected = []
+            for order_index in range(start, len(order)):
+                position = order[order_index]
+                if mask >> position & 1:
+                    selected.append(position)
+                    if len(selected) == count:
+                        break
+        else:
+            later = (position for position in CardIndex.positions(mask) if rank[position] >= start)
+            selected = heapq.nsmallest(count, later, key=rank.__getitem__)
+        return [cards[position] for position in selected]
+
+    def position_of(self, card_id: int) -> Optional[int]:
+        """Current position of the card with ``card_id`` in ``cards``, or None."""
+        positions = getattr(self, "_positions", None)
+        if positions is None:
+            positions = self._positions = {card.id: position for position, card in enumerate(self.cards)}
+        return positions.get(card_id)
+
+    def set_metadata(self) -> List[Dict[str, Any]]:
+        """Name, code, release order and card count per set, newest first.
+
+        Sets come from the set documents seen at load time plus any set the
+        cards belong to. Computed once per collection; treat it as read-only.
+        """
+        metadata = getattr(self, "_set_metadata", None)
+        if metadata is not None:
+            return metadata
+
+        index = self.index
+        sets: Dict[str, Dict[str, Any]] = {}
+        for set_name, release_order, *_ in getattr(self, "set_fingerprints", {}).values():
+            if set_name:
+                sets[set_name] = {"name": set_name, "code": "", "release_order": release_order or 0, "card_count": 0}
+        for set_name, card_count in index.counts("set_name").items():
+            if not set_name:
+                continue
+            entry = sets.setdefault(set_name, {"name": set_name, "code": "", "release_order": 0, "card_count": 0})
+            entry["card_count"] = card_count
+            set_mask = index.mask("set_name", set_name)
+            entry["code"] = next((code for code in index.values_within("set_code", set_mask) if code), "")
+            if not entry["release_order"]:
+                first_card = self.cards[next(CardIndex.positions(set_mask))]
+                entry["release_order"] = first_card.set_release_order or 0
+
+        by_name = sorted(sets.values(), key=lambda entry: entry["name"])
+        metadata = self._set_metadata = sorted(by_name, key=lambda entry: entry["release_order"], reverse=True)
+        return metadata
+
+    def search(self, text: str, limit: int = 20, **options) -> List[Tuple[Card, float]]:
+        """Cards ranked by relevance to ``text`` (see ``CardSearchIndex.search``)."""
+        cards = self.cards
+        return [(cards[position], score) for position, score in self.search_index.search(text, limit, **options)]
+
+    @property
+    def index(self) -> CardIndex:
+        """Attribute index over ``cards``, rebuilt if it is missing or stale."""
+        index = getattr(self, "_index", None)
+        if index is None or len(index) != len(self.cards):
+            index = CardIndex()
+            for position, card in enumerate(self.cards):
+                index.add(position, card)
+            self._index = index
+        return index
+
+    def cards_for_mask(self, mask: int) -> List[Card]:
+        """Cards selected by an index bitset, in collection order."""
+        cards = self.cards
+        return [cards[position] for position in CardIndex.positions(mask)]
+
+    def query_mask(self, **criteria) -> int:
+        """Bitset of cards matching every criterion.
+
+        Keys are ``CardIndex.FIELDS``; a list or set value matches any of its items.
+        """
+        index = self.index
+        mask = index.all_mask
+        for field, values in criteria.items():
+            mask &= index.mask(field, values)
+            if not mask:
+                break
+        return mask
+
+    def query(self, **criteria) -> List[Card]:
+        """Cards matching every criterion, in collection order."""
+        return self.cards_for_mask(self.query_mask(**criteria))
 
     def add_card(self, card: Card) -> None:
+        self._check_mutable()
+        index = self.index
+        self._version = None
+        self._search_index = None
+        self._set_metadata = None
+        self._sort_orders = None
+        self._positions = None
         self.cards.append(card)
+        index.add(len(self.cards) - 1, card)
         if card.id is not None:
             self.cards_by_id[card.id] = card
         if card.name not in self.cards_by_name:
             self.cards_by_name[card.name] = []
         self.cards_by_name[card.name].append(card)
 
+    def copy(self) -> "CardCollection":
+        """Mutable copy sharing the Card objects, for patching a frozen collection."""
+        clone = CardCollection()
+        clone.cards = list(self.cards)
+        clone.cards_by_id = dict(self.cards_by_id)
+        clone.cards_by_name = {name: list(cards) for name, cards in self.cards_by_name.items()}
+        clone._index = self.index.copy()
+        clone._version = getattr(self, "_version", None)
+        clone.catalog_marker = getattr(self, "catalog_marker", None)
+        clone.set_fingerprints = dict(getattr(self, "set_fingerprints", {}))
+        return clone
+
+    def replace_set_cards(self, set_name: str, cards: List[Card]) -> List[int]:
+        """Make ``cards`` the contents of ``set_name``, patching the index in place.
+
+        Cards are matched by id: changed cards are swapped in at their current
+        position, unchanged ones are kept, new ones are appended and missing
+        ones removed. Returns the ids of every card added, changed or removed.
+        """
+        self._check_mutable()
+        index = self.index
+        incoming = {card.id: card for card in cards}
+        touched: List[int] = []
+        removed_positions = []
+
+        for position in CardIndex.positions(index.mask("set_name", set_name)):
+            old = self.cards[position]
+            new = incoming.pop(old.id, None)
+            if new is None:
+                removed_positions.append(position)
+            elif new.to_dict() != old.to_dict():
+                index.remove(position, old)
+                index.add(position, new)
+                self.cards[position] = new
+                self._unlink_card(old)
+                self._link_card(new)
+            else:
+                continue
+            touched.append(old.id)
+
+        if removed_positions:
+            for position in reversed(removed_positions):
+                self._unlink_card(self.cards.pop(position))
+            # Positions shifted, so the bitsets are rebuilt
+            self._index = None
+            index = self.index
+
+        for card in incoming.values():
+            self.cards.append(card)
+            index.add(len(self.cards) - 1, card)
+            self._link_card(card)
+            touched.append(card.id)
+
+        if touched:
+            self._version = None
+            self._search_index = None
+            self._set_metadata = None
+            self._sort_orders = None
+            self._positions = None
+        return touched
+
+    def _link_card(self, card: Card) -> None:
+        if card.id is not None:
+            self.cards_by_id[card.id] = card
+        self.cards_by_name.setdefault(card.name, []).append(card)
+
+    def _unlink_card(self, card: Card) -> None:
+        if self.cards_by_id.get(card.id) is card:
+            del self.cards_by_id[card.id]
+        same_name = self.cards_by_name.get(card.name, [])
+        self.cards_by_name[card.name] = [other for other in same_name if other is not card]
+        if not self.cards_by_name[card.name]:
+            del self.cards_by_name[card.name]
+
     def get_card_by_id(self, card_id: int) -> Optional[Card]:
         return self.cards_by_id.get(card_id)
 
@@ -202,17 +1078,32 @@ class CardCollection:
     def get_card(
         self, set_code: str, card_number_str_to_find: str
     ) -> Optional[Card]:  # Parameter renamed for clarity
-        for card in self.cards:
-            if (
-                card.set_code == set_code
-                and card.card_number_str == card_number_str_to_find
-            ):  # Compare with card.card_number_str
-                return card
-        return None
+        mask = self.index.mask("number", (set_code, card_number_str_to_find))
+        if not mask:
+            return None
+        return self.cards[next(CardIndex.positions(mask))]
+
+    # Card attributes that can be answered from the index with plain equality
+    _INDEXED_FILTER_FIELDS = ("set_code", "set_name", "energy_type", "rarity", "trainer_subtype")
 
     def filter(self, **kwargs) -> List[Card]:
+        candidates = self.cards
+        indexed = {}
+        for key in self._INDEXED_FILTER_FIELDS:
+            if key in kwargs and kwargs[key] is not None:
+                try:
+                    hash(kwargs[key])
+                except TypeError:
+                    continue
+                indexed[key] = kwargs.pop(key)
+        if indexed:
+            mask = self.index.all_mask
+            for key, value in indexed.items():
+                mask &= self.index.mask(key, [value])
+            candidates = self.cards_for_mask(mask)
+
         result = []
-        for card in self.cards:
+        for card in candidates:
             match = True
             for key, value in kwargs.items():
                 if key == "name" and isinstance(value, str):
@@ -229,17 +1120,148 @@ class CardCollection:
                 result.append(card)
         return result
 
+    @staticmethod
+    def fingerprints_for_set_docs(set_docs) -> Dict[str, Tuple[Any, ...]]:
+        """Per-set fingerprint: set name, release order, card count and ``updated_at``.
+
+        The scraper bumps ``updated_at`` on every card write, so a set whose
+        fingerprint is unchanged does not need its ``set_cards`` re-read.
+        """
+        fingerprints = {}
+        for doc in set_docs:
+            data = doc.to_dict() or {}
+            updated_at = data.get("updated_at")
+            fingerprints[doc.id] = (
+                data.get("set_name"),
+                data.get("release_order"),
+                data.get("card_count"),
+                None if updated_at is None else str(updated_at),
+            )
+        return fingerprints
+
+    @staticmethod
+    def marker_for_fingerprints(fingerprints: Dict[str, Tuple[Any, ...]]) -> str:
+        """Cheap catalog version marker built from the set fingerprints.
+
+        Combines the highest ``release_order``, the summed ``card_count`` and a
+        digest of every fingerprint, so adding a set or re-scraping one
+        changes it without reading any cards.
+        """
+        digest = hashlib.sha256()
+        max_release_order = 0
+        total_cards = 0
+        for doc_id in sorted(fingerprints):
+            _, release_order, card_count, updated_at = fingerprints[doc_id]
+            max_release_order = max(max_release_order, release_order or 0)
+            total_cards += card_count or 0
+            digest.update(f"{doc_id}|{release_order}|{card_count}|{updated_at}\n".encode("utf-8"))
+        return f"{max_release_order}:{total_cards}:{digest.hexdigest()[:16]}"
+
+    @staticmethod
+    def marker_for_set_docs(set_docs) -> str:
+        return CardCollection.marker_for_fingerprints(CardCollection.fingerprints_for_set_docs(set_docs))
+
+    @staticmethod
+    def fetch_catalog_marker(db_client) -> Optional[str]:
+        """Read the current catalog marker (one read per set document)."""
+        try:
+            set_docs = list(db_client.collection("cards").stream())
+        except Exception:
+            return None
+        if not set_docs:
+            return None
+        return CardCollection.marker_for_set_docs(set_docs)
+
+    def save_snapshot(self, path: str, marker: Optional[str] = None) -> bool:
+        """Write the collection to ``path`` as a versioned binary snapshot.
+
+        The file is written to a temporary name and atomically renamed, so a
+        concurrent reader sees either the old snapshot or the new one.
+        """
+        marker = marker or getattr(self, "catalog_marker", None)
+        if not marker or not self.cards:
+            return False
+        # Compute the version before pickling so loads skip the hash
+        self.version
+        payload = pickle.dumps(self, protocol=pickle.HIGHEST_PROTOCOL)
+        marker_bytes = marker.encode("utf-8")
+        header = self._SNAPSHOT_HEADER.pack(self.SNAPSHOT_MAGIC, self.SNAPSHOT_FORMAT, len(marker_bytes))
+        directory = os.path.dirname(os.path.abspath(path))
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".cards-", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(header)
+                    f.write(marker_bytes)
+                    f.write(hashlib.sha256(payload).digest())
+                    f.write(payload)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError:
+            return False
+        return True
+
+    @classmethod
+    def load_snapshot(cls, path: str, marker: Optional[str] = None) -> Optional["CardCollection"]:
+        """Load a snapshot written by ``save_snapshot``.
+
+        Returns None if the file is missing, corrupt, from another format
+        version, or (when ``marker`` is given) built from a different catalog.
+        """
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        header_size = cls._SNAPSHOT_HEADER.size
+        if len(data) < header_size:
+            return None
+        magic, snapshot_format, marker_length = cls._SNAPSHOT_HEADER.unpack_from(data)
+        if magic != cls.SNAPSHOT_MAGIC or snapshot_format != cls.SNAPSHOT_FORMAT:
+            return None
+        payload_start = header_size + marker_length + 32
+        snapshot_marker = data[header_size:header_size + marker_length].decode("utf-8", "replace")
+        if marker is not None and snapshot_marker != marker:
+            return None
+        payload = memoryview(data)[payload_start:]
+        if hashlib.sha256(payload).digest() != data[payload_start - 32:payload_start]:
+            return None
+        try:
+            collection = pickle.loads(payload)
+        except Exception:
+            return None
+        if not isinstance(collection, cls):
+            return None
+        collection.catalog_marker = snapshot_marker
+        return collection
+
     def load_from_firestore(self, db_client, max_cards: int = None) -> None:
         """Load cards from Firestore with optimized batch queries.
         
+        The catalog version is computed once the cards are loaded, so it is
+        carried along when the collection is cached or pickled.
+        
         Args:
             db_client: Firestore client
             max_cards: Optional limit on number of cards to load (for partial loading)
         """
+        self._load_cards_from_firestore(db_client, max_cards)
+        self._version = self._compute_version()
+
+    def _load_cards_from_firestore(self, db_client, max_cards: int = None) -> None:
+        self._check_mutable()
         self.cards = []
         self.cards_by_id = {}
         self.cards_by_name = {}
+        self._index = CardIndex()
+        self._version = None
+        self.catalog_marker = None
+        self.set_fingerprints = {}
         loaded_card_count = 0
+        set_fingerprints: Dict[str, Tuple[Any, ...]] = {}
         
         try:
             # First, build a mapping of set_name -> set_release_order
@@ -248,6 +1270,10 @@ class CardCollection:
             try:
                 sets_collection_ref = db_client.collection("cards")
                 set_docs = list(sets_collection_ref.stream())  # Load all set docs at once
+                set_fingerprints = CardCollection.fingerprints_for_set_docs(set_docs)
+                if not max_cards:
+                    self.set_fingerprints = set_fingerprints
+                    self.catalog_marker = CardCollection.marker_for_fingerprints(set_fingerprints)
                 
                 for doc in set_docs:
                     doc_data = doc.to_dict()
@@ -301,28 +1327,7 @@ class CardCollection:
                         set_name = card_data.get("set_name", "")
                         set_release_order = set_release_order_map.get(set_name)
 
-                        card = Card(
-                            id=int(card_pk_id),
-                            name=card_data.get("name", ""),
-                            energy_type=card_data.get("energy_type", ""),
-                            set_name=set_name,
-                            set_code=card_data.get("set_code", ""),
-                            card_number=card_data.get("card_number"),
-                            card_number_str=card_data.get("card_number_str", ""),
-                            card_type=card_data.get("card_type", ""),
-                            hp=card_data.get("hp"),
-                            attacks=card_data.get("attacks", []),
-                            weakness=card_data.get("weakness"),
-                            retreat_cost=card_data.get("retreat_cost"),
-                            illustrator=card_data.get("illustrator"),
-                            firebase_image_url=card_data.get("firebase_image_url"),
-                            rarity=card_data.get("rarity", ""),
-                            pack=card_data.get("pack", ""),
-                            original_image_url=card_data.get("original_image_url"),
-                            flavor_text=card_data.get("flavor_text"),
-                            abilities=card_data.get("abilities", []),
-                            set_release_order=set_release_order,
-                        )
+                        card = Card.from_firestore(card_data, set_release_order)
                         self.add_card(card)
                         loaded_card_count += 1
                         
@@ -333,6 +1338,10 @@ class CardCollection:
                         pass
                 
                 if loaded_card_count > 0:
+                    if max_cards and len(card_docs) < max_cards and set_fingerprints:
+                        # The limit wasn't reached, so this is the whole catalog
+                        self.set_fingerprints = set_fingerprints
+                        self.catalog_marker = CardCollection.marker_for_fingerprints(set_fingerprints)
                     if current_app and current_app.debug:
                         current_app.logger.debug(f"Successfully loaded {loaded_card_count} cards using collection group query")
                     return
@@ -360,27 +1369,7 @@ class CardCollection:
                         if card_pk_id is None:
                             continue
 
-                        card = Card(
-                            id=int(card_pk_id),
-                            name=doc_data.get("name", ""),
-                            energy_type=doc_data.get("energy_type", ""),
-                            set_name=doc_data.get("set_name", ""),
-                            set_code=doc_data.get("set_code", ""),
-                            card_number=doc_data.get("card_number"),
-                            card_number_str=doc_data.get("card_number_str", ""),
-                            card_type=doc_data.get("card_type", ""),
-                            hp=doc_data.get("hp"),
-                            attacks=doc_data.get("attacks", []),
-                            weakness=doc_data.get("weakness"),
-                            retreat_cost=doc_data.get("retreat_cost"),
-                            illustrator=doc_data.get("illustrator"),
-                            firebase_image_url=doc_data.get("firebase_image_url"),
-                            rarity=doc_data.get("rarity", ""),
-                            pack=doc_data.get("pack", ""),
-                            original_image_url=doc_data.get("original_image_url"),
-                            flavor_text=doc_data.get("flavor_text"),
-                            abilities=doc_data.get("abilities", []),
-                        )
+                        card = Card.from_firestore(doc_data)
                         self.add_card(card)
                         direct_cards_loaded += 1
                         loaded_card_count += 1
@@ -462,28 +1451,7 @@ class CardCollection:
                                 if card_pk_id is None:
                                     continue
 
-                                card = Card(
-                                    id=int(card_pk_id),
-                                    name=card_data.get("name", ""),
-                                    energy_type=card_data.get("energy_type", ""),
-                                    set_name=card_data.get("set_name", ""),
-                                    set_code=card_data.get("set_code", ""),
-                                    card_number=card_data.get("card_number"),
-                                    card_number_str=card_data.get("card_number_str", ""),
-                                    card_type=card_data.get("card_type", ""),
-                                    hp=card_data.get("hp"),
-                                    attacks=card_data.get("attacks", []),
-                                    weakness=card_data.get("weakness"),
-                                    retreat_cost=card_data.get("retreat_cost"),
-                                    illustrator=card_data.get("illustrator"),
-                                    firebase_image_url=card_data.get("firebase_image_url"),
-                                    rarity=card_data.get("rarity", ""),
-                                    pack=card_data.get("pack", ""),
-                                    original_image_url=card_data.get("original_image_url"),
-                                    flavor_text=card_data.get("flavor_text"),
-                                    abilities=card_data.get("abilities", []),
-                                    set_release_order=set_release_order,
-                                )
+                                card = Card.from_firestore(card_data, set_release_order)
                                 self.add_card(card)
                                 batch_loaded += 1
                                 loaded_card_count += 1
@@ -511,15 +1479,15 @@ class CardCollection:
                 pass
 
     def get_pokemon_cards(self) -> List[Card]:
-        return [card for card in self.cards if card.is_pokemon]
+        return self.query(category="Pokémon")
 
     def get_trainer_cards(self) -> List[Card]:
-        return [card for card in self.cards if card.is_trainer]
+        return self.query(category="Trainer")
 
     def get_cards_by_type(self, card_type: str) -> List[Card]:
-        return [
-            card for card in self.cards if card_type.lower() in card.card_type.lower()
-        ]
+        return self.cards_for_mask(
+            self.index.mask_containing("card_type", card_type, case_sensitive=False)
+        )
 
     def __len__(self) -> int:
         return len(self.cards)
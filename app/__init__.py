@@ -38,7 +38,7 @@ from .routes.collection import collection_bp
 from .routes.friends import friends_bp
 from .routes.internal import internal_bp
 from .routes.admin import admin_bp
-from Card import Card, CardCollection
+from Card import Card
 from Deck import Deck
 
 from flask_dance.consumer import oauth_authorized
@@ -52,7 +52,7 @@ from dotenv import (
 load_dotenv()
 
 def _load_cards_from_firestore_and_cache():
-    """Load card collection from Firestore and cache in Redis."""
+    """Load card collection (snapshot or Firestore) and cache in Redis."""
     # Only log in debug mode
     if current_app.debug:
         print("Attempting to load card collection from Firestore...", flush=True)
@@ -63,8 +63,9 @@ def _load_cards_from_firestore_and_cache():
         return None
 
     try:
-        card_collection = CardCollection()
-        card_collection.load_from_firestore(db_client)
+        from .services import CardService
+
+        card_collection = CardService.load_catalog(db_client)
         # Only log in debug mode
         if current_app.debug:
             print(
@@ -228,8 +229,14 @@ def create_app(config_name="default"):
                 )
             firebase_admin.initialize_app()
 
+    # Traced so every read/write is attributed to the endpoint and user making it
+    from .firestore_tracing import traced_client
     db_client = firestore.client()
-    app.config["FIRESTORE_DB"] = db_client
+    app.config["FIRESTORE_DB"] = traced_client(db_client)
+    
+    # Write-behind batching for high-frequency mutations (collection counts)
+    from .db_service import write_batcher
+    write_batcher.init_app(app)
     
     # Firestore client initialized
     login_manager.init_app(app)
@@ -348,6 +355,16 @@ def create_app(config_name="default"):
     
     task_queue.register_task_handler("load_card_collection", card_loading_handler)
     
+    from .task_queue import register_analytics_backfill
+    register_analytics_backfill(app)
+    
+    # Keep the sharded home page counters in line with the real collections.
+    # Not from the Werkzeug reloader parent, which never serves requests.
+    is_reloader_parent = app.debug and not os.environ.get("WERKZEUG_RUN_MAIN")
+    if not app.config.get("TESTING") and not is_reloader_parent and app.config.get("FIRESTORE_DB"):
+        from .task_queue import start_stats_reconciliation
+        start_stats_reconciliation(app, interval_minutes=int(os.environ.get("STATS_RECONCILE_MINUTES", "60")))
+    
     # Schedule the card loading task to run after startup (5 second delay)
     # Only run in main process, not in Flask reloader process
     # Skip card loading in reloader process, use appropriate loading strategy for environment
@@ -424,6 +441,9 @@ def create_app(config_name="default"):
 
     @app.context_processor
     def inject_user_profile_icon():
+        # Derived once per request; every render_template call runs context processors
+        if "_profile_context" in g:
+            return dict(g._profile_context)
         context_vars = {}
         
         if current_user.is_authenticated:
@@ -453,7 +473,8 @@ def create_app(config_name="default"):
             if config_name == 'development':
                 print(f"DEBUG PROFILE ICON (NO AUTH): default_url={default_url}")
         
-        return context_vars
+        g._profile_context = context_vars
+        return dict(context_vars)
 
     @app.template_filter('cdn_url')
     def cdn_url_filter(original_url):
@@ -500,6 +521,14 @@ def create_app(config_name="default"):
             from .monitoring import performance_monitor
             from .cache_manager import cache_manager
             
+            # Prometheus scrapers advertise OpenMetrics; serve them the text exposition
+            if (request.args.get("format") == "prometheus"
+                    or "application/openmetrics-text" in request.headers.get("Accept", "")):
+                from .prometheus import CONTENT_TYPE, cached_render_metrics
+                from .security import security_monitor
+                body = cached_render_metrics(performance_monitor.metrics, security_monitor)
+                return app.response_class(body, content_type=CONTENT_TYPE)
+            
             # Determine Firebase mode
             firebase_mode = "Unknown"
             if os.environ.get('FIRESTORE_EMULATOR_HOST'):
@@ -529,13 +558,10 @@ def create_app(config_name="default"):
     @app.route("/api/refresh-cards", methods=["POST"])
     @security_manager.require_refresh_key
     def refresh_cards_cache():
-        """Refresh card collection cache using Redis."""
+        """Refresh the card collection cache, re-reading only changed sets."""
         
         try:
-            # Invalidate existing cache
-            cache_manager.invalidate_card_cache()
-            
-            # Load fresh data from Firestore  
+            # The service patches the cached collection in place of invalidating it
             from .services import card_service
             success = card_service.refresh_card_collection()
             if success:
@@ -603,6 +629,27 @@ def create_app(config_name="default"):
 
     app.before_request(check_username_requirement)
 
+    @app.before_request
+    def start_request_timer():
+        g._request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request_latency(response):
+        started = g.pop("_request_started", None)
+        # Keyed by endpoint name rather than URL so histogram count stays bounded
+        if started is not None and request.endpoint and request.endpoint != "static":
+            from .monitoring import performance_monitor
+            from .firestore_tracing import request_usage
+            performance_monitor.metrics.record_request_time(
+                request.endpoint, (time.perf_counter() - started) * 1000
+            )
+            performance_monitor.metrics.record_request_firestore_usage(
+                request.endpoint,
+                current_user.get_id() if current_user.is_authenticated else None,
+                request_usage(),
+            )
+        return response
+
     @app.after_request
     def add_cache_control_headers(response):
         if 'user_id' in session:
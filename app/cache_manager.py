@@ -3,77 +3,435 @@ In-memory cache manager for improving performance.
 Provides thread-safe caching without external dependencies.
 """
 
+import copy
 import json
 import pickle
 import os
+import sys
+import time
+import weakref
+from collections import OrderedDict
 from typing import Any, Optional, Dict, List
-from datetime import datetime, timedelta
+from datetime import timedelta
 import threading
 from flask import current_app
 from Card import CardCollection
 
 
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class _CacheShard:
+    """One lock-protected segment of InMemoryCache.
+    
+    Entries are ``(value, expires_at, size, namespace)`` tuples with
+    ``expires_at`` on the ``time.monotonic()`` clock (None for no expiry).
+    Entries are replaced, never mutated, so readers can fetch them without
+    the lock.
+    """
+    
+    # Namespaces up to this size keep exact LRU order
+    EXACT_LRU_ENTRIES = 64
+    
+    __slots__ = (
+        "lock", "data", "lru", "newest", "tick", "max_bytes", "max_entries", "namespace_quotas",
+        "protected_namespaces", "total_bytes", "namespace_bytes", "namespace_entries",
+        "evictions", "expired",
+    )
+    
+    def __init__(self, max_bytes: int, max_entries: int, namespace_quotas: Dict[str, int],
+                 protected_namespaces: frozenset):
+        self.lock = threading.Lock()
+        self.data: Dict[Any, tuple] = {}
+        # Per-namespace LRU order (oldest first) of key -> last access tick
+        self.lru: Dict[str, OrderedDict] = {}
+        # Most recently touched key per namespace, readable without the lock
+        self.newest: Dict[str, Any] = {}
+        self.tick = 0
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.namespace_quotas = namespace_quotas
+        self.protected_namespaces = protected_namespaces
+        self.total_bytes = 0
+        self.namespace_bytes: Dict[str, int] = {}
+        self.namespace_entries: Dict[str, int] = {}
+        self.evictions: Dict[str, int] = {}
+        self.expired = 0
+    
+    def touch(self, key, namespace: str) -> None:
+        tick = self.tick = self.tick + 1
+        lru = self.lru.get(namespace)
+        if lru is None:
+            lru = self.lru[namespace] = OrderedDict()
+        lru[key] = tick
+        lru.move_to_end(key)
+        self.newest[namespace] = key
+    
+    def recently_touched(self, key, namespace: str) -> bool:
+        """Whether a recency update for ``key`` can be skipped.
+        
+        True if the key is already the newest in its namespace or, for
+        namespaces larger than ``EXACT_LRU_ENTRIES``, within the newest half.
+        Safe without the lock (single dict lookups, no iteration); used to
+        keep hot reads off the lock.
+        """
+        lru = self.lru.get(namespace)
+        if not lru:
+            return False
+        last = lru.get(key)
+        if last is None:
+            return False
+        if len(lru) > self.EXACT_LRU_ENTRIES:
+            return self.tick - last <= (len(lru) >> 1)
+        return self.newest.get(namespace) == key
+    
+    def remove(self, key, namespace: str) -> None:
+        """Drop an entry and its accounting. Caller holds the lock."""
+        entry = self.data.pop(key, None)
+        if entry is None:
+            return
+        self.lru[namespace].pop(key, None)
+        size = entry[2]
+        self.total_bytes -= size
+        self.namespace_bytes[namespace] -= size
+        self.namespace_entries[namespace] -= 1
+    
+    def insert(self, key, namespace: str, entry: tuple) -> None:
+        """Store an entry and enforce limits. Caller holds the lock."""
+        size = entry[2]
+        previous = self.data.get(key)
+        self.data[key] = entry
+        self.touch(key, namespace)
+        if previous is None:
+            self.namespace_entries[namespace] = self.namespace_entries.get(namespace, 0) + 1
+        else:
+            size -= previous[2]
+        self.total_bytes += size
+        self.namespace_bytes[namespace] = self.namespace_bytes.get(namespace, 0) + size
+        
+        quota = self.namespace_quotas.get(namespace)
+        if (quota is not None and self.namespace_bytes[namespace] > quota) or self.over_budget():
+            self.enforce_limits(key, namespace)
+    
+    def evict(self, key, namespace: str) -> None:
+        self.remove(key, namespace)
+        self.evictions[namespace] = self.evictions.get(namespace, 0) + 1
+    
+    def oldest(self, namespace: str, new_key):
+        """Least recently used key of a namespace other than ``new_key``, with its tick."""
+        for key, tick in self.lru.get(namespace, {}).items():
+            if key != new_key:
+                return key, tick
+        return None, None
+    
+    def over_budget(self) -> bool:
+        return self.total_bytes > self.max_bytes or len(self.data) > self.max_entries
+    
+    def enforce_limits(self, new_key, namespace: str) -> None:
+        quota = self.namespace_quotas.get(namespace)
+        while quota is not None and self.namespace_bytes.get(namespace, 0) > quota:
+            key, _ = self.oldest(namespace, new_key)
+            if key is None:
+                break
+            self.evict(key, namespace)
+        
+        if not self.over_budget():
+            return
+        
+        # Expired entries go first, then the least recently used entry among
+        # the namespaces this write may evict from
+        self.purge_expired(time.monotonic())
+        candidates = [
+            ns for ns in self.lru
+            if ns == namespace or ns not in self.protected_namespaces
+        ]
+        while self.over_budget():
+            victim, victim_namespace, victim_tick = None, None, None
+            for candidate in candidates:
+                key, tick = self.oldest(candidate, new_key)
+                if key is not None and (victim_tick is None or tick < victim_tick):
+                    victim, victim_namespace, victim_tick = key, candidate, tick
+            if victim is None:
+                break
+            self.evict(victim, victim_namespace)
+    
+    def purge_expired(self, now: float) -> int:
+        """Remove expired entries. Caller holds the lock."""
+        expired = [
+            key for key, (_, expires_at, _, _) in self.data.items()
+            if expires_at is not None and now > expires_at
+        ]
+        for key in expired:
+            self.remove(key, self.data[key][3])
+        self.expired += len(expired)
+        return len(expired)
+    
+    def clear(self) -> None:
+        self.data.clear()
+        self.lru.clear()
+        self.newest.clear()
+        self.total_bytes = 0
+        self.namespace_bytes.clear()
+        self.namespace_entries.clear()
+
+
 class InMemoryCache:
-    """Simple in-memory cache with TTL support."""
+    """In-memory cache with TTL support and bounded, size-aware LRU eviction.
+    
+    Keys are grouped into namespaces by their prefix before the first ":"
+    (``cards``, ``user``, ``user_decks``, ...). Bounds:
+    
+    - ``max_bytes`` / ``max_entries``: overall budget, enforced by evicting
+      least recently used entries.
+    - ``namespace_quotas``: per-namespace byte caps; a namespace over its
+      quota only evicts its own entries.
+    - ``protected_namespaces``: never evicted to make room for other
+      namespaces, so user data cannot push out the card collection.
+    
+    Keys are spread over independently locked shards, and every bound is
+    split evenly between them. Reads do not take a lock; they only record
+    LRU order when the shard lock is free. Expiry uses ``time.monotonic()``.
     
-    def __init__(self):
-        self._data = {}
-        self._expiry = {}
-        self._lock = threading.Lock()
+    Expired entries are removed on access and by a background sweeper.
+    Sizes are estimates (``sys.getsizeof``, summed through containers; card
+    collections size themselves once, see ``CardCollection.__sizeof__``).
+    """
+    
+    # Values live in this process, so callers may store objects by reference
+    in_process = True
+    
+    DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+    DEFAULT_MAX_ENTRIES = 50000
+    DEFAULT_NAMESPACE_QUOTAS = {
+        "user": 32 * 1024 * 1024,
+        "user_collection": 32 * 1024 * 1024,
+        "user_decks": 32 * 1024 * 1024,
+        "dbq": 16 * 1024 * 1024,
+    }
+    DEFAULT_PROTECTED_NAMESPACES = ("cards", "dbq_gen")
+    DEFAULT_SWEEP_INTERVAL = 60
+    DEFAULT_SHARDS = 16
+    
+    def __init__(self, max_bytes: Optional[int] = None, max_entries: Optional[int] = None,
+                 namespace_quotas: Optional[Dict[str, int]] = None,
+                 protected_namespaces: Optional[List[str]] = None,
+                 sweep_interval: Optional[float] = None,
+                 shards: Optional[int] = None):
+        """Initialize the cache.
+        
+        Args:
+            max_bytes: Overall byte budget (env CACHE_MAX_BYTES, default 256 MiB)
+            max_entries: Overall entry limit (env CACHE_MAX_ENTRIES, default 50,000)
+            namespace_quotas: Byte cap per namespace
+            protected_namespaces: Namespaces only evicted by their own writes
+            sweep_interval: Seconds between background expiry sweeps; 0 disables
+                the sweeper (env CACHE_SWEEP_INTERVAL, default 60)
+            shards: Number of lock stripes (env CACHE_SHARDS, default 16)
+        """
+        self.max_bytes = max_bytes if max_bytes is not None else _env_int("CACHE_MAX_BYTES", self.DEFAULT_MAX_BYTES)
+        self.max_entries = max_entries if max_entries is not None else _env_int("CACHE_MAX_ENTRIES", self.DEFAULT_MAX_ENTRIES)
+        self.namespace_quotas = dict(self.DEFAULT_NAMESPACE_QUOTAS if namespace_quotas is None else namespace_quotas)
+        self.protected_namespaces = frozenset(
+            self.DEFAULT_PROTECTED_NAMESPACES if protected_namespaces is None else protected_namespaces
+        )
+        self.sweep_interval = (
+            sweep_interval if sweep_interval is not None
+            else _env_int("CACHE_SWEEP_INTERVAL", self.DEFAULT_SWEEP_INTERVAL)
+        )
+        shard_count = max(1, shards if shards is not None else _env_int("CACHE_SHARDS", self.DEFAULT_SHARDS))
+        
+        def share(limit: int) -> int:
+            return -(-limit // shard_count)  # ceiling division
+        
+        shard_quotas = {namespace: share(quota) for namespace, quota in self.namespace_quotas.items()}
+        self._shards = [
+            _CacheShard(share(self.max_bytes), share(self.max_entries), shard_quotas, self.protected_namespaces)
+            for _ in range(shard_count)
+        ]
+        self._shard_count = shard_count
+        self._sweeper = None
+        self._sweeper_lock = threading.Lock()
+    
+    @staticmethod
+    def _estimate_size(value) -> int:
+        # Never serialize to measure: cached values include the live card catalog
+        if isinstance(value, (str, bytes, bytearray, CardCollection)):
+            # CardCollection.__sizeof__ walks the cards once per frozen collection
+            return sys.getsizeof(value)
+        if isinstance(value, dict):
+            return sys.getsizeof(value) + sum(
+                InMemoryCache._estimate_size(key) + InMemoryCache._estimate_size(item)
+                for key, item in value.items()
+            )
+        if isinstance(value, (list, tuple, set, frozenset)):
+            return sys.getsizeof(value) + sum(InMemoryCache._estimate_size(item) for item in value)
+        return sys.getsizeof(value)
+    
+    @staticmethod
+    def _expires_at(ex) -> Optional[float]:
+        if not ex:
+            return None
+        seconds = ex.total_seconds() if isinstance(ex, timedelta) else ex
+        return time.monotonic() + seconds
+    
+    @staticmethod
+    def _namespace(key) -> str:
+        # Keys are almost always strings; avoid str() for them
+        return key.partition(":")[0] if isinstance(key, str) else str(key).partition(":")[0]
+    
+    def _shard(self, key) -> _CacheShard:
+        return self._shards[hash(key) % self._shard_count]
+    
+    @property
+    def _data(self) -> Dict[Any, Any]:
+        """Snapshot of all stored values keyed by cache key."""
+        values = {}
+        for shard in self._shards:
+            with shard.lock:
+                values.update((key, entry[0]) for key, entry in shard.data.items())
+        return values
+    
+    def _ensure_sweeper(self) -> None:
+        if self._sweeper is not None or not self.sweep_interval or self.sweep_interval <= 0:
+            return
+        with self._sweeper_lock:
+            if self._sweeper is not None:
+                return
+            cache_ref = weakref.ref(self)
+            interval = self.sweep_interval
+            
+            def sweep():
+                while True:
+                    time.sleep(interval)
+                    cache = cache_ref()
+                    if cache is None:
+                        return
+                    cache.purge_expired()
+                    del cache
+            
+            self._sweeper = threading.Thread(target=sweep, name="InMemoryCacheSweeper", daemon=True)
+            self._sweeper.start()
     
     def get(self, key):
-        with self._lock:
-            # Check if key exists and hasn't expired
-            if key in self._data:
-                if key in self._expiry and datetime.now() > self._expiry[key]:
-                    # Expired - remove it
-                    del self._data[key]
-                    del self._expiry[key]
-                    return None
-                return self._data[key]
+        shard = self._shards[hash(key) % self._shard_count]
+        # Entries are immutable tuples, so a plain dict lookup is a consistent read
+        entry = shard.data.get(key)
+        if entry is None:
             return None
+        value, expires_at, _, namespace = entry
+        if expires_at is not None and time.monotonic() > expires_at:
+            with shard.lock:
+                # Only drop the entry we saw expire, not a concurrent replacement
+                if shard.data.get(key) is entry:
+                    shard.remove(key, namespace)
+                    shard.expired += 1
+            return None
+        # Recording recency is best effort: skip it for keys that are already
+        # recent, and rather than wait for the lock
+        if not shard.recently_touched(key, namespace) and shard.lock.acquire(blocking=False):
+            try:
+                if shard.data.get(key) is entry:
+                    shard.touch(key, namespace)
+            finally:
+                shard.lock.release()
+        return value
     
     def set(self, key, value, ex=None):
-        with self._lock:
-            self._data[key] = value
-            if ex:
-                if isinstance(ex, timedelta):
-                    self._expiry[key] = datetime.now() + ex
-                else:  # seconds
-                    self._expiry[key] = datetime.now() + timedelta(seconds=ex)
-            return True
+        namespace = self._namespace(key)
+        entry = (value, self._expires_at(ex), self._estimate_size(value), namespace)
+        shard = self._shards[hash(key) % self._shard_count]
+        with shard.lock:
+            shard.insert(key, namespace, entry)
+        self._ensure_sweeper()
+        return True
     
     def delete(self, key):
-        with self._lock:
-            self._data.pop(key, None)
-            self._expiry.pop(key, None)
-            return 1
+        shard = self._shard(key)
+        with shard.lock:
+            entry = shard.data.get(key)
+            if entry is not None:
+                shard.remove(key, entry[3])
+        return 1
     
     def exists(self, key):
-        with self._lock:
-            if key in self._data:
-                # Check expiry
-                if key in self._expiry and datetime.now() > self._expiry[key]:
-                    return False
-                return True
+        entry = self._shard(key).data.get(key)
+        if entry is None:
             return False
+        expires_at = entry[1]
+        return expires_at is None or time.monotonic() <= expires_at
+    
+    def purge_expired(self) -> int:
+        """Remove every expired entry; returns the number removed."""
+        removed = 0
+        for shard in self._shards:
+            with shard.lock:
+                removed += shard.purge_expired(time.monotonic())
+        return removed
+    
+    def stats(self) -> Dict[str, Any]:
+        """Memory, entry and eviction counters, overall and per namespace."""
+        entries = total_bytes = expired = 0
+        namespaces: Dict[str, Dict[str, Any]] = {}
+        for shard in self._shards:
+            with shard.lock:
+                entries += len(shard.data)
+                total_bytes += shard.total_bytes
+                expired += shard.expired
+                for namespace in set(shard.namespace_entries) | set(shard.evictions):
+                    summary = namespaces.setdefault(namespace, {
+                        "entries": 0,
+                        "bytes": 0,
+                        "quota_bytes": self.namespace_quotas.get(namespace),
+                        "evictions": 0,
+                    })
+                    summary["entries"] += shard.namespace_entries.get(namespace, 0)
+                    summary["bytes"] += shard.namespace_bytes.get(namespace, 0)
+                    summary["evictions"] += shard.evictions.get(namespace, 0)
+        return {
+            "entries": entries,
+            "bytes": total_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "shards": len(self._shards),
+            "evictions": sum(summary["evictions"] for summary in namespaces.values()),
+            "expired_removed": expired,
+            "namespaces": {
+                namespace: summary for namespace, summary in namespaces.items()
+                if summary["entries"]
+            },
+        }
     
     def ping(self):
         return True
     
     def flushdb(self):
-        with self._lock:
-            self._data.clear()
-            self._expiry.clear()
-            return True
+        for shard in self._shards:
+            with shard.lock:
+                shard.clear()
+        return True
 
 
 class CacheManager:
     """In-memory cache manager for scalable caching operations."""
     
-    def __init__(self):
-        """Initialize in-memory cache manager."""
-        self._client = InMemoryCache()
+    def __init__(self, client=None, share_live_collections: Optional[bool] = None):
+        """Initialize in-memory cache manager.
+        
+        Args:
+            client: Cache backend (defaults to a new InMemoryCache)
+            share_live_collections: Store card collections as shared live objects
+                instead of pickles. Defaults to True for in-process backends.
+        """
+        self._client = client if client is not None else InMemoryCache()
+        if share_live_collections is None:
+            share_live_collections = getattr(self._client, "in_process", False)
+        self._share_live_collections = share_live_collections
+        # Last collection stored per key, kept past its TTL for stale-while-revalidate
+        self._stale_collections: Dict[str, Any] = {}
         # Only log in debug mode
         from flask import current_app
         if current_app and current_app.debug:
@@ -84,12 +442,24 @@ class CacheManager:
         """Get the cache client."""
         return self._client
     
+    @property
+    def shares_live_collections(self) -> bool:
+        """Whether card collections are cached as shared live objects."""
+        return self._share_live_collections
+    
     def get_card_collection(self, cache_key: str = "global_cards") -> Optional[CardCollection]:
-        """Get card collection from cache."""
+        """Get card collection from cache.
+        
+        In live mode the returned collection is shared by every request and
+        frozen, so callers must treat it as read-only.
+        """
         try:
             cached_data = self.client.get(f"cards:{cache_key}")
-            if cached_data:
-                collection = pickle.loads(cached_data)
+            if cached_data is not None:
+                if isinstance(cached_data, CardCollection):
+                    collection = cached_data
+                else:
+                    collection = pickle.loads(cached_data)
                 # Record cache hit
                 try:
                     from .monitoring import performance_monitor
@@ -114,10 +484,24 @@ class CacheManager:
             return None
     
     def set_card_collection(self, collection: CardCollection, cache_key: str = "global_cards", ttl_hours: int = 72) -> bool:
-        """Cache card collection with TTL."""
+        """Cache card collection with TTL.
+        
+        In live mode the collection is frozen and swapped in by reference, so
+        requests already holding the previous collection keep a consistent
+        snapshot. Out-of-process backends receive a pickle instead.
+        """
         try:
-            pickled_data = pickle.dumps(collection)
             ttl = timedelta(hours=ttl_hours)
+            # Settle the catalog version before sharing so every reader (and pickle) agrees on it
+            collection.version
+            if self._share_live_collections:
+                collection.freeze()
+                # Build the text search index now rather than on the first search request
+                collection.search_index
+                self._stale_collections[cache_key] = collection
+                return self.client.set(f"cards:{cache_key}", collection, ex=ttl)
+            pickled_data = pickle.dumps(collection)
+            self._stale_collections[cache_key] = pickled_data
             return self.client.set(f"cards:{cache_key}", pickled_data, ex=ttl)
         except Exception as e:
             # Only log in debug mode
@@ -236,12 +620,13 @@ class CacheManager:
                 print(f"Error retrieving user decks from cache: {e}")
             return None
     
-    def set_user_decks(self, user_id: str, decks_data: List[Dict], ttl_hours: int = 4) -> bool:
-        """Cache user decks."""
+    def set_user_decks(self, user_id: str, decks_data: List[Dict], ttl_hours: int = 4,
+                       ttl_seconds: Optional[int] = None) -> bool:
+        """Cache user decks (``ttl_seconds``, when given, overrides ``ttl_hours``)."""
         try:
             serializable_data = self._make_serializable(decks_data)
             json_data = json.dumps(serializable_data)
-            ttl = timedelta(hours=ttl_hours)
+            ttl = timedelta(seconds=ttl_seconds) if ttl_seconds else timedelta(hours=ttl_hours)
             return self.client.set(f"user_decks:{user_id}", json_data, ex=ttl)
         except Exception as e:
             # Only log in debug mode
@@ -250,6 +635,20 @@ class CacheManager:
                 print(f"Error caching user decks: {e}")
             return False
     
+    def invalidate_user_data(self, user_id: str) -> None:
+        """Invalidate a user's cached profile document after it changes."""
+        try:
+            self.client.delete(f"user:{user_id}")
+        except Exception:
+            pass
+    
+    def invalidate_user_decks(self, user_id: str) -> None:
+        """Invalidate a user's cached deck summaries after one of their decks changes."""
+        try:
+            self.client.delete(f"user_decks:{user_id}")
+        except Exception:
+            pass
+    
     def invalidate_user_cache(self, user_id: str) -> None:
         """Invalidate all cached data for a user."""
         try:
@@ -268,9 +667,114 @@ class CacheManager:
             if current_app and current_app.debug:
                 print(f"Error invalidating user cache: {e}")
     
+    def get_stale_card_collection(self, cache_key: str = "global_cards") -> Optional[CardCollection]:
+        """Last collection cached under ``cache_key``, even if its TTL has expired.
+        
+        Used to keep serving while a fresh copy loads; returns None once the
+        key has been explicitly invalidated.
+        """
+        stale = self._stale_collections.get(cache_key)
+        if stale is None or isinstance(stale, CardCollection):
+            return stale
+        try:
+            return pickle.loads(stale)
+        except Exception:
+            return None
+    
+    def get_set_metadata(self) -> Optional[List[Dict]]:
+        """Get cached set metadata read from Firestore."""
+        try:
+            cached_data = self.client.get("sets:metadata")
+            return json.loads(cached_data) if cached_data else None
+        except Exception:
+            return None
+    
+    def set_set_metadata(self, sets: List[Dict], ttl_minutes: int = 60) -> bool:
+        """Cache set metadata read from Firestore with TTL."""
+        try:
+            return self.client.set("sets:metadata", json.dumps(sets), ex=timedelta(minutes=ttl_minutes))
+        except Exception as e:
+            from flask import current_app
+            if current_app and current_app.debug:
+                print(f"Error caching set metadata: {e}")
+            return False
+    
+    def invalidate_set_metadata(self) -> None:
+        """Invalidate cached set metadata."""
+        try:
+            self.client.delete("sets:metadata")
+        except Exception:
+            pass
+    
+    def _query_generation(self, collection: str) -> str:
+        generation = self.client.get(f"dbq_gen:{collection}")
+        if isinstance(generation, bytes):
+            generation = generation.decode()
+        return generation or "0"
+    
+    def get_query_result(self, collection: str, key: str) -> Optional[Dict[str, Any]]:
+        """Get a cached DatabaseService read as ``{"value": ...}``, or None on a miss.
+        
+        The wrapper lets a cached "document not found" (value None) be told
+        apart from a cache miss. The value is a private copy with the same
+        types Firestore returned (timestamps stay datetimes), so a hit looks
+        exactly like the read that filled the cache.
+        """
+        try:
+            cached_data = self.client.get(f"dbq:{collection}:{self._query_generation(collection)}:{key}")
+            try:
+                from .monitoring import performance_monitor
+                if cached_data is not None:
+                    performance_monitor.metrics.record_cache_hit(f"db_query:{collection}")
+                else:
+                    performance_monitor.metrics.record_cache_miss(f"db_query:{collection}")
+            except ImportError:
+                pass
+            if cached_data is None:
+                return None
+            if getattr(self.client, "in_process", False):
+                return copy.deepcopy(cached_data)
+            return pickle.loads(cached_data)
+        except Exception:
+            try:
+                from .monitoring import performance_monitor
+                performance_monitor.metrics.record_cache_error(f"db_query:{collection}")
+            except ImportError:
+                pass
+            return None
+    
+    def set_query_result(self, collection: str, key: str, value: Any, ttl_seconds: int) -> bool:
+        """Cache a DatabaseService read result (None for a missing document).
+        
+        In-process backends keep a copy of the Python objects; others get a pickle.
+        """
+        try:
+            if getattr(self.client, "in_process", False):
+                cached_data = {"value": copy.deepcopy(value)}
+            else:
+                cached_data = pickle.dumps({"value": value})
+            cache_key = f"dbq:{collection}:{self._query_generation(collection)}:{key}"
+            return self.client.set(cache_key, cached_data, ex=timedelta(seconds=ttl_seconds))
+        except Exception as e:
+            from flask import current_app
+            if current_app and current_app.debug:
+                print(f"Error caching query result: {e}")
+            return False
+    
+    def invalidate_query_collection(self, collection: str) -> None:
+        """Invalidate every cached read of ``collection`` by moving it to a new key generation.
+        
+        Entries of the old generation are never read again and expire by TTL.
+        """
+        try:
+            self.client.set(f"dbq_gen:{collection}", str(time.time_ns()))
+        except Exception:
+            pass
+    
     def invalidate_card_cache(self, cache_key: str = "global_cards") -> None:
         """Invalidate card collection cache."""
         try:
+            self._stale_collections.pop(cache_key, None)
             self.client.delete(f"cards:{cache_key}")
             # Only log in debug mode
             from flask import current_app
@@ -340,6 +844,19 @@ class CacheManager:
                 "cost_savings": "high_ttl_reduces_firebase_reads"
             }
             
+            # Size-aware backends report memory, evictions and per-namespace usage
+            if hasattr(self.client, 'stats'):
+                client_stats = self.client.stats()
+                stats.update({
+                    "memory_usage": f"{client_stats['bytes'] / (1024 * 1024):.1f}M",
+                    "memory_bytes": client_stats["bytes"],
+                    "max_bytes": client_stats["max_bytes"],
+                    "max_entries": client_stats["max_entries"],
+                    "evictions": client_stats["evictions"],
+                    "expired_removed": client_stats["expired_removed"],
+                    "namespaces": client_stats["namespaces"],
+                })
+            
             return stats
         except Exception as e:
             return {"error": str(e), "cache_type": "unknown"}
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from datetime import timedelta
 
 class Config:
@@ -36,6 +37,12 @@ class Config:
     FIREBASE_STORAGE_BASE_URL = 'https://firebasestorage.googleapis.com/v0/b/pvpocket-dd286.firebasestorage.app/o'
     ASSET_BASE_URL = FIREBASE_STORAGE_BASE_URL  # Default for development
 
+    # Versioned card catalog snapshot reused across restarts; set to "" to disable.
+    # Point it at a mounted volume to share it between instances.
+    CARD_SNAPSHOT_PATH = os.environ.get(
+        "CARD_SNAPSHOT_PATH", os.path.join(tempfile.gettempdir(), "pvpocket_cards.snapshot")
+    )
+
     DEBUG = (
         os.environ.get("FLASK_DEBUG", "0") == "1"
     )
@@ -76,6 +83,7 @@ class TestingConfig(Config):
     REFRESH_SECRET_KEY = os.environ.get("REFRESH_SECRET_KEY", "test-refresh-key")
     GCP_PROJECT_ID = os.environ.get("GCP_PROJECT_ID", "test-project")
     FIREBASE_SECRET_NAME = os.environ.get("FIREBASE_SECRET_NAME", "test-secret")
+    CARD_SNAPSHOT_PATH = None
 
 config = {
     "development": DevelopmentConfig,
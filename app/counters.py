@@ -0,0 +1,79 @@
+"""
+Sharded Firestore counters for site-wide statistics.
+
+Each counter is a document in ``counters`` with a ``shards`` subcollection.
+Writers increment one random shard inside the batch or transaction that
+creates or deletes the counted document, so the count commits atomically
+with the change and concurrent writers rarely contend on the same shard.
+Reading a counter costs one read per shard, however large the collection.
+"""
+
+import random
+from typing import Dict, Optional
+
+from firebase_admin import firestore
+
+COUNTERS_COLLECTION = "counters"
+DEFAULT_SHARDS = 10
+
+
+class ShardedCounter:
+    """A Firestore counter split across ``num_shards`` shard documents."""
+
+    def __init__(self, name: str, num_shards: int = DEFAULT_SHARDS):
+        self.name = name
+        self.num_shards = num_shards
+
+    def _shards(self, db):
+        return db.collection(COUNTERS_COLLECTION).document(self.name).collection("shards")
+
+    def increment(self, db, writer, amount: int = 1) -> None:
+        """Add ``amount`` to a random shard as part of ``writer`` (a WriteBatch or Transaction)."""
+        shard_ref = self._shards(db).document(str(random.randrange(self.num_shards)))
+        writer.set(shard_ref, {"count": firestore.Increment(amount)}, merge=True)
+
+    def value(self, db) -> int:
+        """Current total across all shards."""
+        return sum(int((shard.to_dict() or {}).get("count", 0)) for shard in self._shards(db).stream())
+
+    def reset_to_count(self, db, count_query) -> int:
+        """Overwrite the counter with ``count_query``'s count in one transaction; returns it.
+
+        The shards are read in the same transaction as the count, so an
+        increment committed before the overwrite makes the transaction retry
+        instead of being silently replaced.
+        """
+        shards = self._shards(db)
+        shard_refs = [shards.document(str(shard)) for shard in range(self.num_shards)]
+
+        @firestore.transactional
+        def overwrite(transaction):
+            list(transaction.get_all(shard_refs))
+            total = int(count_query.get(transaction=transaction)[0][0].value)
+            for shard, shard_ref in enumerate(shard_refs):
+                transaction.set(shard_ref, {"count": total if shard == 0 else 0})
+            return total
+
+        return overwrite(db.transaction())
+
+
+users_counter = ShardedCounter("users")
+decks_counter = ShardedCounter("decks")
+
+
+def count_documents(db, collection_name: str) -> int:
+    """Exact document count via an aggregation query (one read per 1000 documents)."""
+    return int(db.collection(collection_name).count().get()[0][0].value)
+
+
+def reconcile(db, counters: Optional[Dict[str, ShardedCounter]] = None) -> Dict[str, int]:
+    """Reset each counter to the live count of its collection; returns the new totals.
+
+    Counters keyed by collection name; defaults to users and decks. Fixes drift
+    from writes that bypassed the counters (console edits, partial failures).
+    """
+    counters = counters or {"users": users_counter, "decks": decks_counter}
+    return {
+        collection_name: counter.reset_to_count(db, db.collection(collection_name).count())
+        for collection_name, counter in counters.items()
+    }
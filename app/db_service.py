@@ -3,6 +3,9 @@ Enhanced database service with connection pooling and retry logic.
 Provides resilient Firestore operations with better error handling.
 """
 
+import atexit
+import copy
+import logging
 import time
 import random
 from typing import Optional, List, Dict, Any, Callable
@@ -20,6 +23,11 @@ from google.api_core.exceptions import (
 import threading
 import queue
 import os
+import json
+
+from .cache_manager import cache_manager
+
+firestore_logger = logging.getLogger("firestore")
 
 
 class FirestoreConnectionPool:
@@ -150,6 +158,32 @@ def retry_on_error(max_retries: int = 3, base_delay: float = 1.0, max_delay: flo
 class DatabaseService:
     """Enhanced database service with connection pooling and retry logic."""
     
+    # Read-through cache TTLs (seconds) for rarely changing collections. Reads
+    # opt in with cached=True; collections not listed here are never cached.
+    QUERY_CACHE_TTLS: Dict[str, int] = {
+        "cards": 3600,  # set documents; changed only when a new set is imported
+    }
+    # Cap on how long a missing document is remembered as missing
+    NEGATIVE_CACHE_TTL = 300
+    
+    @staticmethod
+    def _cache_ttl(collection: str, cached: bool) -> Optional[int]:
+        return DatabaseService.QUERY_CACHE_TTLS.get(collection) if cached else None
+    
+    @staticmethod
+    def _query_cache_key(filters: Optional[List[tuple]], order_by: Optional[str], limit: Optional[int]) -> str:
+        # Filters are ANDed, so their order doesn't change the result
+        normalized_filters = sorted(
+            (json.dumps([field, operator, value], sort_keys=True, default=str) for field, operator, value in filters or []),
+        )
+        return "query:" + json.dumps([normalized_filters, order_by, limit], sort_keys=True)
+    
+    @staticmethod
+    def invalidate_cache(collection: str) -> None:
+        """Drop cached reads of ``collection`` after writing to it outside DatabaseService."""
+        if collection in DatabaseService.QUERY_CACHE_TTLS:
+            cache_manager.invalidate_query_collection(collection)
+    
     @staticmethod
     def get_client() -> firestore.Client:
         """Get a Firestore client with connection pooling."""
@@ -163,7 +197,9 @@ class DatabaseService:
             client = current_app.config.get("FIRESTORE_DB")
             if not client:
                 raise Exception("No Firestore client available")
-            return client
+            # DatabaseService records its own reads; avoid counting them twice
+            from .firestore_tracing import untraced_client
+            return untraced_client(client)
     
     @staticmethod
     def return_client(client: firestore.Client) -> None:
@@ -172,10 +208,21 @@ class DatabaseService:
     
     @staticmethod
     @retry_on_error(max_retries=3)
-    def get_document(collection: str, document_id: str) -> Optional[Dict[str, Any]]:
-        """Get a single document with retry logic."""
+    def get_document(collection: str, document_id: str, cached: bool = False) -> Optional[Dict[str, Any]]:
+        """Get a single document with retry logic.
+        
+        With ``cached=True`` the result (including "not found") is read
+        through the query cache if the collection has a TTL.
+        """
+        cache_ttl = DatabaseService._cache_ttl(collection, cached)
+        if cache_ttl:
+            hit = cache_manager.get_query_result(collection, f"doc:{document_id}")
+            if hit is not None:
+                return hit["value"]
+        
         client = DatabaseService.get_client()
         try:
+            started = time.perf_counter()
             doc_ref = client.collection(collection).document(document_id)
             doc = doc_ref.get()
             
@@ -183,21 +230,50 @@ class DatabaseService:
             try:
                 from .monitoring import performance_monitor
                 performance_monitor.metrics.record_firestore_read(collection, 1)
+                performance_monitor.metrics.record_db_query_time(
+                    "get_document", (time.perf_counter() - started) * 1000
+                )
             except:
                 pass
             
-            if doc.exists:
-                return doc.to_dict()
-            return None
+            result = doc.to_dict() if doc.exists else None
+            if cache_ttl:
+                cache_manager.set_query_result(
+                    collection, f"doc:{document_id}", result,
+                    cache_ttl if result is not None else min(cache_ttl, DatabaseService.NEGATIVE_CACHE_TTL),
+                )
+            return result
         finally:
             DatabaseService.return_client(client)
     
     @staticmethod
     @retry_on_error(max_retries=3)
-    def get_documents_batch(collection: str, document_ids: List[str]) -> List[Dict[str, Any]]:
-        """Get multiple documents in a batch with retry logic."""
+    def get_documents_batch(collection: str, document_ids: List[str], cached: bool = False) -> List[Dict[str, Any]]:
+        """Get multiple documents in a batch with retry logic.
+        
+        With ``cached=True`` only documents missing from the query cache are
+        read from Firestore; results then follow ``document_ids`` order.
+        """
         if not document_ids:
             return []
+        
+        cache_ttl = DatabaseService._cache_ttl(collection, cached)
+        found: Dict[str, Optional[Dict[str, Any]]] = {}
+        if cache_ttl:
+            for doc_id in document_ids:
+                hit = cache_manager.get_query_result(collection, f"doc:{doc_id}")
+                if hit is not None:
+                    found[doc_id] = hit["value"]
+            missing_ids = [doc_id for doc_id in document_ids if doc_id not in found]
+            if missing_ids:
+                fetched = {doc["id"]: doc for doc in DatabaseService.get_documents_batch(collection, missing_ids)}
+                for doc_id in missing_ids:
+                    found[doc_id] = fetched.get(doc_id)
+                    cache_manager.set_query_result(
+                        collection, f"doc:{doc_id}", found[doc_id],
+                        cache_ttl if found[doc_id] is not None else min(cache_ttl, DatabaseService.NEGATIVE_CACHE_TTL),
+                    )
+            return [found[doc_id] for doc_id in document_ids if found.get(doc_id) is not None]
             
         client = DatabaseService.get_client()
         try:
@@ -209,6 +285,7 @@ class DatabaseService:
             chunk_size = 100
             for i in range(0, len(doc_refs), chunk_size):
                 chunk = doc_refs[i:i + chunk_size]
+                started = time.perf_counter()
                 docs = client.get_all(chunk)
                 
                 for doc in docs:
@@ -221,6 +298,9 @@ class DatabaseService:
                 try:
                     from .monitoring import performance_monitor
                     performance_monitor.metrics.record_firestore_batch_read(collection, len(chunk))
+                    performance_monitor.metrics.record_db_query_time(
+                        "get_documents_batch", (time.perf_counter() - started) * 1000
+                    )
                 except:
                     pass
             
@@ -231,8 +311,21 @@ class DatabaseService:
     @staticmethod
     @retry_on_error(max_retries=3)
     def query_collection(collection: str, filters: List[tuple] = None, 
-                         order_by: str = None, limit: int = None) -> List[Dict[str, Any]]:
-        """Query a collection with filters, ordering, and limits."""
+                         order_by: str = None, limit: int = None,
+                         cached: bool = False) -> List[Dict[str, Any]]:
+        """Query a collection with filters, ordering, and limits.
+        
+        ``order_by`` is a field name, optionally followed by " desc" or " asc".
+        With ``cached=True`` results are read through the query cache, keyed
+        by the normalized query, if the collection has a TTL.
+        """
+        cache_ttl = DatabaseService._cache_ttl(collection, cached)
+        if cache_ttl:
+            cache_key = DatabaseService._query_cache_key(filters, order_by, limit)
+            hit = cache_manager.get_query_result(collection, cache_key)
+            if hit is not None:
+                return hit["value"]
+        
         client = DatabaseService.get_client()
         try:
             query = client.collection(collection)
@@ -244,7 +337,13 @@ class DatabaseService:
             
             # Apply ordering
             if order_by:
-                query = query.order_by(order_by)
+                field, _, direction = order_by.partition(" ")
+                if direction.strip().lower() in ("desc", "asc"):
+                    query = query.order_by(field, direction=(
+                        firestore.Query.DESCENDING if direction.strip().lower() == "desc" else firestore.Query.ASCENDING
+                    ))
+                else:
+                    query = query.order_by(order_by)
             
             # Apply limit
             if limit:
@@ -252,6 +351,7 @@ class DatabaseService:
             
             results = []
             docs_read = 0
+            started = time.perf_counter()
             for doc in query.stream():
                 doc_data = doc.to_dict()
                 doc_data['id'] = doc.id
@@ -259,13 +359,18 @@ class DatabaseService:
                 docs_read += 1
             
             # Track Firestore read operations
-            if docs_read > 0:
-                try:
-                    from .monitoring import performance_monitor
+            try:
+                from .monitoring import performance_monitor
+                performance_monitor.metrics.record_db_query_time(
+                    "query_collection", (time.perf_counter() - started) * 1000
+                )
+                if docs_read > 0:
                     performance_monitor.metrics.record_firestore_read(collection, docs_read)
-                except:
-                    pass
+            except:
+                pass
             
+            if cache_ttl:
+                cache_manager.set_query_result(collection, cache_key, results, cache_ttl)
             return results
         finally:
             DatabaseService.return_client(client)
@@ -286,6 +391,7 @@ class DatabaseService:
             else:
                 doc_ref = collection_ref.add(document_data)
                 result_id = doc_ref[1].id
+            DatabaseService.invalidate_cache(collection)
             
             # Track Firestore write operation
             try:
@@ -307,6 +413,7 @@ class DatabaseService:
         try:
             doc_ref = client.collection(collection).document(document_id)
             doc_ref.set(updates, merge=merge)
+            DatabaseService.invalidate_cache(collection)
             return True
         except Exception as e:
             # Log update errors only in debug mode
@@ -324,6 +431,7 @@ class DatabaseService:
         try:
             doc_ref = client.collection(collection).document(document_id)
             doc_ref.delete()
+            DatabaseService.invalidate_cache(collection)
             
             # Track Firestore delete operation
             try:
@@ -378,4 +486,425 @@ class DatabaseService:
 
 
 # Global database service instance
-db_service = DatabaseService()
\ No newline at end of file
+db_service = DatabaseService()
+
+class _PendingDocument:
+    __slots__ = ("ops", "mutations", "attempts", "first_failure", "retry_at")
+    
+    def __init__(self, ops: Dict[str, tuple], mutations: int = 1, attempts: int = 0):
+        self.ops = ops
+        self.mutations = mutations
+        self.attempts = attempts
+        self.first_failure = 0.0
+        self.retry_at = 0.0
+
+
+class WriteBatcher:
+    """Write-behind buffer that coalesces Firestore mutations per document.
+    
+    Mutations are queued as field paths ("card_counts.123") that are either
+    set to a value ("set") or incremented ("inc"). Mutations of the same
+    document merge while queued: increments add up, a later set replaces
+    earlier ops on that field and an increment after a set folds into it.
+    A background thread commits every queued document with ``set(...,
+    merge=True)`` in WriteBatches of up to 500 documents, at most
+    ``flush_interval`` seconds after the first mutation was queued, or
+    sooner once ``max_pending_documents`` documents are waiting.
+    
+    Documents with derived fields register a normalizer for their collection
+    (``set_normalizer``). Their queued ops are then committed inside a
+    transaction that reads the stored document, applies the ops and writes
+    back the normalized result, so invariants across fields hold however
+    writers on other instances interleave. ``apply_pending`` normalizes its
+    view the same way.
+    
+    A failed batch is queued again under any newer mutations and retried
+    with exponential backoff (``flush_interval`` doubling up to
+    ``max_backoff``); a document still failing ``retry_window`` seconds after
+    its first failure is dropped and logged. ``close()`` (registered with
+    atexit by ``init_app``) keeps flushing what is left on shutdown until
+    the queue is empty or ``shutdown_timeout`` passes, and logs every
+    document it could not write. Only a hard kill loses writes silently.
+    Until a document's commit returns its readers should pass what they read
+    through ``apply_pending``, which overlays queued writes and writes in a
+    batch that is still committing.
+    """
+    
+    MAX_BATCH_DOCUMENTS = 500  # Firestore WriteBatch limit
+    
+    def __init__(self, client=None, flush_interval: float = 0.5,
+                 max_pending_documents: int = 400, max_backoff: float = 60.0,
+                 retry_window: float = 3600.0, shutdown_timeout: float = 8.0):
+        self.flush_interval = flush_interval
+        self.max_pending_documents = max_pending_documents
+        self.max_backoff = max_backoff
+        self.retry_window = retry_window
+        self.shutdown_timeout = shutdown_timeout
+        self._client = client
+        self._app = None
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._pending: Dict[tuple, _PendingDocument] = {}
+        # Taken by the running flush; readers still see them until committed or requeued
+        self._in_flight: Dict[tuple, _PendingDocument] = {}
+        self._normalizers: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {}
+        # When the first document not backing off was queued; None if there is none
+        self._oldest: Optional[float] = None
+        self._wake = threading.Event()
+        self._full = threading.Event()
+        self._thread = None
+        self._closed = False
+        self.stats = {
+            "mutations": 0,
+            "coalesced": 0,
+            "batches": 0,
+            "documents_flushed": 0,
+            "failed_batches": 0,
+            "dropped_documents": 0,
+        }
+    
+    def init_app(self, app) -> None:
+        """Flush through ``app.config["FIRESTORE_DB"]`` and flush on interpreter exit."""
+        self._app = app
+        atexit.register(self.close)
+    
+    def set_normalizer(self, collection: str, normalize: Callable[[Dict[str, Any]], Dict[str, Any]]) -> None:
+        """Commit ``collection`` transactionally, storing ``normalize(document with ops applied)``."""
+        self._normalizers[collection] = normalize
+    
+    def _get_client(self):
+        if self._client is not None:
+            return self._client
+        return self._app.config.get("FIRESTORE_DB") if self._app is not None else None
+    
+    @staticmethod
+    def _merge_ops(older: Dict[str, tuple], newer: Dict[str, tuple]) -> Dict[str, tuple]:
+        merged = dict(older)
+        for path, (op, value) in newer.items():
+            if op == "set":
+                # Replacing a field also replaces anything queued beneath it
+                for queued in [queued for queued in merged if queued.startswith(path + ".")]:
+                    del merged[queued]
+                merged[path] = (op, value)
+                continue
+            previous = merged.get(path)
+            if previous is None:
+                merged[path] = (op, value)
+            elif previous[0] == "inc":
+                merged[path] = ("inc", previous[1] + value)
+            elif isinstance(previous[1], (int, float)) and not isinstance(previous[1], bool):
+                merged[path] = ("set", previous[1] + value)
+            elif previous[1] is firestore.DELETE_FIELD:
+                # Incrementing a missing field starts it from zero
+                merged[path] = ("set", value)
+            else:
+                merged[path] = (op, value)
+        return merged
+    
+    def _queue(self, collection: str, document_id: str, ops: Dict[str, tuple]) -> bool:
+        """Merge ``ops`` into the document's pending writes; True once closed (caller flushes)."""
+        key = (collection, document_id)
+        with self._lock:
+            self.stats["mutations"] += 1
+            pending = self._pending.get(key)
+            if pending is None:
+                if self._oldest is None:
+                    self._oldest = time.monotonic()
+                    self._wake.set()
+                self._pending[key] = _PendingDocument(dict(ops))
+            else:
+                pending.ops = self._merge_ops(pending.ops, ops)
+                pending.mutations += 1
+                self.stats["coalesced"] += 1
+            if len(self._pending) >= self.max_pending_documents:
+                self._full.set()
+            if not self._closed:
+                self._ensure_thread()
+            return self._closed
+    
+    def set(self, collection: str, document_id: str, fields: Dict[str, Any]) -> None:
+        """Queue field values (dotted paths; ``firestore.DELETE_FIELD`` removes a field)."""
+        if self._queue(collection, document_id, {path: ("set", value) for path, value in fields.items()}):
+            # Nothing flushes after shutdown; write through
+            self.flush()
+    
+    def increment(self, collection: str, document_id: str, fields: Dict[str, Any]) -> None:
+        """Queue numeric increments (negative to decrement) of dotted field paths."""
+        if self._queue(collection, document_id, {path: ("inc", amount) for path, amount in fields.items()}):
+            self.flush()
+    
+    def mutate(self, collection: str, document_id: str, current: Optional[Dict[str, Any]],
+               build: Callable[[Optional[Dict[str, Any]]], tuple]) -> Any:
+        """Queue the writes ``build`` derives from the document's latest known state.
+        
+        ``current`` is the stored document as just read (None if missing).
+        ``build`` gets it with the pending writes applied and returns
+        ``(sets, increments, result)``; ``result`` is returned. Runs under the
+        batcher lock, so concurrent mutations of a document in this process
+        each see the others' writes. Exceptions from ``build`` queue nothing.
+        """
+        closed = False
+        with self._lock:
+            sets, increments, result = build(self.apply_pending(collection, document_id, current))
+            ops = {path: ("inc", amount) for path, amount in (increments or {}).items()}
+            ops = self._merge_ops(ops, {path: ("set", value) for path, value in (sets or {}).items()})
+            if ops:
+                closed = self._queue(collection, document_id, ops)
+        if closed:
+            self.flush()
+        return result
+    
+    def apply_pending(self, collection: str, document_id: str,
+                      data: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """``data`` (a stored document, or None) with this document's queued writes applied.
+        
+        Server-side sentinels other than DELETE_FIELD (e.g. SERVER_TIMESTAMP)
+        leave the stored value in place.
+        """
+        key = (collection, document_id)
+        with self._lock:
+            in_flight = self._in_flight.get(key)
+            pending = self._pending.get(key)
+            ops = dict(in_flight.ops) if in_flight else {}
+            if pending:
+                ops = self._merge_ops(ops, pending.ops)
+        if not ops:
+            return data
+        result = self._apply_ops(data, ops)
+        normalize = self._normalizers.get(collection)
+        return normalize(result) if normalize else result
+    
+    @staticmethod
+    def _apply_ops(data: Optional[Dict[str, Any]], ops: Dict[str, tuple]) -> Dict[str, Any]:
+        result = copy.deepcopy(data) if data is not None else {}
+        for path, (op, value) in ops.items():
+            *parents, field = path.split(".")
+            target = result
+            for parent in parents:
+                if not isinstance(target.get(parent), dict):
+                    target[parent] = {}
+                target = target[parent]
+            if op == "inc":
+                existing = target.get(field)
+                target[field] = (existing if isinstance(existing, (int, float)) else 0) + value
+            elif value is firestore.DELETE_FIELD:
+                target.pop(field, None)
+            elif value is not firestore.SERVER_TIMESTAMP:
+                target[field] = value
+        return result
+    
+    def _normalized_data(self, collection: str, stored: Optional[Dict[str, Any]],
+                         ops: Dict[str, tuple]) -> Dict[str, Any]:
+        # The whole document, written over the stored one inside the transaction
+        data = self._normalizers[collection](self._apply_ops(stored, ops))
+        for path, (op, value) in ops.items():
+            if value is firestore.SERVER_TIMESTAMP:
+                *parents, field = path.split(".")
+                target = data
+                for parent in parents:
+                    target = target.setdefault(parent, {})
+                target[field] = value
+        return data
+    
+    @staticmethod
+    def _document_data(ops: Dict[str, tuple]) -> Dict[str, Any]:
+        # Nested maps, so set(merge=True) only touches the queued leaf fields
+        data: Dict[str, Any] = {}
+        for path, (op, value) in ops.items():
+            *parents, field = path.split(".")
+            target = data
+            for parent in parents:
+                target = target.setdefault(parent, {})
+            target[field] = firestore.Increment(value) if op == "inc" else value
+        return data
+    
+    @property
+    def pending_documents(self) -> int:
+        with self._lock:
+            return len(self._pending)
+    
+    def _drop(self, key: tuple, document: _PendingDocument, reason: str) -> None:
+        self.stats["dropped_documents"] += 1
+        firestore_logger.error(
+            f"Dropping queued write to {key[0]}/{key[1]} ({document.mutations} mutations, "
+            f"fields {sorted(document.ops)}) {reason}"
+        )
+        try:
+            from .monitoring import performance_monitor
+            performance_monitor.metrics.record_error("write_batch_dropped")
+        except ImportError:
+            pass
+    
+    def _requeue(self, documents: List[tuple]) -> None:
+        """Put failed documents back beneath anything queued for them since, backing off."""
+        now = time.monotonic()
+        with self._lock:
+            for key, failed in documents:
+                self._in_flight.pop(key, None)
+                if failed.attempts == 0:
+                    failed.first_failure = now
+                failed.attempts += 1
+                if now - failed.first_failure >= self.retry_window:
+                    # Writes queued since then stay queued on their own
+                    self._drop(key, failed, f"after {failed.attempts} failed attempts")
+                    continue
+                newer = self._pending.get(key)
+                if newer is not None:
+                    failed.ops = self._merge_ops(failed.ops, newer.ops)
+                    failed.mutations += newer.mutations
+                failed.retry_at = now + min(self.flush_interval * 2 ** failed.attempts, self.max_backoff)
+                self._pending[key] = failed
+            if self._pending:
+                self._wake.set()
+    
+    def _next_flush(self) -> float:
+        """When the background thread should flush next (monotonic time)."""
+        with self._lock:
+            due = [document.retry_at for document in self._pending.values() if document.attempts]
+            if self._oldest is not None:
+                due.append(self._oldest + self.flush_interval)
+        return min(due) if due else time.monotonic()
+    
+    def flush(self, force: bool = True) -> int:
+        """Commit what is queued now; returns the number of documents written.
+        
+        Without ``force`` documents still backing off after a failure stay queued.
+        """
+        with self._flush_lock:
+            with self._lock:
+                if force:
+                    pending, self._pending = self._pending, {}
+                else:
+                    now = time.monotonic()
+                    pending = {key: document for key, document in self._pending.items()
+                               if not document.attempts or document.retry_at <= now}
+                    self._pending = {key: document for key, document in self._pending.items()
+                                     if key not in pending}
+                self._in_flight = dict(pending)
+                self._oldest = None
+                self._full.clear()
+                if not self._pending:
+                    self._wake.clear()
+            if not pending:
+                return 0
+            
+            client = self._get_client()
+            items = list(pending.items())
+            if client is None:
+                self._requeue(items)
+                return 0
+            
+            written = 0
+            for start in range(0, len(items), self.MAX_BATCH_DOCUMENTS):
+                chunk = items[start:start + self.MAX_BATCH_DOCUMENTS]
+                started = time.perf_counter()
+                try:
+                    self._commit(client, chunk)
+                except Exception as e:
+                    with self._lock:
+                        self.stats["failed_batches"] += 1
+                    firestore_logger.warning(f"Write batch of {len(chunk)} documents failed, will retry: {e}")
+                    self._requeue(chunk)
+                    continue
+                
+                written += len(chunk)
+                with self._lock:
+                    self.stats["batches"] += 1
+                    self.stats["documents_flushed"] += len(chunk)
+                try:
+                    from .monitoring import performance_monitor
+                    performance_monitor.metrics.record_write_batch(
+                        len(chunk),
+                        sum(document.mutations for _, document in chunk),
+                        (time.perf_counter() - started) * 1000,
+                    )
+                except ImportError:
+                    pass
+                for collection in {collection for (collection, _), _ in chunk}:
+                    DatabaseService.invalidate_cache(collection)
+                with self._lock:
+                    for key, _ in chunk:
+                        self._in_flight.pop(key, None)
+            return written
+    
+    def _commit(self, client, chunk: List[tuple]) -> None:
+        """Write one chunk; a transaction when it holds normalized documents, else a WriteBatch."""
+        refs = [client.collection(collection).document(document_id) for (collection, document_id), _ in chunk]
+        normalized = [index for index, ((collection, _), _) in enumerate(chunk) if collection in self._normalizers]
+        if not normalized:
+            batch = client.batch()
+            for ref, (_, document) in zip(refs, chunk):
+                batch.set(ref, self._document_data(document.ops), merge=True)
+            batch.commit()
+            return
+        
+        @firestore.transactional
+        def commit(transaction):
+            stored = {
+                snapshot.reference.path: snapshot.to_dict() if snapshot.exists else None
+                for snapshot in transaction.get_all([refs[index] for index in normalized])
+            }
+            for ref, ((collection, _), document) in zip(refs, chunk):
+                if collection in self._normalizers:
+                    transaction.set(ref, self._normalized_data(collection, stored.get(ref.path), document.ops))
+                else:
+                    transaction.set(ref, self._document_data(document.ops), merge=True)
+        
+        commit(client.transaction())
+    
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="FirestoreWriteBatcher", daemon=True)
+            self._thread.start()
+    
+    def _run(self) -> None:
+        while True:
+            self._wake.wait()
+            if self._closed:
+                return
+            remaining = self._next_flush() - time.monotonic()
+            if remaining > 0:
+                # Sleep out the window unless the buffer fills first
+                self._full.wait(remaining)
+            if self._closed:
+                return
+            try:
+                self.flush(force=False)
+            except Exception as e:
+                firestore_logger.error(f"Write batcher flush failed: {e}")
+    
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Stop the flush thread and write out everything still queued.
+        
+        Failed documents are retried with backoff until the queue is empty or
+        ``timeout`` (default ``shutdown_timeout``) seconds pass; whatever is
+        left then is dropped and logged.
+        """
+        deadline = time.monotonic() + (self.shutdown_timeout if timeout is None else timeout)
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+        self._wake.set()
+        self._full.set()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=max(0.0, deadline - time.monotonic()))
+        attempt = 0
+        while True:
+            self.flush()
+            remaining = deadline - time.monotonic()
+            if not self.pending_documents or remaining <= 0:
+                break
+            time.sleep(min(self.flush_interval * 2 ** attempt, self.max_backoff, remaining))
+            attempt += 1
+        with self._lock:
+            lost, self._pending = self._pending, {}
+            for key, document in lost.items():
+                self._drop(key, document, "at shutdown")
+    
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.stats, pending_documents=len(self._pending))
+
+
+# Global write-behind batcher; init_app wires it to the app's Firestore client
+write_batcher = WriteBatcher(flush_interval=float(os.environ.get("WRITE_BATCH_FLUSH_SECONDS", "0.5")))
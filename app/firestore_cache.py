@@ -15,6 +15,9 @@ from google.cloud import firestore
 class FirestoreCache:
     """Cache implementation using Firestore - no additional infrastructure needed."""
     
+    # Values are stored remotely and must be serialized before caching
+    in_process = False
+    
     def __init__(self):
         self.collection_name = "_cache"  # Firestore collection for cache
         self._client = None
@@ -0,0 +1,345 @@
+"""
+Firestore read/write attribution for the app's shared client.
+
+``traced_client`` wraps the Firestore client stored in
+``app.config["FIRESTORE_DB"]`` so every document read, write and delete
+that goes through it — including direct ``db.collection(...).stream()``
+calls in routes — is counted in ``PerformanceMetrics`` per collection and,
+inside a request, added to the request's usage on ``flask.g``. The
+``after_request`` hook hands that usage to ``PerformanceMetrics``, which
+keeps reads-per-request per endpoint and reads per user.
+
+Reads are counted the way Firestore bills them: one per document returned
+by a query (one for an empty result), one per document in ``get_all``
+whether or not it exists, and one per 1000 index entries for ``count()``.
+Operations slower than ``FIRESTORE_SLOW_QUERY_MS`` are logged with the
+endpoint and user that issued them.
+
+References, queries, snapshots, batches and transactions handed out by a
+traced client are traced too and are unwrapped before reaching the SDK.
+"""
+
+import logging
+import math
+import os
+import time
+from typing import Any, Dict, Optional
+
+from flask import g, has_request_context, request
+
+firestore_logger = logging.getLogger("firestore")
+
+SLOW_QUERY_MS = float(os.environ.get("FIRESTORE_SLOW_QUERY_MS", "500"))
+
+# Query methods that return a new query over the same collection
+_QUERY_BUILDERS = frozenset({
+    "where", "order_by", "limit", "limit_to_last", "offset", "select",
+    "start_at", "start_after", "end_at", "end_before",
+})
+
+
+def _unwrap(value: Any) -> Any:
+    if isinstance(value, _Traced):
+        return value._wrapped
+    if isinstance(value, (list, tuple)):
+        return type(value)(_unwrap(item) for item in value)
+    return value
+
+
+def _collection_of(reference) -> str:
+    if isinstance(reference, _Traced):
+        return reference._collection
+    collection_id = getattr(getattr(reference, "parent", None), "id", "")
+    return collection_id if isinstance(collection_id, str) else ""
+
+
+def _unwrap_call(args, kwargs):
+    return [_unwrap(arg) for arg in args], {name: _unwrap(arg) for name, arg in kwargs.items()}
+
+
+def request_usage() -> Optional[Dict[str, int]]:
+    """Firestore operations counted so far in the current request, or None outside one."""
+    if not has_request_context():
+        return None
+    if "_firestore_usage" not in g:
+        g._firestore_usage = {"reads": 0, "writes": 0, "deletes": 0}
+    return g._firestore_usage
+
+
+def _record(operation: str, collection: str, count: int) -> None:
+    if count <= 0:
+        return
+    try:
+        from .monitoring import performance_monitor
+        metrics = performance_monitor.metrics
+        if operation == "reads":
+            metrics.record_firestore_read(collection, count)
+        elif operation == "writes":
+            metrics.record_firestore_write(collection, count)
+        else:
+            metrics.record_firestore_delete(collection, count)
+    except ImportError:
+        pass
+    usage = request_usage()
+    if usage is not None:
+        usage[operation] += count
+
+
+def _check_slow(description: str, collection: str, started: float, documents: int,
+                elapsed: Optional[float] = None) -> None:
+    """Log and record the operation if it took at least ``SLOW_QUERY_MS``.
+
+    ``elapsed`` (seconds) overrides ``now - started`` for streams, whose wall
+    time includes however long the caller spends on each document.
+    """
+    duration_ms = (time.perf_counter() - started if elapsed is None else elapsed) * 1000
+    if duration_ms < SLOW_QUERY_MS:
+        return
+    endpoint = request.endpoint if has_request_context() else None
+    user_id = None
+    if has_request_context():
+        try:
+            from flask_login import current_user
+            user_id = current_user.get_id() if current_user.is_authenticated else None
+        except Exception:
+            user_id = None
+    entry = {
+        "operation": description,
+        "collection": collection,
+        "documents": documents,
+        "duration_ms": round(duration_ms, 1),
+        "endpoint": endpoint,
+        "user_id": user_id,
+    }
+    firestore_logger.warning(
+        f"Slow Firestore {description} on {collection}: {entry['duration_ms']}ms, "
+        f"{documents} docs (endpoint={endpoint}, user={user_id})"
+    )
+    try:
+        from .monitoring import performance_monitor
+        performance_monitor.metrics.record_slow_query(entry)
+    except ImportError:
+        pass
+
+
+class _Traced:
+    """Delegates everything not overridden to the wrapped SDK object."""
+
+    __slots__ = ("_wrapped", "_collection")
+
+    def __init__(self, wrapped, collection: str = ""):
+        self._wrapped = wrapped
+        self._collection = collection
+
+    def __getattr__(self, name):
+        return getattr(self._wrapped, name)
+
+    def __eq__(self, other):
+        return self._wrapped == _unwrap(other)
+
+    def __hash__(self):
+        return hash(self._wrapped)
+
+    def __repr__(self):
+        return f"Traced({self._wrapped!r})"
+
+
+class _TracedSnapshot(_Traced):
+    __slots__ = ()
+
+    @property
+    def reference(self):
+        return _TracedDocument(self._wrapped.reference, self._collection)
+
+
+class _TracedDocument(_Traced):
+    __slots__ = ()
+
+    def get(self, *args, **kwargs):
+        started = time.perf_counter()
+        args, kwargs = _unwrap_call(args, kwargs)
+        snapshot = self._wrapped.get(*args, **kwargs)
+        _record("reads", self._collection, 1)
+        _check_slow("document get", self._collection, started, 1)
+        return _TracedSnapshot(snapshot, self._collection)
+
+    def set(self, *args, **kwargs):
+        _record("writes", self._collection, 1)
+        return self._wrapped.set(*_unwrap(args), **kwargs)
+
+    def create(self, *args, **kwargs):
+        _record("writes", self._collection, 1)
+        return self._wrapped.create(*_unwrap(args), **kwargs)
+
+    def update(self, *args, **kwargs):
+        _record("writes", self._collection, 1)
+        return self._wrapped.update(*_unwrap(args), **kwargs)
+
+    def delete(self, *args, **kwargs):
+        _record("deletes", self._collection, 1)
+        return self._wrapped.delete(*args, **kwargs)
+
+    def collection(self, name: str):
+        return _TracedCollection(self._wrapped.collection(name), name)
+
+
+class _TracedAggregation(_Traced):
+    __slots__ = ()
+
+    def get(self, *args, **kwargs):
+        started = time.perf_counter()
+        args, kwargs = _unwrap_call(args, kwargs)
+        results = self._wrapped.get(*args, **kwargs)
+        try:
+            entries = max(int(result.value) for row in results for result in row)
+        except (TypeError, ValueError, AttributeError):
+            entries = 0
+        _record("reads", self._collection, max(1, math.ceil(entries / 1000)))
+        _check_slow("aggregation", self._collection, started, entries)
+        return results
+
+
+class _TracedQuery(_Traced):
+    __slots__ = ()
+
+    def __getattr__(self, name):
+        attribute = getattr(self._wrapped, name)
+        if name in _QUERY_BUILDERS:
+            collection = self._collection
+
+            def build(*args, **kwargs):
+                args, kwargs = _unwrap_call(args, kwargs)
+                return _TracedQuery(attribute(*args, **kwargs), collection)
+            return build
+        return attribute
+
+    def stream(self, *args, **kwargs):
+        args, kwargs = _unwrap_call(args, kwargs)
+        return _count_stream(self._wrapped.stream(*args, **kwargs), self._collection, "query")
+
+    def get(self, *args, **kwargs):
+        return list(self.stream(*args, **kwargs))
+
+    def count(self, *args, **kwargs):
+        return _TracedAggregation(self._wrapped.count(*args, **kwargs), self._collection)
+
+
+class _TracedCollection(_TracedQuery):
+    __slots__ = ()
+
+    def document(self, *args, **kwargs):
+        return _TracedDocument(self._wrapped.document(*args, **kwargs), self._collection)
+
+    def add(self, *args, **kwargs):
+        _record("writes", self._collection, 1)
+        update_time, reference = self._wrapped.add(*args, **kwargs)
+        return update_time, _TracedDocument(reference, self._collection)
+
+
+class _TracedWriter(_Traced):
+    """WriteBatch or Transaction: writes are counted as they are queued."""
+
+    __slots__ = ()
+
+    def _queue(self, operation: str, method: str, reference, *args, **kwargs):
+        _record(operation, _collection_of(reference), 1)
+        return getattr(self._wrapped, method)(_unwrap(reference), *_unwrap(args), **kwargs)
+
+    def set(self, reference, *args, **kwargs):
+        return self._queue("writes", "set", reference, *args, **kwargs)
+
+    def create(self, reference, *args, **kwargs):
+        return self._queue("writes", "create", reference, *args, **kwargs)
+
+    def update(self, reference, *args, **kwargs):
+        return self._queue("writes", "update", reference, *args, **kwargs)
+
+    def delete(self, reference, *args, **kwargs):
+        return self._queue("deletes", "delete", reference, *args, **kwargs)
+
+    def get(self, reference, *args, **kwargs):
+        # Transaction reads: a document reference or a query, both streamed
+        description = "transaction get" if isinstance(reference, _TracedDocument) else "transaction query"
+        result = self._wrapped.get(_unwrap(reference), *args, **kwargs)
+        return _count_stream(result, _collection_of(reference), description)
+
+    def get_all(self, references, *args, **kwargs):
+        references = list(references)
+        return _get_all(self._wrapped, references, "transaction get_all", *args, **kwargs)
+
+
+def _count_stream(snapshots, collection: str, description: str):
+    """Yield traced snapshots, then record the reads and the time spent fetching them."""
+    started = time.perf_counter()
+    fetching = 0.0
+    documents = 0
+    iterator = iter(snapshots)
+    try:
+        while True:
+            fetch_started = time.perf_counter()
+            try:
+                snapshot = next(iterator)
+            except StopIteration:
+                fetching += time.perf_counter() - fetch_started
+                return
+            fetching += time.perf_counter() - fetch_started
+            documents += 1
+            yield _TracedSnapshot(snapshot, collection)
+    finally:
+        # An empty result is still billed one read
+        _record("reads", collection, max(1, documents))
+        _check_slow(description, collection, started, documents, elapsed=fetching)
+
+
+def _get_all(reader, references, description: str, *args, **kwargs):
+    """``reader.get_all`` (client or transaction), billing every requested document."""
+    started = time.perf_counter()
+    by_collection: Dict[str, int] = {}
+    for reference in references:
+        collection = _collection_of(reference)
+        by_collection[collection] = by_collection.get(collection, 0) + 1
+    # Every requested document is billed, found or not
+    for collection, count in by_collection.items():
+        _record("reads", collection, count)
+    documents = 0
+    for snapshot in reader.get_all(_unwrap(references), *args, **kwargs):
+        documents += 1
+        yield _TracedSnapshot(snapshot, _collection_of(getattr(snapshot, "reference", None)))
+    _check_slow(description, ",".join(sorted(by_collection)), started, documents)
+
+
+class TracedClient(_Traced):
+    """Firestore client that attributes every operation to the current request."""
+
+    __slots__ = ()
+
+    def collection(self, *path):
+        return _TracedCollection(self._wrapped.collection(*path), path[-1].split("/")[-1])
+
+    def collection_group(self, collection_id: str):
+        return _TracedQuery(self._wrapped.collection_group(collection_id), collection_id)
+
+    def document(self, *path):
+        reference = self._wrapped.document(*path)
+        return _TracedDocument(reference, _collection_of(reference))
+
+    def get_all(self, references, *args, **kwargs):
+        return _get_all(self._wrapped, list(references), "get_all", *args, **kwargs)
+
+    def batch(self, *args, **kwargs):
+        return _TracedWriter(self._wrapped.batch(*args, **kwargs))
+
+    def transaction(self, *args, **kwargs):
+        return _TracedWriter(self._wrapped.transaction(*args, **kwargs))
+
+
+def traced_client(client):
+    """Wrap ``client`` for read attribution (idempotent)."""
+    if client is None or isinstance(client, TracedClient):
+        return client
+    return TracedClient(client)
+
+
+def untraced_client(client):
+    """The SDK client behind ``client``, for code that records its own usage."""
+    return client._wrapped if isinstance(client, TracedClient) else client
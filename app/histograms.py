@@ -0,0 +1,292 @@
+"""
+Fixed-memory latency histograms for performance monitoring.
+
+``LogHistogram`` is a DDSketch-style histogram: values fall into
+logarithmic buckets whose width is a fixed fraction of their value, so any
+quantile is answered within ``relative_accuracy`` of the true sample and
+histograms with the same accuracy merge by adding bucket counts. Values are
+clamped to ``[min_value, max_value]``, which bounds the number of buckets
+(about 1,100 at 1% accuracy for 1 µs to 1 hour in milliseconds).
+
+``LatencyHistograms`` keys histograms by endpoint or query type and keeps
+per-minute slots for rolling windows plus a lifetime histogram per key.
+Recording appends to a buffer owned by the calling thread, so request
+threads never wait on each other; buffers are folded into the shared
+histograms when they fill up, when they age past ``flush_seconds``, and
+before every read.
+"""
+
+import bisect
+import math
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+DEFAULT_QUANTILES = (0.5, 0.95, 0.99, 0.999)
+
+
+class LogHistogram:
+    """Mergeable histogram with relative-error quantiles."""
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY,
+                 min_value: float = 0.001, max_value: float = 3_600_000.0):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.min_value = min_value
+        self.max_value = max_value
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def _index(self, value: float) -> int:
+        value = min(max(value, self.min_value), self.max_value)
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _bucket_value(self, index: int) -> float:
+        # Midpoint (in relative terms) of the bucket (gamma^(i-1), gamma^i]
+        return 2 * self._gamma ** index / (self._gamma + 1)
+
+    def add(self, value: float, count: int = 1) -> None:
+        index = self._index(value)
+        self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += count
+        self.total += value * count
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: "LogHistogram") -> None:
+        """Add ``other``'s samples into this histogram."""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge histograms with different relative accuracy")
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def cumulative_counts(self, upper_bounds: List[float]) -> List[int]:
+        """Samples at or below each of the ascending ``upper_bounds`` (bucket-accurate)."""
+        cumulative = [0] * len(upper_bounds)
+        for index, count in self.buckets.items():
+            position = bisect.bisect_left(upper_bounds, self._bucket_value(index))
+            if position < len(cumulative):
+                cumulative[position] += count
+        for position in range(1, len(cumulative)):
+            cumulative[position] += cumulative[position - 1]
+        return cumulative
+
+    def copy(self) -> "LogHistogram":
+        clone = LogHistogram(self.relative_accuracy, self.min_value, self.max_value)
+        clone.merge(self)
+        return clone
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Estimated value at quantile ``q`` (0-1); 0.0 when empty."""
+        if not self.count:
+            return 0.0
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                return min(max(self._bucket_value(index), self.min), self.max)
+        return self.max
+
+    def percentiles(self, quantiles: Iterable[float] = DEFAULT_QUANTILES) -> Dict[str, float]:
+        """Quantiles keyed ``p50``, ``p95``, ``p99``, ``p999`` and so on."""
+        return {_quantile_label(q): round(self.quantile(q), 3) for q in quantiles}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Export for dashboards: summary stats and ``[upper_bound, count]`` buckets."""
+        return {
+            "count": self.count,
+            "sum": round(self.total, 3),
+            "min": round(self.min, 3) if self.count else 0.0,
+            "max": round(self.max, 3),
+            "relative_accuracy": self.relative_accuracy,
+            "buckets": [
+                [round(self._gamma ** index, 6), self.buckets[index]]
+                for index in sorted(self.buckets)
+            ],
+        }
+
+
+def _quantile_label(q: float) -> str:
+    digits = f"{q * 100:g}".replace(".", "")
+    return f"p{digits}"
+
+
+class RollingHistogram:
+    """Per-slot ``LogHistogram``s covering the last ``slots * slot_seconds`` seconds."""
+
+    def __init__(self, slot_seconds: int = 60, slots: int = 60,
+                 relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY):
+        self.slot_seconds = slot_seconds
+        self.slots = slots
+        self.relative_accuracy = relative_accuracy
+        self._slots: Dict[int, LogHistogram] = {}
+
+    def _prune(self, current_slot: int) -> None:
+        for slot in [slot for slot in self._slots if slot <= current_slot - self.slots]:
+            del self._slots[slot]
+
+    def add(self, value: float, now: float) -> None:
+        slot = int(now // self.slot_seconds)
+        histogram = self._slots.get(slot)
+        if histogram is None:
+            self._prune(slot)
+            histogram = self._slots[slot] = LogHistogram(self.relative_accuracy)
+        histogram.add(value)
+
+    def window(self, window_seconds: float, now: float) -> LogHistogram:
+        """Merged histogram of the slots overlapping the last ``window_seconds``."""
+        current_slot = int(now // self.slot_seconds)
+        self._prune(current_slot)
+        oldest_slot = current_slot - max(1, math.ceil(window_seconds / self.slot_seconds)) + 1
+        merged = LogHistogram(self.relative_accuracy)
+        for slot, histogram in self._slots.items():
+            if slot >= oldest_slot:
+                merged.merge(histogram)
+        return merged
+
+
+class _ThreadBuffer:
+    __slots__ = ("thread", "lock", "samples", "flushed_at")
+
+    def __init__(self, now: float):
+        self.thread = threading.current_thread()
+        self.lock = threading.Lock()
+        self.samples: List[Tuple[str, float, float]] = []
+        self.flushed_at = now
+
+
+class LatencyHistograms:
+    """Keyed rolling and lifetime histograms fed through per-thread buffers."""
+
+    def __init__(self, buffer_size: int = 1000, flush_seconds: float = 5.0,
+                 slot_seconds: int = 60, slots: int = 60,
+                 relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY):
+        self.buffer_size = buffer_size
+        self.flush_seconds = flush_seconds
+        self.slot_seconds = slot_seconds
+        self.slots = slots
+        self.relative_accuracy = relative_accuracy
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._buffers: List[_ThreadBuffer] = []
+        self._rolling: Dict[str, RollingHistogram] = {}
+        self._lifetime: Dict[str, LogHistogram] = {}
+
+    @property
+    def max_window_seconds(self) -> int:
+        return self.slot_seconds * self.slots
+
+    def _buffer(self, now: float) -> _ThreadBuffer:
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is None:
+            buffer = self._local.buffer = _ThreadBuffer(now)
+            with self._lock:
+                self._buffers.append(buffer)
+        return buffer
+
+    def record(self, key: str, value: float) -> None:
+        """Record one sample; only touches the calling thread's buffer unless it is due a flush."""
+        now = time.monotonic()
+        buffer = self._buffer(now)
+        with buffer.lock:
+            buffer.samples.append((key, value, now))
+            due = len(buffer.samples) >= self.buffer_size or now - buffer.flushed_at >= self.flush_seconds
+        if due:
+            self._drain(buffer, now)
+
+    def _drain(self, buffer: _ThreadBuffer, now: float) -> None:
+        with buffer.lock:
+            samples, buffer.samples = buffer.samples, []
+            buffer.flushed_at = now
+        if not samples:
+            return
+        with self._lock:
+            for key, value, recorded_at in samples:
+                rolling = self._rolling.get(key)
+                if rolling is None:
+                    rolling = self._rolling[key] = RollingHistogram(
+                        self.slot_seconds, self.slots, self.relative_accuracy
+                    )
+                    self._lifetime[key] = LogHistogram(self.relative_accuracy)
+                rolling.add(value, recorded_at)
+                self._lifetime[key].add(value)
+
+    def flush(self) -> None:
+        """Fold every thread's buffered samples into the shared histograms."""
+        now = time.monotonic()
+        with self._lock:
+            buffers = list(self._buffers)
+        for buffer in buffers:
+            self._drain(buffer, now)
+        with self._lock:
+            # Threads that have exited can't record again; their buffers are now empty
+            self._buffers = [buffer for buffer in self._buffers if buffer.thread.is_alive()]
+
+    def keys(self) -> List[str]:
+        self.flush()
+        with self._lock:
+            return list(self._lifetime)
+
+    def window(self, key: Optional[str] = None, window_seconds: Optional[float] = None) -> LogHistogram:
+        """Histogram of ``key`` (all keys merged when None) over the last ``window_seconds``.
+
+        ``window_seconds`` of None covers the whole retained window.
+        """
+        self.flush()
+        window_seconds = window_seconds or self.max_window_seconds
+        now = time.monotonic()
+        merged = LogHistogram(self.relative_accuracy)
+        with self._lock:
+            keys = [key] if key is not None else list(self._rolling)
+            for name in keys:
+                if name in self._rolling:
+                    merged.merge(self._rolling[name].window(window_seconds, now))
+        return merged
+
+    def lifetime(self, key: str) -> LogHistogram:
+        """Histogram of every sample recorded for ``key`` since startup."""
+        self.flush()
+        with self._lock:
+            histogram = self._lifetime.get(key)
+            return histogram.copy() if histogram else LogHistogram(self.relative_accuracy)
+
+    def lifetimes(self) -> Dict[str, LogHistogram]:
+        """Copies of every key's lifetime histogram, taken in one pass."""
+        self.flush()
+        with self._lock:
+            return {key: histogram.copy() for key, histogram in self._lifetime.items()}
+
+    def counts(self) -> Dict[str, int]:
+        """Lifetime sample count per key."""
+        self.flush()
+        with self._lock:
+            return {key: histogram.count for key, histogram in self._lifetime.items()}
+
+    def export(self, window_seconds: Optional[float] = None, include_buckets: bool = True) -> Dict[str, Any]:
+        """Per-key window histograms with percentiles, for JSON metrics endpoints."""
+        exported = {}
+        for key in self.keys():
+            histogram = self.window(key, window_seconds)
+            if not histogram.count:
+                continue
+            entry = histogram.to_dict() if include_buckets else {"count": histogram.count}
+            entry["mean"] = round(histogram.mean, 3)
+            entry.update(histogram.percentiles())
+            exported[key] = entry
+        return exported
@@ -1,8 +1,11 @@
 # app/models.py
 from flask_login import UserMixin, LoginManager
-from flask import current_app
+from flask import current_app, g, has_request_context
 from .cache_manager import cache_manager
 
+# Cross-request TTL for cached user documents read by load_user
+USER_CACHE_TTL_MINUTES = 30
+
 login_manager = LoginManager()
 login_manager.login_view = "auth.login_prompt_page"
 login_manager.login_message = "Please sign in with Google to access this page."
@@ -38,24 +41,67 @@ class User(UserMixin):
         return profile_data
 
 
+def _record_memo_hit() -> None:
+    # Cache and Firestore lookups are already counted as "user_data" hits/misses by CacheManager
+    try:
+        from .monitoring import performance_monitor
+        performance_monitor.metrics.record_cache_hit("user_session")
+    except ImportError:
+        pass
+
+
+def _request_memo() -> dict:
+    """Users already loaded during this request, keyed by id (empty outside a request)."""
+    if not has_request_context():
+        return {}
+    if "_loaded_users" not in g:
+        g._loaded_users = {}
+    return g._loaded_users
+
+
+def _forget_in_request(user_id_str: str) -> None:
+    if has_request_context():
+        _request_memo().pop(user_id_str, None)
+        g.pop("_profile_context", None)
+
+
+def remember_user_data(user_id, user_data: dict) -> None:
+    """Write fresh user data through to the cache ``load_user`` reads."""
+    user_id_str = str(user_id)
+    _forget_in_request(user_id_str)
+    cache_manager.set_user_data(user_id_str, user_data, ttl_minutes=USER_CACHE_TTL_MINUTES)
+
+
+def forget_user_data(user_id) -> None:
+    """Drop cached user data after a write, so the next ``load_user`` reads Firestore."""
+    user_id_str = str(user_id)
+    _forget_in_request(user_id_str)
+    cache_manager.invalidate_user_data(user_id_str)
+
+
 @login_manager.user_loader
 def load_user(user_id_from_session):
-    """Loads a user from cache first, then Firestore if needed."""
+    """Loads a user from the request memo, then cache, then Firestore if needed."""
     if not user_id_from_session:
         return None
         
     user_id_str = str(user_id_from_session)
+    memo = _request_memo()
+    if user_id_str in memo:
+        _record_memo_hit()
+        return memo[user_id_str]
     
     # Try to get from Redis cache first
     try:
         cached_user_data = cache_manager.get_user_data(user_id_str)
         if cached_user_data:
-            return User(user_id=user_id_str, data=cached_user_data)
+            memo[user_id_str] = User(user_id=user_id_str, data=cached_user_data)
+            return memo[user_id_str]
     except Exception as e:
         # Only log cache errors in debug mode
         if current_app and current_app.debug:
             print(f"[LOAD_USER_CACHE] Error loading user from cache: {e}", flush=True)
-    
+
     # Fallback to Firestore if not in cache
     db = current_app.config.get("FIRESTORE_DB")
     if not db:
@@ -73,9 +119,10 @@ def load_user(user_id_from_session):
 
         if user_doc.exists:
             user_data = user_doc.to_dict()
-            # Cache the user data for future requests (30 minute TTL)
-            cache_manager.set_user_data(user_id_str, user_data, ttl_minutes=30)
-            return User(user_id=user_id_str, data=user_data)
+            # Cache the user data for future requests
+            cache_manager.set_user_data(user_id_str, user_data, ttl_minutes=USER_CACHE_TTL_MINUTES)
+            memo[user_id_str] = User(user_id=user_id_str, data=user_data)
+            return memo[user_id_str]
         else:
             # Only log user not found in debug mode
             if current_app and current_app.debug:
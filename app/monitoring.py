@@ -8,30 +8,39 @@ import threading
 from typing import Dict, Any, Optional, List
 from datetime import datetime, timedelta
 from collections import defaultdict, deque
-import statistics
 import json
 import os
 from flask import current_app
 
+from .histograms import LatencyHistograms
+
 
 class PerformanceMetrics:
     """Tracks performance metrics in memory."""
     
+    # Window for the summary latency figures (percentiles and averages)
+    LATENCY_WINDOW_SECONDS = 300
+    
     def __init__(self, max_samples: int = 1000):
+        # Samples a thread buffers before folding them into the shared histograms
         self.max_samples = max_samples
         self._lock = threading.RLock()
         
         # Metrics storage
-        self.request_times = defaultdict(lambda: deque(maxlen=max_samples))
+        self.request_times = LatencyHistograms(buffer_size=max_samples)
         self.error_counts = defaultdict(int)
         self.cache_stats = {
             "hits": 0,
             "misses": 0,
             "errors": 0
         }
-        self.db_query_times = defaultdict(lambda: deque(maxlen=max_samples))
+        self.cache_stats_by_type = defaultdict(lambda: {"hits": 0, "misses": 0, "errors": 0})
+        self.db_query_times = LatencyHistograms(buffer_size=max_samples)
+        # Firestore documents read per request, by endpoint (counts, not milliseconds)
+        self.reads_per_request = LatencyHistograms(buffer_size=max_samples)
+        # Documents and coalesced mutations per write-behind batch (counts)
+        self.write_batches = LatencyHistograms(buffer_size=max_samples)
         self.active_users = set()
-        self.endpoint_calls = defaultdict(int)
         
         # Firestore usage tracking for cost monitoring
         self.firestore_operations = {
@@ -39,21 +48,27 @@ class PerformanceMetrics:
             "writes": defaultdict(int),
             "deletes": defaultdict(int),
             "batch_reads": defaultdict(int),
+            "reads_by_user": defaultdict(int),
             "total_reads_today": 0,
             "total_writes_today": 0,
             "total_deletes_today": 0,
             "last_reset": datetime.now()
         }
         
+        self.slow_queries = deque(maxlen=100)
+        
         # System health
         self.last_health_check = None
         self.health_status = {}
         
+    @property
+    def endpoint_calls(self) -> Dict[str, int]:
+        """Requests recorded per endpoint since startup."""
+        return self.request_times.counts()
+    
     def record_request_time(self, endpoint: str, duration_ms: float):
         """Record request processing time."""
-        with self._lock:
-            self.request_times[endpoint].append(duration_ms)
-            self.endpoint_calls[endpoint] += 1
+        self.request_times.record(endpoint, duration_ms)
     
     def record_error(self, error_type: str):
         """Record an error occurrence."""
@@ -64,21 +79,23 @@ class PerformanceMetrics:
         """Record a cache hit."""
         with self._lock:
             self.cache_stats["hits"] += 1
+            self.cache_stats_by_type[cache_type]["hits"] += 1
     
     def record_cache_miss(self, cache_type: str = "general"):
         """Record a cache miss."""
         with self._lock:
             self.cache_stats["misses"] += 1
+            self.cache_stats_by_type[cache_type]["misses"] += 1
     
     def record_cache_error(self, cache_type: str = "general"):
         """Record a cache error."""
         with self._lock:
             self.cache_stats["errors"] += 1
+            self.cache_stats_by_type[cache_type]["errors"] += 1
     
     def record_db_query_time(self, query_type: str, duration_ms: float):
         """Record database query time."""
-        with self._lock:
-            self.db_query_times[query_type].append(duration_ms)
+        self.db_query_times.record(query_type, duration_ms)
     
     def record_active_user(self, user_id: str):
         """Record an active user."""
@@ -114,6 +131,35 @@ class PerformanceMetrics:
             self.firestore_operations["batch_reads"][collection] += count
             self.firestore_operations["total_reads_today"] += count
     
+    def record_request_firestore_usage(self, endpoint: str, user_id: Optional[str], usage: Dict[str, int]):
+        """Record the Firestore operations one request made, attributed to its endpoint and user."""
+        reads = usage.get("reads", 0)
+        self.reads_per_request.record(endpoint, reads)
+        if user_id and reads:
+            with self._lock:
+                self._check_daily_reset()
+                self.firestore_operations["reads_by_user"][user_id] += reads
+    
+    def record_slow_query(self, entry: Dict[str, Any]):
+        """Keep a slow Firestore operation for the dashboard's slow query log."""
+        entry = dict(entry, timestamp=datetime.utcnow().isoformat())
+        with self._lock:
+            self.slow_queries.append(entry)
+    
+    def record_write_batch(self, documents: int, mutations: int, flush_ms: float):
+        """Record one committed write-behind batch: its size and how long the commit took."""
+        self.write_batches.record("documents", documents)
+        self.write_batches.record("mutations", mutations)
+        self.db_query_times.record("write_batch_flush", flush_ms)
+    
+    def get_write_batch_stats(self, window_seconds: int = None) -> Dict[str, Dict[str, float]]:
+        """Distribution of documents and queued mutations per write-behind batch."""
+        return self.write_batches.export(window_seconds or self.LATENCY_WINDOW_SECONDS, include_buckets=False)
+    
+    def get_reads_per_request(self, window_seconds: int = None) -> Dict[str, Dict[str, float]]:
+        """Per-endpoint distribution of Firestore reads per request."""
+        return self.reads_per_request.export(window_seconds or self.LATENCY_WINDOW_SECONDS, include_buckets=False)
+    
     def _check_daily_reset(self):
         """Reset daily counters if it's a new day."""
         now = datetime.now()
@@ -124,6 +170,7 @@ class PerformanceMetrics:
             self.firestore_operations["total_reads_today"] = 0
             self.firestore_operations["total_writes_today"] = 0
             self.firestore_operations["total_deletes_today"] = 0
+            self.firestore_operations["reads_by_user"].clear()
             self.firestore_operations["last_reset"] = now
     
     def get_firestore_usage_stats(self, days: int = 1) -> Dict[str, Any]:
@@ -132,6 +179,8 @@ class PerformanceMetrics:
         Args:
             days: Number of days to calculate stats for (1, 7, 14, 30, 60)
         """
+        reads_per_request = self.get_reads_per_request()
+        write_batches = self.get_write_batch_stats()
         with self._lock:
             self._check_daily_reset()
             
@@ -153,6 +202,12 @@ class PerformanceMetrics:
                 "daily_deletes": period_deletes,
                 "reads_by_collection": dict(self.firestore_operations["reads"]),
                 "writes_by_collection": dict(self.firestore_operations["writes"]),
+                "reads_per_request": reads_per_request,
+                "write_batches": write_batches,
+                "top_users_by_reads": sorted(
+                    self.firestore_operations["reads_by_user"].items(), key=lambda item: item[1], reverse=True
+                )[:10],
+                "slow_queries": list(self.slow_queries)[-20:],
                 "estimated_daily_cost": self._estimate_firestore_cost(days)
             }
     
@@ -182,43 +237,34 @@ class PerformanceMetrics:
         
         return round(reads_cost + writes_cost + deletes_cost, 4)
     
-    def get_cache_hit_rate(self) -> float:
-        """Calculate cache hit rate."""
-        total = self.cache_stats["hits"] + self.cache_stats["misses"]
+    def get_cache_hit_rate(self, cache_type: str = None) -> float:
+        """Calculate cache hit rate, overall or for one cache type."""
+        stats = self.cache_stats_by_type.get(cache_type, {"hits": 0, "misses": 0}) if cache_type else self.cache_stats
+        total = stats["hits"] + stats["misses"]
         if total == 0:
             return 0.0
-        return (self.cache_stats["hits"] / total) * 100
+        return (stats["hits"] / total) * 100
     
-    def get_average_response_time(self, endpoint: str = None) -> float:
+    def get_average_response_time(self, endpoint: str = None, window_seconds: int = None) -> float:
         """Get average response time for endpoint or overall."""
-        with self._lock:
-            if endpoint:
-                times = list(self.request_times[endpoint])
-                return statistics.mean(times) if times else 0.0
-            
-            all_times = []
-            for times in self.request_times.values():
-                all_times.extend(times)
-            
-            return statistics.mean(all_times) if all_times else 0.0
+        return self.request_times.window(endpoint, window_seconds or self.LATENCY_WINDOW_SECONDS).mean
     
-    def get_p95_response_time(self, endpoint: str = None) -> float:
+    def get_p95_response_time(self, endpoint: str = None, window_seconds: int = None) -> float:
         """Get 95th percentile response time."""
-        with self._lock:
-            if endpoint:
-                times = list(self.request_times[endpoint])
-            else:
-                all_times = []
-                for times in self.request_times.values():
-                    all_times.extend(times)
-                times = all_times
-            
-            if not times:
-                return 0.0
-            
-            times.sort()
-            index = int(0.95 * len(times))
-            return times[index] if index < len(times) else times[-1]
+        return self.request_times.window(endpoint, window_seconds or self.LATENCY_WINDOW_SECONDS).quantile(0.95)
+    
+    def get_latency_percentiles(self, endpoint: str = None, window_seconds: int = None) -> Dict[str, float]:
+        """Get p50/p95/p99/p999 response times for endpoint or overall."""
+        return self.request_times.window(endpoint, window_seconds or self.LATENCY_WINDOW_SECONDS).percentiles()
+    
+    def get_latency_histograms(self, window_seconds: int = None, include_buckets: bool = True) -> Dict[str, Any]:
+        """Get per-endpoint and per-query-type latency histograms for dashboards."""
+        window_seconds = window_seconds or self.LATENCY_WINDOW_SECONDS
+        return {
+            "window_seconds": window_seconds,
+            "requests": self.request_times.export(window_seconds, include_buckets),
+            "db_queries": self.db_query_times.export(window_seconds, include_buckets),
+        }
     
     def get_active_user_count(self) -> int:
         """Get count of active users."""
@@ -238,9 +284,11 @@ class PerformanceMetrics:
     
     def get_health_summary(self) -> Dict[str, Any]:
         """Get overall health summary."""
+        percentiles = self.get_latency_percentiles()
         return {
             "avg_response_time": round(self.get_average_response_time(), 2),
-            "p95_response_time": round(self.get_p95_response_time(), 2),
+            "p95_response_time": round(percentiles["p95"], 2),
+            "p99_response_time": round(percentiles["p99"], 2),
             "cache_hit_rate": round(self.get_cache_hit_rate(), 2),
             "active_users": self.get_active_user_count(),
             "total_requests": sum(self.endpoint_calls.values()),
@@ -267,7 +315,10 @@ class AlertManager:
             "hourly_cost_usd": 0.2,  # $0.20 hourly cost spike threshold
             "daily_reads": 10000,  # 10k reads per day warning
             "hourly_reads": 1000,  # 1k reads per hour spike warning
+            "reads_per_request": 200,  # p95 Firestore reads for a single endpoint
         }
+        # Requests an endpoint needs in the window before its reads per request can alert
+        self.min_requests_for_read_alert = 10
         self.active_alerts = {}
         self.alert_cooldown = timedelta(minutes=15)  # Don't spam alerts
         self.cost_tracking = {
@@ -405,6 +456,26 @@ class AlertManager:
                     }
                 })
         
+        # Endpoints whose requests read far more documents than expected (cost regressions)
+        for endpoint, reads in usage_stats.get("reads_per_request", {}).items():
+            if reads["count"] < self.min_requests_for_read_alert:
+                continue
+            if reads["p95"] > self.alert_thresholds["reads_per_request"]:
+                alert_key = f"expensive_endpoint:{endpoint}"
+                if self._should_alert(alert_key, current_time):
+                    alerts.append({
+                        "type": "expensive_endpoint",
+                        "message": f"Endpoint {endpoint} reads {reads['p95']:.0f} Firestore documents per request at p95 (threshold: {self.alert_thresholds['reads_per_request']})",
+                        "severity": "warning",
+                        "timestamp": current_time.isoformat(),
+                        "cost_details": {
+                            "endpoint": endpoint,
+                            "p95_reads_per_request": reads["p95"],
+                            "mean_reads_per_request": reads["mean"],
+                            "requests": reads["count"]
+                        }
+                    })
+        
         # Hourly spike detection (if we have historical data)
         if len(self.cost_tracking["hourly_reads"]) > 1:
             recent_avg = sum(list(self.cost_tracking["hourly_reads"])[-3:]) / min(3, len(self.cost_tracking["hourly_reads"]))
@@ -528,6 +599,7 @@ class PerformanceMonitor:
             "health_summary": self.metrics.get_health_summary(),
             "top_endpoints": self.metrics.get_top_endpoints(),
             "cache_stats": self.metrics.cache_stats,
+            "latency": self.metrics.get_latency_histograms(),
             "active_alerts": len(self.alert_manager.active_alerts),
             "cost_trends": self.alert_manager.get_cost_trends()
         }
@@ -0,0 +1,49 @@
+"""
+Opaque keyset cursors for paginated API endpoints.
+
+A cursor carries the sort key and id of the last item a client has seen, so
+the next page starts right after it (Firestore ``start_after`` for remote
+data, sort ranks for in-memory data) instead of skipping an offset. Clients
+treat the string as opaque and send back ``pagination.next_cursor``.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, List
+
+_DATETIME_TAG = "$dt"
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {_DATETIME_TAG: value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if set(value) != {_DATETIME_TAG} or not isinstance(value[_DATETIME_TAG], str):
+            raise ValueError("Invalid cursor value")
+        return datetime.fromisoformat(value[_DATETIME_TAG])
+    if isinstance(value, list):
+        raise ValueError("Invalid cursor value")
+    return value
+
+
+def encode_cursor(*values: Any) -> str:
+    """Opaque URL-safe cursor for a sort key; datetimes keep their timezone."""
+    payload = json.dumps([_encode_value(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Sort key values from ``encode_cursor``; raises ValueError unless there are exactly ``size``."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Invalid cursor")
+    return [_decode_value(value) for value in values]
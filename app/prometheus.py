@@ -0,0 +1,217 @@
+"""
+Prometheus text-format exposition of the in-process metrics.
+
+Renders ``PerformanceMetrics`` (latency histograms, cache hits per cache
+type, Firestore operations per collection, errors), the ``SecurityMonitor``
+counters and, once the simulator has created it, the battle card cache's
+``CacheMetrics``. Latencies are re-bucketed from the log histograms into
+fixed ``le`` boundaries, so each histogram series has a constant number of
+lines. Series per family are capped and the rendered text is reused for
+``RENDER_TTL_SECONDS``, which keeps scrape cost bounded however many
+endpoints or scrapers there are.
+"""
+
+import sys
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+METRIC_PREFIX = "pvpocket"
+
+# Latency bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+MAX_SERIES_PER_FAMILY = 100
+RENDER_TTL_SECONDS = 5.0
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Writer:
+    """Accumulates exposition lines family by family."""
+
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def family(self, name: str, metric_type: str, help_text: str,
+               samples: Iterable[Tuple[Labels, float]]) -> None:
+        samples = list(samples)[:MAX_SERIES_PER_FAMILY]
+        if not samples:
+            return
+        full_name = f"{METRIC_PREFIX}_{name}"
+        self.lines.append(f"# HELP {full_name} {help_text}")
+        self.lines.append(f"# TYPE {full_name} {metric_type}")
+        for labels, value in samples:
+            self.lines.append(f"{full_name}{_format_labels(labels)} {_format_value(value)}")
+
+    def histograms(self, name: str, help_text: str, label_name: str, histograms: Dict) -> None:
+        """Latency histograms (recorded in milliseconds) as second-based Prometheus histograms."""
+        if not histograms:
+            return
+        full_name = f"{METRIC_PREFIX}_{name}"
+        self.lines.append(f"# HELP {full_name} {help_text}")
+        self.lines.append(f"# TYPE {full_name} histogram")
+        bounds_ms = [bound * 1000 for bound in LATENCY_BUCKETS]
+        busiest = sorted(histograms.items(), key=lambda item: item[1].count, reverse=True)
+        for key, histogram in busiest[:MAX_SERIES_PER_FAMILY]:
+            label = f'{label_name}="{_escape(key)}"'
+            for bound, count in zip(LATENCY_BUCKETS, histogram.cumulative_counts(bounds_ms)):
+                self.lines.append(f'{full_name}_bucket{{{label},le="{bound}"}} {count}')
+            self.lines.append(f'{full_name}_bucket{{{label},le="+Inf"}} {histogram.count}')
+            self.lines.append(f"{full_name}_sum{{{label}}} {histogram.total / 1000!r}")
+            self.lines.append(f"{full_name}_count{{{label}}} {histogram.count}")
+
+    def summaries(self, name: str, help_text: str, label_name: str, histograms: Dict) -> None:
+        """Count and sum per key, e.g. Firestore reads per request by endpoint."""
+        if not histograms:
+            return
+        full_name = f"{METRIC_PREFIX}_{name}"
+        self.lines.append(f"# HELP {full_name} {help_text}")
+        self.lines.append(f"# TYPE {full_name} summary")
+        busiest = sorted(histograms.items(), key=lambda item: item[1].total, reverse=True)
+        for key, histogram in busiest[:MAX_SERIES_PER_FAMILY]:
+            label = f'{label_name}="{_escape(key)}"'
+            self.lines.append(f"{full_name}_sum{{{label}}} {round(histogram.total)}")
+            self.lines.append(f"{full_name}_count{{{label}}} {histogram.count}")
+
+    def text(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+def _write_performance_metrics(writer: _Writer, metrics) -> None:
+    writer.histograms(
+        "http_request_duration_seconds", "Request latency by Flask endpoint.",
+        "endpoint", metrics.request_times.lifetimes(),
+    )
+    writer.histograms(
+        "db_query_duration_seconds", "Firestore query latency by query type.",
+        "query_type", metrics.db_query_times.lifetimes(),
+    )
+    writer.summaries(
+        "firestore_request_reads", "Firestore documents read per request by Flask endpoint.",
+        "endpoint", metrics.reads_per_request.lifetimes(),
+    )
+    writer.summaries(
+        "firestore_write_batch_size", "Documents and coalesced mutations per write-behind batch.",
+        "unit", metrics.write_batches.lifetimes(),
+    )
+
+    with metrics._lock:
+        cache_by_type = {cache_type: dict(stats) for cache_type, stats in metrics.cache_stats_by_type.items()}
+        errors = dict(metrics.error_counts)
+        operations = {
+            operation: dict(metrics.firestore_operations[operation])
+            for operation in ("reads", "batch_reads", "writes", "deletes")
+        }
+        active_users = len(metrics.active_users)
+
+    writer.family(
+        "cache_requests_total", "counter", "Cache lookups by cache type and result.",
+        (
+            ((("cache_type", cache_type), ("result", result)), stats[key])
+            for cache_type, stats in sorted(cache_by_type.items())
+            for result, key in (("hit", "hits"), ("miss", "misses"), ("error", "errors"))
+        ),
+    )
+    writer.family(
+        "cache_hit_ratio", "gauge", "Cache hit ratio (0-1) by cache type.",
+        (
+            ((("cache_type", cache_type),), stats["hits"] / (stats["hits"] + stats["misses"]))
+            for cache_type, stats in sorted(cache_by_type.items())
+            if stats["hits"] + stats["misses"]
+        ),
+    )
+
+    reads = dict(operations["reads"])
+    for collection, count in operations["batch_reads"].items():
+        reads[collection] = reads.get(collection, 0) + count
+    writer.family(
+        "firestore_reads_total", "counter", "Firestore document reads by collection.",
+        (((("collection", collection),), count) for collection, count in sorted(reads.items())),
+    )
+    writer.family(
+        "firestore_writes_total", "counter", "Firestore document writes by collection.",
+        (((("collection", collection),), count) for collection, count in sorted(operations["writes"].items())),
+    )
+    writer.family(
+        "firestore_deletes_total", "counter", "Firestore document deletes by collection.",
+        (((("collection", collection),), count) for collection, count in sorted(operations["deletes"].items())),
+    )
+    writer.family(
+        "errors_total", "counter", "Recorded application errors by type.",
+        (((("error_type", error_type),), count) for error_type, count in sorted(errors.items())),
+    )
+    writer.family("active_users", "gauge", "Users active in the current monitoring interval.", [((), active_users)])
+
+
+def _write_security_metrics(writer: _Writer, monitor) -> None:
+    # Totals only: per-identifier labels would expose IPs and grow without bound
+    attempts = list(monitor.failed_attempts.values())
+    writer.family(
+        "security_failed_attempts", "gauge",
+        "Failed authentication attempts in the current hourly window.", [((), sum(attempts))],
+    )
+    writer.family(
+        "security_blocked_identifiers", "gauge",
+        "Identifiers currently blocked for repeated failures.", [((), sum(1 for count in attempts if count > 10))],
+    )
+
+
+def _write_battle_cache_metrics(writer: _Writer) -> None:
+    # Only report a cache the simulator already created; never import or load it here
+    battle_cache_module = sys.modules.get("simulator.core.battle_cache")
+    battle_cache = getattr(battle_cache_module, "_battle_cache", None)
+    if battle_cache is None:
+        return
+    cache_metrics = battle_cache.metrics
+    writer.family(
+        "battle_cache_requests_total", "counter", "Battle card cache lookups by result.",
+        [((("result", "hit"),), cache_metrics.cache_hits), ((("result", "miss"),), cache_metrics.cache_misses)],
+    )
+    writer.family(
+        "battle_cache_hit_ratio", "gauge", "Battle card cache hit ratio (0-1).",
+        [((), cache_metrics.hit_rate / 100)],
+    )
+    writer.family(
+        "battle_cache_load_seconds", "gauge", "Duration of the last battle card cache load.",
+        [((), float(cache_metrics.load_time))],
+    )
+
+
+def render_metrics(metrics, security_monitor=None) -> str:
+    """Prometheus text exposition of ``metrics`` (a PerformanceMetrics) and related counters."""
+    writer = _Writer()
+    _write_performance_metrics(writer, metrics)
+    if security_monitor is not None:
+        _write_security_metrics(writer, security_monitor)
+    _write_battle_cache_metrics(writer)
+    return writer.text()
+
+
+_render_lock = threading.Lock()
+_rendered: Optional[Tuple[float, str]] = None
+
+
+def cached_render_metrics(metrics, security_monitor=None) -> str:
+    """``render_metrics`` reused for ``RENDER_TTL_SECONDS`` across scrapes."""
+    global _rendered
+    with _render_lock:
+        if _rendered is None or time.monotonic() - _rendered[0] >= RENDER_TTL_SECONDS:
+            _rendered = (time.monotonic(), render_metrics(metrics, security_monitor))
+        return _rendered[1]
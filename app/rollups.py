@@ -0,0 +1,129 @@
+"""
+Daily analytics rollups for the admin dashboard.
+
+One document per UTC day in ``analytics_daily`` (id ``YYYY-MM-DD``), updated
+with Firestore increments in the same batch as the login or signup:
+
+- ``logins``: successful logins that day
+- ``new_users``: accounts created that day
+- ``last_active_users``: users whose most recent login falls on that day
+
+A login moves the user from the day of their previous login to today in
+``last_active_users``, so each user is counted on exactly one day and the
+number of users active since day D is the sum over the days from D on.
+Any window's active, new and login totals cost one read per day.
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from firebase_admin import firestore
+
+ROLLUP_COLLECTION = "analytics_daily"
+ROLLUP_FIELDS = ("logins", "new_users", "last_active_users")
+
+
+def day_key(moment: datetime) -> str:
+    """Rollup document id for the UTC day containing ``moment``."""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return moment.strftime("%Y-%m-%d")
+
+
+def _day_ref(db, moment: datetime):
+    return db.collection(ROLLUP_COLLECTION).document(day_key(moment))
+
+
+def _add(db, writer, moment: datetime, **amounts: int) -> None:
+    fields = {field: firestore.Increment(amount) for field, amount in amounts.items() if amount}
+    if fields:
+        writer.set(_day_ref(db, moment), fields, merge=True)
+
+
+def record_login(db, writer, previous_login: Optional[datetime], now: Optional[datetime] = None) -> None:
+    """Count a login in ``writer`` (a WriteBatch or Transaction).
+
+    ``previous_login`` is the user's ``last_login`` before this one, or None
+    for a first login. The caller writes the new ``last_login`` in the same batch.
+    """
+    now = now or datetime.now(timezone.utc)
+    if isinstance(previous_login, datetime) and day_key(previous_login) == day_key(now):
+        _add(db, writer, now, logins=1)
+        return
+    _add(db, writer, now, logins=1, last_active_users=1)
+    if isinstance(previous_login, datetime):
+        _add(db, writer, previous_login, last_active_users=-1)
+
+
+def record_new_user(db, writer, now: Optional[datetime] = None) -> None:
+    """Count an account creation in ``writer``."""
+    _add(db, writer, now or datetime.now(timezone.utc), new_users=1)
+
+
+def record_user_deleted(db, writer, last_login: Optional[datetime]) -> None:
+    """Stop counting a deleted user as active on the day of their last login."""
+    if isinstance(last_login, datetime):
+        _add(db, writer, last_login, last_active_users=-1)
+
+
+def read_days(db, days: int, now: Optional[datetime] = None) -> List[Dict[str, int]]:
+    """Rollups for the last ``days`` UTC days, oldest first; missing days read as zeros."""
+    now = now or datetime.now(timezone.utc)
+    refs = [_day_ref(db, now - timedelta(days=offset)) for offset in range(days - 1, -1, -1)]
+    found = {}
+    for doc in db.get_all(refs):
+        if doc.exists:
+            found[doc.id] = doc.to_dict() or {}
+    return [
+        {field: int(found.get(ref.id, {}).get(field, 0)) for field in ROLLUP_FIELDS}
+        for ref in refs
+    ]
+
+
+def summarize(rollups: List[Dict[str, int]], period_days: int) -> Dict[str, int]:
+    """Active, new and login totals from ``read_days`` output for common windows.
+
+    ``rollups`` must cover at least ``max(period_days, 30)`` days.
+    """
+    def total(field: str, days: int) -> int:
+        return sum(day[field] for day in rollups[-days:]) if days else 0
+
+    return {
+        "daily_active": total("last_active_users", 1),
+        "weekly_active": total("last_active_users", 7),
+        "monthly_active": total("last_active_users", 30),
+        "active_users_period": total("last_active_users", period_days),
+        "new_users_period": total("new_users", period_days),
+        "logins_period": total("logins", period_days),
+    }
+
+
+def backfill(db, users: Iterable[Any]) -> int:
+    """Rebuild ``new_users`` and ``last_active_users`` from user documents.
+
+    ``users`` are user document snapshots. Existing rollup days missing from
+    the rebuilt counts are zeroed; ``logins`` can't be recovered and is kept.
+    Returns the number of day documents written.
+    """
+    rebuilt: Dict[str, Dict[str, int]] = {}
+    for user_doc in users:
+        user_data = user_doc.to_dict() or {}
+        for source, field in (("created_at", "new_users"), ("last_login", "last_active_users")):
+            moment = user_data.get(source)
+            if isinstance(moment, datetime):
+                counts = rebuilt.setdefault(day_key(moment), {"new_users": 0, "last_active_users": 0})
+                counts[field] += 1
+
+    for doc in db.collection(ROLLUP_COLLECTION).select([]).stream():
+        rebuilt.setdefault(doc.id, {"new_users": 0, "last_active_users": 0})
+
+    batch = db.batch()
+    pending = 0
+    for key, counts in rebuilt.items():
+        batch.set(db.collection(ROLLUP_COLLECTION).document(key), counts, merge=True)
+        pending += 1
+        if pending % 400 == 0:  # Firestore batches hold at most 500 writes
+            batch.commit()
+            batch = db.batch()
+    batch.commit()
+    return len(rebuilt)
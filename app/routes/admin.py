@@ -9,7 +9,11 @@ import os
 from datetime import datetime, timedelta
 from ..monitoring import performance_monitor
 from ..cache_manager import cache_manager
-from ..db_service import db_service
+from ..counters import decks_counter, users_counter
+from .. import rollups
+from ..task_queue import enqueue_analytics_backfill
+from ..user_search import PREFIX_END, user_search_index
+from ..db_service import db_service, write_batcher
 from google.cloud.firestore_v1 import Query
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
@@ -115,22 +119,9 @@ def metrics_summary():
                     current_app.logger.warning(f"Admin: Fallback query sampled {len(cards_docs)} cards, estimated {total_cards} total")
                     total_sets = 5  # Estimated
                 
-                # Count total users and active users
-                from datetime import datetime, timedelta
-                thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-                
-                # COST OPTIMIZATION: Sample users for admin dashboard instead of loading all 2000
-                users_query = db.collection("users").limit(50)
-                users_docs = list(users_query.stream())
-                total_users = len(users_docs) * 2  # Rough estimate - adjust as needed
-                
-                active_users_count = 0
-                for user_doc in users_docs:
-                    user_data = user_doc.to_dict()
-                    if 'last_login' in user_data and user_data['last_login'] > thirty_days_ago:
-                        active_users_count += 1
-                # Scale up the active users estimate based on sample
-                active_users = active_users_count * 2 if users_docs else 0
+                # Count total users and active users from the counter shards and 30 daily rollups
+                total_users = users_counter.value(db)
+                active_users = rollups.summarize(rollups.read_days(db, 30), 30)["monthly_active"]
                 
                 # Count open support tickets (new, in_progress)
                 tickets_query = db.collection("support_tickets").where("status", "in", ["new", "in_progress"]).limit(100)
@@ -194,17 +185,25 @@ def metrics_summary():
             "performance": {
                 "response_times": {
                     "average": health_summary.get("avg_response_time", 0),
-                    "p95": health_summary.get("p95_response_time", 0)
+                    "p95": health_summary.get("p95_response_time", 0),
+                    "p99": health_summary.get("p99_response_time", 0)
                 },
+                "latency_percentiles": performance_monitor.metrics.get_latency_percentiles(),
+                "latency_histograms": performance_monitor.metrics.get_latency_histograms(),
                 "active_users": health_summary.get("active_users", 0),
                 "total_requests": health_summary.get("total_requests", 0),
                 "top_endpoints": performance_monitor.metrics.get_top_endpoints()
             },
             "firestore_usage": performance_monitor.metrics.get_firestore_usage_stats(),
+            "write_batcher": write_batcher.get_stats(),
             "cache_stats": {
                 "hit_rate": performance_monitor.metrics.get_cache_hit_rate(),
                 "total_hits": performance_monitor.metrics.cache_stats.get("hits", 0),
-                "total_misses": performance_monitor.metrics.cache_stats.get("misses", 0)
+                "total_misses": performance_monitor.metrics.cache_stats.get("misses", 0),
+                "by_type": {
+                    cache_type: dict(stats)
+                    for cache_type, stats in performance_monitor.metrics.cache_stats_by_type.items()
+                }
             }
         }
         
@@ -534,34 +533,47 @@ def search_users():
         if not query:
             return jsonify({"users": [], "total": 0}), 200
         
-        users = []
+        # Keyed by id so each user appears once, in match order
+        users = {}
+        users_ref = db.collection("users")
         
-        # Search by email (exact match first, then partial)
-        if "@" in query:
-            email_query = db.collection("users").where("email", "==", query).limit(limit)
-            for doc in email_query.stream():
-                user_data = doc.to_dict()
-                user_data["id"] = doc.id
-                users.append(user_data)
+        # Email prefix (an exact address is its own prefix)
+        email_query = users_ref.where("email", ">=", query).where("email", "<", query + PREFIX_END).limit(limit)
+        for doc in email_query.stream():
+            users[doc.id] = dict(doc.to_dict(), id=doc.id)
         
-        # Search by username (partial match)
+        # Username prefix: the in-process trie names the matches, so only their documents are read
         if len(users) < limit:
-            username_query = db.collection("users").limit(limit * 2)  # Get more to filter
-            for doc in username_query.stream():
+            remaining = limit - len(users)
+            user_search_index.build_in_background(db)
+            if user_search_index.ready:
+                user_search_index.refresh(db)
+                candidate_ids = [user_id for user_id in user_search_index.search(query, limit) if user_id not in users]
+                refs = [users_ref.document(user_id) for user_id in candidate_ids[:remaining]]
+                username_docs = db.get_all(refs) if refs else []
+            else:
+                # Trie still building: range query on the username index instead
+                username_docs = (
+                    users_ref.where("username_lowercase", ">=", query)
+                    .where("username_lowercase", "<", query + PREFIX_END)
+                    .limit(limit)
+                    .stream()
+                )
+            for doc in username_docs:
+                if len(users) >= limit:
+                    break
+                if doc.id in users or not doc.exists:
+                    continue
                 user_data = doc.to_dict()
-                user_data["id"] = doc.id
-                username = user_data.get("username", "").lower()
-                
-                # Skip if already in results
-                if any(u["id"] == user_data["id"] for u in users):
+                if not user_data.get("username_lowercase", "").startswith(query):
+                    # Renamed since the trie last synced
+                    user_search_index.update(doc.id, user_data.get("username_lowercase", ""))
                     continue
-                    
-                if query in username and len(users) < limit:
-                    users.append(user_data)
+                users[doc.id] = dict(user_data, id=doc.id)
         
         # Clean sensitive data and add useful info
         clean_users = []
-        for user in users:
+        for user in users.values():
             clean_user = {
                 "id": user["id"],
                 "email": user.get("email", ""),
@@ -881,7 +893,10 @@ def moderate_deck(deck_id):
         
         if action == "delete":
             # Delete the deck
-            deck_ref.delete()
+            batch = db.batch()
+            batch.delete(deck_ref)
+            decks_counter.increment(db, batch, -1)
+            batch.commit()
             current_app.logger.info(f"Deck {deck_id} deleted by admin {current_user.email}")
             
         elif action == "hide":
@@ -903,6 +918,10 @@ def moderate_deck(deck_id):
             })
             current_app.logger.info(f"Deck {deck_id} approved by admin {current_user.email}")
         
+        owner_id = deck_doc.to_dict().get("owner_id")
+        if owner_id:
+            cache_manager.invalidate_user_decks(owner_id)
+        
         return jsonify({
             "success": True,
             "message": f"Deck {action}d successfully",
@@ -942,51 +961,16 @@ def analytics_summary():
         # Calculate user analytics
         user_analytics = {}
         try:
-            # Get basic user counts (use timezone-aware datetime for Firestore compatibility)
-            from datetime import timezone
-            now = datetime.now(timezone.utc)
-            thirty_days_ago = now - timedelta(days=30)
-            seven_days_ago = now - timedelta(days=7)
-            one_day_ago = now - timedelta(days=1)
+            # Daily rollups: at most max(time range, 30) day documents plus the user counter shards
+            total_users = users_counter.value(db)
+            activity = rollups.summarize(rollups.read_days(db, max(time_range_days, 30)), time_range_days)
+            daily_active = activity["daily_active"]
+            weekly_active = activity["weekly_active"]
+            monthly_active = activity["monthly_active"]
+            new_users_period = activity["new_users_period"]  # New users in the selected time period
+            active_users_period = activity["active_users_period"]  # Active users in the selected time period
             
-            # Use the selected time range for period calculations
-            period_start = now - timedelta(days=time_range_days)
-            
-            # Count total users and recent activity
-            users_query = db.collection("users").limit(1000)
-            users_docs = list(users_query.stream())
-            
-            total_users = len(users_docs)
-            daily_active = 0
-            weekly_active = 0
-            monthly_active = 0
-            new_users_period = 0  # New users in the selected time period
-            active_users_period = 0  # Active users in the selected time period
-            
-            current_app.logger.info(f"Analytics: Found {total_users} users in database, calculating for {time_range_days} days")
-            
-            # Process real user data based on selected time period
-            for user_doc in users_docs:
-                user_data = user_doc.to_dict()
-                
-                # Count active users by last login
-                last_login = user_data.get('last_login')
-                created_at = user_data.get('created_at')
-                
-                if last_login:
-                    if last_login > one_day_ago:
-                        daily_active += 1
-                    if last_login > seven_days_ago:
-                        weekly_active += 1
-                    if last_login > thirty_days_ago:
-                        monthly_active += 1
-                    # Count users active in the selected period
-                    if last_login > period_start:
-                        active_users_period += 1
-                
-                # Count new users in the selected time period
-                if created_at and created_at > period_start:
-                    new_users_period += 1
+            current_app.logger.info(f"Analytics: {total_users} users, calculating for {time_range_days} days from rollups")
             
             user_analytics = {
                 "total_users": total_users,
@@ -1086,6 +1070,16 @@ def analytics_summary():
         return jsonify({"error": str(e)}), 500
 
 
+@admin_bp.route("/api/analytics/backfill", methods=["POST"])
+@admin_required
+def backfill_analytics():
+    """Rebuild the daily analytics rollups from user documents in the background."""
+    if not enqueue_analytics_backfill():
+        return jsonify({"error": "Failed to schedule analytics backfill"}), 500
+    current_app.logger.info(f"Analytics rollup backfill scheduled by admin {current_user.email}")
+    return jsonify({"success": True, "message": "Analytics backfill scheduled"}), 202
+
+
 @admin_bp.route("/api/analytics/test")
 def analytics_test():
     """Development-only test endpoint to verify analytics data without authentication."""
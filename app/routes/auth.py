@@ -27,7 +27,11 @@ from flask_dance.contrib.google import google
 # Import for Firestore specific types like SERVER_TIMESTAMP or ArrayUnion if needed later
 from firebase_admin import firestore
 
-from ..models import User  # Your User class from models.py
+from ..models import User, forget_user_data, remember_user_data  # Your User class from models.py
+from ..counters import users_counter, decks_counter
+from .. import rollups
+from ..user_search import user_search_index
+from ..services import user_service
 from better_profanity import profanity  # Your profanity checker
 
 auth_bp = Blueprint("auth", __name__)
@@ -249,9 +253,15 @@ def google_authorized(blueprint, token):
             "username_set": False,
             "profile_icon": "",
             "username_change_count": 0,
+            "last_login": firestore.SERVER_TIMESTAMP,
         }
         try:
-            users_collection_ref.document(user_app_id).set(user_data_for_login)
+            batch = db.batch()
+            batch.set(users_collection_ref.document(user_app_id), user_data_for_login)
+            users_counter.increment(db, batch)
+            rollups.record_new_user(db, batch)
+            rollups.record_login(db, batch, previous_login=None)
+            batch.commit()
             if current_app.debug:
                 current_app.logger.debug(f"[AUTH_FIRESTORE] Created new user in Firestore. App ID: {user_app_id}")
         except Exception as e_create:
@@ -262,6 +272,18 @@ def google_authorized(blueprint, token):
             }
             return redirect(url_for("main.index"))  # Or a more generic error page
 
+    else:
+        # Existing user: stamp last_login and count the login in today's rollup
+        try:
+            batch = db.batch()
+            batch.update(users_collection_ref.document(user_app_id), {"last_login": firestore.SERVER_TIMESTAMP})
+            rollups.record_login(db, batch, previous_login=user_data_for_login.get("last_login"))
+            batch.commit()
+            # Just read from Firestore, so later requests in this session skip the user read
+            remember_user_data(user_app_id, user_data_for_login)
+        except Exception as e_login_stats:
+            current_app.logger.error(f"[AUTH_FIRESTORE] ERROR recording login for user {user_app_id}: {e_login_stats}")
+
     # 4. Log in the user with Flask-Login
     if user_data_for_login and user_app_id:
         # Ensure created_at (if it's a Firestore Timestamp) is handled if User class expects str
@@ -404,10 +426,13 @@ def set_username_page():
                 update_data = {
                     "username": new_username,
                     "username_lowercase": new_username.lower(),
+                    "username_updated_at": firestore.SERVER_TIMESTAMP,
                     "username_set": True,
                     "profile_icon": selected_icon,
                 }
                 user_doc_ref.update(update_data)
+                forget_user_data(user_id_str)
+                user_search_index.update(user_id_str, new_username.lower())
 
                 session["username"] = new_username
                 if hasattr(flask_login_current_user, "username"):
@@ -484,10 +509,9 @@ def user_profile_and_settings():
                 try:
                     user_doc_ref.update({"profile_icon": new_icon})
                     
-                    # Invalidate user cache to ensure immediate update
+                    # Invalidate cached user data to ensure immediate update
                     try:
-                        from ..cache_manager import cache_manager
-                        cache_manager.invalidate_user_cache(user_id_str)
+                        forget_user_data(user_id_str)
                     except Exception as cache_error:
                         current_app.logger.warning(f"Failed to invalidate user cache: {cache_error}")
                     
@@ -542,14 +566,17 @@ def user_profile_and_settings():
                     update_data = {
                         "username": new_username_form,
                         "username_lowercase": new_username_form.lower(),
+                        "username_updated_at": firestore.SERVER_TIMESTAMP,
                         "username_change_count": firestore.Increment(
                             1
                         ),  # Increments the value on the server
                     }
                     user_doc_ref.update(update_data)
+                    user_search_index.update(user_id_str, new_username_form.lower())
                     fresh_user_snapshot = user_doc_ref.get()
                     if fresh_user_snapshot.exists:
                         fresh_user_data = fresh_user_snapshot.to_dict()
+                        remember_user_data(user_id_str, fresh_user_data)
                         updated_user_object = User(
                             user_id=user_id_str, data=fresh_user_data
                         )
@@ -670,11 +697,13 @@ def delete_account():
             return redirect(url_for("main.index"))
 
         # 2. Add delete operations for each deck to the batch
+        deleted_deck_count = 0
         if deck_ids_to_delete:  # Check if the list is not empty
             for deck_id in deck_ids_to_delete:
                 if deck_id and isinstance(deck_id, str):  # Ensure deck_id is valid
                     deck_ref_to_delete = db.collection("decks").document(deck_id)
                     batch.delete(deck_ref_to_delete)
+                    deleted_deck_count += 1
                     current_app.logger.info(
                         f"Added deletion of deck {deck_id} to batch for user {user_id_to_delete}."
                     )
@@ -685,12 +714,19 @@ def delete_account():
 
         # 3. Add delete operation for the user document itself to the batch
         batch.delete(user_doc_ref)
+        users_counter.increment(db, batch, -1)
+        rollups.record_user_deleted(db, batch, user_data.get("last_login"))
+        if deleted_deck_count:
+            decks_counter.increment(db, batch, -deleted_deck_count)
         current_app.logger.info(
             f"Added deletion of user document {user_id_to_delete} to batch."
         )
 
         # 4. Commit the batch
         batch.commit()
+        user_search_index.remove(user_id_to_delete)
+        forget_user_data(user_id_to_delete)
+        user_service.invalidate_user_cache(user_id_to_delete)
         current_app.logger.info(
             f"Successfully committed batch deletion for user {user_id_to_delete} and their decks."
         )
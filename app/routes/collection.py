@@ -14,11 +14,16 @@ from flask import (
 from flask_login import current_user as flask_login_current_user, login_required
 from datetime import datetime, timezone
 
+import bisect
 import uuid
 from typing import Optional
 from Deck import Deck
 from ..services import card_service, database_service, url_service
+from ..cache_manager import cache_manager
+from ..db_service import write_batcher
+from ..counters import decks_counter
 from ..security import rate_limit_api
+from ..pagination import decode_cursor, encode_cursor
 
 from firebase_admin import (
     firestore,
@@ -28,10 +33,55 @@ collection_bp = Blueprint("collection_bp", __name__)
 
 # --- HELPERS (adapted from your decks.py) ---
 MAX_DECKS_PER_USER = 200
+# The deck summary cache is per process; keep it short so every instance sees deck writes quickly
+DECK_SUMMARIES_CACHE_SECONDS = 60
 
 # Use shared database service instead of local get_db() function
 get_db = database_service.get_db
 
+
+def _normalize_collection(collection_data: dict) -> dict:
+    """Drop cards whose count reached zero and recompute the totals from ``card_counts``."""
+    card_counts = {
+        card_id: count for card_id, count in collection_data.get("card_counts", {}).items()
+        if isinstance(count, (int, float)) and count > 0
+    }
+    collection_data.update(
+        card_counts=card_counts,
+        total_cards=sum(card_counts.values()),
+        unique_cards=len(card_counts),
+    )
+    return collection_data
+
+
+# Queued card count changes are committed in a transaction that recomputes the totals
+write_batcher.set_normalizer("collections", _normalize_collection)
+
+
+def _read_collection(db, user_id: str) -> Optional[dict]:
+    """The user's collection document including changes still queued for writing."""
+    collection_doc = db.collection("collections").document(user_id).get()
+    stored = collection_doc.to_dict() if collection_doc.exists else None
+    return write_batcher.apply_pending("collections", user_id, stored)
+
+
+def _queue_collection_change(db, user_id: str, build) -> Optional[dict]:
+    """Queue the writes ``build`` derives from the collection; returns it as updated.
+    
+    ``build`` follows ``WriteBatcher.mutate`` and returns a falsy result,
+    queueing nothing, when the change doesn't apply; None is returned then.
+    """
+    collection_doc = db.collection("collections").document(user_id).get()
+    stored = collection_doc.to_dict() if collection_doc.exists else None
+    if not write_batcher.mutate("collections", user_id, stored, build):
+        return None
+    updated = write_batcher.apply_pending("collections", user_id, stored) or {}
+    return {
+        "card_counts": updated.get("card_counts", {}),
+        "total_cards": updated.get("total_cards", 0),
+        "unique_cards": updated.get("unique_cards", 0),
+    }
+
 def _does_deck_name_exist_for_user_firestore(
     user_id: str,
     deck_name_to_check: str,
@@ -49,17 +99,17 @@ def _does_deck_name_exist_for_user_firestore(
         return True
     return False
 
-def passes_filters(deck_data: dict, search_text: str, energy_types: list, privacy_filter: str, card_collection_obj=None) -> bool:
-    """Check if a deck passes the given filters."""
+def passes_filters(deck_summary: dict, search_text: str, energy_types: list, privacy_filter: str) -> bool:
+    """Check if a deck summary from ``_deck_summary`` passes the given filters."""
     # Privacy filter
-    if privacy_filter == "public" and not deck_data.get("is_public", False):
+    if privacy_filter == "public" and not deck_summary.get("is_public", False):
         return False
-    elif privacy_filter == "private" and deck_data.get("is_public", False):
+    elif privacy_filter == "private" and deck_summary.get("is_public", False):
         return False
     
     # Energy type filter
     if energy_types:
-        deck_types = deck_data.get("deck_types", [])
+        deck_types = deck_summary.get("types", [])
         # Require exact match - same length and all selected types present
         if len(deck_types) != len(energy_types) or not all(energy_type in deck_types for energy_type in energy_types):
             return False
@@ -67,32 +117,124 @@ def passes_filters(deck_data: dict, search_text: str, energy_types: list, privac
     # Search text filter (applied to deck name and Pokemon names in deck)
     if search_text:
         search_text_lower = search_text.lower()
-        
-        # First check deck name
-        deck_name = deck_data.get("name", "").lower()
-        if search_text_lower in deck_name:
+        if search_text_lower in deck_summary.get("name", "").lower():
             return True
-        
-        # If not found in deck name, search through Pokemon names in the deck
-        if card_collection_obj:
-            card_ids = deck_data.get("card_ids", [])
-            for card_id_str in card_ids:
-                try:
-                    card_obj = card_collection_obj.get_card_by_id(int(card_id_str))
-                    if card_obj:
-                        card_name = getattr(card_obj, "name", "").lower()
-                        if search_text_lower in card_name:
-                            return True
-                except (ValueError, TypeError):
-                    continue
-        
-        # If search text wasn't found in deck name or Pokemon names, filter out this deck
-        return False
+        return any(search_text_lower in card_name for card_name in deck_summary.get("card_names", []))
     
     return True
 # --- END HELPERS ---
 
 
+def _deck_summary(deck_id: str, deck_data: dict, card_collection_obj=None) -> dict:
+    """Listing projection of a deck: everything /api/my-decks shows, filters or sorts on.
+
+    Cover cards are resolved to CDN URLs and the deck's card names are
+    lowercased up front, so serving the list needs no deck or card lookups.
+    """
+    resolved_cover_cards = []
+    card_names = []
+    if card_collection_obj:
+        cover_card_ids_from_db = deck_data.get("cover_card_ids", [])
+        seen_card_ids = set()
+        if isinstance(cover_card_ids_from_db, list):
+            for c_id_str in cover_card_ids_from_db:
+                if c_id_str and c_id_str not in seen_card_ids:
+                    try:
+                        card_obj = card_collection_obj.get_card_by_id(int(c_id_str))
+                        if card_obj:
+                            # Process URL for CDN conversion on server side
+                            image_path = getattr(card_obj, "display_image_path", None)
+                            resolved_cover_cards.append(
+                                {
+                                    "name": getattr(card_obj, "name", "N/A"),
+                                    "display_image_path": url_service.process_firebase_to_cdn_url(image_path),
+                                }
+                            )
+                            seen_card_ids.add(c_id_str)
+                            # Limit to 3 cover cards maximum
+                            if len(resolved_cover_cards) >= 3:
+                                break
+                    except (ValueError, TypeError):
+                        pass
+
+        for card_id_str in dict.fromkeys(deck_data.get("card_ids", [])):
+            try:
+                card_obj = card_collection_obj.get_card_by_id(int(card_id_str))
+            except (ValueError, TypeError):
+                continue
+            card_name = getattr(card_obj, "name", "").lower() if card_obj else ""
+            if card_name and card_name not in card_names:
+                card_names.append(card_name)
+
+    updated_at = deck_data.get("updated_at")
+    return {
+        "deck_id": deck_id,
+        "name": deck_data.get("name", f"Deck {deck_id[:8]}..."),
+        "types": deck_data.get("deck_types", []),
+        "card_count": len(deck_data.get("card_ids", [])),
+        "updated_at": updated_at.isoformat() if isinstance(updated_at, datetime) else None,
+        "is_public": deck_data.get("is_public", False),
+        "description": deck_data.get("description", ""),
+        "resolved_cover_cards": resolved_cover_cards,
+        "card_names": card_names,
+    }
+
+
+_NO_UPDATE_TIME = datetime.min.replace(tzinfo=timezone.utc)
+
+
+def _deck_sort_key(deck_summary: dict) -> tuple:
+    """``(updated_at, deck_id)``; decks are listed in descending order of this key."""
+    updated_at = deck_summary.get("updated_at")
+    return (datetime.fromisoformat(updated_at) if updated_at else _NO_UPDATE_TIME, deck_summary["deck_id"])
+
+
+def _get_deck_summaries(db, user_id: str) -> Optional[list]:
+    """A user's deck summaries, most recently updated first; None if the user doesn't exist.
+
+    Served from ``CacheManager.get_user_decks`` when cached. A miss reads the
+    user document and all of its decks once and caches the projection for
+    ``DECK_SUMMARIES_CACHE_SECONDS``. Deck routes invalidate it, but only on
+    the instance that handled the write, so the TTL bounds how long other
+    instances can serve a stale list.
+    """
+    deck_summaries = cache_manager.get_user_decks(user_id)
+    if deck_summaries is not None:
+        return deck_summaries
+
+    user_doc = db.collection("users").document(user_id).get()
+    if not user_doc.exists:
+        return None
+
+    deck_refs = [
+        db.collection("decks").document(deck_id)
+        for deck_id in user_doc.to_dict().get("deck_ids", [])
+        if deck_id
+    ]
+    card_collection_obj = card_service.get_card_collection() if deck_refs else None
+    deck_summaries = [
+        _deck_summary(deck_doc.id, deck_doc.to_dict(), card_collection_obj)
+        for deck_doc in (db.get_all(deck_refs) if deck_refs else [])
+        if deck_doc.exists
+    ]
+    deck_summaries.sort(key=_deck_sort_key, reverse=True)
+    cache_manager.set_user_decks(user_id, deck_summaries, ttl_seconds=DECK_SUMMARIES_CACHE_SECONDS)
+    return deck_summaries
+
+
+def _deck_cursor(deck_summary: dict) -> str:
+    """Cursor resuming after ``deck_summary``; legacy decks without ``updated_at`` encode ``_NO_UPDATE_TIME``."""
+    return encode_cursor(*_deck_sort_key(deck_summary))
+
+
+def _decode_deck_cursor(cursor: str) -> list:
+    """``(updated_at, deck_id)`` from ``_deck_cursor``; raises ValueError for anything else."""
+    updated_at, deck_id = decode_cursor(cursor, 2)
+    if not isinstance(updated_at, datetime) or updated_at.tzinfo is None or not isinstance(deck_id, str):
+        raise ValueError("Invalid deck cursor")
+    return [updated_at, deck_id]
+
+
 @collection_bp.route("/collection")
 @login_required
 def view_collection():
@@ -163,7 +305,9 @@ def view_collection():
 
             user_ref = db.collection("users").document(current_user_id)
             batch.update(user_ref, {"deck_ids": firestore.ArrayUnion([new_deck_id])})
+            decks_counter.increment(db, batch)
             batch.commit()
+            cache_manager.invalidate_user_decks(current_user_id)
 
             session['display_toast_once'] = {"message": f"Copied '{original_name}' to your collection.", "type": "success"}
             return redirect(url_for("collection_bp.view_collection"))
@@ -202,6 +346,9 @@ def get_user_decks_api():
         try:
             page = max(1, int(request.args.get("page", 1)))
             limit = min(max(1, int(request.args.get("limit", 12))), 50)  # Max 50 decks per page, default 12
+            # A cursor (empty for the first page) switches to keyset pagination and takes precedence over page
+            cursor = request.args.get("cursor")
+            after = _decode_deck_cursor(cursor) if cursor else None
         except ValueError:
             return jsonify({"error": "Invalid pagination parameters", "decks": []}), 400
         
@@ -212,111 +359,58 @@ def get_user_decks_api():
         energy_types = request.args.getlist("energy_types")  # Can have multiple
         privacy_filter = request.args.get("privacy", "all")  # all, public, private
 
-        current_user_app_id = str(flask_login_current_user.id)
-        user_doc_ref = db.collection("users").document(current_user_app_id)
-        user_doc = user_doc_ref.get()
-
-        if not user_doc.exists:
+        deck_summaries = _get_deck_summaries(db, str(flask_login_current_user.id))
+        if deck_summaries is None:
             return jsonify({"error": "User not found", "decks": [], "pagination": {"has_more": False}}), 404
 
-        user_deck_ids = user_doc.to_dict().get("deck_ids", [])
-        if not user_deck_ids:
-            return jsonify({"decks": [], "pagination": {"current_page": page, "total_count": 0, "has_more": False}})
-
-        # Get all deck documents first to sort by updated_at
-        deck_refs = [
-            db.collection("decks").document(deck_id)
-            for deck_id in user_deck_ids
-            if deck_id
+        # Filter and page the cached summaries; no deck documents are read here
+        valid_decks = [
+            deck_summary for deck_summary in deck_summaries
+            if passes_filters(deck_summary, search_text, energy_types, privacy_filter)
         ]
-        all_deck_docs = db.get_all(deck_refs)
-
-        # Get card collection for Pokemon name searching
-        card_collection_obj = card_service.get_card_collection()
-        
-        # Sort all decks by updated_at (most recent first) and apply filters
-        valid_decks = []
-        for deck_doc in all_deck_docs:
-            if deck_doc.exists:
-                deck_data = deck_doc.to_dict()
-                
-                # Apply server-side filtering (now includes Pokemon name search)
-                if not passes_filters(deck_data, search_text, energy_types, privacy_filter, card_collection_obj):
-                    continue
-                    
-                valid_decks.append((deck_doc, deck_data))
-
-        default_time = datetime.min.replace(tzinfo=timezone.utc)
-        valid_decks.sort(
-            key=lambda item: item[1].get("updated_at", default_time), reverse=True
-        )
-
-        # Apply pagination after sorting
         total_count = len(valid_decks)
-        paginated_decks = valid_decks[offset:offset + limit]
-        has_more = offset + limit < total_count
+
+        if cursor is not None:
+            # Resume right after the last deck the client saw; the list is sorted descending
+            start = 0
+            if after:
+                after_key = tuple(after)
+                start = bisect.bisect_left(
+                    range(total_count), True, key=lambda index: _deck_sort_key(valid_decks[index]) < after_key
+                )
+            paginated_decks = valid_decks[start:start + limit]
+            has_more = start + limit < total_count
+        else:
+            paginated_decks = valid_decks[offset:offset + limit]
+            has_more = offset + limit < total_count
 
         user_decks_details = []
         meta_stats = current_app.config.get("meta_stats", {})
 
-        for deck_doc, deck_data in paginated_decks:
-            deck_id_str = deck_doc.id
-
+        for deck_summary in paginated_decks:
             win_rate = None
-            deck_name = deck_data.get("name", f"Deck {deck_id_str[:8]}...")
+            deck_name = deck_summary["name"]
             if deck_name and meta_stats.get("decks", {}).get(deck_name):
                 stats = meta_stats["decks"][deck_name]
                 if stats.get("total_battles", 0) > 0:
                     win_rate = (stats.get("wins", 0) / stats["total_battles"]) * 100
 
-            resolved_cover_cards = []
-            cover_card_ids_from_db = deck_data.get("cover_card_ids", [])
-            seen_card_ids = set()
-            if card_collection_obj and isinstance(cover_card_ids_from_db, list):
-                for c_id_str in cover_card_ids_from_db:
-                    if c_id_str and c_id_str not in seen_card_ids:
-                        try:
-                            card_obj = card_collection_obj.get_card_by_id(int(c_id_str))
-                            if card_obj:
-                                # Process URL for CDN conversion on server side
-                                image_path = getattr(card_obj, "display_image_path", None)
-                                display_image_url = url_service.process_firebase_to_cdn_url(image_path)
-                                    
-                                resolved_cover_cards.append(
-                                    {
-                                        "name": getattr(card_obj, "name", "N/A"),
-                                        "display_image_path": display_image_url,
-                                    }
-                                )
-                                seen_card_ids.add(c_id_str)
-                                # Limit to 3 cover cards maximum
-                                if len(resolved_cover_cards) >= 3:
-                                    break
-                        except (ValueError, TypeError):
-                            pass
-
-            user_decks_details.append(
-                {
-                    "name": deck_name,
-                    "deck_id": deck_id_str,
-                    "types": deck_data.get("deck_types", []),
-                    "card_count": len(deck_data.get("card_ids", [])),
-                    "win_rate": (round(win_rate, 1) if win_rate is not None else None),
-                    "resolved_cover_cards": resolved_cover_cards,
-                    "updated_at": deck_data.get("updated_at"),
-                    "is_public": deck_data.get("is_public", False),
-                    "description": deck_data.get("description", ""),
-                }
-            )
+            deck_details = {key: value for key, value in deck_summary.items() if key != "card_names"}
+            deck_details["win_rate"] = round(win_rate, 1) if win_rate is not None else None
+            user_decks_details.append(deck_details)
+
+        pagination = {
+            "total_count": total_count,
+            "has_more": has_more,
+            "page_size": limit,
+            "next_cursor": _deck_cursor(paginated_decks[-1]) if has_more and paginated_decks else None,
+        }
+        if cursor is None:
+            pagination["current_page"] = page
 
         return jsonify({
             "decks": user_decks_details,
-            "pagination": {
-                "current_page": page,
-                "total_count": total_count,
-                "has_more": has_more,
-                "page_size": limit
-            }
+            "pagination": pagination,
         })
 
     except Exception as e:
@@ -338,17 +432,15 @@ def get_user_collection():
         db = get_db()
         user_id = flask_login_current_user.id
         
-        collection_ref = db.collection("collections").document(user_id)
-        collection_doc = collection_ref.get()
+        collection_data = _read_collection(db, user_id)
         
-        if not collection_doc.exists:
+        if collection_data is None:
             return jsonify({
                 "card_counts": {},
                 "total_cards": 0,
                 "unique_cards": 0
             })
         
-        collection_data = collection_doc.to_dict()
         return jsonify(collection_data)
     
     except Exception as e:
@@ -381,35 +473,13 @@ def add_card_to_collection():
         if not card:
             return jsonify({"error": "Card not found"}), 404
         
-        # Update collection in transaction
-        @firestore.transactional
-        def update_collection(transaction, collection_ref):
-            collection_doc = collection_ref.get(transaction=transaction)
-            
-            if collection_doc.exists:
-                collection_data = collection_doc.to_dict()
-                card_counts = collection_data.get("card_counts", {})
-                card_counts[str(card_id)] = card_counts.get(str(card_id), 0) + quantity
-            else:
-                card_counts = {str(card_id): quantity}
-            
-            # Recalculate totals
-            total_cards = sum(card_counts.values())
-            unique_cards = len(card_counts)
-            
-            updated_data = {
-                "card_counts": card_counts,
-                "total_cards": total_cards,
-                "unique_cards": unique_cards,
-                "last_updated": firestore.SERVER_TIMESTAMP
-            }
-            
-            transaction.set(collection_ref, updated_data, merge=True)
-            return updated_data
+        # Queue the change; rapid clicks on one collection coalesce into a single write
+        # and the totals are recomputed when it is committed
+        card_key = str(card.id)
+        def add_cards(collection_data):
+            return {"last_updated": firestore.SERVER_TIMESTAMP}, {f"card_counts.{card_key}": quantity}, True
         
-        collection_ref = db.collection("collections").document(user_id)
-        transaction = db.transaction()
-        updated_data = update_collection(transaction, collection_ref)
+        updated_data = _queue_collection_change(db, user_id, add_cards)
         
         return jsonify({"success": True, "collection": updated_data})
     
@@ -437,46 +507,25 @@ def remove_card_from_collection():
         if quantity <= 0:
             return jsonify({"error": "Quantity must be positive"}), 400
         
-        # Update collection in transaction
-        @firestore.transactional
-        def update_collection(transaction, collection_ref):
-            collection_doc = collection_ref.get(transaction=transaction)
-            
-            if not collection_doc.exists:
-                return None
+        # Card ids become Firestore field paths
+        if "." in str(card_id):
+            return jsonify({"error": "Invalid card ID"}), 400
+        
+        # Queue the change; the commit drops the card once its count reaches zero
+        card_key = str(card_id)
+        def remove_cards(collection_data):
+            if collection_data is None:
+                return None, None, False
             
-            collection_data = collection_doc.to_dict()
             card_counts = collection_data.get("card_counts", {})
-            
-            current_count = card_counts.get(str(card_id), 0)
+            current_count = card_counts.get(card_key, 0)
             if current_count < quantity:
                 raise ValueError("Insufficient cards to remove")
             
-            new_count = current_count - quantity
-            if new_count <= 0:
-                del card_counts[str(card_id)]
-            else:
-                card_counts[str(card_id)] = new_count
-            
-            # Recalculate totals
-            total_cards = sum(card_counts.values())
-            unique_cards = len(card_counts)
-            
-            updated_data = {
-                "card_counts": card_counts,
-                "total_cards": total_cards,
-                "unique_cards": unique_cards,
-                "last_updated": firestore.SERVER_TIMESTAMP
-            }
-            
-            transaction.set(collection_ref, updated_data, merge=True)
-            return updated_data
-        
-        collection_ref = db.collection("collections").document(user_id)
-        transaction = db.transaction()
+            return {"last_updated": firestore.SERVER_TIMESTAMP}, {f"card_counts.{card_key}": -quantity}, True
         
         try:
-            updated_data = update_collection(transaction, collection_ref)
+            updated_data = _queue_collection_change(db, user_id, remove_cards)
             if updated_data is None:
                 return jsonify({"error": "Collection not found"}), 404
             return jsonify({"success": True, "collection": updated_data})
@@ -532,17 +581,15 @@ def get_collection_stats():
         db = get_db()
         user_id = flask_login_current_user.id
         
-        collection_ref = db.collection("collections").document(user_id)
-        collection_doc = collection_ref.get()
+        collection_data = _read_collection(db, user_id)
         
-        if not collection_doc.exists:
+        if collection_data is None:
             return jsonify({
                 "total_cards": 0,
                 "unique_cards": 0,
                 "completion_percentage": 0
             })
         
-        collection_data = collection_doc.to_dict()
         return jsonify({
             "total_cards": collection_data.get("total_cards", 0),
             "unique_cards": collection_data.get("unique_cards", 0),
@@ -562,10 +609,9 @@ def get_completion_progress():
         db = get_db()
         user_id = flask_login_current_user.id
         
-        collection_ref = db.collection("collections").document(user_id)
-        collection_doc = collection_ref.get()
+        collection_data = _read_collection(db, user_id)
         
-        if not collection_doc.exists:
+        if collection_data is None:
             return jsonify({
                 "completion_percentage": 0,
                 "total_possible": 1327,  # Total cards in game
@@ -573,7 +619,6 @@ def get_completion_progress():
                 "missing": 1327
             })
         
-        collection_data = collection_doc.to_dict()
         owned_count = collection_data.get("unique_cards", 0)
         total_possible = 1327  # Total cards available
         completion_percentage = (owned_count / total_possible) * 100 if total_possible > 0 else 0
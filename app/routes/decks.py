@@ -2,8 +2,10 @@ from flask import Blueprint, render_template, redirect, url_for, request, flash,
 from Deck import Deck
 from .auth import is_logged_in, get_current_user_data, profanity_check
 import uuid
-from ..services import card_service, database_service, url_service
+from ..services import card_service, card_render_service, database_service, user_service
 from ..security import rate_limit_api, rate_limit_api_paginated, rate_limit_heavy
+from ..pagination import decode_cursor, encode_cursor
+from ..counters import decks_counter
 from flask_login import (
     current_user as flask_login_current_user,
     login_required,
@@ -13,7 +15,9 @@ from firebase_admin import firestore  # For ArrayUnion and SERVER_TIMESTAMP
 from typing import Optional, Dict, List, Set  # For type hinting in helper function
 import json
 import datetime
+import hashlib
 import re
+from urllib.parse import urlencode
 
 decks_bp = Blueprint('decks', __name__)
 
@@ -227,6 +231,199 @@ def _does_deck_name_exist_for_user_firestore(
     return False
 
 
+def _set_mask(index, set_value: str) -> int:
+    """Cards whose set_code or set_name equals the given value."""
+    return index.mask("set_code", set_value) | index.mask("set_name", set_value)
+
+
+def _stage_type_mask(index, stage_type: str) -> int:
+    """Cards matching a stage/trainer keyword (EX, Basic, Stage 1, Item, ...)."""
+    if stage_type == "EX":
+        # EX cards: name ends with " ex" or card_type contains "pokemon - ex"
+        return index.mask("is_ex", True)
+    if stage_type in index.STAGE_TAGS:
+        return index.mask("stage", stage_type)
+    return index.mask_containing("card_type", stage_type)
+
+
+def _keyword_rarity_mask(index, parsed_keywords: Dict) -> int:
+    """Cards matching the parsed rarity keywords."""
+    mask = index.mask("rarity", parsed_keywords['rarities'])
+    if parsed_keywords.get('is_shiny_search', False):
+        # Special handling for "shiny" searches: include regular shiny cards plus specific Promo-A cards
+        promo_mask = index.mask("set_name", "Promo-A")
+        promo_numbers = [
+            (set_code, number)
+            for set_code in index.values_within("set_code", promo_mask)
+            for number in ('50', '51')
+        ]
+        mask |= promo_mask & index.mask("number", promo_numbers)
+    return mask
+
+
+# Rarity order for the paginated rarity sort - matches frontend exactly
+RARITY_SORT_ORDER = {
+    'Crown Rare': 0, '✵✵': 1, '✵': 2,
+    '☆☆☆': 3, '☆☆': 4, '☆': 5,
+    '◊◊◊◊': 6, '◊◊◊': 7, '◊◊': 8, '◊': 9,
+    # Legacy mappings for compatibility
+    "Ultra Rare": 1, "♦♦♦♦": 1,
+    "Rare": 2, "♦♦♦": 2,
+    "Uncommon": 3, "♦♦": 3,
+    "Common": 4, "♦": 4
+}
+
+# Type order that matches frontend exactly
+TYPE_SORT_ORDER = {
+    'Grass': 0, 'Fire': 1, 'Water': 2, 'Lightning': 3,
+    'Psychic': 4, 'Fighting': 5, 'Darkness': 6, 'Metal': 7,
+    'Dragon': 8, 'Colorless': 9, 'Trainer': 10,
+    # Legacy mappings for compatibility
+    'Electric': 3, 'Dark': 6
+}
+
+
+def _name_sort_key(card):
+    return card.name.lower() if card.name else ""
+
+
+def _rarity_sort_key(card):
+    # Primary sort: Rarity
+    rarity_priority = RARITY_SORT_ORDER.get(card.rarity, 99) if card.rarity else 99
+    
+    # Secondary sort: Most recent set (using same logic as set sorting)
+    # Get set name for all cards (needed for Promo-A check)
+    set_name = card.set_name if card.set_name else ""
+    
+    # Use release_order if available
+    if card.set_release_order is not None:
+        # Higher release_order = newer set, we want newer first so negate
+        set_priority = -card.set_release_order
+    else:
+        # Fallback to old logic
+        set_priority = SET_RELEASE_ORDER.get(set_name, 999)
+    
+    # Promo-A should ALWAYS be at the bottom regardless of sort direction
+    if set_name == "Promo-A":
+        set_priority = 999  # Make Promo-A always come last
+    
+    return (rarity_priority, set_priority)
+
+
+def _type_sort_key(card):
+    # Sort by card type with sophisticated ordering
+    if not card.card_type:
+        return (99, "", "")
+    
+    type_priority = TYPE_SORT_ORDER.get(card.energy_type if card.is_pokemon else 'Trainer', 99)
+    
+    # Stage order that matches frontend exactly
+    if card.is_pokemon:
+        stage_priority = {
+            'Stage 2': 0, 'Stage 1': 1, 'Basic': 2, 'Ultra Beast': 6
+        }.get(getattr(card, 'stage', None) or 'Basic', 99)
+    elif card.is_trainer:
+        stage_priority = {
+            'Item': 3, 'Supporter': 4, 'Tool': 5
+        }.get(card.trainer_subtype, 99)
+    else:
+        stage_priority = 99
+    
+    # Add set-based secondary sorting (same logic as set sorting)
+    # Use release_order if available
+    if card.set_release_order is not None:
+        # Higher release_order = newer set, we want newer first for secondary sort
+        set_priority = -card.set_release_order
+    else:
+        # Fallback to old logic
+        set_priority = SET_RELEASE_ORDER.get(card.set_name, 999)
+    
+    # Promo-A should ALWAYS be at the bottom regardless of sort direction
+    if card.set_name == "Promo-A":
+        set_priority = 999  # Make Promo-A always come last
+    
+    return (type_priority, stage_priority, set_priority, 0)
+
+
+def _set_sort_key(card, descending: bool):
+    # Sort by set release order, then by card number within each set
+    # Use release_order from card if available, otherwise use fallback logic
+    if card.set_release_order is not None:
+        # For release_order: higher number = newer set
+        # For desc: we want newer sets first, so negate the release_order
+        if descending:
+            set_priority = -card.set_release_order
+        else:
+            set_priority = card.set_release_order
+    else:
+        # Fallback to hardcoded mapping for cards without release_order
+        set_name = card.set_name if card.set_name else ""
+        set_priority = SET_RELEASE_ORDER.get(set_name, 999)
+    
+    # Special handling for Promo-A - always put it last regardless of direction
+    if card.set_name == "Promo-A":
+        set_priority = 9999
+    
+    # Use card_number for secondary sort within each set
+    card_num = card.card_number if card.card_number is not None else 0
+    if card_num == 0 and card.card_number_str:
+        match = re.search(r'(\d+)', str(card.card_number_str))
+        card_num = int(match.group(1)) if match else 0
+            
+    return (set_priority, card_num)
+
+
+def _card_sort_order(card_collection, sort_type: str, direction: str):
+    """Materialized catalog order for a paginated sort, or None to keep collection order.
+
+    Each (sort, direction) is sorted once per catalog version and reused by
+    every page request; filtered pages are then selected from it.
+    """
+    descending = direction == "desc"
+    if sort_type == "name":
+        return card_collection.sort_order(f"name:{descending}", _name_sort_key, reverse=descending)
+    if sort_type == "rarity":
+        return card_collection.sort_order(f"rarity:{descending}", _rarity_sort_key, reverse=descending)
+    if sort_type == "type":
+        return card_collection.sort_order(f"type:{descending}", _type_sort_key, reverse=descending)
+    if sort_type == "set":
+        # Direction is part of the key here rather than a reversed sort
+        return card_collection.sort_order(f"set:{descending}", lambda card: _set_sort_key(card, descending))
+    return None
+
+
+def _name_text_mask(card_collection, text: str) -> int:
+    """Cards whose name contains every term of ``text``.
+
+    Matching ignores case, accents and punctuation. If no card name matches
+    the text at all, it is taken as a typo and names within an edit or two
+    are matched instead.
+    """
+    search_index = card_collection.search_index
+    mask = search_index.match_mask(text)
+    if not mask:
+        mask = search_index.match_mask(text, fuzzy=True)
+    return mask
+
+
+def _card_listing_etag(card_collection, endpoint: str) -> str:
+    """Strong ETag for a card listing: catalog version plus the normalized query.
+
+    Stable across processes, so any instance can validate a client's copy.
+    """
+    query = sorted((key, value.strip()) for key, value in request.args.items(multi=True))
+    digest = hashlib.sha256(f"{endpoint}?{urlencode(query)}".encode("utf-8")).hexdigest()[:16]
+    return f"{card_collection.version}-{digest}"
+
+
+def _not_modified_response(etag: str, cache_control: str):
+    """Empty 304 response carrying the validators of the full response."""
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+
 @decks_bp.route("/decks")
 def list_decks():
     """
@@ -329,6 +526,12 @@ def get_all_cards():
         f"Using {len(all_cards_from_collection)} cards from pre-loaded CardCollection for /api/cards."
     )
 
+    # Cache for 5 minutes since cards don't change often
+    cache_control = 'public, max-age=300'
+    etag = _card_listing_etag(card_collection, "cards")
+    if request.if_none_match.contains_weak(etag):
+        return _not_modified_response(etag, cache_control)
+
     try:
         # Get filter parameters from query string
         set_code_filter = request.args.get("set_code")
@@ -342,177 +545,57 @@ def get_all_cards():
             'rarities': [], 'set_code': None, 'exclude_ex': False, 'remaining_text': ''
         }
 
-        # Apply filters to the in-memory list of Card objects
-        filtered_card_objects = all_cards_from_collection
+        # Apply filters by intersecting index bitsets instead of scanning every card
+        index = card_collection.index
+        mask = index.all_mask
 
         if set_code_filter:
-            filtered_card_objects = [
-                card
-                for card in filtered_card_objects
-                if card.set_code == set_code_filter
-            ]
+            mask &= index.mask("set_code", set_code_filter)
 
         # Apply keyword-based energy type filter (takes precedence over URL parameter)
         if parsed_keywords['energy_types']:
-            # Use the first parsed energy type (multiple energy types not supported in this API)
-            filtered_card_objects = [
-                card
-                for card in filtered_card_objects
-                if card.energy_type in parsed_keywords['energy_types']
-            ]
+            mask &= index.mask("energy_type", parsed_keywords['energy_types'])
         elif energy_type_filter:
-            filtered_card_objects = [
-                card
-                for card in filtered_card_objects
-                if card.energy_type == energy_type_filter
-            ]
+            mask &= index.mask("energy_type", energy_type_filter)
 
         # Apply keyword-based card type filter (takes precedence over URL parameter)
         if parsed_keywords['card_type']:
-            if parsed_keywords['card_type'] == "Pokémon":
-                filtered_card_objects = [
-                    card
-                    for card in filtered_card_objects
-                    if card.card_type and "Pokémon" in card.card_type
-                ]
-            elif parsed_keywords['card_type'] == "Trainer":
-                filtered_card_objects = [
-                    card
-                    for card in filtered_card_objects
-                    if card.card_type and "Trainer" in card.card_type
-                ]
+            mask &= index.mask("category", parsed_keywords['card_type'])
         elif card_type_filter:
             # Assuming card.card_type is a string like "Pokémon - Basic"
-            filtered_card_objects = [
-                card
-                for card in filtered_card_objects
-                if card.card_type and card_type_filter in card.card_type
-            ]
+            mask &= index.mask_containing("card_type", card_type_filter)
 
         # Apply keyword-based stage type filter
         if parsed_keywords['stage_type']:
-            stage_type = parsed_keywords['stage_type']
-            if stage_type == "EX":
-                # Filter for EX cards (cards ending with " ex" in name or having "pokemon - ex" in card_type)
-                filtered_card_objects = [
-                    card for card in filtered_card_objects
-                    if (card.name and card.name.lower().endswith(' ex') and not card.name.lower().endswith(' - ex (ultra beast)')) or
-                       (card.card_type and 'pokemon - ex' in card.card_type.lower())
-                ]
-            else:
-                # For other stage types (Basic, Stage 1, Stage 2, etc.) or trainer types (Item, Supporter, etc.)
-                filtered_card_objects = [
-                    card for card in filtered_card_objects
-                    if card.card_type and stage_type in card.card_type
-                ]
+            mask &= _stage_type_mask(index, parsed_keywords['stage_type'])
 
         # Apply keyword-based rarity filter
         if parsed_keywords['rarities']:
-            if parsed_keywords.get('is_shiny_search', False):
-                # Special handling for "shiny" searches: include regular shiny cards plus specific Promo-A cards
-                filtered_card_objects = [
-                    card for card in filtered_card_objects
-                    if (card.rarity in parsed_keywords['rarities']) or  
-                       (hasattr(card, 'card_number_str') and card.card_number_str in ['50', '51'] and 
-                        getattr(card, 'set_name', None) == 'Promo-A')
-                ]
-            else:
-                filtered_card_objects = [
-                    card for card in filtered_card_objects
-                    if card.rarity in parsed_keywords['rarities']
-                ]
+            mask &= _keyword_rarity_mask(index, parsed_keywords)
 
         # Apply keyword-based set filter
         if parsed_keywords['set_code']:
-            filtered_card_objects = [
-                card for card in filtered_card_objects
-                if (hasattr(card, 'set_code') and card.set_code == parsed_keywords['set_code']) or
-                   (hasattr(card, 'set_name') and card.set_name == parsed_keywords['set_code'])
-            ]
+            mask &= _set_mask(index, parsed_keywords['set_code'])
 
         # Apply remaining text as name filter (after keyword extraction)
         if parsed_keywords['remaining_text']:
-            remaining_text = parsed_keywords['remaining_text'].lower()
-            filtered_card_objects = [
-                card
-                for card in filtered_card_objects
-                if card.name and remaining_text in card.name.lower()
-            ]
-        
+            mask &= index.mask_containing("name", parsed_keywords['remaining_text'].lower())
+
         # Apply exclude_ex filter if requested
         if parsed_keywords['exclude_ex']:
-            filtered_card_objects = [
-                card for card in filtered_card_objects
-                if not ((card.name and card.name.lower().endswith(' ex')) or
-                        (card.card_type and 'pokemon - ex' in card.card_type.lower()))
-            ]
+            mask &= ~index.mask("is_ex", True)
 
-        # Convert Card objects to dictionaries for JSON response
-        # The Card.to_dict() method should prepare the data correctly.
-        # The Card.display_image_path property will be accessed when to_dict() is called if it's part of it,
-        # or we add it explicitly if to_dict() doesn't include properties.
+        filtered_card_objects = card_collection.cards_for_mask(mask)
 
-        card_dicts = []
-        
-        # Cache for set release orders to avoid repeated lookups
-        set_release_orders = {}
-        debug_info = {"sets_found": {}, "lookup_attempts": 0, "successful_lookups": 0}
-        
-        for card_obj in filtered_card_objects:
-            card_dict = (
-                card_obj.to_dict()
-            )  # Card.to_dict() should return all necessary fields
-            
-            
-            # Fix missing set_release_order by looking it up from Firestore
-            if card_dict.get('set_release_order') is None and card_obj.set_name:
-                debug_info["lookup_attempts"] += 1
-                
-                if card_obj.set_name not in set_release_orders:
-                    pass  # Looking up release_order for set
-                    try:
-                        from ..db_service import db_service
-                        set_doc = db_service.get_document("cards", card_obj.set_name.replace(" ", "_"))
-                        pass  # Retrieved set document
-                        if set_doc:
-                            release_order = set_doc.get("release_order")
-                            set_release_orders[card_obj.set_name] = release_order
-                            debug_info["successful_lookups"] += 1
-                            pass  # Found release_order
-                        else:
-                            set_release_orders[card_obj.set_name] = None
-                            pass  # No set document found
-                    except Exception as e:
-                        set_release_orders[card_obj.set_name] = None
-                        pass  # Exception during lookup
-                
-                final_value = set_release_orders[card_obj.set_name]
-                card_dict['set_release_order'] = final_value
-                pass  # Set release_order
-            
-            # Track which sets we're seeing
-            if card_obj.set_name not in debug_info["sets_found"]:
-                debug_info["sets_found"][card_obj.set_name] = {"count": 0, "release_order": card_dict.get('set_release_order')}
-            debug_info["sets_found"][card_obj.set_name]["count"] += 1
-            
-            # Process URL for CDN conversion on server side
-            card_dict['display_image_path'] = url_service.process_firebase_to_cdn_url(card_obj.display_image_path)
-                
-            # Generate high-res path from CDN URL
-            if card_dict['display_image_path']:
-                card_dict['high_res_image_path'] = card_dict['display_image_path'].replace('/cards/', '/high_res_cards/')
-                
-            card_dicts.append(card_dict)
-
-        # DEBUG: Log summary of what we found
-        # API Summary logged internally
-        
         current_app.logger.info(
-            f"Returning {len(card_dicts)} cards after filtering from CardCollection."
+            f"Returning {len(filtered_card_objects)} cards after filtering from CardCollection."
+        )
+        # Join pre-rendered per-card JSON instead of building and encoding dicts per request
+        response = card_render_service.build_response(
+            card_collection, filtered_card_objects, success=True
         )
-        response = jsonify({"cards": card_dicts, "success": True})
-        # Cache for 5 minutes since cards don't change often
-        response.headers['Cache-Control'] = 'public, max-age=300'
+        response.headers['Cache-Control'] = cache_control
+        response.set_etag(etag)
         return response
 
     except Exception as e:
@@ -534,10 +617,7 @@ def get_cards_paginated():
     
     # Log set distribution
     if card_collection and hasattr(card_collection, "cards"):
-        set_counts = {}
-        for card in card_collection.cards:
-            set_name = card.set_name
-            set_counts[set_name] = set_counts.get(set_name, 0) + 1
+        set_counts = card_collection.index.counts("set_name")
         
         current_app.logger.info(f"DEBUG DECKS: Cards per set: {dict(sorted(set_counts.items(), key=lambda x: x[1], reverse=True))}")
         current_app.logger.info(f"DEBUG DECKS: Total unique sets: {len(set_counts)}")
@@ -556,11 +636,25 @@ def get_cards_paginated():
             503,
         )
 
+    # 10 minutes client, 30 minutes proxy
+    cache_control = 'public, max-age=600, s-maxage=1800'
+    etag = _card_listing_etag(card_collection, "cards/paginated")
+    if request.if_none_match.contains_weak(etag):
+        return _not_modified_response(etag, cache_control)
+
     try:
         # Get pagination parameters
         page = int(request.args.get("page", 1))
         limit = min(int(request.args.get("limit", 20)), 100)  # Max 100 cards per page
         offset = (page - 1) * limit
+        # A cursor (empty for the first page) switches to keyset pagination and takes precedence over page
+        cursor = request.args.get("cursor")
+        after_position = None
+        if cursor:
+            (after_card_id,) = decode_cursor(cursor, 1)
+            after_position = card_collection.position_of(after_card_id)
+            if after_position is None:
+                raise ValueError(f"cursor card {after_card_id!r} is no longer in the catalog")
 
         # Get filter parameters
         set_code_filter = request.args.get("set_code")
@@ -576,336 +670,94 @@ def get_cards_paginated():
             'rarities': [], 'set_code': None, 'exclude_ex': False, 'remaining_text': ''
         }
 
-        # Start with all cards from the collection
-        all_cards_from_collection = card_collection.cards
-        filtered_card_objects = all_cards_from_collection
+        # Apply server-side filters by intersecting index bitsets
+        index = card_collection.index
+        mask = index.all_mask
 
-        # Apply server-side filters
         # Apply keyword-based set filter first (takes precedence over URL parameter)
         if parsed_keywords['set_code']:
-            filtered_card_objects = [
-                card for card in filtered_card_objects
-                if (hasattr(card, 'set_code') and card.set_code == parsed_keywords['set_code']) or
-                   (hasattr(card, 'set_name') and card.set_name == parsed_keywords['set_code'])
-            ]
+            mask &= _set_mask(index, parsed_keywords['set_code'])
         elif set_code_filter and set_code_filter != "All":
-            filtered_card_objects = [
-                card for card in filtered_card_objects
-                if (hasattr(card, 'set_code') and card.set_code == set_code_filter) or
-                   (hasattr(card, 'set_name') and card.set_name == set_code_filter)
-            ]
+            mask &= _set_mask(index, set_code_filter)
 
         # Apply keyword-based energy type filter (takes precedence over URL parameter)
         if parsed_keywords['energy_types']:
-            filtered_card_objects = [
-                card for card in filtered_card_objects
-                if hasattr(card, 'energy_type') and card.energy_type in parsed_keywords['energy_types']
-            ]
+            mask &= index.mask("energy_type", parsed_keywords['energy_types'])
         elif energy_type_filter and energy_type_filter != "All":
-            filtered_card_objects = [
-                card for card in filtered_card_objects
-                if hasattr(card, 'energy_type') and card.energy_type == energy_type_filter
-            ]
+            mask &= index.mask("energy_type", energy_type_filter)
 
         # Apply keyword-based card type filter (takes precedence over URL parameter)
         if parsed_keywords['card_type']:
-            if parsed_keywords['card_type'] == "Pokémon":
-                filtered_card_objects = [
-                    card for card in filtered_card_objects
-                    if hasattr(card, 'card_type') and card.card_type and "Pokémon" in card.card_type
-                ]
-            elif parsed_keywords['card_type'] == "Trainer":
-                filtered_card_objects = [
-                    card for card in filtered_card_objects
-                    if hasattr(card, 'card_type') and card.card_type and "Trainer" in card.card_type
-                ]
-        elif card_type_filter and card_type_filter != "All":
-            if card_type_filter == "Pokémon":
-                filtered_card_objects = [
-                    card for card in filtered_card_objects
-                    if hasattr(card, 'card_type') and card.card_type and "Pokémon" in card.card_type
-                ]
-            elif card_type_filter == "Trainer":
-                filtered_card_objects = [
-                    card for card in filtered_card_objects
-                    if hasattr(card, 'card_type') and card.card_type and "Trainer" in card.card_type
-                ]
+            mask &= index.mask("category", parsed_keywords['card_type'])
+        elif card_type_filter in ("Pokémon", "Trainer"):
+            mask &= index.mask("category", card_type_filter)
 
         # Apply keyword-based stage type filter (takes precedence over URL parameter)
         if parsed_keywords['stage_type']:
-            stage_type = parsed_keywords['stage_type']
-            if stage_type == "EX":
-                # Filter for EX cards (cards ending with " ex" in name or having "pokemon - ex" in card_type)
-                filtered_card_objects = [
-                    card for card in filtered_card_objects
-                    if (card.name and card.name.lower().endswith(' ex') and not card.name.lower().endswith(' - ex (ultra beast)')) or
-                       (card.card_type and 'pokemon - ex' in card.card_type.lower())
-                ]
-            else:
-                # For other stage types (Basic, Stage 1, Stage 2, etc.) or trainer types (Item, Supporter, etc.)
-                filtered_card_objects = [
-                    card for card in filtered_card_objects
-                    if card.card_type and stage_type in card.card_type
-                ]
+            mask &= _stage_type_mask(index, parsed_keywords['stage_type'])
         elif stage_type_filter and stage_type_filter != "All":
-            if stage_type_filter == "EX":
-                # Filter for EX cards (cards ending with " ex" in name or having "pokemon - ex" in card_type)
-                filtered_card_objects = [
-                    card for card in filtered_card_objects
-                    if (card.name and card.name.lower().endswith(' ex') and not card.name.lower().endswith(' - ex (ultra beast)')) or
-                       (card.card_type and 'pokemon - ex' in card.card_type.lower())
-                ]
-            else:
-                # For other stage types (Basic, Stage 1, Stage 2, etc.) or trainer types (Item, Supporter, etc.)
-                filtered_card_objects = [
-                    card for card in filtered_card_objects
-                    if card.card_type and stage_type_filter in card.card_type
-                ]
+            mask &= _stage_type_mask(index, stage_type_filter)
 
         # Apply keyword-based rarity filter (takes precedence over URL parameter)
         if parsed_keywords['rarities']:
-            if parsed_keywords.get('is_shiny_search', False):
-                pass  # Shiny search detected
-                # Special handling for "shiny" searches: include regular shiny cards plus specific Promo-A cards
-                promo_cards_found = []
-                for card in filtered_card_objects:
-                    if hasattr(card, 'card_number_str') and card.card_number_str in ['50', '51'] and getattr(card, 'set_name', None) == 'Promo-A':
-                        promo_cards_found.append(f"CardNum:{card.card_number_str}, Name:{card.name}, Set:{card.set_name}")
-                
-                if promo_cards_found:
-                    pass  # Found Promo-A cards
-                else:
-                    pass  # No Promo-A cards found
-                
-                filtered_card_objects = [
-                    card for card in filtered_card_objects
-                    if (card.rarity in parsed_keywords['rarities']) or  
-                       (hasattr(card, 'card_number_str') and card.card_number_str in ['50', '51'] and 
-                        getattr(card, 'set_name', None) == 'Promo-A')
-                ]
-            else:
-                filtered_card_objects = [
-                    card for card in filtered_card_objects
-                    if card.rarity in parsed_keywords['rarities']
-                ]
+            mask &= _keyword_rarity_mask(index, parsed_keywords)
         elif rarity_filter and rarity_filter != "All":
-            filtered_card_objects = [
-                card for card in filtered_card_objects
-                if card.rarity == rarity_filter
-            ]
+            mask &= index.mask("rarity", rarity_filter)
 
         # Apply remaining text as name filter (after keyword extraction)
+        # Only card names are searched; types and energies match via complete keywords
         if parsed_keywords['remaining_text']:
-            remaining_text = parsed_keywords['remaining_text'].lower()
-            search_terms = remaining_text.split()
-            
-            def card_matches_search_terms(card):
-                # Only search in card names for partial matches
-                # Card types and energy types are only matched via complete keywords
-                card_name = card.name.lower() if card.name else ""
-                
-                # Check if all search terms are found in the card name
-                return all(term in card_name for term in search_terms)
-            
-            filtered_card_objects = [
-                card for card in filtered_card_objects
-                if card_matches_search_terms(card)
-            ]
-        
+            mask &= _name_text_mask(card_collection, parsed_keywords['remaining_text'])
+
         # Apply exclude_ex filter if requested
         if parsed_keywords['exclude_ex']:
-            filtered_card_objects = [
-                card for card in filtered_card_objects
-                if not ((card.name and card.name.lower().endswith(' ex')) or
-                        (card.card_type and 'pokemon - ex' in card.card_type.lower()))
-            ]
+            mask &= ~index.mask("is_ex", True)
 
         # Get sorting parameters
         sort_type = request.args.get("sort", "name")
         direction = request.args.get("direction", "desc")
         current_app.logger.info(f"DEBUG API CALL: sort_type={sort_type}, direction={direction}, all_args={dict(request.args)}")
         
-        # Apply sorting
-        if sort_type == "name":
-            filtered_card_objects.sort(key=lambda card: card.name.lower() if card.name else "", reverse=(direction == "desc"))
-        elif sort_type == "rarity":
-            # Define rarity order - matches frontend exactly
-            rarity_order = {
-                'Crown Rare': 0, '✵✵': 1, '✵': 2,
-                '☆☆☆': 3, '☆☆': 4, '☆': 5,
-                '◊◊◊◊': 6, '◊◊◊': 7, '◊◊': 8, '◊': 9,
-                # Legacy mappings for compatibility
-                "Ultra Rare": 1, "♦♦♦♦": 1,
-                "Rare": 2, "♦♦♦": 2,
-                "Uncommon": 3, "♦♦": 3,
-                "Common": 4, "♦": 4
-            }
-            def rarity_sort_key(card):
-                # Primary sort: Rarity
-                rarity_priority = rarity_order.get(card.rarity, 99) if card.rarity else 99
-                
-                # Secondary sort: Most recent set (using same logic as set sorting)
-                # Get set name for all cards (needed for Promo-A check)
-                set_name = card.set_name if card.set_name else ""
-                
-                # Use release_order if available
-                if hasattr(card, 'set_release_order') and card.set_release_order is not None:
-                    # Higher release_order = newer set, we want newer first so negate
-                    set_priority = -card.set_release_order
-                else:
-                    # Fallback to old logic
-                    set_priority = SET_RELEASE_ORDER.get(set_name, 999)
-                
-                # Promo-A should ALWAYS be at the bottom regardless of sort direction
-                if set_name == "Promo-A":
-                    set_priority = 999  # Make Promo-A always come last
-                
-                return (rarity_priority, set_priority)
-            
-            filtered_card_objects.sort(
-                key=rarity_sort_key, 
-                reverse=(direction == "desc")
-            )
-        elif sort_type == "type":
-            # Sort by card type with sophisticated ordering
-            def get_card_sort_key(card):
-                if not card.card_type:
-                    return (99, "", "")
-                
-                # Use type order that matches frontend exactly
-                type_priority = {
-                    'Grass': 0, 'Fire': 1, 'Water': 2, 'Lightning': 3, 
-                    'Psychic': 4, 'Fighting': 5, 'Darkness': 6, 'Metal': 7, 
-                    'Dragon': 8, 'Colorless': 9, 'Trainer': 10,
-                    # Legacy mappings for compatibility
-                    'Electric': 3, 'Dark': 6
-                }.get(card.energy_type if card.is_pokemon else 'Trainer', 99)
-                
-                # Stage order that matches frontend exactly
-                if card.is_pokemon:
-                    stage_priority = {
-                        'Stage 2': 0, 'Stage 1': 1, 'Basic': 2, 'Ultra Beast': 6
-                    }.get(getattr(card, 'stage', None) or 'Basic', 99)
-                elif card.is_trainer:
-                    stage_priority = {
-                        'Item': 3, 'Supporter': 4, 'Tool': 5
-                    }.get(card.trainer_subtype, 99)
-                else:
-                    stage_priority = 99
-                
-                # Add set-based secondary sorting (same logic as set sorting)
-                # Use release_order if available
-                if hasattr(card, 'set_release_order') and card.set_release_order is not None:
-                    # Higher release_order = newer set, we want newer first for secondary sort
-                    set_priority = -card.set_release_order
-                else:
-                    # Fallback to old logic
-                    set_priority = SET_RELEASE_ORDER.get(card.set_name, 999)
-                
-                # Promo-A should ALWAYS be at the bottom regardless of sort direction
-                if card.set_name == "Promo-A":
-                    set_priority = 999  # Make Promo-A always come last
-                
-                return (type_priority, stage_priority, set_priority, 0)
-            
-            filtered_card_objects.sort(
-                key=get_card_sort_key, 
-                reverse=(direction == "desc")
-            )
-        elif sort_type == "set":
-            # Sort by set release order, then by card number within each set
-            def set_sort_key(card):
-                # Use release_order from card if available, otherwise use fallback logic
-                if hasattr(card, 'set_release_order') and card.set_release_order is not None:
-                    # For release_order: higher number = newer set
-                    # For desc: we want newer sets first, so negate the release_order
-                    if direction == "desc":
-                        set_priority = -card.set_release_order
-                    else:
-                        set_priority = card.set_release_order
-                else:
-                    # Fallback to hardcoded mapping for cards without release_order
-                    set_name = card.set_name if card.set_name else ""
-                    set_priority = SET_RELEASE_ORDER.get(set_name, 999)
-                
-                # Special handling for Promo-A - always put it last regardless of direction
-                if card.set_name == "Promo-A":
-                    set_priority = 9999
-                
-                # Use card_number for secondary sort within each set
-                card_num = card.card_number if card.card_number is not None else 0
-                if card_num == 0 and hasattr(card, 'card_number_str') and card.card_number_str:
-                    try:
-                        import re
-                        match = re.search(r'(\d+)', str(card.card_number_str))
-                        card_num = int(match.group(1)) if match else 0
-                    except:
-                        card_num = 0
-                        
-                return (set_priority, card_num)
-            
-            filtered_card_objects.sort(key=set_sort_key)
-
         # Calculate pagination metadata
-        total_count = len(filtered_card_objects)
-        has_more = (offset + limit) < total_count
-        
-        # Apply pagination
-        paginated_cards = filtered_card_objects[offset:offset + limit]
-
-        # Convert Card objects to dictionaries for JSON response
-        card_dicts = []
-        
-        # Cache for set release orders to avoid repeated lookups
-        set_release_orders = {}
-        
-        for card_obj in paginated_cards:
-            card_dict = card_obj.to_dict()
-            
-            # Fix missing set_release_order by looking it up from Firestore
-            if card_dict.get('set_release_order') is None and card_obj.set_name:
-                if card_obj.set_name not in set_release_orders:
-                    try:
-                        from ..db_service import db_service
-                        set_doc = db_service.get_document("cards", card_obj.set_name.replace(" ", "_"))
-                        if set_doc:
-                            set_release_orders[card_obj.set_name] = set_doc.get("release_order")
-                        else:
-                            set_release_orders[card_obj.set_name] = None
-                    except Exception:
-                        set_release_orders[card_obj.set_name] = None
-                
-                card_dict['set_release_order'] = set_release_orders[card_obj.set_name]
-            
-            # Process URL for CDN conversion on server side
-            card_dict['display_image_path'] = url_service.process_firebase_to_cdn_url(card_obj.display_image_path)
-                
-            # Generate high-res path from CDN URL
-            if card_dict['display_image_path']:
-                card_dict['high_res_image_path'] = card_dict['display_image_path'].replace('/cards/', '/high_res_cards/')
-                
-            card_dicts.append(card_dict)
+        total_count = mask.bit_count()
+        
+        # Select the page from the presorted catalog order instead of sorting the filtered cards
+        sort_order = _card_sort_order(card_collection, sort_type, direction)
+        if cursor is not None:
+            paginated_cards = card_collection.select_after(mask, sort_order, after_position, limit + 1)
+            has_more = len(paginated_cards) > limit
+            paginated_cards = paginated_cards[:limit]
+        elif sort_order is None:
+            has_more = (offset + limit) < total_count
+            paginated_cards = card_collection.cards_for_mask(mask)[offset:offset + limit]
+        else:
+            has_more = (offset + limit) < total_count
+            paginated_cards = card_collection.select_sorted(mask, sort_order, offset, offset + limit)
 
         current_app.logger.info(
-            f"Returning page {page} with {len(card_dicts)} cards (total: {total_count}) from CardCollection."
+            f"Returning page {page} with {len(paginated_cards)} cards (total: {total_count}) from CardCollection."
         )
 
-        response = jsonify({
-            "cards": card_dicts,
-            "success": True,
-            "pagination": {
-                "current_page": page,
-                "total_count": total_count,
-                "has_more": has_more,
-                "page_size": limit,
-                "total_pages": (total_count + limit - 1) // limit
-            }
-        })
+        pagination = {
+            "total_count": total_count,
+            "has_more": has_more,
+            "page_size": limit,
+            "total_pages": (total_count + limit - 1) // limit,
+            "next_cursor": encode_cursor(paginated_cards[-1].id) if has_more and paginated_cards else None,
+        }
+        if cursor is None:
+            pagination["current_page"] = page
+
+        response = card_render_service.build_response(
+            card_collection,
+            paginated_cards,
+            success=True,
+            pagination=pagination,
+        )
         
         # Add enhanced cache headers for better performance
-        response.headers['Cache-Control'] = 'public, max-age=600, s-maxage=1800'  # 10 minutes client, 30 minutes proxy
-        cache_key = f"{page}-{limit}-{set_code_filter}-{energy_type_filter}-{card_type_filter}-{stage_type_filter}-{rarity_filter}-{name_filter}-{total_count}"
-        response.headers['ETag'] = f'"{hash(cache_key)}"'
+        response.headers['Cache-Control'] = cache_control
+        response.set_etag(etag)
         
         # Add rate limiting information to help client-side throttling
         response.headers['X-RateLimit-Limit'] = '1000'
@@ -1178,8 +1030,10 @@ def create_deck():
         batch.update(
             user_doc_ref, {"deck_ids": firestore.ArrayUnion([deck_firestore_id])}
         )
+        decks_counter.increment(db, batch)
 
         batch.commit()
+        user_service.invalidate_user_decks(user_firestore_id)
 
         current_app.logger.info(
             f"Deck '{deck_name_from_req}' (FS ID: {deck_firestore_id}) created for user {user_firestore_id}."
@@ -1396,6 +1250,7 @@ def update_deck(deck_id: str):
         # updated_at will be set to firestore.SERVER_TIMESTAMP by to_firestore_dict().
 
         deck_doc_ref.update(updated_deck_firestore_data)
+        user_service.invalidate_user_decks(user_firestore_id)
         current_app.logger.info(
             f"Deck '{new_deck_name_from_req}' (ID: {deck_id}) updated by user {user_firestore_id}."
         )
@@ -1463,8 +1318,10 @@ def delete_deck(deck_id: str):
         # 2. Remove the deck's ID from the user's 'deck_ids' array
         user_doc_ref = db.collection("users").document(user_firestore_id)
         batch.update(user_doc_ref, {"deck_ids": firestore.ArrayRemove([deck_id])})
+        decks_counter.increment(db, batch, -1)
 
         batch.commit()
+        user_service.invalidate_user_decks(user_firestore_id)
 
         current_app.logger.info(
             f"Deck (ID: {deck_id}) deleted successfully by user {user_firestore_id}."
@@ -1544,6 +1401,7 @@ def update_deck_description(deck_id: str):
         deck_ref.update({
             "description": description
         })
+        user_service.invalidate_user_decks(current_user_id)
         
         return jsonify({
             "success": True,
@@ -1606,6 +1464,7 @@ def toggle_deck_privacy(deck_id: str):
             "description": deck.description
         }
         db.collection("decks").document(deck_id).update(update_data)
+        user_service.invalidate_user_decks(current_user_id)
         
         action = "made public" if new_privacy else "made private"
         return jsonify({
@@ -1734,7 +1593,9 @@ def copy_deck(
         batch.update(
             user_doc_ref, {"deck_ids": firestore.ArrayUnion([new_deck_firestore_id])}
         )
+        decks_counter.increment(db, batch)
         batch.commit()
+        user_service.invalidate_user_decks(user_firestore_id)
 
         current_app.logger.info(
             f"Deck {original_deck_id} copied to new deck {new_deck_firestore_id} for user {user_firestore_id}."
@@ -2018,20 +1879,18 @@ def view_public_deck(deck_id):
 def get_all_sets():
     """API endpoint to get all sets with their metadata including release order."""
     try:
-        db = get_db()
-        if not db:
-            current_app.logger.error("Database connection not available for /api/sets")
-            return jsonify({
-                "error": "Database is currently unavailable. Please try again later.",
-                "success": False,
-                "sets": []
-            }), 503
-
-        # Query the sets collection directly from Firebase
-        sets_ref = db.collection('cards')
-        sets_docs = list(sets_ref.stream())
-        
-        if not sets_docs:
+        card_collection = card_service.get_full_card_collection()
+        cache_control = 'public, max-age=3600'
+        etag = None
+        if card_collection and card_collection.cards:
+            etag = _card_listing_etag(card_collection, "sets")
+            if request.if_none_match.contains_weak(etag):
+                return _not_modified_response(etag, cache_control)
+
+        # Derived from the loaded catalog; only reads Firestore when no catalog is available
+        sets_data = card_service.get_set_metadata()
+
+        if not sets_data:
             current_app.logger.warning("No sets found in database for /api/sets")
             return jsonify({
                 "error": "No sets found in database.",
@@ -2039,48 +1898,17 @@ def get_all_sets():
                 "sets": []
             }), 404
 
-        sets_data = []
-        for doc in sets_docs:
-            try:
-                set_data = doc.to_dict()
-                set_name = set_data.get('set_name')
-                release_order = set_data.get('release_order')
-                
-                if not set_name:
-                    current_app.logger.warning(f"Set document {doc.id} missing set_name")
-                    continue
-                
-                # Get card count from subcollection
-                cards_ref = doc.reference.collection('set_cards')
-                try:
-                    # Use a more efficient count query if available, otherwise get all docs
-                    cards_docs = list(cards_ref.stream())
-                    card_count = len(cards_docs)
-                except Exception as e:
-                    current_app.logger.warning(f"Could not count cards for set {set_name}: {e}")
-                    card_count = 0
-                
-                sets_data.append({
-                    "name": set_name,
-                    "code": set_data.get('set_code', ''),
-                    "release_order": release_order if release_order is not None else 0,
-                    "card_count": card_count
-                })
-                
-            except Exception as e:
-                current_app.logger.error(f"Error processing set document {doc.id}: {e}")
-                continue
-
-        # Sort by release_order (descending - newest first)
-        sets_data.sort(key=lambda x: x['release_order'], reverse=True)
-        
         current_app.logger.info(f"Successfully retrieved {len(sets_data)} sets for /api/sets")
         
-        return jsonify({
+        response = jsonify({
             "success": True,
             "sets": sets_data,
             "count": len(sets_data)
         })
+        if etag:
+            response.headers['Cache-Control'] = cache_control
+            response.set_etag(etag)
+        return response
 
     except Exception as e:
         current_app.logger.error(f"Error in /api/sets endpoint: {e}")
@@ -12,26 +12,45 @@ from flask_login import login_required, current_user as flask_login_current_user
 from firebase_admin import firestore
 from Deck import Deck
 from ..models import User
-from ..services import card_service, url_service
+from ..services import card_service, url_service, user_service
+from ..pagination import decode_cursor, encode_cursor
 import datetime
 from better_profanity import profanity
 
 friends_bp = Blueprint("friends", __name__, url_prefix="/friends")
 
 
-# Helper function to get user data for display
-def _get_user_snapshot(user_id):
-    db = current_app.config.get("FIRESTORE_DB")
-    user_ref = db.collection("users").document(user_id)
-    user_doc = user_ref.get()
-    if user_doc.exists:
-        user_data = user_doc.to_dict()
-        return {
-            "id": user_doc.id,
+# Helper functions to get user data for display
+def _user_snapshots(user_ids) -> dict:
+    """Display snapshots for ``user_ids`` keyed by id, loaded in batches; unknown users are left out."""
+    profiles = user_service.get_user_profiles(list(user_ids))
+    return {
+        user_id: {
+            "id": user_id,
             "username": user_data.get("username", "Unknown"),
             "profile_icon": user_data.get("profile_icon", ""),
         }
-    return None
+        for user_id, user_data in profiles.items()
+    }
+
+
+def _get_user_snapshot(user_id):
+    return _user_snapshots([user_id]).get(user_id)
+
+
+def _friend_cursor(friended_at, friend_id: str):
+    """Cursor resuming after a friend; None when ``friended_at`` is missing."""
+    if not isinstance(friended_at, datetime.datetime):
+        return None
+    return encode_cursor(friended_at, friend_id)
+
+
+def _decode_friend_cursor(cursor: str) -> list:
+    """``(friended_at, friend_id)`` from ``_friend_cursor``; raises ValueError for anything else."""
+    friended_at, friend_id = decode_cursor(cursor, 2)
+    if not isinstance(friended_at, datetime.datetime) or not isinstance(friend_id, str):
+        raise ValueError("Invalid friend cursor")
+    return [friended_at, friend_id]
 
 
 @friends_bp.route("/")
@@ -41,20 +60,25 @@ def friends_page():
     user_id = flask_login_current_user.id
 
     # Fetch current friends
-    friends_ref = (
-        db.collection("users").document(user_id).collection("friends").stream()
-    )
-    friends = [_get_user_snapshot(friend.id) for friend in friends_ref]
+    friend_ids = [
+        friend.id
+        for friend in db.collection("users").document(user_id).collection("friends").stream()
+    ]
 
     # Fetch pending requests (sent and received)
-    requests_ref = (
+    request_docs = list(
         db.collection("users").document(user_id).collection("friend_requests").stream()
     )
+
+    # One batched profile load for everyone on the page
+    snapshots = _user_snapshots(friend_ids + [req.id for req in request_docs])
+    friends = [snapshots.get(friend_id) for friend_id in friend_ids]
+
     sent_requests = []
     received_requests = []
-    for req in requests_ref:
+    for req in request_docs:
         req_data = req.to_dict()
-        user_info = _get_user_snapshot(req.id)
+        user_info = snapshots.get(req.id)
         if user_info:
             if req_data.get("status") == "sent":
                 sent_requests.append(user_info)
@@ -81,48 +105,77 @@ def get_friends_api():
         try:
             page = max(1, int(request.args.get("page", 1)))
             limit = min(max(1, int(request.args.get("limit", 20))), 100)  # Max 100 friends per page, default 20
+            # A cursor (empty for the first page) switches to keyset pagination and takes precedence over page
+            cursor = request.args.get("cursor")
+            after = _decode_friend_cursor(cursor) if cursor else None
         except ValueError:
             return jsonify({"error": "Invalid pagination parameters", "friends": []}), 400
         
         offset = (page - 1) * limit
-        
-        # Get all friend documents
-        friends_ref = (
-            db.collection("users").document(user_id).collection("friends").stream()
-        )
-        
-        # Convert to list and sort by friended_at (most recent first)
-        all_friends = []
-        for friend in friends_ref:
-            friend_data = friend.to_dict()
-            user_info = _get_user_snapshot(friend.id)
-            if user_info:
-                user_info['friended_at'] = friend_data.get('friended_at')
-                all_friends.append(user_info)
-        
-        # Sort by friended_at (most recent first), then by username
-        all_friends.sort(key=lambda f: (
-            f.get('friended_at') or datetime.datetime.min, 
-            f.get('username', '').lower()
-        ), reverse=True)
-        
-        # Apply pagination
-        total_count = len(all_friends)
-        paginated_friends = all_friends[offset:offset + limit]
-        has_more = offset + limit < total_count
-        
-        # Remove friended_at from response (internal field)
-        for friend in paginated_friends:
-            friend.pop('friended_at', None)
-        
+        friends_collection = db.collection("users").document(user_id).collection("friends")
+
+        if cursor is not None:
+            # Read only the requested page, newest friendship first, resuming after the last one seen
+            friends_query = friends_collection.order_by(
+                "friended_at", direction=firestore.Query.DESCENDING
+            ).order_by("__name__", direction=firestore.Query.DESCENDING)
+            if after:
+                friends_query = friends_query.start_after({"friended_at": after[0], "__name__": after[1]})
+            friend_docs = list(friends_query.limit(limit + 1).stream())
+            has_more = len(friend_docs) > limit
+            friend_docs = friend_docs[:limit]
+
+            snapshots = _user_snapshots(friend.id for friend in friend_docs)
+            paginated_friends = [snapshots[friend.id] for friend in friend_docs if friend.id in snapshots]
+            next_cursor = None
+            if has_more and friend_docs:
+                next_cursor = _friend_cursor(friend_docs[-1].get("friended_at"), friend_docs[-1].id)
+            # Aggregation query, billed as one read per 1000 friends
+            total_count = friends_collection.count().get()[0][0].value
+        else:
+            # Get all friend documents
+            friend_docs = list(friends_collection.stream())
+            snapshots = _user_snapshots(friend.id for friend in friend_docs)
+
+            # Convert to list and sort by friended_at (most recent first)
+            all_friends = []
+            for friend in friend_docs:
+                friend_data = friend.to_dict()
+                user_info = snapshots.get(friend.id)
+                if user_info:
+                    user_info['friended_at'] = friend_data.get('friended_at')
+                    all_friends.append(user_info)
+
+            # Sort by friended_at (most recent first), then by username
+            all_friends.sort(key=lambda f: (
+                f.get('friended_at') or datetime.datetime.min, 
+                f.get('username', '').lower()
+            ), reverse=True)
+
+            # Apply pagination
+            total_count = len(all_friends)
+            paginated_friends = all_friends[offset:offset + limit]
+            has_more = offset + limit < total_count
+            next_cursor = None
+            if has_more and paginated_friends:
+                next_cursor = _friend_cursor(paginated_friends[-1].get('friended_at'), paginated_friends[-1]['id'])
+
+            # Remove friended_at from response (internal field)
+            for friend in paginated_friends:
+                friend.pop('friended_at', None)
+
+        pagination = {
+            "total_count": total_count,
+            "has_more": has_more,
+            "page_size": limit,
+            "next_cursor": next_cursor,
+        }
+        if cursor is None:
+            pagination["current_page"] = page
+
         return jsonify({
             "friends": paginated_friends,
-            "pagination": {
-                "current_page": page,
-                "total_count": total_count,
-                "has_more": has_more,
-                "page_size": limit
-            }
+            "pagination": pagination,
         })
         
     except Exception as e:
@@ -149,8 +202,15 @@ def search_users():
     )
 
     current_user_id = flask_login_current_user.id
+    # The query already returns the user documents; no per-result profile reads
     results = [
-        _get_user_snapshot(doc.id) for doc in query_result if doc.id != current_user_id
+        {
+            "id": doc.id,
+            "username": doc.to_dict().get("username", "Unknown"),
+            "profile_icon": doc.to_dict().get("profile_icon", ""),
+        }
+        for doc in query_result
+        if doc.id != current_user_id
     ]
 
     return jsonify(results)
@@ -554,6 +614,7 @@ def toggle_deck_privacy(deck_id):
             "description": deck.description
         }
         db.collection("decks").document(deck_id).update(update_data)
+        user_service.invalidate_user_decks(current_user_id)
         
         action = "made public" if new_privacy else "made private"
         return jsonify({
@@ -111,6 +111,16 @@ def get_metrics():
         return jsonify({"error": str(e)}), 500
 
 
+@internal_bp.route("/metrics/prometheus", methods=["GET"])
+def prometheus_metrics():
+    """Metrics in Prometheus text exposition format for scrapers."""
+    from ..prometheus import CONTENT_TYPE, cached_render_metrics
+    from ..security import security_monitor
+
+    body = cached_render_metrics(performance_monitor.metrics, security_monitor)
+    return current_app.response_class(body, content_type=CONTENT_TYPE)
+
+
 @internal_bp.route("/dashboard", methods=["GET"])
 def monitoring_dashboard():
     """Get monitoring dashboard data."""
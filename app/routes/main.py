@@ -13,7 +13,7 @@ from flask_login import (
 )
 import requests
 from datetime import datetime
-from ..services import database_service, card_service
+from ..services import database_service, card_service, url_service, stats_service
 
 main_bp = Blueprint("main", __name__)
 
@@ -28,99 +28,26 @@ def simple_health_check():
 
 @main_bp.route("/")
 def index():
-    db = current_app.config.get("FIRESTORE_DB")  # Get Firestore client
-
     # Get card collection from cache manager for better performance tracking
     card_collection = card_service.get_card_collection()
     total_cards = len(card_collection) if card_collection else 0
 
-    # --- Get Total Users from Firestore ---
-    total_users = 0
-    if db:
-        try:
-            # WARNING: Streaming all documents just to count can be inefficient for very large collections.
-            # Consider a distributed counter for production if user numbers are huge.
-            users_query = (
-                db.collection("users").select([]).stream()
-            )  # select([]) fetches only IDs, more efficient
-            total_users = len(list(users_query))
-        except Exception as e:
-            current_app.logger.error(f"Error counting users from Firestore: {e}")
-            # Fallback or set to a placeholder if count fails
-            total_users = "N/A"
-    else:
-        total_users = "N/A"  # DB not available
-
-    # --- Get Total Decks from Firestore ---
-    total_decks = 0
-    if db:
-        try:
-            # Same warning as for users regarding counting large collections.
-            decks_query = db.collection("decks").select([]).stream()
-            total_decks = len(list(decks_query))
-        except Exception as e:
-            current_app.logger.error(f"Error counting decks from Firestore: {e}")
-            total_decks = "N/A"
-    else:
-        total_decks = "N/A"  # DB not available
+    # User/deck totals and top decks come from sharded counters, cached in process
+    home_stats = stats_service.get_home_stats()
 
     battle_history = current_app.config.get("battle_history", [])
     total_battles = len(battle_history)
     recent_battles = battle_history[-5:] if battle_history else []
     # TODO: Migrate battle_history to Firestore and update fetching here.
 
-    meta_stats = current_app.config.get("meta_stats", {"decks": {}})
-    top_decks_data = []
-    if db:
-        for deck_name, stats in meta_stats.get("decks", {}).items():
-            if (
-                stats.get("total_battles", 0) >= 5
-            ):
-                win_rate = (stats.get("wins", 0) / stats["total_battles"]) * 100
-
-                deck_types_from_fs = []
-                try:
-                    deck_query_by_name = (
-                        db.collection("decks")
-                        .where("name", "==", deck_name)
-                        .limit(1)
-                        .stream()
-                    )
-                    for deck_doc_found in deck_query_by_name:
-                        deck_data_fs = deck_doc_found.to_dict()
-                        deck_types_from_fs = deck_data_fs.get("deck_types", [])
-                        break
-                except Exception as e_deck_type:
-                    current_app.logger.error(
-                        f"Error fetching types for deck '{deck_name}' from Firestore: {e_deck_type}"
-                    )
-
-                top_decks_data.append(
-                    {
-                        "name": deck_name,
-                        "win_rate": round(win_rate, 1),
-                        "types": deck_types_from_fs,
-                    }
-                )
-    else:
-        for deck_name, stats in meta_stats.get("decks", {}).items():
-            if stats.get("total_battles", 0) >= 5:
-                win_rate = (stats.get("wins", 0) / stats["total_battles"]) * 100
-                top_decks_data.append(
-                    {"name": deck_name, "win_rate": round(win_rate, 1), "types": []}
-                )
-
-    top_decks_data.sort(key=lambda x: x.get("win_rate", 0), reverse=True)
-    top_decks_data = top_decks_data[:5]
-
     return render_template(
         "main_index.html",
         total_cards=total_cards,
-        total_users=total_users,
-        total_decks=total_decks,
+        total_users=home_stats["total_users"],
+        total_decks=home_stats["total_decks"],
         total_battles=total_battles,
         recent_battles=recent_battles,
-        top_decks=top_decks_data,
+        top_decks=home_stats["top_decks"],
         user_logged_in=flask_login_current_user.is_authenticated,
         username=(
             flask_login_current_user.username
@@ -342,9 +269,24 @@ def search_api():
             return jsonify({"error": "Invalid search query"}), 400
         
         if search_type == 'cards':
-            card_collection = card_service.get_card_collection()
-            # Simple search implementation
-            results = []
+            card_collection = card_service.get_full_card_collection()
+            limit = min(max(request.args.get('limit', 20, type=int), 1), 50)
+            # Ranked, typo-tolerant match over card names, attacks and abilities
+            results = [
+                {
+                    "id": card.id,
+                    "name": card.name,
+                    "set_name": card.set_name,
+                    "set_code": card.set_code,
+                    "card_number_str": card.card_number_str,
+                    "rarity": card.rarity,
+                    "energy_type": card.energy_type,
+                    "card_type": card.card_type,
+                    "display_image_path": url_service.process_firebase_to_cdn_url(card.display_image_path),
+                    "score": round(score, 3),
+                }
+                for card, score in card_collection.search(query, limit=limit)
+            ]
             return jsonify({"results": results})
         
         elif search_type == 'users':
@@ -488,13 +430,10 @@ def about():
     
     if db:
         try:
-            # Get user count
-            users_query = db.collection("users").select([]).stream()
-            total_users = len(list(users_query))
-            
-            # Get deck count
-            decks_query = db.collection("decks").select([]).stream()
-            total_decks = len(list(decks_query))
+            # User and deck counts from the cached counter totals
+            home_stats = stats_service.get_home_stats()
+            total_users = home_stats["total_users"]
+            total_decks = home_stats["total_decks"]
             
             # Get battle count (if we have it stored)
             try:
@@ -6,6 +6,7 @@ Provides clean interfaces for accessing cached data without storing in app confi
 from typing import Optional, List, Dict, Any
 import threading
 import os
+import time
 from flask import current_app
 from Card import CardCollection, Card
 from .cache_manager import cache_manager
@@ -13,6 +14,60 @@ from .db_service import db_service
 from firebase_admin import firestore
 
 
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into a single execution.
+    
+    The first caller for a key runs the function; callers arriving while it
+    runs wait for its result instead of repeating the work.
+    """
+    
+    class _Call:
+        __slots__ = ("done", "result", "error")
+        
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, "SingleFlight._Call"] = {}
+    
+    def in_flight(self, key: str) -> bool:
+        with self._lock:
+            return key in self._calls
+    
+    def do(self, key: str, fn, timeout: Optional[float] = None):
+        """Run ``fn`` once per key among concurrent callers and share its result.
+        
+        Raises TimeoutError if a waiting caller gives up after ``timeout``
+        seconds; the leader's exception is re-raised in every caller.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = SingleFlight._Call()
+        
+        if not leader:
+            if not call.done.wait(timeout):
+                raise TimeoutError(f"Timed out waiting for in-flight load of {key}")
+            if call.error is not None:
+                raise call.error
+            return call.result
+        
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+
 class CardService:
     """Service for handling card collection operations."""
     
@@ -30,6 +85,11 @@ class CardService:
     _background_loading_lock = threading.Lock()
     _background_loading_active = False
     
+    # Concurrent cache misses share one Firestore load; waiters give up after this many seconds
+    _loads = SingleFlight()
+    _revalidating = set()
+    LOAD_WAIT_TIMEOUT = 30
+    
     @staticmethod
     def _get_sample_card_collection() -> CardCollection:
         """Create a small sample collection for development testing."""
@@ -99,8 +159,7 @@ class CardService:
         try:
             current_app.logger.info(f"DEBUG SERVICES: Getting dynamic priority sets...")
             # Query Firestore for sets ordered by release_order descending
-            db_client = db_service.get_db_client()
-            if not db_client:
+            if not current_app.config.get("FIRESTORE_DB"):
                 current_app.logger.info(f"DEBUG SERVICES: No DB client, falling back to hardcoded: {CardService.PRIORITY_SETS}")
                 # Fallback to hardcoded list if no DB connection
                 return CardService.PRIORITY_SETS
@@ -111,7 +170,8 @@ class CardService:
             sets_data = db_service.query_collection(
                 "cards",
                 order_by="release_order desc",
-                limit=5
+                limit=5,
+                cached=True
             )
             current_app.logger.info(f"DEBUG SERVICES: Query returned {len(sets_data)} set documents")
             
@@ -168,6 +228,11 @@ class CardService:
         if full_collection and len(full_collection.cards) > 1000:  # Full collection threshold
             return full_collection
         
+        # Expired full collection: keep serving it while one background load refreshes it
+        stale_collection = CardService._get_stale_collection("global_cards", min_cards=1000)
+        if stale_collection:
+            return stale_collection
+        
         # If no full collection, check if we have a priority collection cached
         priority_collection = cache_manager.get_card_collection(cache_key="global_cards_priority")
         
@@ -207,6 +272,20 @@ class CardService:
         # Try priority collection from cache
         priority_collection = cache_manager.get_card_collection(cache_key="global_cards_priority")
         
+        if priority_collection:
+            return priority_collection
+        
+        stale_collection = CardService._get_stale_collection("global_cards_priority")
+        if stale_collection:
+            return stale_collection
+        
+        return CardService._coalesced_load("global_cards_priority", CardService._fetch_priority_card_collection)
+    
+    @staticmethod
+    def _fetch_priority_card_collection() -> Optional[CardCollection]:
+        """Load priority sets from Firestore and cache them."""
+        # Another caller may have finished loading while this one waited
+        priority_collection = cache_manager.get_card_collection(cache_key="global_cards_priority")
         if priority_collection:
             return priority_collection
         
@@ -259,7 +338,7 @@ class CardService:
         """Load cards from a specific set into the collection."""
         try:
             # Use db_service for metrics tracking
-            all_set_docs = db_service.query_collection("cards")
+            all_set_docs = db_service.query_collection("cards", cached=True)
             
             loaded_count = 0
             set_found = False
@@ -298,14 +377,6 @@ class CardService:
                 
                 current_app.logger.info(f"DEBUG SERVICES: Found {len(card_docs)} card documents in subcollection")
                 
-                # Manually track the reads
-                if card_docs:
-                    try:
-                        from .monitoring import performance_monitor
-                        performance_monitor.metrics.record_firestore_read("cards/set_cards", len(card_docs))
-                    except:
-                        pass
-                
                 set_loaded_count = 0
                 cards_processed = 0
                 cards_skipped_no_data = 0
@@ -343,28 +414,7 @@ class CardService:
                         current_app.logger.info(f"DEBUG SERVICES: Creating card {card_name}... with set_release_order: {set_release_order}")
                         current_app.logger.info(f"DEBUG SERVICES: Card data keys: {list(card_data.keys())[:10]}")
 
-                        card = Card(
-                            id=int(card_pk_id),
-                            name=card_data.get("name", ""),
-                            energy_type=card_data.get("energy_type", ""),
-                            set_name=card_data.get("set_name", ""),
-                            set_code=card_data.get("set_code", ""),
-                            card_number=card_data.get("card_number"),
-                            card_number_str=card_data.get("card_number_str", ""),
-                            card_type=card_data.get("card_type", ""),
-                            hp=card_data.get("hp"),
-                            attacks=card_data.get("attacks", []),
-                            weakness=card_data.get("weakness"),
-                            retreat_cost=card_data.get("retreat_cost"),
-                            illustrator=card_data.get("illustrator"),
-                            firebase_image_url=card_data.get("firebase_image_url"),
-                            rarity=card_data.get("rarity", ""),
-                            pack=card_data.get("pack", ""),
-                            original_image_url=card_data.get("original_image_url"),
-                            flavor_text=card_data.get("flavor_text"),
-                            abilities=card_data.get("abilities", []),
-                            set_release_order=set_release_order,
-                        )
+                        card = Card.from_firestore(card_data, set_release_order)
                         collection.add_card(card)
                         set_loaded_count += 1
                         loaded_count += 1
@@ -437,10 +487,133 @@ class CardService:
     def _load_full_collection(cache_as_full: bool = True, max_cards: int = None) -> CardCollection:
         """Load the complete card collection from Firestore with optional limits.
         
+        Concurrent loads that populate the shared cache run once; every
+        caller receives that collection.
+        
         Args:
             cache_as_full: Whether to cache the result as the full collection
             max_cards: Optional limit on number of cards to load (for cost optimization)
         """
+        if cache_as_full:
+            collection = CardService._coalesced_load(
+                "global_cards", lambda: CardService._fetch_full_collection(True, max_cards)
+            )
+        else:
+            collection = CardService._coalesced_load(
+                f"uncached:{max_cards}", lambda: CardService._fetch_full_collection(False, max_cards)
+            )
+        return collection if collection is not None else CardCollection()
+    
+    @staticmethod
+    def _coalesced_load(cache_key: str, loader) -> Optional[CardCollection]:
+        """Run ``loader`` once for all concurrent misses on ``cache_key``.
+        
+        Callers that time out waiting get the stale collection if there is one.
+        """
+        try:
+            return CardService._loads.do(cache_key, loader, timeout=CardService.LOAD_WAIT_TIMEOUT)
+        except TimeoutError:
+            if current_app and current_app.debug:
+                current_app.logger.debug(f"Timed out waiting for card load '{cache_key}'")
+            return cache_manager.get_stale_card_collection(cache_key)
+    
+    @staticmethod
+    def _get_stale_collection(cache_key: str, min_cards: int = 0) -> Optional[CardCollection]:
+        """Expired collection for ``cache_key``, scheduling a background refresh of it.
+        
+        Returns None if there is no stale copy (or it is below ``min_cards``).
+        """
+        stale_collection = cache_manager.get_stale_card_collection(cache_key)
+        if not stale_collection or len(stale_collection.cards) <= min_cards:
+            return None
+        CardService._revalidate_in_background(cache_key)
+        return stale_collection
+    
+    @staticmethod
+    def _revalidate_in_background(cache_key: str) -> None:
+        """Start one background reload of ``cache_key`` unless one is already running."""
+        with CardService._background_loading_lock:
+            if cache_key in CardService._revalidating or CardService._loads.in_flight(cache_key):
+                return
+            CardService._revalidating.add(cache_key)
+        app = current_app._get_current_object()
+        
+        def load():
+            if cache_key == "global_cards":
+                return CardService._fetch_full_collection(True)
+            return CardService._fetch_priority_card_collection()
+        
+        def revalidate():
+            with app.app_context():
+                try:
+                    CardService._loads.do(cache_key, load)
+                except Exception as e:
+                    if app.debug:
+                        app.logger.error(f"Error revalidating card collection '{cache_key}': {e}")
+                finally:
+                    with CardService._background_loading_lock:
+                        CardService._revalidating.discard(cache_key)
+        
+        threading.Thread(target=revalidate, daemon=True).start()
+    
+    @staticmethod
+    def _snapshot_path() -> Optional[str]:
+        """Configured on-disk snapshot path, or None if snapshots are disabled."""
+        try:
+            return current_app.config.get("CARD_SNAPSHOT_PATH") or None
+        except RuntimeError:
+            return None
+    
+    @staticmethod
+    def load_catalog(db_client, max_cards: int = None) -> CardCollection:
+        """Full card collection, from the on-disk snapshot when it is current.
+        
+        The snapshot is checked against the catalog marker (one read per set
+        document); Firestore is only read for cards when the marker has moved
+        or there is no usable snapshot, and a fresh snapshot is written after.
+        ``max_cards`` caps the Firestore read, not the snapshot, which costs
+        no card reads.
+        """
+        snapshot_path = CardService._snapshot_path()
+        if snapshot_path:
+            marker = CardCollection.fetch_catalog_marker(db_client)
+            if marker:
+                collection = CardCollection.load_snapshot(snapshot_path, marker)
+                if collection is not None:
+                    if current_app and current_app.debug:
+                        current_app.logger.debug(f"Loaded {len(collection)} cards from snapshot {snapshot_path}")
+                    return collection
+        
+        collection = CardCollection()
+        collection.load_from_firestore(db_client, max_cards=max_cards)
+        
+        if snapshot_path and CardService._is_complete_load(collection):
+            if collection.save_snapshot(snapshot_path):
+                if current_app and current_app.debug:
+                    current_app.logger.debug(f"Wrote card snapshot {snapshot_path} ({collection.catalog_marker})")
+        return collection
+    
+    @staticmethod
+    def _is_complete_load(collection: CardCollection) -> bool:
+        """Whether a load has at least as many cards as the set documents report.
+        
+        Firestore errors during loading are swallowed, so this keeps a partial
+        collection from being written as the snapshot.
+        """
+        if not collection.cards or not collection.catalog_marker:
+            return False
+        expected_cards = int(collection.catalog_marker.split(":")[1])
+        return len(collection.cards) >= expected_cards
+    
+    @staticmethod
+    def _fetch_full_collection(cache_as_full: bool = True, max_cards: int = None) -> CardCollection:
+        """Read the card collection from Firestore and optionally cache it."""
+        if cache_as_full:
+            # Another caller may have finished loading while this one waited
+            cached_collection = cache_manager.get_card_collection(cache_key="global_cards")
+            if cached_collection and len(cached_collection.cards) > 1000:
+                return cached_collection
+        
         db_client = current_app.config.get("FIRESTORE_DB")
         if not db_client:
             # Critical error logging
@@ -454,9 +627,7 @@ class CardService:
                 emulator_host = os.environ.get('FIRESTORE_EMULATOR_HOST')
                 limit_msg = f" (limited to {max_cards} cards)" if max_cards else ""
                 current_app.logger.debug(f"Loading card collection from Firestore{limit_msg}... (Emulator: {emulator_host})")
-            collection = CardCollection()
-            # Load full collection from Firestore
-            collection.load_from_firestore(db_client, max_cards=max_cards)
+            collection = CardService.load_catalog(db_client, max_cards=max_cards)
             
             if cache_as_full:
                 # Cache as full collection with extended TTL (1 week) for cost savings
@@ -513,6 +684,10 @@ class CardService:
         if full_collection and len(full_collection.cards) > 1000:
             return full_collection
         
+        stale_collection = CardService._get_stale_collection("global_cards", min_cards=1000)
+        if stale_collection:
+            return stale_collection
+        
         # Load full collection immediately
         # API loading message only in debug
         if current_app and current_app.debug:
@@ -523,11 +698,28 @@ class CardService:
     
     @staticmethod
     def refresh_card_collection() -> bool:
-        """Force refresh of card collection from Firestore."""
+        """Refresh the cached card collections from Firestore.
+        
+        When a full collection is cached, only the sets whose fingerprint
+        changed are re-read and patched into it; otherwise both caches are
+        rebuilt.
+        """
+        try:
+            db_client = current_app.config.get("FIRESTORE_DB")
+            live_collection = cache_manager.get_card_collection(cache_key="global_cards")
+            if db_client and live_collection and getattr(live_collection, "set_fingerprints", None):
+                return CardService._refresh_changed_sets(db_client, live_collection)
+        except Exception as e:
+            # Fall back to a full rebuild below
+            if current_app and current_app.debug:
+                print(f"Error refreshing changed card sets: {e}")
+        
         try:
             # Invalidate both full and priority caches
             cache_manager.invalidate_card_cache()
             cache_manager.invalidate_card_cache(cache_key="global_cards_priority")
+            cache_manager.invalidate_set_metadata()
+            db_service.invalidate_cache("cards")
             
             # Load fresh priority data first
             db_client = current_app.config.get("FIRESTORE_DB")
@@ -556,10 +748,154 @@ class CardService:
                 print(f"Error refreshing card collection: {e}")
             return False
 
+    @staticmethod
+    def get_set_metadata() -> List[Dict[str, Any]]:
+        """Name, code, release order and card count per set, newest first.
+        
+        Derived from the loaded catalog and memoized on it, so it costs no
+        Firestore reads and is replaced along with the collection on refresh.
+        Falls back to the set documents plus aggregation counts, cached for an
+        hour, when no catalog is available.
+        """
+        collection = CardService.get_full_card_collection()
+        if collection and collection.cards:
+            return collection.set_metadata()
+        
+        sets = cache_manager.get_set_metadata()
+        if sets is None:
+            sets = CardService._fetch_set_metadata()
+            if sets:
+                cache_manager.set_set_metadata(sets)
+        return sets or []
+    
+    @staticmethod
+    def _fetch_set_metadata() -> List[Dict[str, Any]]:
+        """Set metadata from Firestore, counting cards with aggregation queries."""
+        db_client = current_app.config.get("FIRESTORE_DB")
+        if not db_client:
+            return []
+        
+        sets = []
+        for doc in db_client.collection("cards").stream():
+            set_data = doc.to_dict() or {}
+            set_name = set_data.get("set_name")
+            if not set_name:
+                continue
+            try:
+                # One aggregation read per set instead of one read per card
+                card_count = doc.reference.collection("set_cards").count().get()[0][0].value
+            except Exception as e:
+                if current_app and current_app.debug:
+                    current_app.logger.debug(f"Could not count cards for set {set_name}: {e}")
+                card_count = set_data.get("card_count") or 0
+            release_order = set_data.get("release_order")
+            sets.append({
+                "name": set_name,
+                "code": set_data.get("set_code", ""),
+                "release_order": release_order if release_order is not None else 0,
+                "card_count": card_count,
+            })
+        sets.sort(key=lambda entry: entry["release_order"], reverse=True)
+        return sets
+    
+    @staticmethod
+    def _refresh_changed_sets(db_client, live_collection: CardCollection) -> bool:
+        """Re-read the ``set_cards`` of sets whose fingerprint moved and swap in a patched collection.
+        
+        The live collection is frozen and read without locks, so the patch is
+        applied to a copy (sharing unchanged Card objects and index postings)
+        that replaces it in the cache. The catalog version, and with it the
+        ETags and rendered fragments, only changes if card data changed.
+        """
+        set_docs = list(db_client.collection("cards").stream())
+        fingerprints = CardCollection.fingerprints_for_set_docs(set_docs)
+        previous = live_collection.set_fingerprints
+        changed_sets = [doc_id for doc_id, fingerprint in fingerprints.items() if previous.get(doc_id) != fingerprint]
+        removed_sets = [doc_id for doc_id in previous if doc_id not in fingerprints]
+        if not changed_sets and not removed_sets:
+            return True
+        
+        collection = live_collection.copy()
+        touched_ids = []
+        for doc_id in removed_sets:
+            touched_ids += collection.replace_set_cards(previous[doc_id][0], [])
+        
+        reads = len(set_docs)
+        for doc_id in changed_sets:
+            set_name, release_order = fingerprints[doc_id][:2]
+            card_docs = list(db_client.collection("cards").document(doc_id).collection("set_cards").stream())
+            reads += len(card_docs)
+            cards = []
+            for card_doc in card_docs:
+                card_data = card_doc.to_dict()
+                if not card_data or card_data.get("id") is None:
+                    continue
+                try:
+                    cards.append(Card.from_firestore(card_data, release_order))
+                except (TypeError, ValueError):
+                    continue
+            if cards and not set_name:
+                set_name = cards[0].set_name
+            touched_ids += collection.replace_set_cards(set_name, cards)
+        
+        collection.set_fingerprints = fingerprints
+        collection.catalog_marker = CardCollection.marker_for_fingerprints(fingerprints)
+        cache_manager.invalidate_set_metadata()
+        db_service.invalidate_cache("cards")
+        if touched_ids:
+            CardRenderService.patch_fragments(live_collection, collection, touched_ids)
+        cache_manager.set_card_collection(collection, ttl_hours=168)
+        cache_manager.invalidate_card_cache(cache_key="global_cards_priority")
+        
+        snapshot_path = CardService._snapshot_path()
+        if snapshot_path and CardService._is_complete_load(collection):
+            collection.save_snapshot(snapshot_path)
+        
+        if current_app and current_app.debug:
+            current_app.logger.debug(
+                f"Refreshed {len(changed_sets)} changed and {len(removed_sets)} removed sets "
+                f"({len(touched_ids)} cards, {reads} reads); catalog {collection.version}"
+            )
+        return True
+
 
 class UserService:
     """Service for handling user data operations."""
     
+    # Profiles loaded for display elsewhere (friends lists) share load_user's cache entries
+    PROFILE_TTL_MINUTES = 5
+    PROFILE_BATCH_SIZE = 100
+    
+    @staticmethod
+    def get_user_profiles(user_ids: List[str]) -> Dict[str, Dict]:
+        """User documents for ``user_ids`` keyed by id; unknown users are left out.
+        
+        Served from the per-user cache that ``load_user`` also reads. Misses
+        are fetched with one ``db.get_all`` per ``PROFILE_BATCH_SIZE`` ids and
+        cached for ``PROFILE_TTL_MINUTES``.
+        """
+        profiles = {}
+        missing = []
+        for user_id in dict.fromkeys(user_ids):
+            cached_profile = cache_manager.get_user_data(user_id)
+            if cached_profile:
+                profiles[user_id] = cached_profile
+            else:
+                missing.append(user_id)
+        if not missing:
+            return profiles
+        
+        db = DatabaseService.get_db()
+        users_ref = db.collection("users")
+        for start in range(0, len(missing), UserService.PROFILE_BATCH_SIZE):
+            chunk = missing[start:start + UserService.PROFILE_BATCH_SIZE]
+            for user_doc in db.get_all([users_ref.document(user_id) for user_id in chunk]):
+                if user_doc.exists:
+                    user_data = user_doc.to_dict()
+                    cache_manager.set_user_data(user_doc.id, user_data, ttl_minutes=UserService.PROFILE_TTL_MINUTES)
+                    profiles[user_doc.id] = user_data
+        return profiles
+    
     @staticmethod
     def get_user_collection(user_id: str) -> Optional[Dict]:
         """Get user's personal card collection with enhanced database service."""
@@ -608,6 +944,11 @@ class UserService:
                 print(f"Error loading user decks for {user_id}: {e}")
             return []
     
+    @staticmethod
+    def invalidate_user_decks(user_id: str) -> None:
+        """Invalidate a user's cached deck summaries."""
+        cache_manager.invalidate_user_decks(user_id)
+    
     @staticmethod
     def invalidate_user_cache(user_id: str) -> None:
         """Invalidate all cached data for a user."""
@@ -681,6 +1022,193 @@ class UrlService:
         return image_path
 
 
+class CardRenderService:
+    """Pre-serialized JSON fragments for card API responses.
+
+    Each card is rendered once per catalog version (to_dict, release order
+    backfill, CDN URL conversion) and kept as encoded JSON bytes, so listing
+    endpoints only join fragments instead of building and encoding dicts.
+    """
+
+    # Catalog versions kept at once (e.g. priority and full collections)
+    MAX_VERSIONS = 2
+
+    _lock = threading.Lock()
+    _fragments: Dict[str, Dict[int, bytes]] = {}
+
+    @staticmethod
+    def render_card(card: Card, set_release_orders: Dict[str, Optional[int]]) -> Dict[str, Any]:
+        """Build the API dict for a card as served by /api/cards."""
+        card_dict = card.to_dict()
+
+        # Fix missing set_release_order by looking it up from Firestore (once per set)
+        if card_dict.get('set_release_order') is None and card.set_name:
+            if card.set_name not in set_release_orders:
+                try:
+                    set_doc = db_service.get_document("cards", card.set_name.replace(" ", "_"), cached=True)
+                    set_release_orders[card.set_name] = set_doc.get("release_order") if set_doc else None
+                except Exception:
+                    set_release_orders[card.set_name] = None
+            card_dict['set_release_order'] = set_release_orders[card.set_name]
+
+        # Process URL for CDN conversion on server side
+        card_dict['display_image_path'] = UrlService.process_firebase_to_cdn_url(card.display_image_path)
+
+        # Generate high-res path from CDN URL
+        if card_dict['display_image_path']:
+            card_dict['high_res_image_path'] = card_dict['display_image_path'].replace('/cards/', '/high_res_cards/')
+
+        return card_dict
+
+    @staticmethod
+    def _encode(value: Any) -> bytes:
+        # Same key order and escaping as jsonify, without whitespace
+        return current_app.json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+    @staticmethod
+    def get_fragments(collection: CardCollection) -> Dict[int, bytes]:
+        """Encoded JSON per card id for the collection's catalog version."""
+        version = collection.version
+        with CardRenderService._lock:
+            fragments = CardRenderService._fragments.get(version)
+        if fragments is not None:
+            return fragments
+
+        set_release_orders: Dict[str, Optional[int]] = {}
+        fragments = {
+            card.id: CardRenderService._encode(CardRenderService.render_card(card, set_release_orders))
+            for card in collection.cards
+        }
+
+        with CardRenderService._lock:
+            cache = CardRenderService._fragments
+            cache[version] = fragments
+            while len(cache) > CardRenderService.MAX_VERSIONS:
+                cache.pop(next(iter(cache)))
+
+        if current_app and current_app.debug:
+            current_app.logger.debug(f"Rendered {len(fragments)} card fragments for catalog {version}")
+        return fragments
+
+    @staticmethod
+    def patch_fragments(previous: CardCollection, collection: CardCollection, card_ids: List[int]) -> None:
+        """Seed ``collection``'s fragments from ``previous``, re-rendering only ``card_ids``."""
+        with CardRenderService._lock:
+            old_fragments = CardRenderService._fragments.get(previous.version)
+        if old_fragments is None or previous.version == collection.version:
+            return
+        
+        stale_ids = set(card_ids)
+        set_release_orders: Dict[str, Optional[int]] = {}
+        fragments = {}
+        for card in collection.cards:
+            fragment = None if card.id in stale_ids else old_fragments.get(card.id)
+            if fragment is None:
+                fragment = CardRenderService._encode(CardRenderService.render_card(card, set_release_orders))
+            fragments[card.id] = fragment
+        
+        with CardRenderService._lock:
+            cache = CardRenderService._fragments
+            cache[collection.version] = fragments
+            while len(cache) > CardRenderService.MAX_VERSIONS:
+                cache.pop(next(iter(cache)))
+
+    @staticmethod
+    def build_response(collection: CardCollection, cards: List[Card], **fields):
+        """JSON response ``{"cards": [...], **fields}`` assembled from cached fragments."""
+        fragments = CardRenderService.get_fragments(collection)
+        parts = [b'{"cards":[', b",".join(fragments[card.id] for card in cards), b"]"]
+        for key in sorted(fields):
+            parts.append(b"," + CardRenderService._encode(key) + b":" + CardRenderService._encode(fields[key]))
+        parts.append(b"}\n")
+        return current_app.response_class(b"".join(parts), mimetype="application/json")
+
+    @staticmethod
+    def clear() -> None:
+        """Drop all rendered fragments."""
+        with CardRenderService._lock:
+            CardRenderService._fragments.clear()
+
+
+class StatsService:
+    """Site-wide statistics for the home and about pages.
+
+    User and deck totals come from sharded counters instead of streaming the
+    collections. The computed stats are kept in process for ``TTL_SECONDS``,
+    so most page views cost no Firestore reads at all.
+    """
+
+    TTL_SECONDS = int(os.environ.get("HOME_STATS_TTL_SECONDS", "300"))
+    _lock = threading.Lock()
+    _cached: Optional[Dict[str, Any]] = None
+    _expires_at = 0.0
+
+    @staticmethod
+    def get_home_stats() -> Dict[str, Any]:
+        """Total users, total decks and the top meta decks with their energy types."""
+        with StatsService._lock:
+            if StatsService._cached is not None and time.monotonic() < StatsService._expires_at:
+                return StatsService._cached
+        stats = StatsService._compute_home_stats()
+        with StatsService._lock:
+            StatsService._cached = stats
+            StatsService._expires_at = time.monotonic() + StatsService.TTL_SECONDS
+        return stats
+
+    @staticmethod
+    def _compute_home_stats() -> Dict[str, Any]:
+        from .counters import users_counter, decks_counter
+
+        db = current_app.config.get("FIRESTORE_DB")
+        total_users = total_decks = "N/A"  # DB not available or counter read failed
+        if db:
+            try:
+                total_users = users_counter.value(db)
+                total_decks = decks_counter.value(db)
+            except Exception as e:
+                current_app.logger.error(f"Error reading stats counters from Firestore: {e}")
+
+        meta_stats = current_app.config.get("meta_stats", {"decks": {}})
+        top_decks = []
+        for deck_name, deck_stats in meta_stats.get("decks", {}).items():
+            if deck_stats.get("total_battles", 0) >= 5:
+                win_rate = (deck_stats.get("wins", 0) / deck_stats["total_battles"]) * 100
+                top_decks.append({"name": deck_name, "win_rate": round(win_rate, 1), "types": []})
+        top_decks.sort(key=lambda x: x.get("win_rate", 0), reverse=True)
+        top_decks = top_decks[:5]
+
+        # Energy types only for the decks actually shown
+        if db:
+            for top_deck in top_decks:
+                try:
+                    for deck_doc in db.collection("decks").where("name", "==", top_deck["name"]).limit(1).stream():
+                        top_deck["types"] = deck_doc.to_dict().get("deck_types", [])
+                except Exception as e:
+                    current_app.logger.error(
+                        f"Error fetching types for deck '{top_deck['name']}' from Firestore: {e}"
+                    )
+
+        return {"total_users": total_users, "total_decks": total_decks, "top_decks": top_decks}
+
+    @staticmethod
+    def reconcile_counters() -> Optional[Dict[str, int]]:
+        """Recount users and decks into their counters and drop the cached stats."""
+        from .counters import reconcile
+
+        db = current_app.config.get("FIRESTORE_DB")
+        if not db:
+            return None
+        totals = reconcile(db)
+        StatsService.invalidate()
+        return totals
+
+    @staticmethod
+    def invalidate() -> None:
+        """Drop the cached stats so the next page view recomputes them."""
+        with StatsService._lock:
+            StatsService._cached = None
+
+
 class MetricsService:
     """Service for tracking application metrics."""
     
@@ -712,4 +1240,6 @@ card_service = CardService()
 user_service = UserService()
 database_service = DatabaseService()
 url_service = UrlService()
+card_render_service = CardRenderService()
+stats_service = StatsService()
 metrics_service = MetricsService()
\ No newline at end of file
@@ -17,6 +17,7 @@ from functools import wraps
 try:
     from google.cloud import tasks_v2
     from google.protobuf import timestamp_pb2
+    from google.api_core.exceptions import AlreadyExists
     CLOUD_TASKS_AVAILABLE = True
 except ImportError:
     CLOUD_TASKS_AVAILABLE = False
@@ -56,6 +57,9 @@ class TaskQueue:
         self._workers = []
         self._running = True
         self._task_registry = {}
+        # Names of scheduled tasks not yet run, for deduplicating named tasks
+        self._named_tasks = set()
+        self._named_tasks_lock = threading.Lock()
         
         # Start worker threads
         for i in range(3):  # 3 worker threads
@@ -80,6 +84,9 @@ class TaskQueue:
         try:
             task_type = task_data.get("task_type")
             payload = task_data.get("payload", {})
+            if task_data.get("task_name"):
+                with self._named_tasks_lock:
+                    self._named_tasks.discard(task_data["task_name"])
             
             handler = self._task_registry.get(task_type)
             if handler:
@@ -116,18 +123,24 @@ class TaskQueue:
             pass
     
     def enqueue_task(self, task_type: str, payload: Dict[str, Any], 
-                    delay_seconds: int = 0, url: str = None) -> bool:
-        """Enqueue a task for background processing."""
+                    delay_seconds: int = 0, url: str = None, task_name: str = None) -> bool:
+        """Enqueue a task for background processing.
+        
+        A ``task_name`` (letters, digits, "-" and "_") makes the enqueue
+        idempotent: while a task of that name is pending, enqueueing it again
+        is a no-op that returns True. Cloud Tasks enforces this across all
+        instances; the in-memory queue only within this process.
+        """
         
         if self.client and self.queue_path:
             # Use Google Cloud Tasks
-            return self._enqueue_cloud_task(task_type, payload, delay_seconds, url)
+            return self._enqueue_cloud_task(task_type, payload, delay_seconds, url, task_name)
         else:
             # Use in-memory fallback
-            return self._enqueue_memory_task(task_type, payload, delay_seconds)
+            return self._enqueue_memory_task(task_type, payload, delay_seconds, task_name)
     
     def _enqueue_cloud_task(self, task_type: str, payload: Dict[str, Any], 
-                           delay_seconds: int, url: str) -> bool:
+                           delay_seconds: int, url: str, task_name: str = None) -> bool:
         """Enqueue task using Google Cloud Tasks."""
         try:
             if not url:
@@ -160,30 +173,47 @@ class TaskQueue:
                 timestamp.FromDatetime(datetime.utcnow() + timedelta(seconds=delay_seconds))
                 task["schedule_time"] = timestamp
             
+            if task_name:
+                task["name"] = self.client.task_path(self.project_id, self.location, self.queue_name, task_name)
+            
             # Enqueue the task
             response = self.client.create_task(parent=self.queue_path, task=task)
             print(f"Enqueued Cloud Task: {response.name}")
             return True
             
+        except AlreadyExists:
+            # Another instance already scheduled this named task
+            return True
         except Exception as e:
             print(f"Error enqueuing Cloud Task: {e}")
             # Fallback to memory queue
-            return self._enqueue_memory_task(task_type, payload, delay_seconds)
+            return self._enqueue_memory_task(task_type, payload, delay_seconds, task_name)
     
-    def _enqueue_memory_task(self, task_type: str, payload: Dict[str, Any], delay_seconds: int) -> bool:
+    def _enqueue_memory_task(self, task_type: str, payload: Dict[str, Any], delay_seconds: int,
+                             task_name: str = None) -> bool:
         """Enqueue task using in-memory queue."""
         try:
+            if not hasattr(self, '_memory_queue'):
+                # Cloud Tasks was configured but failed for this task
+                self._setup_memory_fallback()
+            if task_name:
+                with self._named_tasks_lock:
+                    if task_name in self._named_tasks:
+                        return True
+                    self._named_tasks.add(task_name)
             task_data = {
                 "task_type": task_type,
                 "payload": payload,
                 "timestamp": datetime.utcnow().isoformat(),
-                "delay_seconds": delay_seconds
+                "delay_seconds": delay_seconds,
+                "task_name": task_name,
             }
             
             if delay_seconds > 0:
                 # Schedule delayed task
                 timer = threading.Timer(delay_seconds, 
                                       lambda: self._memory_queue.put(task_data))
+                timer.daemon = True  # Pending delayed tasks must not block shutdown
                 timer.start()
             else:
                 # Immediate task
@@ -296,6 +326,70 @@ def cleanup_expired_cache_task(payload: Dict[str, Any]):
         print(f"Error in cleanup_expired_cache_task: {e}")
 
 
+def _next_reconciliation(interval_minutes: int, after_slot: int = None, now: float = None) -> tuple:
+    """``(slot, task_name, delay_seconds)`` for the next run on the shared ``interval_minutes`` grid.
+    
+    Every instance and worker derives the same name for a given slot, so
+    only one task per slot is ever scheduled. ``after_slot`` (the slot that
+    just ran) keeps a run that fires early from rescheduling its own slot.
+    """
+    interval_seconds = interval_minutes * 60
+    now = time.time() if now is None else now
+    slot = int(now // interval_seconds) + 1
+    if after_slot is not None:
+        slot = max(slot, after_slot + 1)
+    task_name = f"reconcile-stats-counters-{interval_minutes}m-{slot}"
+    return slot, task_name, max(1, int(slot * interval_seconds - now))
+
+
+def start_stats_reconciliation(app, interval_minutes: int = 60) -> bool:
+    """Recount users and decks into the home page counters every ``interval_minutes``.
+    
+    Runs are named tasks aligned to a shared schedule: every worker and
+    instance that starts (or finishes a run) asks for the same next slot and
+    Cloud Tasks keeps just one, so there is a single chain however many
+    instances come and go. The in-memory queue only deduplicates within its
+    process.
+    """
+    def reconcile_stats_handler(payload: Dict[str, Any]):
+        try:
+            with app.app_context():
+                from .services import stats_service
+                totals = stats_service.reconcile_counters()
+                if app.debug:
+                    app.logger.debug(f"Reconciled stats counters: {totals}")
+        except Exception as e:
+            print(f"Error in reconcile_stats_counters task: {e}")
+        finally:
+            schedule(payload.get("slot"))
+    
+    def schedule(after_slot: Optional[int] = None) -> bool:
+        slot, task_name, delay_seconds = _next_reconciliation(interval_minutes, after_slot)
+        return task_queue.enqueue_task(
+            "reconcile_stats_counters", {"slot": slot}, delay_seconds=delay_seconds, task_name=task_name
+        )
+    
+    task_queue.register_task_handler("reconcile_stats_counters", reconcile_stats_handler)
+    return schedule()
+
+
+def register_analytics_backfill(app) -> None:
+    """Register the job that rebuilds the daily analytics rollups from user documents."""
+    def backfill_analytics_handler(payload: Dict[str, Any]):
+        try:
+            with app.app_context():
+                from . import rollups
+                db = app.config.get("FIRESTORE_DB")
+                if not db:
+                    return
+                days = rollups.backfill(db, db.collection("users").stream())
+                app.logger.info(f"Backfilled analytics rollups for {days} days")
+        except Exception as e:
+            print(f"Error in backfill_analytics_rollups task: {e}")
+    
+    task_queue.register_task_handler("backfill_analytics_rollups", backfill_analytics_handler)
+
+
 # Utility function to enqueue common tasks
 def enqueue_card_refresh(delay_minutes: int = 0):
     """Enqueue a card cache refresh task."""
@@ -304,4 +398,9 @@ def enqueue_card_refresh(delay_minutes: int = 0):
 
 def enqueue_user_stats_update(user_id: str, delay_minutes: int = 5):
     """Enqueue a user stats update task."""
-    return task_queue.enqueue_task("update_user_stats", {"user_id": user_id}, delay_seconds=delay_minutes * 60)
\ No newline at end of file
+    return task_queue.enqueue_task("update_user_stats", {"user_id": user_id}, delay_seconds=delay_minutes * 60)
+
+
+def enqueue_analytics_backfill(delay_minutes: int = 0):
+    """Enqueue a rebuild of the daily analytics rollups."""
+    return task_queue.enqueue_task("backfill_analytics_rollups", {}, delay_seconds=delay_minutes * 60)
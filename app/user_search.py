@@ -0,0 +1,151 @@
+"""
+Prefix search over usernames for the admin user search.
+
+``UserSearchIndex`` keeps a trie of ``username_lowercase`` -> user ids in
+process. It is built once from a single-field projection of ``users`` in a
+background thread and then refreshed incrementally from documents whose
+``username_updated_at`` changed since the last sync, plus direct updates
+from the routes that change usernames in this process. Callers fetch only
+the matching user documents, so a search costs reads proportional to its
+results.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Set
+
+# Upper bound for prefix range queries: sorts after any character in a username or email
+PREFIX_END = "\uf8ff"
+
+
+class _TrieNode:
+    __slots__ = ("children", "user_ids")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.user_ids: Set[str] = set()
+
+
+class UsernameTrie:
+    """Trie of lowercase usernames to the ids of the users holding them."""
+
+    def __init__(self):
+        self._root = _TrieNode()
+
+    def insert(self, username: str, user_id: str) -> None:
+        node = self._root
+        for char in username:
+            node = node.children.setdefault(char, _TrieNode())
+        node.user_ids.add(user_id)
+
+    def remove(self, username: str, user_id: str) -> None:
+        path = [self._root]
+        for char in username:
+            node = path[-1].children.get(char)
+            if node is None:
+                return
+            path.append(node)
+        path[-1].user_ids.discard(user_id)
+        # Prune branches that no longer lead to any username
+        for depth in range(len(username), 0, -1):
+            node = path[depth]
+            if node.user_ids or node.children:
+                break
+            del path[depth - 1].children[username[depth - 1]]
+
+    def prefix(self, prefix: str, limit: int) -> List[str]:
+        """Up to ``limit`` user ids whose username starts with ``prefix``, in username order."""
+        node = self._root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        matches: List[str] = []
+        stack = [node]
+        while stack and len(matches) < limit:
+            node = stack.pop()
+            matches.extend(sorted(node.user_ids)[:limit - len(matches)])
+            stack.extend(node.children[char] for char in sorted(node.children, reverse=True))
+        return matches
+
+
+class UserSearchIndex:
+    """Process-wide username trie with a lazy background build and incremental refresh."""
+
+    # Seconds between incremental refresh queries; clock skew allowance for username_updated_at
+    REFRESH_SECONDS = 30
+    SYNC_OVERLAP = timedelta(seconds=5)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._trie = UsernameTrie()
+        self._usernames: Dict[str, str] = {}
+        self._ready = False
+        self._building = False
+        self._synced_at: Optional[datetime] = None
+        self._checked_at = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    def update(self, user_id: str, username: str) -> None:
+        """Record ``user_id``'s current lowercase username (empty removes it from search)."""
+        with self._lock:
+            previous = self._usernames.pop(user_id, None)
+            if previous:
+                self._trie.remove(previous, user_id)
+            if username:
+                self._usernames[user_id] = username
+                self._trie.insert(username, user_id)
+
+    def remove(self, user_id: str) -> None:
+        self.update(user_id, "")
+
+    def search(self, prefix: str, limit: int) -> List[str]:
+        with self._lock:
+            return self._trie.prefix(prefix, limit)
+
+    def build_in_background(self, db) -> None:
+        """Start building the trie from Firestore unless it is built or building."""
+        with self._lock:
+            if self._ready or self._building:
+                return
+            self._building = True
+        threading.Thread(target=self._build, args=(db,), daemon=True).start()
+
+    def _build(self, db) -> None:
+        try:
+            synced_at = datetime.now(timezone.utc)
+            for doc in db.collection("users").select(["username_lowercase"]).stream():
+                self.update(doc.id, (doc.to_dict() or {}).get("username_lowercase", ""))
+            with self._lock:
+                self._synced_at = synced_at
+                self._checked_at = time.monotonic()
+                self._ready = True
+        finally:
+            with self._lock:
+                self._building = False
+
+    def refresh(self, db) -> None:
+        """Apply username changes made since the last sync, at most every ``REFRESH_SECONDS``."""
+        with self._lock:
+            if not self._ready or time.monotonic() - self._checked_at < self.REFRESH_SECONDS:
+                return
+            self._checked_at = time.monotonic()
+            since = self._synced_at - self.SYNC_OVERLAP
+        synced_at = datetime.now(timezone.utc)
+        changed = (
+            db.collection("users")
+            .where("username_updated_at", ">", since)
+            .select(["username_lowercase"])
+            .stream()
+        )
+        for doc in changed:
+            self.update(doc.id, (doc.to_dict() or {}).get("username_lowercase", ""))
+        with self._lock:
+            self._synced_at = synced_at
+
+
+user_search_index = UserSearchIndex()
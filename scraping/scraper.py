@@ -275,6 +275,8 @@ def save_card_to_firestore(
                     "release_order": max_order + 1
                 }
                 print(f"Assigning release_order {max_order + 1} to new set: {set_name_original}")
+            # Bump the set's updated_at so cached card snapshots see the change
+            set_doc_data["updated_at"] = firestore.SERVER_TIMESTAMP
             set_doc_ref.set(set_doc_data, merge=True)
             card_specific_ref.set(card_data_dict)
             print(
@@ -299,6 +301,8 @@ def save_card_to_firestore(
                     "release_order": max_order + 1
                 }
                 print(f"Assigning release_order {max_order + 1} to new set: {set_name_original}")
+            # Bump the set's updated_at so cached card snapshots see the change
+            set_doc_data["updated_at"] = firestore.SERVER_TIMESTAMP
             set_doc_ref.set(set_doc_data, merge=True)
             card_specific_ref.set(card_data_dict, merge=True)
             print(f"UPDATED: {card_name_original} ({set_code} {card_number_str_val})")
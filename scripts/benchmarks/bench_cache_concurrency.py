@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Multithreaded get/set throughput benchmark for InMemoryCache.
+
+Each thread runs a read-heavy mix (90% get, 10% set by default) over a
+shared key space shaped like production (a hot card collection key plus
+per-user keys) and the total operations per second is reported for
+1 to 32 threads.
+
+Compare against an older cache_manager.py by passing it as a baseline, e.g.:
+    git show <commit>:app/cache_manager.py > /tmp/cache_manager_baseline.py
+    python scripts/benchmarks/bench_cache_concurrency.py --baseline /tmp/cache_manager_baseline.py
+"""
+
+import argparse
+import importlib.util
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.cache_manager import InMemoryCache
+
+THREAD_COUNTS = [1, 2, 4, 8, 16, 32]
+
+
+def load_cache_class(path: str):
+    spec = importlib.util.spec_from_file_location("cache_manager_baseline", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.InMemoryCache
+
+
+def run(cache, threads: int, ops_per_thread: int, write_ratio: float, keys: int) -> float:
+    """Return total operations per second across all threads."""
+    key_space = ["cards:global_cards"] + [f"user:{i}" for i in range(keys)]
+    for key in key_space:
+        cache.set(key, "x" * 256, ex=3600)
+
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(seed):
+        rng = random.Random(seed)
+        choices = [rng.choice(key_space) for _ in range(1024)]
+        writes = [rng.random() < write_ratio for _ in range(1024)]
+        barrier.wait()
+        for i in range(ops_per_thread):
+            key = choices[i & 1023]
+            if writes[i & 1023]:
+                cache.set(key, "y" * 256, ex=3600)
+            else:
+                cache.get(key)
+
+    workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return threads * ops_per_thread / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", help="Path to an older cache_manager.py to compare against")
+    parser.add_argument("--ops", type=int, default=50000, help="Operations per thread")
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    parser.add_argument("--keys", type=int, default=2000)
+    args = parser.parse_args()
+
+    factories = [
+        ("1 shard", lambda: InMemoryCache(shards=1, sweep_interval=0)),
+        ("16 shards", lambda: InMemoryCache(shards=16, sweep_interval=0)),
+    ]
+    if args.baseline:
+        baseline_class = load_cache_class(args.baseline)
+        factories.insert(0, ("baseline", baseline_class))
+
+    print(f"{'threads':<10}" + "".join(f"{label + ' ops/s':>20}" for label, _ in factories))
+    for threads in THREAD_COUNTS:
+        row = [run(factory(), threads, args.ops, args.write_ratio, args.keys) for _, factory in factories]
+        print(f"{threads:<10}" + "".join(f"{ops:>20,.0f}" for ops in row))
+
+
+if __name__ == "__main__":
+    main()
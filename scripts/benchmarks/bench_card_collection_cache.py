@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Benchmark CacheManager.get_card_collection at full catalog size.
+Compares the pickled cache (previous behaviour) against the shared live
+collection mode used by in-process caches.
+
+Usage: python scripts/benchmarks/bench_card_collection_cache.py [--iterations N]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_catalog import build_catalog
+from app.cache_manager import CacheManager, InMemoryCache
+
+
+def time_lookups(manager: CacheManager, iterations: int) -> list:
+    """Return per-call latencies in milliseconds."""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        collection = manager.get_card_collection()
+        samples.append((time.perf_counter() - start) * 1000)
+        assert collection is not None
+    return samples
+
+
+def summarize(label: str, samples: list) -> None:
+    ordered = sorted(samples)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(f"{label:<22} mean={statistics.mean(samples):8.4f}ms  "
+          f"p50={statistics.median(samples):8.4f}ms  p95={p95:8.4f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"Catalog size: {len(build_catalog())} cards, {args.iterations} lookups each\n")
+
+    pickled = CacheManager(InMemoryCache(), share_live_collections=False)
+    pickled.set_card_collection(build_catalog())
+    before = time_lookups(pickled, args.iterations)
+
+    live = CacheManager(InMemoryCache(), share_live_collections=True)
+    live.set_card_collection(build_catalog())
+    after = time_lookups(live, args.iterations)
+
+    summarize("before (pickle.loads)", before)
+    summarize("after (shared live)", after)
+    print(f"\nSpeedup (mean): {statistics.mean(before) / statistics.mean(after):,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Memory and throughput benchmark for Card / CardCollection at full catalog size.
+
+Measures traced memory of the catalog, pickle size and load time, and the
+cost of the property-heavy sort keys used by /api/cards/paginated.
+
+Compare against an older Card.py by passing it as a baseline, e.g.:
+    git show <commit>:Card.py > /tmp/Card_baseline.py
+    python scripts/benchmarks/bench_card_memory.py --baseline /tmp/Card_baseline.py
+"""
+
+import argparse
+import gc
+import importlib.util
+import os
+import pickle
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_catalog import build_catalog
+import Card as current_card_module
+
+
+def load_card_module(path: str):
+    spec = importlib.util.spec_from_file_location("card_baseline", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    # Pickle resolves classes by module name, so register the baseline module
+    sys.modules["card_baseline"] = module
+    return module
+
+
+def type_sort_key(card):
+    """Mirror of the 'type' sort key in get_cards_paginated."""
+    type_priority = {
+        'Grass': 0, 'Fire': 1, 'Water': 2, 'Lightning': 3, 'Psychic': 4,
+        'Fighting': 5, 'Darkness': 6, 'Metal': 7, 'Dragon': 8, 'Colorless': 9, 'Trainer': 10,
+    }.get(card.energy_type if card.is_pokemon else 'Trainer', 99)
+    if card.is_pokemon:
+        stage_priority = card.evolution_stage if card.evolution_stage is not None else 99
+    elif card.is_trainer:
+        stage_priority = {'Item': 3, 'Supporter': 4, 'Tool': 5}.get(card.trainer_subtype, 99)
+    else:
+        stage_priority = 99
+    set_priority = -card.set_release_order if card.set_release_order is not None else 999
+    return (type_priority, stage_priority, set_priority, card.name.lower())
+
+
+def measure(card_module, repeats: int) -> dict:
+    gc.collect()
+    tracemalloc.start()
+    collection = build_catalog(card_module=card_module)
+    gc.collect()
+    traced_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    payload = pickle.dumps(collection)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        pickle.loads(payload)
+    unpickle_ms = (time.perf_counter() - start) * 1000 / repeats
+
+    cards = collection.cards
+    start = time.perf_counter()
+    for _ in range(repeats):
+        sorted(cards, key=type_sort_key)
+    sort_ms = (time.perf_counter() - start) * 1000 / repeats
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for card in cards:
+            card.is_pokemon, card.is_basic, card.evolution_stage, card.trainer_subtype
+    props_ms = (time.perf_counter() - start) * 1000 / repeats
+
+    return {
+        "cards": len(collection),
+        "memory_kib": traced_bytes / 1024,
+        "pickle_kib": len(payload) / 1024,
+        "unpickle_ms": unpickle_ms,
+        "type_sort_ms": sort_ms,
+        "flag_scan_ms": props_ms,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--baseline", help="Path to an older Card.py to compare against")
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    columns = [("current", measure(current_card_module, args.repeats))]
+    if args.baseline:
+        columns.insert(0, ("baseline", measure(load_card_module(args.baseline), args.repeats)))
+
+    print(f"{'metric':<14}" + "".join(f"{label:>14}" for label, _ in columns))
+    for metric in columns[0][1]:
+        print(f"{metric:<14}" + "".join(f"{result[metric]:>14,.2f}" for _, result in columns))
+
+
+if __name__ == "__main__":
+    main()
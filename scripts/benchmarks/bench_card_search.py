@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for CardSearchIndex on a full-size catalog.
+
+The synthetic catalog is given production-like text (several hundred
+distinct names, over a thousand attack names, a few hundred abilities) and
+queried with a keystroke-style workload: growing prefixes, one- and
+two-edit typos, attack words and multi-term queries. Each query runs with
+a cold term cache and the p50/p99/max latency is reported for:
+
+    linear  the old per-card ``all(term in name.lower() ...)`` scan
+    names   CardSearchIndex.match_mask over names, typo fallback when empty
+    ranked  CardSearchIndex.search over names, attacks and abilities (top 20)
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic_catalog import build_catalog
+from Card import Card, CardCollection, CardSearchIndex
+
+SYLLABLES = ["pi", "ka", "chu", "char", "iz", "ard", "mew", "two", "bul", "ba", "saur", "squir",
+             "tle", "ee", "vee", "gen", "gar", "dra", "go", "nite", "lu", "ca", "rio", "chomp",
+             "snor", "lax", "de", "voir", "gre", "nin", "ja", "ray", "qua", "za", "mag", "karp"]
+ATTACK_WORDS = ["Thunder", "Shock", "Flame", "Tail", "Hydro", "Pump", "Psychic", "Slash", "Rock",
+                "Smash", "Leaf", "Blade", "Dark", "Pulse", "Iron", "Head", "Dragon", "Claw", "Quick",
+                "Attack", "Mega", "Punch", "Ice", "Beam", "Fire", "Blast", "Vine", "Whip", "Body",
+                "Slam", "Bite", "Crunch", "Gust", "Hyper", "Voice", "Spark", "Surf", "Drain", "Kiss"]
+ABILITY_WORDS = ["Guard", "Barrier", "Shell", "Veil", "Aura", "Flash", "Fire", "Water", "Sand",
+                 "Stream", "Healing", "Wind", "Power", "Boost", "Drive", "Spirit", "Shadow", "Light"]
+
+
+def diversify(collection: CardCollection, seed: int) -> CardCollection:
+    """Copy of ``collection`` with production-like name, attack and ability variety."""
+    rng = random.Random(seed)
+    names = sorted({"".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).title()
+                    for _ in range(700)})
+    diversified = CardCollection()
+    for card in collection.cards:
+        name = rng.choice(names) + (" ex" if rng.random() < 0.1 else "")
+        attacks = [{"name": f"{rng.choice(ATTACK_WORDS)} {rng.choice(ATTACK_WORDS)}", "cost": [], "damage": "30"}
+                   for _ in range(rng.randint(0, 2))] if card.is_pokemon else []
+        abilities = [{"name": f"{rng.choice(ABILITY_WORDS)} {rng.choice(ABILITY_WORDS)}", "description": ""}
+                     ] if card.is_pokemon and rng.random() < 0.2 else []
+        diversified.add_card(Card(
+            id=card.id, name=name, energy_type=card.energy_type, set_name=card.set_name,
+            set_code=card.set_code, card_number_str=card.card_number_str, card_type=card.card_type,
+            rarity=card.rarity, attacks=attacks, abilities=abilities, set_release_order=card.set_release_order,
+        ))
+    return diversified
+
+
+def typo(word: str, rng: random.Random) -> str:
+    position = rng.randrange(len(word))
+    kind = rng.choice(["substitute", "delete", "insert", "transpose"])
+    if kind == "substitute":
+        return word[:position] + rng.choice("abcdefghijklmnopqrstuvwxyz") + word[position + 1:]
+    if kind == "delete":
+        return word[:position] + word[position + 1:]
+    if kind == "insert":
+        return word[:position] + rng.choice("abcdefghijklmnopqrstuvwxyz") + word[position:]
+    position = min(position, len(word) - 2)
+    return word[:position] + word[position + 1] + word[position] + word[position + 2:]
+
+
+def workload(collection: CardCollection, count: int, seed: int):
+    rng = random.Random(seed)
+    queries = []
+    while len(queries) < count:
+        card = rng.choice(collection.cards)
+        name = card.name.lower()
+        kind = rng.random()
+        if kind < 0.5:
+            # Keystrokes while typing a name
+            queries.extend(name[:length] for length in range(1, len(name) + 1))
+        elif kind < 0.8:
+            word = max(name.split(), key=len)
+            queries.append(typo(word, rng) if len(word) >= 4 else word)
+        elif kind < 0.9 and card.attacks:
+            queries.append(rng.choice(card.attacks)["name"].split()[0].lower())
+        else:
+            queries.append(f"{name.split()[0][:3]} {rng.choice(['ex', 'a', 'ar', 'o'])}")
+    return queries[:count]
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda fraction: samples[min(len(samples) - 1, int(fraction * len(samples)))]
+    return pick(0.5), pick(0.99), samples[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    collection = diversify(build_catalog(), args.seed)
+    start = time.perf_counter()
+    search_index = CardSearchIndex(collection.cards)
+    build_ms = (time.perf_counter() - start) * 1000
+    queries = workload(collection, args.queries, args.seed)
+    cards = collection.cards
+
+    def linear(query):
+        terms = query.split()
+        return [card for card in cards if all(term in card.name.lower() for term in terms)]
+
+    def names(query):
+        return search_index.match_mask(query) or search_index.match_mask(query, fuzzy=True)
+
+    def ranked(query):
+        return search_index.search(query, limit=20)
+
+    print(f"{len(cards)} cards, {len(search_index._values)} distinct strings, "
+          f"{len(search_index._word_values)} words, index built in {build_ms:.1f} ms")
+    print(f"{'method':<10}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for label, method in (("linear", linear), ("names", names), ("ranked", ranked)):
+        samples = []
+        for query in queries:
+            search_index._term_cache.clear()
+            start = time.perf_counter()
+            method(query)
+            samples.append((time.perf_counter() - start) * 1000)
+        p50, p99, worst = percentiles(samples)
+        print(f"{label:<10}{p50:>10.3f}{p99:>10.3f}{worst:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
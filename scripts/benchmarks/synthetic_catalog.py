@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Synthetic full-size card catalog for offline benchmarks.
+Builds a CardCollection shaped like production (~1,300 cards over 11 sets)
+without touching Firestore.
+"""
+
+import os
+import sys
+import random
+from types import ModuleType
+from typing import Optional
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import Card as card_module_default
+
+# (set_name, set_code, release_order, card_count)
+SETS = [
+    ("Genetic Apex", "A1", 1, 226),
+    ("Promo-A", "P-A", 2, 60),
+    ("Mythical Island", "A1a", 3, 68),
+    ("Space-Time Smackdown", "A2", 4, 155),
+    ("Triumphant Light", "A2a", 4, 75),
+    ("Shining Revelry", "A2b", 5, 96),
+    ("Celestial Guardians", "A3", 7, 181),
+    ("Extradimensional Crisis", "A3a", 8, 69),
+    ("Eevee Grove", "A3b", 9, 93),
+    ("Wisdom of Sea and Sky", "A4", 10, 177),
+    ("Secluded Springs", "A4a", 11, 100),
+]
+
+ENERGY_TYPES = ["Grass", "Fire", "Water", "Lightning", "Psychic", "Fighting",
+                "Darkness", "Metal", "Dragon", "Colorless"]
+RARITIES = ["◊", "◊◊", "◊◊◊", "◊◊◊◊", "☆", "☆☆", "☆☆☆", "✵", "✵✵", "Crown Rare"]
+NAME_ROOTS = ["Pikachu", "Charizard", "Mewtwo", "Bulbasaur", "Squirtle", "Eevee",
+              "Gengar", "Dragonite", "Lucario", "Garchomp", "Snorlax", "Gardevoir",
+              "Greninja", "Rayquaza", "Magikarp", "Gyarados", "Machamp", "Alakazam"]
+TRAINER_NAMES = ["Professor's Research", "Poké Ball", "Potion", "X Speed",
+                 "Giovanni", "Sabrina", "Misty", "Rocky Helmet", "Giant Cape"]
+CDN_IMAGE_BASE = "https://firebasestorage.googleapis.com/v0/b/pvpocket-dd286.firebasestorage.app/o/cards%2F"
+
+
+def build_catalog(seed: int = 1234, card_module: Optional[ModuleType] = None):
+    """Build a deterministic production-sized CardCollection.
+
+    Args:
+        seed: Random seed for the generated attributes
+        card_module: Module providing Card/CardCollection (defaults to Card.py),
+            so benchmarks can compare against an older implementation
+    """
+    card_module = card_module or card_module_default
+    Card = card_module.Card
+    rng = random.Random(seed)
+    collection = card_module.CardCollection()
+    card_id = 0
+
+    for set_name, set_code, release_order, card_count in SETS:
+        for number in range(1, card_count + 1):
+            card_id += 1
+            card_number_str = str(number)
+
+            if rng.random() < 0.18:
+                name = rng.choice(TRAINER_NAMES)
+                card_type = f"Trainer - {rng.choice(['Item', 'Supporter', 'Tool'])}"
+                energy_type = ""
+                hp = None
+                attacks = []
+            else:
+                root = rng.choice(NAME_ROOTS)
+                name = f"{root} ex" if rng.random() < 0.12 else root
+                stage = rng.choice(["Basic", "Basic", "Stage 1", "Stage 2"])
+                card_type = f"Pokémon - {stage}"
+                if stage != "Basic":
+                    card_type += f" - Evolves from {rng.choice(NAME_ROOTS)}"
+                energy_type = rng.choice(ENERGY_TYPES)
+                hp = rng.choice([50, 60, 70, 80, 90, 100, 120, 150, 180])
+                attacks = [
+                    {
+                        "name": f"Attack {i}",
+                        "cost": [energy_type] * (i + 1),
+                        "damage": str(20 * (i + 1)),
+                        "effect": "Flip a coin. If heads, this attack does 30 more damage.",
+                    }
+                    for i in range(rng.choice([1, 2]))
+                ]
+
+            image_file = f"{set_code}_{card_number_str}.png"
+            collection.add_card(
+                Card(
+                    id=card_id,
+                    name=name,
+                    energy_type=energy_type,
+                    set_name=set_name,
+                    set_code=set_code,
+                    card_number=number,
+                    card_number_str=card_number_str,
+                    card_type=card_type,
+                    hp=hp,
+                    attacks=attacks,
+                    weakness=rng.choice(ENERGY_TYPES),
+                    retreat_cost=rng.choice([0, 1, 2, 3]),
+                    illustrator="Synthetic Illustrator",
+                    firebase_image_url=f"{CDN_IMAGE_BASE}{image_file}?alt=media",
+                    rarity=rng.choice(RARITIES),
+                    pack=f"{set_name} Pack",
+                    flavor_text="A synthetic card used for benchmarking.",
+                    abilities=[],
+                    original_image_url=f"https://example.com/cards/{image_file}",
+                    set_release_order=release_order,
+                )
+            )
+
+    return collection
+
+
+if __name__ == "__main__":
+    catalog = build_catalog()
+    print(f"Built synthetic catalog with {len(catalog)} cards")
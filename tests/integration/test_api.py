@@ -74,6 +74,86 @@ class TestCardAPI:
         assert len(data['cards']) <= 1
         assert 'total_count' in data['pagination']
         assert 'current_page' in data['pagination']
+    
+    @patch('app.services.CardService.get_full_card_collection')
+    def test_cards_api_etag_revalidation(self, mock_collection, client):
+        """Test card listings send deterministic ETags and answer If-None-Match with 304."""
+        from Card import CardCollection, Card
+        collection = CardCollection()
+        collection.add_card(Card(id=1, name="Pikachu", energy_type="Lightning", set_name="Genetic Apex",
+                                 set_code="A1", set_release_order=1))
+        mock_collection.return_value = collection
+        
+        for url in ('/api/cards?name=pika', '/api/cards/paginated?page=1&limit=1'):
+            response = client.get(url)
+            assert response.status_code == 200
+            etag = response.headers['ETag']
+            assert etag.strip('"').startswith(collection.version)
+            
+            assert client.get(url).headers['ETag'] == etag
+            
+            cached = client.get(url, headers={'If-None-Match': etag})
+            assert cached.status_code == 304
+            assert cached.data == b''
+            assert cached.headers['ETag'] == etag
+        
+        other = client.get('/api/cards/paginated?page=2&limit=1')
+        assert other.headers['ETag'] != etag
+        
+        # A new catalog version invalidates previously issued ETags
+        refreshed = CardCollection()
+        refreshed.add_card(Card(id=2, name="Raichu", set_name="Genetic Apex", set_release_order=1))
+        mock_collection.return_value = refreshed
+        stale = client.get('/api/cards/paginated?page=1&limit=1', headers={'If-None-Match': etag})
+        assert stale.status_code == 200
+    
+    @patch('app.routes.decks.get_db')
+    @patch('app.services.CardService.get_full_card_collection')
+    def test_sets_api_derived_from_collection(self, mock_collection, mock_get_db, client):
+        """Test /api/sets is built from the loaded catalog without Firestore reads."""
+        from Card import CardCollection, Card
+        collection = CardCollection()
+        collection.add_card(Card(id=1, name="Pikachu", set_name="Genetic Apex", set_code="A1", set_release_order=1))
+        collection.add_card(Card(id=2, name="Mew", set_name="Mythical Island", set_code="A1a", set_release_order=2))
+        collection.add_card(Card(id=3, name="Potion", set_name="Genetic Apex", set_code="A1", set_release_order=1))
+        mock_collection.return_value = collection
+        
+        response = client.get('/api/sets')
+        data = response.get_json()
+        
+        assert response.status_code == 200
+        assert data['sets'] == [
+            {"name": "Mythical Island", "code": "A1a", "release_order": 2, "card_count": 1},
+            {"name": "Genetic Apex", "code": "A1", "release_order": 1, "card_count": 2},
+        ]
+        assert client.get('/api/sets', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+        mock_get_db.assert_not_called()
+    
+    @patch('app.services.CardService.get_full_card_collection')
+    def test_cards_paginated_cursor_walk(self, mock_collection, client):
+        """Test following next_cursor visits the same cards as page numbers, and stale cursors are rejected."""
+        from Card import CardCollection, Card
+        collection = CardCollection()
+        for card_id in range(1, 24):
+            collection.add_card(Card(id=card_id, name=["Mew", "Eevee", "Pikachu"][card_id % 3],
+                                     set_name="Genetic Apex", set_code="A1", rarity="◊"))
+        mock_collection.return_value = collection
+        
+        paged = []
+        for page in (1, 2, 3):
+            paged += [c['id'] for c in client.get(f'/api/cards/paginated?sort=name&limit=10&page={page}').get_json()['cards']]
+        walked, cursor = [], ''
+        while cursor is not None:
+            data = client.get(f'/api/cards/paginated?sort=name&limit=10&cursor={cursor}').get_json()
+            walked += [c['id'] for c in data['cards']]
+            assert data['pagination']['total_count'] == 23
+            assert 'current_page' not in data['pagination']
+            cursor = data['pagination']['next_cursor']
+        
+        assert walked == paged and len(walked) == 23
+        from app.pagination import encode_cursor
+        stale = client.get(f'/api/cards/paginated?cursor={encode_cursor(999)}')
+        assert stale.status_code == 400
 
 
 @pytest.mark.integration
@@ -205,6 +205,37 @@ class TestCollectionModification:
                                          content_type='application/json')
                     
                     assert response.status_code in [400, 302]  # Bad request or redirect
+    
+    def test_add_and_remove_queue_counts_by_catalog_id(self, client, app):
+        """Test cards are counted under the catalog id and emptied cards drop out of the totals."""
+        from app.db_service import WriteBatcher
+        from app.routes.collection import _normalize_collection
+        
+        batcher = WriteBatcher(client=Mock(), flush_interval=60)
+        batcher.set_normalizer("collections", _normalize_collection)
+        mock_db = Mock()
+        mock_db.collection.return_value.document.return_value.get.return_value = Mock(
+            exists=True, to_dict=Mock(return_value={"card_counts": {"1": 2, "7": 1}, "total_cards": 3, "unique_cards": 2})
+        )
+        card_collection = Mock()
+        card_collection.get_card_by_id.return_value = Mock(id=1)
+        app.config["LOGIN_DISABLED"] = True
+        try:
+            with patch('app.routes.collection.get_db', return_value=mock_db), \
+                    patch('app.routes.collection.write_batcher', batcher), \
+                    patch('app.routes.collection.flask_login_current_user', Mock(id="test_user")), \
+                    patch('app.routes.collection.card_service') as mock_card_service:
+                mock_card_service.get_card_collection.return_value = card_collection
+                added = client.post('/api/collection/add', json={'card_id': '01', 'quantity': 1})
+                removed = client.post('/api/collection/remove', json={'card_id': '7', 'quantity': 1})
+        finally:
+            app.config["LOGIN_DISABLED"] = False
+            batcher.close(timeout=0)
+        
+        assert added.status_code == 200 and removed.status_code == 200
+        assert added.get_json()["collection"] == {"card_counts": {"1": 3, "7": 1}, "total_cards": 4, "unique_cards": 2}
+        assert removed.get_json()["collection"] == {"card_counts": {"1": 3}, "total_cards": 3, "unique_cards": 1}
+        card_collection.get_card_by_id.assert_called_once_with(1)
 
 
 @pytest.mark.integration
@@ -529,4 +560,89 @@ class TestCollectionPerformance:
                     assert response.status_code in [200, 302]
                     if response.status_code != 302:
                         data = json.loads(response.data)
-                        assert 'pagination' in data or 'page' in data or response.status_code == 200
\ No newline at end of file
+                        assert 'pagination' in data or 'page' in data or response.status_code == 200
+
+@pytest.mark.integration
+class TestDeckKeysetPagination:
+    """Test cursor pagination of a user's decks."""
+    
+    def test_deck_summaries_are_cached_sorted_and_filtered(self, app):
+        """Test a cache miss reads the decks once and later listings come from the cached summaries."""
+        from datetime import timezone
+        from app.routes.collection import _get_deck_summaries, passes_filters, DECK_SUMMARIES_CACHE_SECONDS
+        
+        base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        deck_docs = []
+        for i, updated_at in enumerate([base.replace(day=3), None, base.replace(day=9)]):
+            doc = Mock(id=f"d{i}", exists=True)
+            doc.to_dict.return_value = {"name": f"Deck {i}", "updated_at": updated_at, "deck_types": ["Fire"],
+                                        "card_ids": ["1", "1"], "cover_card_ids": ["1"], "is_public": i == 2}
+            deck_docs.append(doc)
+        mock_db = Mock()
+        mock_db.collection.return_value.document.return_value.get.return_value = Mock(
+            exists=True, to_dict=Mock(return_value={"deck_ids": ["d0", "d1", "d2"]})
+        )
+        mock_db.get_all.return_value = deck_docs
+        card_collection = Mock()
+        card_collection.get_card_by_id.return_value = Mock(display_image_path=None)
+        card_collection.get_card_by_id.return_value.name = "Charizard ex"
+        cache = {}
+        
+        with app.app_context(), \
+                patch('app.routes.collection.card_service') as mock_card_service, \
+                patch('app.routes.collection.cache_manager') as mock_cache:
+            mock_card_service.get_card_collection.return_value = card_collection
+            mock_cache.get_user_decks.side_effect = cache.get
+            mock_cache.set_user_decks.side_effect = lambda user_id, summaries, **kwargs: cache.__setitem__(user_id, summaries)
+            first = _get_deck_summaries(mock_db, "user_1")
+            second = _get_deck_summaries(mock_db, "user_1")
+        
+        assert [deck["deck_id"] for deck in first] == ["d2", "d0", "d1"]
+        assert second is first and mock_db.get_all.call_count == 1
+        assert mock_cache.set_user_decks.call_args[1] == {"ttl_seconds": DECK_SUMMARIES_CACHE_SECONDS}
+        assert first[0]["card_count"] == 2 and first[0]["card_names"] == ["charizard ex"]
+        assert first[0]["resolved_cover_cards"][0]["name"] == "Charizard ex"
+        assert passes_filters(first[0], "chari", [], "public")
+        assert not passes_filters(first[1], "", ["Fire"], "public")
+        assert not passes_filters(first[0], "", ["Fire", "Water"], "all")
+    
+    def test_deck_cursor_resumes_after_summary(self):
+        """Test a deck cursor round-trips the sort key of the summary it was taken from."""
+        from app.routes.collection import _deck_cursor, _decode_deck_cursor, _deck_sort_key
+        
+        summary = {"deck_id": "d1", "updated_at": "2025-01-03T10:00:00+00:00"}
+        
+        assert tuple(_decode_deck_cursor(_deck_cursor(summary))) == _deck_sort_key(summary)
+    
+    def test_deck_cursor_covers_legacy_decks(self):
+        """Test legacy decks without updated_at get a cursor that round-trips and bad cursors are rejected."""
+        from app.routes.collection import _deck_cursor, _decode_deck_cursor, _deck_sort_key
+        from app.pagination import encode_cursor
+        
+        legacy = {"deck_id": "d1", "updated_at": None}
+        
+        assert tuple(_decode_deck_cursor(_deck_cursor(legacy))) == _deck_sort_key(legacy)
+        with pytest.raises(ValueError):
+            _decode_deck_cursor(encode_cursor("yesterday", "d1"))
+    
+    def test_cursor_pages_reach_every_deck(self, client, app):
+        """Test following next_cursor lists every deck once, through the legacy decks sorted last."""
+        summaries = [{"deck_id": f"d{i}", "name": f"Deck {i}", "updated_at": f"2025-01-{10 - i:02d}T00:00:00+00:00",
+                      "deck_types": [], "is_public": False} for i in range(3)]
+        summaries += [{"deck_id": f"legacy{i}", "name": f"Legacy {i}", "updated_at": None,
+                       "deck_types": [], "is_public": False} for i in (2, 1, 0)]
+        seen = []
+        cursor = ""
+        app.config["LOGIN_DISABLED"] = True
+        try:
+            with patch('app.routes.collection._get_deck_summaries', return_value=summaries), \
+                    patch('app.routes.collection.flask_login_current_user', Mock(id="test_user")):
+                while cursor is not None:
+                    data = client.get(f'/api/my-decks?limit=2&cursor={cursor}').get_json()
+                    seen.extend(deck["deck_id"] for deck in data["decks"])
+                    assert data["pagination"]["has_more"] == (data["pagination"]["next_cursor"] is not None)
+                    cursor = data["pagination"]["next_cursor"]
+        finally:
+            app.config["LOGIN_DISABLED"] = False
+        
+        assert seen == [summary["deck_id"] for summary in summaries]
@@ -24,20 +24,20 @@ from firebase_admin import firestore
 class TestFriendsPage:
     """Test friends main page functionality."""
     
-    @patch('app.routes.friends._get_user_snapshot')
+    @patch('app.routes.friends._user_snapshots')
     @patch('flask_login.current_user')
-    def test_friends_page_loads(self, mock_current_user, mock_get_user, client, app):
+    def test_friends_page_loads(self, mock_current_user, mock_get_users, client, app):
         """Test that friends page loads and displays friends data."""
         with app.app_context():
             mock_current_user.id = "test_user_1"
             mock_current_user.is_authenticated = True
             
-            # Mock user snapshot
-            mock_get_user.side_effect = [
-                {"id": "friend_1", "username": "Friend1", "profile_icon": "icon1.png"},
-                {"id": "pending_1", "username": "PendingUser", "profile_icon": ""},
-                {"id": "received_1", "username": "ReceivedUser", "profile_icon": ""}
-            ]
+            # Mock batched user snapshots
+            mock_get_users.return_value = {
+                "friend_1": {"id": "friend_1", "username": "Friend1", "profile_icon": "icon1.png"},
+                "pending_1": {"id": "pending_1", "username": "PendingUser", "profile_icon": ""},
+                "received_1": {"id": "received_1", "username": "ReceivedUser", "profile_icon": ""}
+            }
             
             with patch('flask_login.login_required', lambda f: f):
                 with patch('app.routes.friends.current_app') as mock_app:
@@ -311,11 +311,11 @@ class TestFriendManagement:
                     ]
                     mock_db.collection.return_value.document.return_value.collection.return_value.stream.return_value = mock_friends
                     
-                    with patch('app.routes.friends._get_user_snapshot') as mock_snapshot:
-                        mock_snapshot.side_effect = [
-                            {"id": "friend_1", "username": "Friend1", "profile_icon": ""},
-                            {"id": "friend_2", "username": "Friend2", "profile_icon": ""}
-                        ]
+                    with patch('app.routes.friends._user_snapshots') as mock_snapshots:
+                        mock_snapshots.return_value = {
+                            "friend_1": {"id": "friend_1", "username": "Friend1", "profile_icon": ""},
+                            "friend_2": {"id": "friend_2", "username": "Friend2", "profile_icon": ""}
+                        }
                         
                         response = client.get('/friends/api/friends?page=1&limit=10')
                         
@@ -229,12 +229,12 @@ class TestHighVolumeOperations:
             mock_db.collection.return_value.document.return_value.collection.return_value.stream.return_value = mock_friends
             
             with patch('flask_login.login_required', lambda f: f):
-                with patch('app.routes.friends._get_user_snapshot') as mock_snapshot:
-                    # Mock user snapshots for large friend list
-                    mock_snapshot.side_effect = [
-                        {"id": f"friend_{i}", "username": f"Friend{i}", "profile_icon": ""}
+                with patch('app.routes.friends._user_snapshots') as mock_snapshots:
+                    # Mock batched user snapshots for large friend list
+                    mock_snapshots.return_value = {
+                        f"friend_{i}": {"id": f"friend_{i}", "username": f"Friend{i}", "profile_icon": ""}
                         for i in range(100)
-                    ]
+                    }
                     
                     start_time = time.time()
                     
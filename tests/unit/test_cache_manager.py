@@ -3,7 +3,11 @@ Unit tests for CacheManager functionality.
 """
 
 import pytest
+import sys
+import threading
+import time
 from datetime import datetime, timedelta
+from unittest.mock import patch
 from Card import Card, CardCollection
 from app.cache_manager import CacheManager
 
@@ -79,7 +83,18 @@ class TestCacheManager:
         # Invalidate user cache
         cache_manager.invalidate_user_cache(user_id)
         assert cache_manager.get_user_data(user_id) is None
-    
+
+    def test_user_decks_invalidation_keeps_user_data(self, cache_manager, mock_user_data):
+        """Test invalidating deck summaries leaves the rest of the user's cache alone."""
+        user_id = "test-user-123"
+        cache_manager.set_user_data(user_id, mock_user_data)
+        cache_manager.set_user_decks(user_id, [])
+        assert cache_manager.get_user_decks(user_id) == []
+
+        cache_manager.invalidate_user_decks(user_id)
+        assert cache_manager.get_user_decks(user_id) is None
+        assert cache_manager.get_user_data(user_id) is not None
+
     def test_cache_miss_returns_none(self, cache_manager):
         """Test that cache misses return None."""
         assert cache_manager.get_user_data("nonexistent-user") is None
@@ -101,4 +116,212 @@ class TestCacheManager:
         cached_collection = cache_manager.get_user_collection(user_id)
         assert cached_collection is not None
         assert cached_collection["card-1"]["count"] == 2
-        assert cached_collection["card-2"]["count"] == 1
\ No newline at end of file
+        assert cached_collection["card-2"]["count"] == 1
+    
+    def test_card_collection_shared_live_in_memory(self, cache_manager):
+        """Test in-process cache hands out the same frozen collection without unpickling."""
+        collection = CardCollection()
+        collection.add_card(Card(id=1, name="Test Card", energy_type="Fire"))
+        
+        assert cache_manager.shares_live_collections is True
+        cache_manager.set_card_collection(collection)
+        
+        first = cache_manager.get_card_collection()
+        second = cache_manager.get_card_collection()
+        assert first is collection
+        assert second is collection
+        assert collection.is_frozen
+        with pytest.raises(RuntimeError):
+            collection.add_card(Card(id=2, name="Other Card"))
+    
+    def test_card_collection_refresh_swaps_reference(self, cache_manager):
+        """Test refreshing replaces the shared collection while old holders keep their snapshot."""
+        old_collection = CardCollection()
+        old_collection.add_card(Card(id=1, name="Old Card"))
+        cache_manager.set_card_collection(old_collection)
+        held = cache_manager.get_card_collection()
+        
+        new_collection = CardCollection()
+        new_collection.add_card(Card(id=1, name="New Card"))
+        new_collection.add_card(Card(id=2, name="Another Card"))
+        cache_manager.set_card_collection(new_collection)
+        
+        assert held.get_card_by_id(1).name == "Old Card"
+        assert cache_manager.get_card_collection() is new_collection
+    
+    def test_card_collection_pickled_for_out_of_process_backend(self):
+        """Test out-of-process backends receive pickled bytes and return copies."""
+        from app.cache_manager import InMemoryCache
+        
+        class RemoteCache(InMemoryCache):
+            in_process = False
+        
+        manager = CacheManager(RemoteCache())
+        collection = CardCollection()
+        collection.add_card(Card(id=1, name="Test Card"))
+        
+        assert manager.shares_live_collections is False
+        manager.set_card_collection(collection)
+        
+        assert isinstance(manager.client.get("cards:global_cards"), bytes)
+        restored = manager.get_card_collection()
+        assert restored is not collection
+        assert restored.get_card_by_id(1).name == "Test Card"
+        assert not collection.is_frozen
+    
+    def test_query_results_keep_their_types_on_every_backend(self):
+        """Test cached query results come back with their original types, as copies."""
+        from datetime import datetime, timezone
+        from app.cache_manager import InMemoryCache
+        
+        class RemoteCache(InMemoryCache):
+            in_process = False
+        
+        document = {"release_order": 3, "released": datetime(2025, 1, 30, tzinfo=timezone.utc)}
+        for manager in (CacheManager(InMemoryCache(sweep_interval=0)), CacheManager(RemoteCache(sweep_interval=0))):
+            manager.set_query_result("cards", "doc:A1", document, 60)
+            manager.set_query_result("cards", "doc:missing", None, 60)
+            hit = manager.get_query_result("cards", "doc:A1")
+            
+            assert hit == {"value": document} and hit["value"] is not document
+            assert manager.get_query_result("cards", "doc:missing") == {"value": None}
+            assert manager.get_query_result("cards", "doc:other") is None
+
+
+@pytest.mark.unit
+class TestInMemoryCacheBounds:
+    """Test size-aware eviction in InMemoryCache."""
+    
+    def _cache(self, **kwargs):
+        from app.cache_manager import InMemoryCache
+        kwargs.setdefault("sweep_interval", 0)
+        # A single shard makes limits exact (they are split evenly across shards)
+        kwargs.setdefault("shards", 1)
+        return InMemoryCache(**kwargs)
+    
+    def test_entry_limit_evicts_least_recently_used(self):
+        """Test the entry limit evicts the least recently read key first."""
+        cache = self._cache(max_entries=2, namespace_quotas={})
+        cache.set("user:a", "1")
+        cache.set("user:b", "2")
+        cache.get("user:a")
+        cache.set("user:c", "3")
+        
+        assert cache.get("user:b") is None
+        assert cache.get("user:a") == "1"
+        assert cache.get("user:c") == "3"
+        assert cache.stats()["evictions"] == 1
+    
+    def test_namespace_quota_only_evicts_own_namespace(self):
+        """Test a namespace over its quota evicts its own entries, not others."""
+        value = "x" * 1000
+        cache = self._cache(namespace_quotas={"user_decks": 2500})
+        cache.set("user:profile", value)
+        for index in range(5):
+            cache.set(f"user_decks:{index}", value)
+        
+        stats = cache.stats()
+        assert stats["namespaces"]["user_decks"]["bytes"] <= 2500
+        assert stats["namespaces"]["user_decks"]["evictions"] == 3
+        assert cache.get("user:profile") == value
+        assert cache.get("user_decks:4") == value
+    
+    def test_user_data_never_evicts_card_collection(self):
+        """Test the byte budget evicts user entries while protected card data stays."""
+        collection = CardCollection()
+        collection.add_card(Card(id=1, name="Test Card"))
+        cache = self._cache(max_bytes=20000, namespace_quotas={})
+        cache.set("cards:global_cards", collection)
+        for index in range(50):
+            cache.set(f"user:{index}", "x" * 1000)
+        
+        assert cache.get("cards:global_cards") is collection
+        assert cache.stats()["bytes"] <= 20000
+        assert cache.get("user:49") is not None
+        assert cache.get("user:0") is None
+    
+    def test_purge_expired_and_stats(self, cache_manager):
+        """Test expired entries are swept and memory shows up in get_cache_stats."""
+        cache = self._cache()
+        cache.set("user:old", "stale", ex=1)
+        cache.set("user:new", "fresh", ex=timedelta(hours=1))
+        
+        later = time.monotonic() + 2
+        with patch("app.cache_manager.time.monotonic", return_value=later):
+            assert cache.exists("user:old") is False
+            assert cache.purge_expired() == 1
+        assert cache.stats()["entries"] == 1
+        assert cache.stats()["expired_removed"] == 1
+        
+        stats = CacheManager(cache).get_cache_stats()
+        assert stats["memory_bytes"] == cache.stats()["bytes"]
+        assert stats["namespaces"]["user"]["entries"] == 1
+        assert stats["evictions"] == 0
+    
+    def test_sharded_cache_concurrent_access(self):
+        """Test concurrent writers and readers across shards keep accounting consistent."""
+        cache = self._cache(shards=8)
+        
+        def worker(worker_id):
+            for index in range(200):
+                key = f"user:{worker_id}:{index % 20}"
+                cache.set(key, f"value-{index}")
+                assert cache.get(key) is not None
+        
+        threads = [threading.Thread(target=worker, args=(worker_id,)) for worker_id in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        stats = cache.stats()
+        assert stats["shards"] == 8
+        assert stats["entries"] == 8 * 20
+        assert stats["bytes"] == sum(cache._estimate_size(value) for value in cache._data.values())
+    
+    def test_single_shard_concurrent_reads_during_writes(self):
+        """Test lock-free recency checks survive writers reordering the same shard."""
+        cache = self._cache()
+        for index in range(40):
+            cache.set(f"cards:{index}", "x" * 10)
+        errors = []
+        
+        def reader():
+            try:
+                for _ in range(300):
+                    for index in range(40):
+                        cache.get(f"cards:{index}")
+            except Exception as e:
+                errors.append(e)
+        
+        def writer():
+            try:
+                for _ in range(300):
+                    for index in range(40):
+                        cache.set(f"cards:{index}", "y" * 10)
+            except Exception as e:
+                errors.append(e)
+        
+        threads = [threading.Thread(target=reader) for _ in range(4)]
+        threads += [threading.Thread(target=writer) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert errors == []
+        assert cache.stats()["entries"] == 40
+    
+    def test_card_collection_sized_without_pickling(self):
+        """Test storing a card collection sizes it from the cards, once, without pickling."""
+        collection = CardCollection()
+        collection.add_card(Card(id=1, name="Test Card", attacks=[{"name": "Scratch", "damage": "10"}]))
+        collection.freeze()
+        cache = self._cache()
+        
+        with patch("pickle.dumps", side_effect=AssertionError("pickled")):
+            cache.set("cards:global_cards", collection)
+            cache.set("cards:global_cards_priority", collection)
+        
+        assert collection._size_estimate > sys.getsizeof(collection.cards)
+        assert cache.stats()["namespaces"]["cards"]["bytes"] >= 2 * collection._size_estimate
@@ -4,7 +4,7 @@ Unit tests for Card class core functionality.
 
 import pytest
 import json
-from Card import Card, CardCollection
+from Card import Card, CardCollection, normalize_search_text
 
 
 @pytest.mark.unit
@@ -100,6 +100,42 @@ class TestCard:
         
         assert "Pikachu" in str_repr
         assert "Base Set" in str_repr
+    
+    def test_card_uses_slots_and_interned_fields(self):
+        """Test cards have no per-instance dict and share categorical strings."""
+        card1 = Card(id=1, name="Pikachu", set_name="".join(["Genetic ", "Apex"]), rarity="◊")
+        card2 = Card(id=2, name="Raichu", set_name="".join(["Genetic ", "Apex"]), rarity="◊")
+        
+        assert not hasattr(card1, "__dict__")
+        assert card1.set_name is card2.set_name
+    
+    def test_derived_flags_precomputed(self):
+        """Test stage, ex and trainer flags follow name and card_type."""
+        card = Card(id=1, name="Raichu", card_type="Pokémon - Stage 1 - Evolves from Pikachu")
+        
+        assert card.is_pokemon and card.is_evolution and not card.is_basic
+        assert card.evolution_stage == 1
+        assert card.evolves_from == "Pikachu"
+        assert not card.is_ex
+        
+        card.name = "Raichu ex"
+        assert card.is_ex
+        
+        card.card_type = "Trainer - Supporter"
+        assert card.is_trainer and not card.is_pokemon
+        assert card.trainer_subtype == "Supporter"
+        assert card.evolution_stage is None
+    
+    def test_card_pickle_round_trip(self):
+        """Test slotted cards survive pickling with derived flags intact."""
+        import pickle
+        card = Card(id=7, name="Pikachu ex", card_type="Pokémon - Basic", energy_type="Lightning",
+                    attacks=[{"name": "Circle Circuit", "damage": "30x"}])
+        
+        restored = pickle.loads(pickle.dumps(card))
+        
+        assert restored.to_dict() == card.to_dict()
+        assert restored.is_basic and restored.is_ex
 
 
 @pytest.mark.unit
@@ -159,4 +195,276 @@ class TestCardCollection:
         assert len(trainer_cards) == 1
         
         energy_cards = collection.get_cards_by_type("Energy")
-        assert len(energy_cards) == 0
\ No newline at end of file
+        assert len(energy_cards) == 0
+    
+    def _indexed_collection(self):
+        collection = CardCollection()
+        collection.add_card(Card(id=1, name="Pikachu", energy_type="Lightning", set_name="Genetic Apex",
+                                 set_code="A1", card_number_str="94", card_type="Pokémon - Basic", rarity="◊"))
+        collection.add_card(Card(id=2, name="Pikachu ex", energy_type="Lightning", set_name="Genetic Apex",
+                                 set_code="A1", card_number_str="96", card_type="Pokémon - Basic", rarity="◊◊◊◊"))
+        collection.add_card(Card(id=3, name="Raichu", energy_type="Lightning", set_name="Mythical Island",
+                                 set_code="A1a", card_number_str="26", card_type="Pokémon - Stage 1 - Evolves from Pikachu", rarity="◊◊◊"))
+        collection.add_card(Card(id=4, name="Potion", set_name="Genetic Apex", set_code="A1",
+                                 card_number_str="219", card_type="Trainer - Item", rarity="◊"))
+        return collection
+    
+    def test_query_intersects_postings(self):
+        """Test combined index queries return matching cards in collection order."""
+        collection = self._indexed_collection()
+        
+        assert [c.id for c in collection.query(set_code="A1", energy_type="Lightning")] == [1, 2]
+        assert [c.id for c in collection.query(rarity=["◊", "◊◊◊"])] == [1, 3, 4]
+        assert [c.id for c in collection.query(is_ex=True)] == [2]
+        assert [c.id for c in collection.query(stage="Stage 1")] == [3]
+        assert [c.id for c in collection.query(trainer_subtype="Item")] == [4]
+        assert collection.query(set_code="A1", stage="Stage 1") == []
+    
+    def test_index_backed_lookups(self):
+        """Test get_card, filter and type helpers use the index with unchanged results."""
+        collection = self._indexed_collection()
+        
+        assert collection.get_card("A1", "96").id == 2
+        assert collection.get_card("A1", "999") is None
+        assert [c.id for c in collection.filter(set_name="Genetic Apex", name="pika")] == [1, 2]
+        assert [c.id for c in collection.get_pokemon_cards()] == [1, 2, 3]
+        assert [c.id for c in collection.get_trainer_cards()] == [4]
+        assert [c.id for c in collection.get_cards_by_type("stage 1")] == [3]
+    
+    def test_index_rebuilt_when_missing(self):
+        """Test collections unpickled without an index rebuild it on demand."""
+        collection = self._indexed_collection()
+        del collection._index
+        
+        assert [c.id for c in collection.query(set_code="A1a")] == [3]
+        assert collection.index.counts("set_name") == {"Genetic Apex": 3, "Mythical Island": 1}
+    
+    def test_version_tracks_content(self):
+        """Test the catalog version is a content hash that changes when cards are added."""
+        first = self._indexed_collection()
+        second = self._indexed_collection()
+        
+        assert first.version == second.version
+        
+        second.add_card(Card(id=5, name="Mew", set_code="P-A"))
+        assert second.version != first.version
+    
+    def test_snapshot_round_trip(self, tmp_path):
+        """Test a snapshot loads back with the same cards, index and version."""
+        collection = self._indexed_collection()
+        path = str(tmp_path / "cards.snapshot")
+        
+        assert collection.save_snapshot(path, marker="11:4:abc")
+        loaded = CardCollection.load_snapshot(path, marker="11:4:abc")
+        
+        assert [c.id for c in loaded.cards] == [1, 2, 3, 4]
+        assert loaded.version == collection.version
+        assert loaded.catalog_marker == "11:4:abc"
+        assert [c.id for c in loaded.query(set_code="A1a")] == [3]
+    
+    def test_snapshot_rejected_when_stale_or_corrupt(self, tmp_path):
+        """Test mismatched markers, corrupt payloads and missing files are not loaded."""
+        collection = self._indexed_collection()
+        path = tmp_path / "cards.snapshot"
+        collection.save_snapshot(str(path), marker="11:4:abc")
+        
+        assert CardCollection.load_snapshot(str(path), marker="12:5:def") is None
+        
+        data = bytearray(path.read_bytes())
+        data[-1] ^= 0xFF
+        path.write_bytes(bytes(data))
+        assert CardCollection.load_snapshot(str(path), marker="11:4:abc") is None
+        assert CardCollection.load_snapshot(str(tmp_path / "missing.snapshot")) is None
+    
+    def test_catalog_marker_from_set_docs(self):
+        """Test the marker reflects release order, card counts and set updates."""
+        class SetDoc:
+            def __init__(self, doc_id, **data):
+                self.id = doc_id
+                self._data = data
+            
+            def to_dict(self):
+                return self._data
+        
+        docs = [SetDoc("genetic_apex", release_order=1, card_count=286),
+                SetDoc("mythical_island", release_order=2, card_count=86)]
+        marker = CardCollection.marker_for_set_docs(docs)
+        
+        assert marker.startswith("2:372:")
+        assert CardCollection.marker_for_set_docs(list(reversed(docs))) == marker
+        docs[1]._data["updated_at"] = "2025-01-01"
+        assert CardCollection.marker_for_set_docs(docs) != marker
+    
+    def test_capped_load_keeps_fingerprints_only_when_complete(self, app):
+        """Test a max_cards load records set fingerprints unless the cap truncated it."""
+        from unittest.mock import MagicMock
+        set_doc = MagicMock(id="genetic_apex")
+        set_doc.to_dict.return_value = {"set_name": "Genetic Apex", "release_order": 1, "card_count": 2}
+        card_docs = []
+        for card_id in (1, 2):
+            card_doc = MagicMock()
+            card_doc.to_dict.return_value = {"id": card_id, "name": f"Card {card_id}", "set_name": "Genetic Apex"}
+            card_docs.append(card_doc)
+        db_client = MagicMock()
+        db_client.collection.return_value.stream.side_effect = lambda: iter([set_doc])
+        db_client.collection_group.return_value.limit.return_value.stream.side_effect = lambda: iter(card_docs)
+        
+        with app.app_context():
+            complete = CardCollection()
+            complete.load_from_firestore(db_client, max_cards=2000)
+            truncated = CardCollection()
+            truncated.load_from_firestore(db_client, max_cards=2)
+        
+        assert set(complete.set_fingerprints) == {"genetic_apex"}
+        assert complete.catalog_marker.startswith("1:2:")
+        assert truncated.set_fingerprints == {}
+        assert truncated.catalog_marker is None
+    
+    def test_set_metadata_from_cards_and_set_docs(self):
+        """Test set metadata counts cards per set and keeps empty sets from the set docs."""
+        collection = self._indexed_collection()
+        collection.cards[0].set_release_order = 1
+        collection.cards[2].set_release_order = 2
+        collection.set_fingerprints = {"Space_Time": ("Space-Time Smackdown", 3, 0, None)}
+        
+        assert collection.set_metadata() == [
+            {"name": "Space-Time Smackdown", "code": "", "release_order": 3, "card_count": 0},
+            {"name": "Mythical Island", "code": "A1a", "release_order": 2, "card_count": 1},
+            {"name": "Genetic Apex", "code": "A1", "release_order": 1, "card_count": 3},
+        ]
+        assert collection.set_metadata() is collection.set_metadata()
+        
+        collection.add_card(Card(id=9, name="Mew", set_name="Mythical Island", set_code="A1a"))
+        assert collection.set_metadata()[1]["card_count"] == 2
+    
+    def test_select_sorted_matches_sorting_filtered_cards(self):
+        """Test pages selected from a materialized order equal slices of a sorted filter."""
+        import random
+        rng = random.Random(5)
+        collection = CardCollection()
+        for card_id in range(200):
+            collection.add_card(Card(id=card_id, name=rng.choice(["Mew", "Eevee", "Pikachu", "Ditto"]),
+                                     set_code=f"S{card_id % 3}", rarity=rng.choice(["◊", "◊◊"])))
+        key = lambda card: (card.name, card.rarity)
+        sort_order = collection.sort_order("name", key, reverse=True)
+        assert collection.sort_order("name", key, reverse=True) is sort_order
+        
+        for criteria in ({}, {"set_code": "S1"}, {"set_code": "S2", "rarity": "◊◊"}, {"set_code": "missing"}):
+            mask = collection.query_mask(**criteria)
+            expected = sorted(collection.cards_for_mask(mask), key=key, reverse=True)
+            for start, stop in ((0, 10), (10, 30), (60, 200), (190, 260), (-10, 0), (-30, -10)):
+                assert collection.select_sorted(mask, sort_order, start, stop) == expected[start:stop]
+    
+    def test_select_after_walks_the_same_order_as_select_sorted(self):
+        """Test keyset pages chained through the last card's position cover the sorted filter exactly."""
+        import random
+        rng = random.Random(11)
+        collection = CardCollection()
+        for card_id in range(200):
+            collection.add_card(Card(id=card_id * 7, name=rng.choice(["Mew", "Eevee", "Pikachu", "Ditto"]),
+                                     set_code=f"S{card_id % 3}", rarity=rng.choice(["◊", "◊◊"])))
+        sort_order = collection.sort_order("name", lambda card: card.name, reverse=True)
+        
+        for order in (sort_order, None):
+            for criteria in ({}, {"set_code": "S1"}, {"set_code": "S2", "rarity": "◊◊"}, {"set_code": "missing"}):
+                mask = collection.query_mask(**criteria)
+                if order is None:
+                    expected = collection.cards_for_mask(mask)
+                else:
+                    expected = collection.select_sorted(mask, order, 0, len(collection.cards))
+                walked, after = [], None
+                while True:
+                    page = collection.select_after(mask, order, after, 9)
+                    walked.extend(page)
+                    if len(page) < 9:
+                        break
+                    after = collection.position_of(page[-1].id)
+                assert walked == expected
+        assert collection.position_of(14) == 2
+        assert collection.position_of(3) is None
+    
+    def test_replace_set_cards_patches_copy_in_place(self):
+        """Test replacing a set's cards updates lookups and index without touching the original."""
+        original = self._indexed_collection()
+        original.freeze()
+        collection = original.copy()
+        mythical = original.get_card_by_id(3)
+        
+        changed = Card(id=3, name="Raichu", energy_type="Lightning", set_name="Mythical Island",
+                       set_code="A1a", card_number_str="26", card_type="Pokémon - Stage 1 - Evolves from Pikachu", rarity="◊◊◊◊")
+        added = Card(id=5, name="Mew", energy_type="Psychic", set_name="Mythical Island",
+                     set_code="A1a", card_number_str="32", card_type="Pokémon - Basic", rarity="◊")
+        
+        assert collection.replace_set_cards("Mythical Island", [changed, added]) == [3, 5]
+        assert collection.replace_set_cards("Mythical Island", [changed, added]) == []
+        assert [c.id for c in collection.query(rarity="◊◊◊◊")] == [2, 3]
+        assert [c.id for c in collection.query(set_code="A1a", energy_type="Psychic")] == [5]
+        assert collection.get_card("A1a", "32").id == 5
+        assert original.get_card_by_id(3) is mythical
+        assert original.query(set_code="A1a") == [mythical]
+        
+        assert collection.replace_set_cards("Genetic Apex", [original.get_card_by_id(1)]) == [2, 4]
+        assert [c.id for c in collection.cards] == [1, 3, 5]
+        assert collection.get_cards_by_name("Potion") == []
+        assert collection.index.counts("set_name") == {"Genetic Apex": 1, "Mythical Island": 2}
+
+
+@pytest.mark.unit
+class TestCardSearchIndex:
+    """Test text search over names, attacks and abilities."""
+    
+    def _collection(self):
+        collection = CardCollection()
+        collection.add_card(Card(id=1, name="Pikachu", set_release_order=1,
+                                 attacks=[{"name": "Thunder Shock"}]))
+        collection.add_card(Card(id=2, name="Pikachu ex", set_release_order=1,
+                                 attacks=[{"name": "Circle Circuit"}]))
+        collection.add_card(Card(id=3, name="Raichu", set_release_order=2,
+                                 attacks=[{"name": "Thunderbolt"}]))
+        collection.add_card(Card(id=4, name="Flabébé", set_release_order=3,
+                                 abilities=[{"name": "Pollen Veil"}]))
+        collection.add_card(Card(id=5, name="Professor's Research", card_type="Trainer - Supporter"))
+        return collection
+    
+    def test_normalize_search_text(self):
+        """Test normalization drops case, accents and punctuation."""
+        assert normalize_search_text("Flabébé") == "flabebe"
+        assert normalize_search_text("  Professor's   Research ") == "professor s research"
+        assert normalize_search_text(None) == ""
+    
+    def test_match_mask_is_substring_over_names(self):
+        """Test name matching keeps substring semantics and ignores accents."""
+        collection = self._collection()
+        search_index = collection.search_index
+        
+        def ids(mask):
+            return [card.id for card in collection.cards_for_mask(mask)]
+        
+        assert ids(search_index.match_mask("chu")) == [1, 2, 3]
+        assert ids(search_index.match_mask("pika ex")) == [2]
+        assert ids(search_index.match_mask("flabebe")) == [4]
+        assert ids(search_index.match_mask("professor's")) == [5]
+        assert search_index.match_mask("thunder") == 0
+        assert search_index.match_mask("pikahcu") == 0
+        assert ids(search_index.match_mask("pikahcu", fuzzy=True)) == [1, 2]
+    
+    def test_search_ranks_by_relevance(self):
+        """Test ranking prefers name over attack matches and exact over typo matches."""
+        collection = self._collection()
+        
+        assert [card.id for card, _ in collection.search("pikachu")] == [1, 2]
+        assert [card.id for card, _ in collection.search("thunder")] == [3, 1]
+        assert [card.id for card, _ in collection.search("raichu")][0] == 3
+        assert [card.id for card, _ in collection.search("pollen")] == [4]
+        assert [card.id for card, _ in collection.search("thundr shock")] == [1]
+        assert [card.id for card, _ in collection.search("p")] == [1, 2, 5, 4]
+        assert collection.search("pikachu", limit=1)[0][0].id == 1
+        assert collection.search("zzz") == []
+    
+    def test_search_index_rebuilt_after_changes(self):
+        """Test adding cards invalidates the search index."""
+        collection = self._collection()
+        assert collection.search("mew") == []
+        
+        collection.add_card(Card(id=6, name="Mew"))
+        assert [card.id for card, _ in collection.search("mew")] == [6]
@@ -0,0 +1,66 @@
+"""
+Unit tests for sharded Firestore counters.
+"""
+
+import pytest
+from unittest.mock import Mock, patch
+from google.auth.credentials import AnonymousCredentials
+from google.cloud import firestore
+from google.cloud.firestore_v1.types import firestore as firestore_types
+from google.cloud.firestore_v1.types.aggregation_result import AggregationResult
+from google.cloud.firestore_v1.types.document import Value
+from google.protobuf.timestamp_pb2 import Timestamp
+
+from app.counters import ShardedCounter, reconcile
+
+
+@pytest.mark.unit
+class TestShardedCounter:
+    """Test sharded counter writes, reads and reconciliation."""
+    
+    def test_increment_writes_one_shard_in_callers_batch(self):
+        """Test increments go into the caller's batch as a merged Increment on one shard."""
+        db = Mock()
+        batch = Mock()
+        counter = ShardedCounter("decks", num_shards=4)
+        
+        with patch("app.counters.random.randrange", return_value=3):
+            counter.increment(db, batch, -2)
+        
+        db.collection.assert_called_with("counters")
+        db.collection.return_value.document.assert_called_with("decks")
+        shards = db.collection.return_value.document.return_value.collection.return_value
+        shards.document.assert_called_with("3")
+        args, kwargs = batch.set.call_args
+        assert args[0] is shards.document.return_value
+        assert args[1]["count"].value == -2 and kwargs == {"merge": True}
+        batch.commit.assert_not_called()
+    
+    def test_value_sums_shards(self):
+        """Test the counter value is the sum of its shard documents."""
+        db = Mock()
+        shards = db.collection.return_value.document.return_value.collection.return_value
+        shards.stream.return_value = [Mock(to_dict=Mock(return_value={"count": n})) for n in (4, 0, 7)]
+        
+        assert ShardedCounter("users").value(db) == 11
+    
+    def test_reconcile_resets_counters_to_live_counts(self):
+        """Test reconciliation counts and overwrites every shard in one real SDK transaction."""
+        client = firestore.Client(project="test-project", credentials=AnonymousCredentials())
+        api = client._firestore_api_internal = Mock()
+        api.begin_transaction.return_value = firestore_types.BeginTransactionResponse(transaction=b"tx")
+        api.batch_get_documents.return_value = iter([])
+        api.run_aggregation_query.return_value = iter([firestore_types.RunAggregationQueryResponse(
+            result=AggregationResult(aggregate_fields={"field_1": Value(integer_value=42)}),
+            read_time=Timestamp(),
+        )])
+        api.commit.return_value = firestore_types.CommitResponse(commit_time=Timestamp())
+        
+        assert reconcile(client, {"users": ShardedCounter("users", num_shards=3)}) == {"users": 42}
+        
+        assert api.run_aggregation_query.call_args[1]["request"]["transaction"] == b"tx"
+        commit = api.commit.call_args[1]["request"]
+        assert commit["transaction"] == b"tx"
+        written = [(write.update.name.rsplit("/", 1)[1], write.update.fields["count"].integer_value)
+                   for write in commit["writes"]]
+        assert written == [("0", 42), ("1", 0), ("2", 0)]
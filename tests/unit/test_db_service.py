@@ -20,7 +20,8 @@ from app.db_service import (
     retry_on_error,
     DatabaseService,
     _connection_pool,
-    db_service
+    db_service,
+    WriteBatcher,
 )
 
 
@@ -628,6 +629,375 @@ class TestDatabaseService:
             assert result is False
 
 
+@pytest.mark.unit
+class TestDatabaseServiceQueryCache:
+    """Test the opt-in read-through cache for DatabaseService reads."""
+    
+    def setup_method(self):
+        """Start every test from an empty generation of the cards cache."""
+        from app.cache_manager import cache_manager
+        cache_manager.invalidate_query_collection("cards")
+    
+    @patch('app.db_service.DatabaseService.get_client')
+    @patch('app.db_service.DatabaseService.return_client')
+    def test_cached_get_document_reads_once(self, mock_return_client, mock_get_client, app):
+        """Test a cached document read only reaches Firestore on the first call and hits match the miss."""
+        from datetime import datetime, timezone
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        mock_doc = mock_client.collection.return_value.document.return_value.get.return_value
+        mock_doc.exists = True
+        released = datetime(2025, 1, 30, tzinfo=timezone.utc)
+        mock_doc.to_dict.side_effect = lambda: {"set_name": "Genetic Apex", "release_order": 1, "released": released}
+        
+        with app.app_context():
+            first = DatabaseService.get_document("cards", "Genetic_Apex", cached=True)
+            first["release_order"] = 99
+            second = DatabaseService.get_document("cards", "Genetic_Apex", cached=True)
+            third = DatabaseService.get_document("cards", "Genetic_Apex", cached=True)
+        
+        assert second == third == {"set_name": "Genetic Apex", "release_order": 1, "released": released}
+        assert isinstance(second["released"], datetime) and second is not third
+        mock_get_client.assert_called_once()
+    
+    @patch('app.db_service.DatabaseService.get_client')
+    @patch('app.db_service.DatabaseService.return_client')
+    def test_missing_document_cached_negatively(self, mock_return_client, mock_get_client, app):
+        """Test a missing document is remembered as missing."""
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        mock_client.collection.return_value.document.return_value.get.return_value.exists = False
+        
+        with app.app_context():
+            assert DatabaseService.get_document("cards", "Unknown_Set", cached=True) is None
+            assert DatabaseService.get_document("cards", "Unknown_Set", cached=True) is None
+        
+        mock_get_client.assert_called_once()
+    
+    @patch('app.db_service.DatabaseService.get_client')
+    @patch('app.db_service.DatabaseService.return_client')
+    def test_uncached_collection_always_reads(self, mock_return_client, mock_get_client, app):
+        """Test collections without a cache TTL ignore cached=True."""
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        mock_client.collection.return_value.document.return_value.get.return_value.exists = False
+        
+        with app.app_context():
+            DatabaseService.get_document("users", "user1", cached=True)
+            DatabaseService.get_document("users", "user1", cached=True)
+        
+        assert mock_get_client.call_count == 2
+    
+    @patch('app.db_service.DatabaseService.get_client')
+    @patch('app.db_service.DatabaseService.return_client')
+    def test_write_invalidates_cached_query(self, mock_return_client, mock_get_client, app):
+        """Test a write through DatabaseService invalidates cached queries of the collection."""
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        mock_doc = MagicMock()
+        mock_doc.id = "Genetic_Apex"
+        mock_doc.to_dict.return_value = {"release_order": 1}
+        mock_client.collection.return_value.stream.side_effect = lambda: iter([mock_doc])
+        
+        with app.app_context():
+            DatabaseService.query_collection("cards", cached=True)
+            DatabaseService.query_collection("cards", cached=True)
+            assert mock_client.collection.return_value.stream.call_count == 1
+            
+            DatabaseService.update_document("cards", "Genetic_Apex", {"release_order": 2})
+            result = DatabaseService.query_collection("cards", cached=True)
+        
+        assert mock_client.collection.return_value.stream.call_count == 2
+        assert result == [{"release_order": 1, "id": "Genetic_Apex"}]
+    
+    @patch('app.db_service.DatabaseService.get_client')
+    @patch('app.db_service.DatabaseService.return_client')
+    def test_batch_fetches_only_uncached_ids(self, mock_return_client, mock_get_client, app):
+        """Test a cached batch read only fetches ids missing from the cache, in request order."""
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        mock_client.collection.return_value.document.side_effect = lambda doc_id: doc_id
+        
+        def get_all(refs):
+            for doc_id in refs:
+                doc = MagicMock()
+                doc.id = doc_id
+                doc.exists = doc_id != "missing"
+                doc.to_dict.return_value = {"name": doc_id}
+                yield doc
+        mock_client.get_all.side_effect = get_all
+        
+        with app.app_context():
+            DatabaseService.get_documents_batch("cards", ["a", "missing"], cached=True)
+            result = DatabaseService.get_documents_batch("cards", ["b", "missing", "a"], cached=True)
+        
+        assert [doc["id"] for doc in result] == ["b", "a"]
+        assert mock_client.get_all.call_args[0][0] == ["b"]
+    
+    @patch('app.db_service.DatabaseService.get_client')
+    @patch('app.db_service.DatabaseService.return_client')
+    def test_order_by_direction_suffix(self, mock_return_client, mock_get_client):
+        """Test an order_by with a " desc" suffix orders descending on the bare field."""
+        from google.cloud import firestore
+        mock_client = MagicMock()
+        mock_get_client.return_value = mock_client
+        mock_query = mock_client.collection.return_value
+        mock_query.order_by.return_value = mock_query
+        mock_query.limit.return_value = mock_query
+        mock_query.stream.return_value = []
+        
+        DatabaseService.query_collection("test_collection", order_by="release_order desc", limit=5)
+        
+        mock_query.order_by.assert_called_with("release_order", direction=firestore.Query.DESCENDING)
+    
+    def test_query_cache_key_ignores_filter_order(self):
+        """Test equivalent queries share a cache key."""
+        first = DatabaseService._query_cache_key([("a", "==", 1), ("b", ">", 2)], "a", 5)
+        second = DatabaseService._query_cache_key([("b", ">", 2), ("a", "==", 1)], "a", 5)
+        
+        assert first == second
+        assert first != DatabaseService._query_cache_key([("a", "==", 1)], "a", 5)
+
+
+@pytest.mark.unit
+class TestWriteBatcher:
+    """Test write-behind coalescing and flushing of Firestore mutations."""
+    
+    def setup_method(self):
+        """Set up test fixtures."""
+        from google.cloud import firestore
+        self.firestore = firestore
+        self.client = MagicMock()
+        self.batch = self.client.batch.return_value
+        self.client.collection.return_value.document.side_effect = lambda doc_id: f"ref:{doc_id}"
+        self.batcher = WriteBatcher(client=self.client, flush_interval=60)
+    
+    def teardown_method(self):
+        """Stop the flush thread."""
+        self.batcher.close()
+    
+    def test_increments_coalesce_into_one_write(self):
+        """Test repeated increments of a document become one set with summed increments."""
+        for _ in range(3):
+            self.batcher.increment("collections", "user1", {"card_counts.5": 1, "total_cards": 1})
+        
+        assert self.batcher.flush() == 1
+        
+        self.batch.set.assert_called_once()
+        ref, data = self.batch.set.call_args[0]
+        assert ref == "ref:user1"
+        assert self.batch.set.call_args[1] == {"merge": True}
+        assert data["card_counts"]["5"] == self.firestore.Increment(3)
+        assert data["total_cards"] == self.firestore.Increment(3)
+        self.batch.commit.assert_called_once()
+        assert self.batcher.get_stats()["coalesced"] == 2
+        assert self.batcher.pending_documents == 0
+    
+    def test_set_and_increment_merge_rules(self):
+        """Test a set replaces earlier increments and later increments fold into a numeric set."""
+        self.batcher.increment("collections", "user1", {"total_cards": 2})
+        self.batcher.set("collections", "user1", {"total_cards": 10})
+        self.batcher.increment("collections", "user1", {"total_cards": 1})
+        self.batcher.set("collections", "user1", {"card_counts.5": self.firestore.DELETE_FIELD})
+        self.batcher.increment("collections", "user1", {"card_counts.5": 2})
+        
+        view = self.batcher.apply_pending("collections", "user1", {"total_cards": 4, "card_counts": {"5": 1}})
+        assert view == {"total_cards": 11, "card_counts": {"5": 2}}
+    
+    def test_apply_pending_leaves_stored_document_untouched(self):
+        """Test pending writes overlay a copy of the stored document."""
+        stored = {"card_counts": {"5": 1}, "total_cards": 1}
+        self.batcher.set("collections", "user1", {
+            "card_counts.5": self.firestore.DELETE_FIELD,
+            "last_updated": self.firestore.SERVER_TIMESTAMP,
+        })
+        
+        view = self.batcher.apply_pending("collections", "user1", stored)
+        
+        assert view == {"card_counts": {}, "total_cards": 1}
+        assert stored == {"card_counts": {"5": 1}, "total_cards": 1}
+        assert self.batcher.apply_pending("collections", "user2", None) is None
+    
+    def test_mutate_sees_pending_writes_and_queues_nothing_on_error(self):
+        """Test mutate builds from the pending view and an exception queues nothing."""
+        def add_one(view):
+            count = (view or {}).get("card_counts", {}).get("5", 0)
+            return None, {"card_counts.5": 1}, count
+        
+        assert self.batcher.mutate("collections", "user1", None, add_one) == 0
+        assert self.batcher.mutate("collections", "user1", None, add_one) == 1
+        
+        def reject(view):
+            raise ValueError("Insufficient cards to remove")
+        with pytest.raises(ValueError):
+            self.batcher.mutate("collections", "user1", None, reject)
+        
+        assert self.batcher.apply_pending("collections", "user1", None) == {"card_counts": {"5": 2}}
+    
+    def test_failed_batch_is_retried_under_newer_writes(self):
+        """Test a failed commit is queued again beneath mutations made since."""
+        self.batch.commit.side_effect = [Exception("unavailable"), None]
+        self.batcher.increment("collections", "user1", {"total_cards": 2})
+        
+        assert self.batcher.flush() == 0
+        self.batcher.increment("collections", "user1", {"total_cards": 3})
+        assert self.batcher.flush() == 1
+        
+        data = self.batch.set.call_args[0][1]
+        assert data["total_cards"] == self.firestore.Increment(5)
+        assert self.batcher.get_stats()["failed_batches"] == 1
+    
+    def test_writes_visible_while_batch_commits(self):
+        """Test writes stay in the pending view while their batch commits, and after it fails."""
+        views = []
+        def commit():
+            views.append(self.batcher.apply_pending("collections", "user1", {"total_cards": 1}))
+            self.batcher.increment("collections", "user1", {"total_cards": 1})
+            raise Exception("unavailable")
+        self.batch.commit.side_effect = commit
+        self.batcher.increment("collections", "user1", {"total_cards": 2})
+        
+        assert self.batcher.flush() == 0
+        
+        assert views == [{"total_cards": 3}]
+        assert self.batcher.apply_pending("collections", "user1", {"total_cards": 1}) == {"total_cards": 4}
+        self.batch.commit.side_effect = None
+        assert self.batcher.flush() == 1
+        assert self.batcher.apply_pending("collections", "user1", {"total_cards": 4}) == {"total_cards": 4}
+    
+    def test_failed_document_backs_off(self):
+        """Test the background flush leaves a failed document alone until its backoff expires."""
+        self.batch.commit.side_effect = [Exception("unavailable"), None]
+        self.batcher.max_backoff = 0.05
+        self.batcher.increment("collections", "user1", {"total_cards": 1})
+        
+        assert self.batcher.flush(force=False) == 0
+        assert self.batcher.flush(force=False) == 0
+        assert self.batch.commit.call_count == 1
+        
+        time.sleep(0.06)
+        self.batcher.flush(force=False)
+        assert self.batch.commit.call_count == 2
+        assert self.batcher.pending_documents == 0
+    
+    def test_normalized_documents_committed_in_transaction(self):
+        """Test a normalizer's collection is read and rewritten in a transaction, other writes merged."""
+        def normalize(data):
+            counts = {card_id: count for card_id, count in data.get("counts", {}).items() if count > 0}
+            return dict(data, counts=counts, total=sum(counts.values()))
+        self.batcher.set_normalizer("collections", normalize)
+        self.client.collection.return_value.document.side_effect = lambda doc_id: Mock(path=f"c/{doc_id}")
+        transaction = self.client.transaction.return_value
+        transaction._max_attempts = 1
+        transaction._read_only = False
+        # Another instance changed the stored document since it was last read here
+        stored = Mock(exists=True)
+        stored.reference.path = "c/user1"
+        stored.to_dict.return_value = {"counts": {"5": 2, "7": 1}, "total": 3}
+        transaction.get_all.return_value = [stored]
+        self.batcher.increment("collections", "user1", {"counts.5": -2, "counts.9": 1})
+        self.batcher.set("collections", "user1", {"updated": self.firestore.SERVER_TIMESTAMP})
+        self.batcher.increment("decks", "deck1", {"views": 1})
+        
+        assert self.batcher.apply_pending("collections", "user1", {"counts": {"5": 2}}) == {"counts": {"9": 1}, "total": 1}
+        assert self.batcher.flush() == 2
+        
+        (_, collection_data), collection_kwargs = transaction.set.call_args_list[0]
+        assert collection_data == {"counts": {"7": 1, "9": 1}, "total": 2, "updated": self.firestore.SERVER_TIMESTAMP}
+        assert collection_kwargs == {}
+        (_, deck_data), deck_kwargs = transaction.set.call_args_list[1]
+        assert deck_data == {"views": self.firestore.Increment(1)} and deck_kwargs == {"merge": True}
+        transaction._commit.assert_called_once()
+        self.batch.commit.assert_not_called()
+    
+    def test_document_dropped_after_retry_window(self):
+        """Test a document still failing after retry_window is dropped."""
+        self.batch.commit.side_effect = Exception("invalid")
+        self.batcher.retry_window = 0.05
+        self.batcher.increment("collections", "user1", {"total_cards": 1})
+        
+        self.batcher.flush()
+        assert self.batcher.pending_documents == 1
+        time.sleep(0.06)
+        self.batcher.flush()
+        
+        assert self.batcher.pending_documents == 0
+        assert self.batcher.get_stats()["dropped_documents"] == 1
+    
+    def test_flush_splits_batches_at_firestore_limit(self):
+        """Test more than 500 documents are committed in several batches."""
+        self.batcher.max_pending_documents = WriteBatcher.MAX_BATCH_DOCUMENTS * 2
+        for index in range(WriteBatcher.MAX_BATCH_DOCUMENTS + 1):
+            self.batcher.increment("collections", f"user{index}", {"total_cards": 1})
+        
+        assert self.batcher.flush() == WriteBatcher.MAX_BATCH_DOCUMENTS + 1
+        assert self.batch.commit.call_count == 2
+    
+    def test_flush_records_batch_metrics(self):
+        """Test each committed batch records its size and flush latency."""
+        from app.monitoring import PerformanceMetrics
+        metrics = PerformanceMetrics()
+        self.batcher.increment("collections", "user1", {"total_cards": 1})
+        self.batcher.increment("collections", "user1", {"total_cards": 1})
+        self.batcher.increment("collections", "user2", {"total_cards": 1})
+        
+        with patch("app.monitoring.performance_monitor", Mock(metrics=metrics)):
+            self.batcher.flush()
+        
+        stats = metrics.get_write_batch_stats()
+        assert stats["documents"]["mean"] == pytest.approx(2)
+        assert stats["mutations"]["mean"] == pytest.approx(3)
+        assert metrics.db_query_times.lifetime("write_batch_flush").count == 1
+    
+    def test_background_flush_within_interval(self):
+        """Test queued writes are flushed by the background thread after flush_interval."""
+        self.batcher.flush_interval = 0.05
+        self.batcher.increment("collections", "user1", {"total_cards": 1})
+        
+        deadline = time.time() + 2
+        while self.batcher.pending_documents and time.time() < deadline:
+            time.sleep(0.01)
+        
+        assert self.batcher.pending_documents == 0
+        self.batch.commit.assert_called_once()
+    
+    def test_close_flushes_and_writes_through_afterwards(self):
+        """Test close writes out queued mutations and later writes are not buffered."""
+        self.batcher.increment("collections", "user1", {"total_cards": 1})
+        
+        self.batcher.close()
+        assert self.batch.commit.call_count == 1
+        
+        self.batcher.increment("collections", "user1", {"total_cards": 1})
+        assert self.batch.commit.call_count == 2
+        assert self.batcher.pending_documents == 0
+    
+    def test_close_retries_until_written(self):
+        """Test close keeps retrying a failed flush until the queue is empty."""
+        self.batch.commit.side_effect = [Exception("unavailable"), Exception("unavailable"), None]
+        self.batcher.flush_interval = 0.01
+        self.batcher.increment("collections", "user1", {"total_cards": 1})
+        
+        self.batcher.close(timeout=5)
+        
+        assert self.batch.commit.call_count == 3
+        assert self.batcher.get_stats()["dropped_documents"] == 0
+    
+    @patch("app.db_service.firestore_logger")
+    def test_close_logs_writes_lost_at_deadline(self, mock_logger):
+        """Test close gives up at its deadline and logs each document it could not write."""
+        self.batch.commit.side_effect = Exception("unavailable")
+        self.batcher.flush_interval = 0.01
+        self.batcher.increment("collections", "user1", {"total_cards": 1})
+        
+        self.batcher.close(timeout=0.1)
+        
+        assert self.batch.commit.call_count > 1
+        assert self.batcher.pending_documents == 0
+        assert self.batcher.get_stats()["dropped_documents"] == 1
+        assert "collections/user1" in mock_logger.error.call_args[0][0]
+
+
 @pytest.mark.unit
 class TestGlobalInstances:
     """Test global instances."""
@@ -0,0 +1,164 @@
+"""
+Unit tests for Firestore read attribution.
+"""
+
+import pytest
+from unittest.mock import patch, MagicMock, Mock
+
+from app import firestore_tracing
+from app.firestore_tracing import traced_client, untraced_client, request_usage
+from app.monitoring import PerformanceMetrics
+
+
+def _snapshot(collection="users", doc_id="doc"):
+    snapshot = Mock()
+    snapshot.id = doc_id
+    snapshot.reference.parent.id = collection
+    return snapshot
+
+
+@pytest.mark.unit
+class TestTracedClient:
+    """Test the traced client counts reads, writes and deletes per collection and request."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.metrics = PerformanceMetrics()
+        self.monitor = Mock(metrics=self.metrics)
+        self.sdk = MagicMock()
+        self.db = traced_client(self.sdk)
+
+    def test_stream_counts_documents_in_request(self, app):
+        """Test streamed documents are counted per collection and for the request."""
+        query = self.sdk.collection.return_value.where.return_value.limit.return_value
+        query.stream.return_value = iter([_snapshot(), _snapshot()])
+
+        with app.test_request_context(), patch("app.monitoring.performance_monitor", self.monitor):
+            docs = list(self.db.collection("users").where("a", "==", 1).limit(5).stream())
+            assert request_usage() == {"reads": 2, "writes": 0, "deletes": 0}
+
+        assert len(docs) == 2
+        assert self.metrics.firestore_operations["reads"]["users"] == 2
+
+    def test_empty_query_billed_one_read(self, app):
+        """Test an empty query result still counts one read."""
+        self.sdk.collection.return_value.stream.return_value = iter([])
+
+        with app.test_request_context(), patch("app.monitoring.performance_monitor", self.monitor):
+            assert list(self.db.collection("decks").stream()) == []
+            assert request_usage()["reads"] == 1
+
+    def test_get_all_counts_every_requested_document(self, app):
+        """Test get_all bills each requested reference and passes unwrapped refs to the SDK."""
+        self.sdk.collection.return_value.document.side_effect = lambda doc_id: Mock(id=doc_id)
+        self.sdk.get_all.return_value = iter([_snapshot("decks", "d1")])
+
+        with app.test_request_context(), patch("app.monitoring.performance_monitor", self.monitor):
+            refs = [self.db.collection("decks").document(doc_id) for doc_id in ("d1", "d2")]
+            docs = list(self.db.get_all(refs))
+            assert request_usage()["reads"] == 2
+
+        sent_refs = self.sdk.get_all.call_args[0][0]
+        assert [ref.id for ref in sent_refs] == ["d1", "d2"]
+        assert not any(isinstance(ref, firestore_tracing._Traced) for ref in sent_refs)
+        assert docs[0].id == "d1"
+
+    def test_batch_writes_and_snapshot_references(self, app):
+        """Test batch writes and deletes through snapshot references are attributed."""
+        self.sdk.collection.return_value.stream.return_value = iter([_snapshot("decks")])
+        batch = self.sdk.batch.return_value
+
+        with app.test_request_context(), patch("app.monitoring.performance_monitor", self.monitor):
+            writer = self.db.batch()
+            for doc in self.db.collection("decks").stream():
+                writer.delete(doc.reference)
+            writer.set(self.db.collection("users").document("u1"), {"deck_count": 0}, merge=True)
+            writer.commit()
+            assert request_usage() == {"reads": 1, "writes": 1, "deletes": 1}
+
+        assert not isinstance(batch.delete.call_args[0][0], firestore_tracing._Traced)
+        batch.commit.assert_called_once()
+        assert self.metrics.firestore_operations["deletes"]["decks"] == 1
+        assert self.metrics.firestore_operations["writes"]["users"] == 1
+
+    def test_count_aggregation_billed_per_thousand(self, app):
+        """Test count() aggregations cost one read per 1000 index entries."""
+        self.sdk.collection.return_value.count.return_value.get.return_value = [[Mock(value=2500)]]
+
+        with app.test_request_context(), patch("app.monitoring.performance_monitor", self.monitor):
+            result = self.db.collection("users").count().get()
+            assert request_usage()["reads"] == 3
+
+        assert result[0][0].value == 2500
+
+    def test_transaction_reads_billed_and_unwrapped(self, app):
+        """Test transaction document gets, get_all and count() aggregations are billed and unwrapped."""
+        self.sdk.collection.return_value.document.side_effect = lambda doc_id: Mock(id=doc_id)
+        transaction = self.sdk.transaction.return_value
+        transaction.get.return_value = iter([_snapshot("users", "u1")])
+        transaction.get_all.return_value = iter([_snapshot("counters", "0")])
+        self.sdk.collection.return_value.count.return_value.get.return_value = [[Mock(value=1500)]]
+        
+        with app.test_request_context(), patch("app.monitoring.performance_monitor", self.monitor):
+            writer = self.db.transaction()
+            snapshots = list(writer.get(self.db.collection("users").document("u1")))
+            refs = [self.db.collection("counters").document(doc_id) for doc_id in ("0", "1")]
+            assert len(list(writer.get_all(refs))) == 1
+            results = self.db.collection("users").count().get(transaction=writer)
+            assert request_usage()["reads"] == 5
+        
+        assert isinstance(snapshots[0], firestore_tracing._TracedSnapshot) and snapshots[0].id == "u1"
+        assert results[0][0].value == 1500
+        assert not isinstance(transaction.get.call_args[0][0], firestore_tracing._Traced)
+        assert not any(isinstance(ref, firestore_tracing._Traced) for ref in transaction.get_all.call_args[0][0])
+        count_kwargs = self.sdk.collection.return_value.count.return_value.get.call_args[1]
+        assert count_kwargs == {"transaction": transaction}
+    
+    def test_slow_query_logged(self, app):
+        """Test operations over the slow query threshold are recorded with their endpoint."""
+        self.sdk.collection.return_value.document.return_value.get.return_value = _snapshot()
+
+        with app.test_request_context(), patch("app.monitoring.performance_monitor", self.monitor), \
+                patch.object(firestore_tracing, "SLOW_QUERY_MS", 0):
+            self.db.collection("users").document("u1").get()
+
+        assert self.metrics.slow_queries[-1]["collection"] == "users"
+        assert self.metrics.slow_queries[-1]["operation"] == "document get"
+
+    def test_wrapping_is_idempotent(self):
+        """Test wrapping twice keeps one layer and untraced_client returns the SDK client."""
+        assert traced_client(self.db) is self.db
+        assert untraced_client(self.db) is self.sdk
+        assert untraced_client(self.sdk) is self.sdk
+
+
+@pytest.mark.unit
+class TestReadsPerRequest:
+    """Test per-endpoint reads per request and the related cost alert."""
+
+    def test_reads_per_request_by_endpoint_and_user(self):
+        """Test request usage feeds the per-endpoint distribution and per-user totals."""
+        metrics = PerformanceMetrics()
+        for reads in (10, 20, 30):
+            metrics.record_request_firestore_usage("main.index", "user1", {"reads": reads})
+
+        stats = metrics.get_firestore_usage_stats()
+        assert stats["reads_per_request"]["main.index"]["count"] == 3
+        assert stats["reads_per_request"]["main.index"]["mean"] == pytest.approx(20)
+        assert stats["top_users_by_reads"] == [("user1", 60)]
+
+    def test_expensive_endpoint_alert(self):
+        """Test an endpoint over the reads-per-request threshold raises a cost alert."""
+        from datetime import datetime
+        from app.monitoring import AlertManager
+
+        metrics = PerformanceMetrics()
+        alert_manager = AlertManager()
+        for _ in range(alert_manager.min_requests_for_read_alert):
+            metrics.record_request_firestore_usage("main.index", None, {"reads": 1000})
+            metrics.record_request_firestore_usage("decks.list", None, {"reads": 2})
+
+        alerts = alert_manager._check_cost_alerts(metrics, datetime.utcnow())
+        expensive = [alert for alert in alerts if alert["type"] == "expensive_endpoint"]
+        assert len(expensive) == 1
+        assert expensive[0]["cost_details"]["endpoint"] == "main.index"
@@ -0,0 +1,139 @@
+"""
+Unit tests for the fixed-memory latency histograms.
+"""
+
+import threading
+import pytest
+from unittest.mock import patch
+
+from app.histograms import LatencyHistograms, LogHistogram, RollingHistogram
+
+
+@pytest.mark.unit
+class TestLogHistogram:
+    """Test LogHistogram quantiles, merging and export."""
+
+    def test_empty_histogram(self):
+        """Test an empty histogram reports zeros."""
+        histogram = LogHistogram()
+        assert histogram.count == 0
+        assert histogram.quantile(0.95) == 0.0
+        assert histogram.mean == 0.0
+
+    def test_quantiles_within_relative_accuracy(self):
+        """Test quantiles stay within the configured relative error."""
+        histogram = LogHistogram(relative_accuracy=0.01)
+        for value in range(1, 10001):
+            histogram.add(value / 10)
+
+        assert histogram.quantile(0.5) == pytest.approx(500, rel=0.01)
+        assert histogram.quantile(0.99) == pytest.approx(990, rel=0.01)
+        assert histogram.quantile(1.0) == pytest.approx(1000, rel=0.01)
+        assert histogram.percentiles()["p999"] == pytest.approx(999, rel=0.01)
+
+    def test_bucket_count_is_bounded(self):
+        """Test values outside the range are clamped so memory stays fixed."""
+        histogram = LogHistogram(min_value=1.0, max_value=100.0)
+        for value in (0.0, 0.5, 1.0, 100.0, 1e9):
+            histogram.add(value)
+
+        assert len(histogram.buckets) == 2
+        assert histogram.max == 1e9
+
+    def test_merge_matches_single_histogram(self):
+        """Test merging two histograms equals recording into one."""
+        left, right, combined = LogHistogram(), LogHistogram(), LogHistogram()
+        for value in range(1, 501):
+            left.add(value)
+            combined.add(value)
+        for value in range(501, 1001):
+            right.add(value)
+            combined.add(value)
+
+        left.merge(right)
+        assert left.buckets == combined.buckets
+        assert left.count == 1000
+        assert left.quantile(0.95) == combined.quantile(0.95)
+
+    def test_merge_rejects_different_accuracy(self):
+        """Test histograms with different bucket widths cannot be merged."""
+        with pytest.raises(ValueError):
+            LogHistogram(0.01).merge(LogHistogram(0.02))
+
+    def test_to_dict_export(self):
+        """Test export includes sorted bucket upper bounds and counts."""
+        histogram = LogHistogram()
+        histogram.add(10.0)
+        histogram.add(10.0)
+        histogram.add(200.0)
+
+        exported = histogram.to_dict()
+        assert exported["count"] == 3
+        assert [count for _, count in exported["buckets"]] == [2, 1]
+        assert exported["buckets"][0][0] >= 10.0
+
+
+@pytest.mark.unit
+class TestRollingHistogram:
+    """Test RollingHistogram windows."""
+
+    def test_window_excludes_old_slots(self):
+        """Test samples older than the window are left out and expired slots dropped."""
+        rolling = RollingHistogram(slot_seconds=60, slots=5)
+        rolling.add(10.0, now=0)
+        rolling.add(20.0, now=250)
+
+        assert rolling.window(60, now=250).count == 1
+        assert rolling.window(300, now=250).count == 2
+        assert rolling.window(300, now=400).count == 1
+
+
+@pytest.mark.unit
+class TestLatencyHistograms:
+    """Test per-thread buffering in LatencyHistograms."""
+
+    def test_reads_flush_pending_samples(self):
+        """Test buffered samples are visible to readers before the buffer fills."""
+        histograms = LatencyHistograms(buffer_size=1000, flush_seconds=60)
+        histograms.record("endpoint", 5.0)
+
+        assert histograms.counts() == {"endpoint": 1}
+        assert histograms.window().count == 1
+
+    def test_concurrent_recording(self):
+        """Test samples from many threads are all counted."""
+        histograms = LatencyHistograms(buffer_size=50)
+
+        def worker():
+            for index in range(500):
+                histograms.record(f"endpoint-{index % 3}", float(index + 1))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert sum(histograms.counts().values()) == 8 * 500
+        # Buffers of finished threads are dropped once drained
+        assert len(histograms._buffers) <= 1
+
+    def test_lifetime_outlives_window(self):
+        """Test lifetime counts keep samples that have left the rolling window."""
+        histograms = LatencyHistograms(slot_seconds=60, slots=2)
+        with patch("app.histograms.time.monotonic", return_value=0.0):
+            histograms.record("endpoint", 5.0)
+            histograms.flush()
+        with patch("app.histograms.time.monotonic", return_value=600.0):
+            assert histograms.window("endpoint").count == 0
+            assert histograms.lifetime("endpoint").count == 1
+
+    def test_export_skips_idle_keys(self):
+        """Test export only includes keys with samples in the window."""
+        histograms = LatencyHistograms()
+        histograms.record("busy", 12.0)
+
+        exported = histograms.export(include_buckets=False)
+        assert set(exported) == {"busy"}
+        assert exported["busy"]["count"] == 1
+        assert "p99" in exported["busy"]
@@ -4,7 +4,7 @@ Unit tests for models functionality.
 
 import pytest
 from unittest.mock import patch, MagicMock, Mock
-from app.models import User, load_user, login_manager
+from app.models import User, load_user, login_manager, forget_user_data
 
 
 @pytest.mark.unit
@@ -211,4 +211,36 @@ class TestLoadUser:
             
             assert result is not None
             assert result.id == "12345"
-            mock_cache_manager.get_user_data.assert_called_once_with("12345")
\ No newline at end of file
+            mock_cache_manager.get_user_data.assert_called_once_with("12345")
+
+
+@pytest.mark.unit
+class TestLoadUserMemo:
+    """Test per-request memoization and write-through invalidation in load_user."""
+
+    def test_load_user_memoized_within_request(self, app):
+        """Test repeated loads in one request hit the cache once and reuse the User."""
+        with app.test_request_context():
+            with patch('app.models.cache_manager') as mock_cache_manager:
+                mock_cache_manager.get_user_data.return_value = {"username": "memouser"}
+
+                first = load_user("user123")
+                second = load_user("user123")
+
+                assert first is second
+                mock_cache_manager.get_user_data.assert_called_once_with("user123")
+
+    def test_forget_user_data_clears_memo_and_cache(self, app):
+        """Test forget_user_data drops the memoized User and the cached document."""
+        with app.test_request_context():
+            with patch('app.models.cache_manager') as mock_cache_manager:
+                mock_cache_manager.get_user_data.return_value = {"username": "olduser"}
+                load_user("user123")
+
+                forget_user_data("user123")
+                mock_cache_manager.invalidate_user_data.assert_called_once_with("user123")
+
+                mock_cache_manager.get_user_data.return_value = {"username": "newuser"}
+                assert load_user("user123").username == "newuser"
+                assert mock_cache_manager.get_user_data.call_count == 2
+
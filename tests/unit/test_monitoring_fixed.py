@@ -7,6 +7,7 @@ from unittest.mock import patch, MagicMock, Mock
 from datetime import datetime, timedelta
 from collections import defaultdict, deque
 
+from app.histograms import LatencyHistograms
 from app.monitoring import (
     PerformanceMetrics,
     PerformanceMonitor,
@@ -26,7 +27,7 @@ class TestPerformanceMetrics:
     def test_initialization(self):
         """Test metrics initialization."""
         assert self.metrics.max_samples == 100
-        assert isinstance(self.metrics.request_times, defaultdict)
+        assert isinstance(self.metrics.request_times, LatencyHistograms)
         assert isinstance(self.metrics.error_counts, defaultdict)
         assert self.metrics.cache_stats["hits"] == 0
         assert self.metrics.cache_stats["misses"] == 0
@@ -39,23 +40,38 @@ class TestPerformanceMetrics:
         self.metrics.record_request_time("/api/test", 200.0)
         self.metrics.record_request_time("/api/other", 100.0)
         
-        assert len(self.metrics.request_times["/api/test"]) == 2
-        assert list(self.metrics.request_times["/api/test"]) == [150.5, 200.0]
-        assert len(self.metrics.request_times["/api/other"]) == 1
+        test_times = self.metrics.request_times.window("/api/test")
+        assert test_times.count == 2
+        assert test_times.min == 150.5
+        assert test_times.max == 200.0
+        assert self.metrics.request_times.window("/api/other").count == 1
         assert self.metrics.endpoint_calls["/api/test"] == 2
         assert self.metrics.endpoint_calls["/api/other"] == 1
     
-    def test_record_request_time_max_samples(self):
-        """Test request time recording respects max samples."""
+    def test_request_time_percentiles(self):
+        """Test latency percentiles come from the histogram within relative accuracy."""
         metrics = PerformanceMetrics(max_samples=3)
         
-        # Add more samples than max
-        for i in range(5):
+        for i in range(1, 1001):
             metrics.record_request_time("/test", float(i))
         
-        # Should only keep last 3 samples
-        assert len(metrics.request_times["/test"]) == 3
-        assert list(metrics.request_times["/test"]) == [2.0, 3.0, 4.0]
+        percentiles = metrics.get_latency_percentiles("/test")
+        assert percentiles["p50"] == pytest.approx(500, rel=0.02)
+        assert percentiles["p95"] == pytest.approx(950, rel=0.02)
+        assert percentiles["p99"] == pytest.approx(990, rel=0.02)
+        assert percentiles["p999"] == pytest.approx(999, rel=0.02)
+        assert metrics.get_p95_response_time() == pytest.approx(950, rel=0.02)
+        assert metrics.get_average_response_time("/test") == pytest.approx(500.5)
+    
+    def test_latency_histogram_export(self):
+        """Test latency histograms are exported per endpoint and query type."""
+        self.metrics.record_request_time("/api/test", 120.0)
+        self.metrics.record_db_query_time("get_document", 15.0)
+        
+        exported = self.metrics.get_latency_histograms()
+        assert exported["requests"]["/api/test"]["count"] == 1
+        assert exported["requests"]["/api/test"]["buckets"][0][1] == 1
+        assert exported["db_queries"]["get_document"]["p50"] == pytest.approx(15.0, rel=0.02)
     
     def test_record_error(self):
         """Test error recording."""
@@ -77,15 +93,26 @@ class TestPerformanceMetrics:
         assert self.metrics.cache_stats["misses"] == 1
         assert self.metrics.cache_stats["errors"] == 1
     
+    def test_cache_hit_rate_by_type(self):
+        """Test cache operations are also tracked per cache type."""
+        self.metrics.record_cache_hit("user_session")
+        self.metrics.record_cache_hit("user_data")
+        self.metrics.record_cache_miss("user_data")
+        
+        assert self.metrics.cache_stats_by_type["user_session"]["hits"] == 1
+        assert self.metrics.get_cache_hit_rate("user_data") == 50.0
+        assert self.metrics.get_cache_hit_rate("unknown") == 0.0
+        assert self.metrics.get_cache_hit_rate() == pytest.approx(200 / 3)
+    
     def test_record_db_query_time(self):
         """Test database query time recording."""
         self.metrics.record_db_query_time("select", 50.0)
         self.metrics.record_db_query_time("select", 75.0)
         self.metrics.record_db_query_time("update", 120.0)
         
-        assert len(self.metrics.db_query_times["select"]) == 2
-        assert list(self.metrics.db_query_times["select"]) == [50.0, 75.0]
-        assert len(self.metrics.db_query_times["update"]) == 1
+        assert self.metrics.db_query_times.window("select").count == 2
+        assert self.metrics.db_query_times.window("select").mean == pytest.approx(62.5)
+        assert self.metrics.db_query_times.window("update").count == 1
     
     def test_record_active_user(self):
         """Test active user recording."""
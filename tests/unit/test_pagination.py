@@ -0,0 +1,35 @@
+"""
+Unit tests for the opaque keyset cursors in app.pagination.
+"""
+
+import pytest
+from datetime import datetime, timezone
+
+from app.pagination import decode_cursor, encode_cursor
+
+
+@pytest.mark.unit
+class TestCursors:
+    """Test cursor encoding and validation."""
+    
+    def test_round_trip_keeps_types(self):
+        """Test sort keys survive a round trip, including timezone-aware datetimes."""
+        updated_at = datetime(2025, 3, 1, 12, 30, 5, 123456, tzinfo=timezone.utc)
+        cursor = encode_cursor(updated_at, "deck-1")
+        
+        assert "=" not in cursor and "/" not in cursor and "+" not in cursor
+        assert decode_cursor(cursor, 2) == [updated_at, "deck-1"]
+        assert decode_cursor(encode_cursor(42), 1) == [42]
+    
+    @pytest.mark.parametrize("cursor", ["", "not-base64!", "bnVsbA", encode_cursor(1, 2, 3), "eyJhIjoxfQ"])
+    def test_malformed_cursors_raise_value_error(self, cursor):
+        """Test garbage, wrong arity and non-list payloads are rejected."""
+        with pytest.raises(ValueError):
+            decode_cursor(cursor, 2)
+    
+    def test_tampered_datetime_rejected(self):
+        """Test a datetime tag must hold an ISO string."""
+        import base64
+        cursor = base64.urlsafe_b64encode(b'[{"$dt":5},"x"]').decode().rstrip("=")
+        with pytest.raises(ValueError):
+            decode_cursor(cursor, 2)
@@ -0,0 +1,97 @@
+"""
+Unit tests for the Prometheus metrics exposition.
+"""
+
+import sys
+import pytest
+from unittest.mock import patch, Mock
+
+from app import prometheus
+from app.monitoring import PerformanceMetrics
+from app.security import SecurityMonitor
+
+
+def _sample(text, line_start):
+    """Value of the first exposition line starting with ``line_start``."""
+    for line in text.splitlines():
+        if line.startswith(line_start):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{line_start} not found")
+
+
+@pytest.mark.unit
+class TestPrometheusExposition:
+    """Test text-format rendering of PerformanceMetrics and related counters."""
+
+    def setup_method(self):
+        """Set up test fixtures."""
+        self.metrics = PerformanceMetrics()
+
+    def test_request_histogram_buckets(self):
+        """Test latencies render as cumulative second-based histogram buckets."""
+        self.metrics.record_request_time("main.index", 20.0)
+        self.metrics.record_request_time("main.index", 400.0)
+
+        text = prometheus.render_metrics(self.metrics)
+        series = 'pvpocket_http_request_duration_seconds'
+        assert f"# TYPE {series} histogram" in text
+        assert _sample(text, f'{series}_bucket{{endpoint="main.index",le="0.025"}}') == 1
+        assert _sample(text, f'{series}_bucket{{endpoint="main.index",le="0.5"}}') == 2
+        assert _sample(text, f'{series}_bucket{{endpoint="main.index",le="+Inf"}}') == 2
+        assert _sample(text, f'{series}_count{{endpoint="main.index"}}') == 2
+        assert _sample(text, f'{series}_sum{{endpoint="main.index"}}') == pytest.approx(0.42)
+
+    def test_cache_and_firestore_families(self):
+        """Test cache hit ratios per type and Firestore reads per collection."""
+        self.metrics.record_cache_hit("user_data")
+        self.metrics.record_cache_hit("user_data")
+        self.metrics.record_cache_miss("user_data")
+        self.metrics.record_firestore_read("users", 3)
+        self.metrics.record_firestore_batch_read("users", 2)
+
+        text = prometheus.render_metrics(self.metrics)
+        assert _sample(text, 'pvpocket_cache_requests_total{cache_type="user_data",result="hit"}') == 2
+        assert _sample(text, 'pvpocket_cache_hit_ratio{cache_type="user_data"}') == pytest.approx(2 / 3)
+        assert _sample(text, 'pvpocket_firestore_reads_total{collection="users"}') == 5
+
+    def test_security_totals_without_identifiers(self):
+        """Test security counters are exported as totals without per-IP labels."""
+        monitor = SecurityMonitor()
+        for _ in range(11):
+            monitor.record_failed_attempt("10.0.0.1")
+
+        text = prometheus.render_metrics(self.metrics, monitor)
+        assert _sample(text, "pvpocket_security_failed_attempts") == 11
+        assert _sample(text, "pvpocket_security_blocked_identifiers") == 1
+        assert "10.0.0.1" not in text
+
+    def test_battle_cache_only_when_created(self):
+        """Test battle cache metrics appear only once the simulator created its cache."""
+        cache_metrics = Mock(cache_hits=3, cache_misses=1, hit_rate=75.0, load_time=0.5)
+        battle_cache_module = Mock(_battle_cache=Mock(metrics=cache_metrics))
+
+        with patch.dict(sys.modules, {"simulator.core.battle_cache": battle_cache_module}):
+            text = prometheus.render_metrics(self.metrics)
+        assert _sample(text, 'pvpocket_battle_cache_requests_total{result="hit"}') == 3
+        assert _sample(text, "pvpocket_battle_cache_hit_ratio") == 0.75
+
+        with patch.dict(sys.modules, {"simulator.core.battle_cache": Mock(_battle_cache=None)}):
+            assert "battle_cache" not in prometheus.render_metrics(self.metrics)
+
+    def test_series_capped_and_labels_escaped(self):
+        """Test series per family are capped and label values are escaped."""
+        for index in range(prometheus.MAX_SERIES_PER_FAMILY + 20):
+            self.metrics.record_error(f"error_{index}")
+        self.metrics.record_cache_hit('odd"type')
+
+        text = prometheus.render_metrics(self.metrics)
+        assert text.count("pvpocket_errors_total{") == prometheus.MAX_SERIES_PER_FAMILY
+        assert 'cache_type="odd\\"type"' in text
+
+    def test_cached_render_reused_within_ttl(self):
+        """Test repeated scrapes within the TTL reuse the rendered text."""
+        with patch.object(prometheus, "_rendered", None), \
+                patch.object(prometheus, "render_metrics", return_value="text\n") as render:
+            assert prometheus.cached_render_metrics(self.metrics) == "text\n"
+            assert prometheus.cached_render_metrics(self.metrics) == "text\n"
+        render.assert_called_once()
@@ -0,0 +1,90 @@
+"""
+Unit tests for the daily analytics rollups.
+"""
+
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import Mock
+
+from app import rollups
+
+
+def _increments(batch):
+    """{day: {field: amount}} from the merged Increment writes in a mock batch."""
+    written = {}
+    for call in batch.set.call_args_list:
+        ref, fields = call.args
+        day = written.setdefault(ref.day, {})
+        for field, increment in fields.items():
+            day[field] = day.get(field, 0) + increment.value
+    return written
+
+
+def _db():
+    db = Mock()
+    db.collection.return_value.document.side_effect = lambda key: Mock(id=key, day=key)
+    return db
+
+
+@pytest.mark.unit
+class TestRollups:
+    """Test login/signup rollup writes and window summaries."""
+    
+    NOW = datetime(2025, 6, 10, 15, 0, tzinfo=timezone.utc)
+    
+    def test_login_moves_user_to_today(self):
+        """Test a returning user is moved from their previous login day to today."""
+        db, batch = _db(), Mock()
+        rollups.record_login(db, batch, previous_login=self.NOW - timedelta(days=3), now=self.NOW)
+        
+        assert _increments(batch) == {
+            "2025-06-10": {"logins": 1, "last_active_users": 1},
+            "2025-06-07": {"last_active_users": -1},
+        }
+    
+    def test_repeat_login_same_day_only_counts_login(self):
+        """Test a second login on the same UTC day doesn't count the user twice."""
+        db, batch = _db(), Mock()
+        rollups.record_login(db, batch, previous_login=self.NOW - timedelta(hours=2), now=self.NOW)
+        
+        assert _increments(batch) == {"2025-06-10": {"logins": 1}}
+    
+    def test_read_and_summarize_windows(self):
+        """Test window totals sum the right days and missing days count as zero."""
+        db = _db()
+        stored = {
+            "2025-06-10": {"last_active_users": 2, "new_users": 1},
+            "2025-06-05": {"last_active_users": 3, "new_users": 2},
+            "2025-05-20": {"last_active_users": 4},
+        }
+        db.get_all.side_effect = lambda refs: [
+            Mock(id=ref.id, exists=ref.id in stored, to_dict=Mock(return_value=stored.get(ref.id)))
+            for ref in refs
+        ]
+        
+        days = rollups.read_days(db, 30, now=self.NOW)
+        summary = rollups.summarize(days, 7)
+        
+        assert len(days) == 30 and days[-1]["last_active_users"] == 2
+        assert summary["daily_active"] == 2
+        assert summary["weekly_active"] == 5
+        assert summary["monthly_active"] == 9
+        assert summary["new_users_period"] == 3
+    
+    def test_backfill_rebuilds_and_zeroes_stale_days(self):
+        """Test backfill counts users by signup and last login day and clears days no longer seen."""
+        db = _db()
+        db.collection.return_value.select.return_value.stream.return_value = [Mock(id="2025-01-01")]
+        users = [
+            Mock(to_dict=Mock(return_value={"created_at": self.NOW, "last_login": self.NOW})),
+            Mock(to_dict=Mock(return_value={"created_at": self.NOW - timedelta(days=1)})),
+        ]
+        
+        assert rollups.backfill(db, users) == 3
+        
+        written = {call.args[0].day: call.args[1] for call in db.batch.return_value.set.call_args_list}
+        assert written == {
+            "2025-06-10": {"new_users": 1, "last_active_users": 1},
+            "2025-06-09": {"new_users": 1, "last_active_users": 0},
+            "2025-01-01": {"new_users": 0, "last_active_users": 0},
+        }
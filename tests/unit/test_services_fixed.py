@@ -3,10 +3,12 @@ Unit tests for services functionality - Fixed version.
 """
 
 import pytest
+import threading
+import time
 from unittest.mock import patch, MagicMock, Mock
 from Card import CardCollection, Card
 
-from app.services import CardService, UserService
+from app.services import CardService, CardRenderService, SingleFlight, StatsService, UserService
 
 
 @pytest.mark.unit
@@ -39,6 +41,65 @@ class TestCardService:
         assert blastoise.energy_type == "Water"
         assert blastoise.hp == 100
     
+    def test_refresh_rereads_only_changed_sets(self, app):
+        """Test refresh patches the cached collection from the sets whose fingerprint changed."""
+        from app.cache_manager import CacheManager
+        manager = CacheManager()
+        
+        def doc(doc_id, **data):
+            return Mock(id=doc_id, to_dict=Mock(return_value=data))
+        
+        set_docs = [doc("Genetic_Apex", set_name="Genetic Apex", release_order=1, card_count=1),
+                    doc("Mythical_Island", set_name="Mythical Island", release_order=2, card_count=1)]
+        collection = CardCollection()
+        collection.add_card(Card(id=1, name="Pikachu", set_name="Genetic Apex", set_release_order=1))
+        collection.add_card(Card(id=2, name="Mew", set_name="Mythical Island", set_release_order=2))
+        collection.set_fingerprints = CardCollection.fingerprints_for_set_docs(set_docs)
+        manager.set_card_collection(collection)
+        old_version = collection.version
+        
+        set_docs[1] = doc("Mythical_Island", set_name="Mythical Island", release_order=2, card_count=2,
+                          updated_at="2025-01-02")
+        set_cards = {"Mythical_Island": [doc("mew", id=2, name="Mew", set_name="Mythical Island"),
+                                         doc("celebi", id=3, name="Celebi ex", set_name="Mythical Island")]}
+        db_client = MagicMock()
+        db_client.collection.return_value.stream.return_value = set_docs
+        db_client.collection.return_value.document.side_effect = lambda doc_id: Mock(
+            collection=Mock(return_value=Mock(stream=Mock(return_value=set_cards[doc_id])))
+        )
+        
+        with app.app_context(), patch.dict(app.config, {"FIRESTORE_DB": db_client}), \
+             patch('app.services.cache_manager', manager):
+            assert CardService.refresh_card_collection() is True
+        
+        refreshed = manager.get_card_collection()
+        db_client.collection.return_value.document.assert_called_once_with("Mythical_Island")
+        assert [card.id for card in refreshed.cards] == [1, 2, 3]
+        assert refreshed.get_card_by_id(1) is collection.get_card_by_id(1)
+        assert refreshed.get_card_by_id(3).set_release_order == 2
+        assert refreshed.version != old_version
+        assert refreshed.set_fingerprints["Mythical_Island"][3] == "2025-01-02"
+        assert len(collection.cards) == 2
+    
+    def test_set_metadata_falls_back_to_aggregation_counts(self, app):
+        """Test set metadata uses count queries and caches them when no catalog is loaded."""
+        from app.cache_manager import CacheManager
+        manager = CacheManager()
+        set_doc = Mock(to_dict=Mock(return_value={"set_name": "Genetic Apex", "set_code": "A1", "release_order": 1}))
+        set_doc.reference.collection.return_value.count.return_value.get.return_value = [[Mock(value=286)]]
+        db_client = MagicMock()
+        db_client.collection.return_value.stream.return_value = [set_doc]
+        
+        with app.app_context(), patch.dict(app.config, {"FIRESTORE_DB": db_client}), \
+             patch('app.services.cache_manager', manager), \
+             patch.object(CardService, 'get_full_card_collection', return_value=CardCollection()):
+            expected = [{"name": "Genetic Apex", "code": "A1", "release_order": 1, "card_count": 286}]
+            assert CardService.get_set_metadata() == expected
+            assert CardService.get_set_metadata() == expected
+        
+        db_client.collection.return_value.stream.assert_called_once()
+        set_doc.reference.collection.return_value.stream.assert_not_called()
+    
     def test_priority_sets_defined(self):
         """Test that priority sets are properly defined."""
         assert len(CardService.PRIORITY_SETS) == 5
@@ -95,6 +156,28 @@ class TestUserService:
         assert result is None
         mock_cache.set_user_collection.assert_not_called()
     
+    @patch('app.services.cache_manager')
+    @patch('app.services.DatabaseService.get_db')
+    def test_get_user_profiles_batches_cache_misses(self, mock_get_db, mock_cache):
+        """Test profiles come from cache when possible and misses are read in chunked get_all calls."""
+        cached = {"u0": {"username": "Cached"}}
+        mock_cache.get_user_data.side_effect = cached.get
+        mock_db = Mock()
+        mock_db.collection.return_value.document.side_effect = lambda user_id: user_id
+        mock_db.get_all.side_effect = lambda refs: [
+            Mock(id=user_id, exists=user_id != "u3", to_dict=Mock(return_value={"username": user_id.upper()}))
+            for user_id in refs
+        ]
+        mock_get_db.return_value = mock_db
+        
+        with patch.object(UserService, "PROFILE_BATCH_SIZE", 2):
+            profiles = UserService.get_user_profiles(["u0", "u1", "u2", "u3", "u1", "u4"])
+        
+        assert profiles == {"u0": {"username": "Cached"}, "u1": {"username": "U1"},
+                            "u2": {"username": "U2"}, "u4": {"username": "U4"}}
+        assert [call.args[0] for call in mock_db.get_all.call_args_list] == [["u1", "u2"], ["u3", "u4"]]
+        assert mock_cache.set_user_data.call_count == 3
+    
     @pytest.mark.skip(reason="UserService.get_user_decks parameter signature differs from test expectation")
     @patch('app.services.db_service')
     def test_get_user_decks_success(self, mock_db):
@@ -126,4 +209,199 @@ class TestServiceHelpers:
         
         # Should be ordered from most recent to older
         assert priority_sets[0] == "Secluded Springs"  # Most recent
-        assert priority_sets[-1] == "Celestial Guardians"  # Oldest in priority
\ No newline at end of file
+        assert priority_sets[-1] == "Celestial Guardians"  # Oldest in priority
+
+@pytest.mark.unit
+class TestCardRenderService:
+    """Test pre-rendered card JSON fragments."""
+    
+    def _collection(self):
+        collection = CardCollection()
+        collection.add_card(Card(id=1, name="Pikachu", energy_type="Lightning", set_name="Genetic Apex",
+                                 firebase_image_url="https://firebasestorage.googleapis.com/v0/b/x/o/cards%2Fa.png?alt=media",
+                                 set_release_order=1))
+        collection.add_card(Card(id=2, name="Potion", card_type="Trainer - Item", set_name="Genetic Apex",
+                                 set_release_order=1))
+        return collection
+    
+    def test_response_matches_rendered_dicts(self, app):
+        """Test joined fragments decode to the same payload as the per-card dicts."""
+        collection = self._collection()
+        CardRenderService.clear()
+        
+        with app.test_request_context():
+            response = CardRenderService.build_response(
+                collection, list(reversed(collection.cards)), success=True, pagination={"total_count": 2}
+            )
+            expected = [CardRenderService.render_card(card, {}) for card in reversed(collection.cards)]
+        
+        payload = response.get_json()
+        assert payload == {"cards": expected, "success": True, "pagination": {"total_count": 2}}
+        assert payload["cards"][1]["display_image_path"] == collection.cards[0].firebase_image_url
+        assert "high_res_image_path" not in payload["cards"][0]
+    
+    @patch('app.services.db_service')
+    def test_fragments_rendered_once_per_version(self, mock_db, app):
+        """Test fragments are reused for a catalog version and release orders looked up once per set."""
+        collection = CardCollection()
+        collection.add_card(Card(id=1, name="Pikachu", set_name="Mythical Island"))
+        collection.add_card(Card(id=2, name="Mew", set_name="Mythical Island"))
+        mock_db.get_document.return_value = {"release_order": 3}
+        CardRenderService.clear()
+        
+        with app.test_request_context():
+            first = CardRenderService.get_fragments(collection)
+            second = CardRenderService.get_fragments(collection)
+        
+        assert first is second
+        assert b'"set_release_order":3' in first[2]
+        mock_db.get_document.assert_called_once_with("cards", "Mythical_Island", cached=True)
+    
+    def test_old_versions_evicted(self, app):
+        """Test only the most recent catalog versions keep fragments."""
+        CardRenderService.clear()
+        
+        with app.test_request_context():
+            for card_id in range(CardRenderService.MAX_VERSIONS + 1):
+                collection = CardCollection()
+                collection.add_card(Card(id=card_id, name=f"Card {card_id}", set_release_order=1))
+                CardRenderService.get_fragments(collection)
+        
+        assert len(CardRenderService._fragments) == CardRenderService.MAX_VERSIONS
+
+
+@pytest.mark.unit
+class TestSingleFlight:
+    """Test request coalescing for card collection loads."""
+    
+    def _run_concurrently(self, count, target):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(target())) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+    
+    def test_concurrent_callers_share_one_call(self):
+        """Test concurrent callers for a key run the function once and share its result."""
+        flight = SingleFlight()
+        calls = []
+        
+        def load():
+            calls.append(1)
+            time.sleep(0.05)
+            return object()
+        
+        results = self._run_concurrently(8, lambda: flight.do("cards", load, timeout=5))
+        
+        assert len(calls) == 1
+        assert len(results) == 8
+        assert all(result is results[0] for result in results)
+        assert not flight.in_flight("cards")
+    
+    def test_waiter_timeout_and_error_propagation(self):
+        """Test waiters time out independently and leader errors reach every caller."""
+        flight = SingleFlight()
+        started = threading.Event()
+        
+        def slow_failure():
+            started.set()
+            time.sleep(0.1)
+            raise ValueError("firestore unavailable")
+        
+        errors = []
+        
+        def leader():
+            try:
+                flight.do("cards", slow_failure)
+            except ValueError as e:
+                errors.append(e)
+        
+        thread = threading.Thread(target=leader)
+        thread.start()
+        started.wait()
+        with pytest.raises(TimeoutError):
+            flight.do("cards", slow_failure, timeout=0.01)
+        with pytest.raises(ValueError):
+            flight.do("cards", slow_failure, timeout=5)
+        thread.join()
+        
+        assert len(errors) == 1
+    
+    def test_full_collection_loaded_once_for_concurrent_misses(self, app):
+        """Test concurrent cache misses trigger a single Firestore load."""
+        collection = CardCollection()
+        collection.add_card(Card(id=1, name="Pikachu"))
+        calls = []
+        
+        def fetch(cache_as_full=True, max_cards=None):
+            calls.append(max_cards)
+            time.sleep(0.05)
+            return collection
+        
+        def request():
+            with app.app_context():
+                return CardService._load_full_collection(cache_as_full=True, max_cards=2000)
+        
+        with patch.object(CardService, '_fetch_full_collection', side_effect=fetch):
+            results = self._run_concurrently(6, request)
+        
+        assert calls == [2000]
+        assert all(result is collection for result in results)
+    
+    def test_expired_collection_served_stale_while_revalidating(self, app):
+        """Test an expired full collection keeps being served while a refresh is scheduled."""
+        from app.cache_manager import CacheManager
+        manager = CacheManager()
+        collection = CardCollection()
+        for card_id in range(1001):
+            collection.add_card(Card(id=card_id, name=f"Card {card_id}"))
+        manager.set_card_collection(collection)
+        # Simulate TTL expiry of the cached entry
+        manager.client.delete("cards:global_cards")
+        
+        with app.app_context(), \
+             patch('app.services.cache_manager', manager), \
+             patch.object(CardService, '_revalidate_in_background') as revalidate, \
+             patch.object(CardService, '_fetch_full_collection') as fetch:
+            assert CardService.get_full_card_collection() is collection
+        
+        revalidate.assert_called_once_with("global_cards")
+        fetch.assert_not_called()
+        
+        manager.invalidate_card_cache()
+        assert manager.get_stale_card_collection() is None
+
+
+@pytest.mark.unit
+class TestStatsService:
+    """Test cached home page statistics."""
+    
+    def test_home_stats_cached_until_invalidated(self, app):
+        """Test counters are read once per TTL and top decks only look up the decks shown."""
+        meta_stats = {"decks": {f"Deck {i}": {"total_battles": 10, "wins": i} for i in range(7)}}
+        mock_db = Mock()
+        mock_db.collection.return_value.where.return_value.limit.return_value.stream.return_value = [
+            Mock(to_dict=Mock(return_value={"deck_types": ["Fire"]}))
+        ]
+        StatsService.invalidate()
+        
+        with app.app_context(), \
+                patch.dict(app.config, {"FIRESTORE_DB": mock_db, "meta_stats": meta_stats}), \
+                patch("app.counters.users_counter") as users_counter, \
+                patch("app.counters.decks_counter") as decks_counter:
+            users_counter.value.return_value = 12
+            decks_counter.value.return_value = 30
+            first = StatsService.get_home_stats()
+            second = StatsService.get_home_stats()
+            StatsService.invalidate()
+            StatsService.get_home_stats()
+        StatsService.invalidate()
+        
+        assert second is first
+        assert first["total_users"] == 12 and first["total_decks"] == 30
+        assert [deck["name"] for deck in first["top_decks"]] == ["Deck 6", "Deck 5", "Deck 4", "Deck 3", "Deck 2"]
+        assert first["top_decks"][0]["types"] == ["Fire"]
+        assert users_counter.value.call_count == 2
+
@@ -0,0 +1,40 @@
+"""
+Unit tests for task queue scheduling helpers.
+"""
+
+import pytest
+from unittest.mock import patch
+
+from app.task_queue import TaskQueue, _next_reconciliation
+
+
+@pytest.mark.unit
+class TestNamedTasks:
+    """Test named tasks deduplicate the stats reconciliation chain."""
+    
+    def test_reconciliation_slots_shared_across_instances(self):
+        """Test every instance derives the same task for the next slot on the interval grid."""
+        first = _next_reconciliation(60, now=3600 * 10 + 5)
+        second = _next_reconciliation(60, now=3600 * 10 + 1800)
+        
+        assert first[:2] == second[:2] == (11, "reconcile-stats-counters-60m-11")
+        assert first[2] == 3595 and second[2] == 1800
+    
+    def test_reconciliation_never_reschedules_its_own_slot(self):
+        """Test a run that fires just before its slot starts schedules the following slot."""
+        slot, task_name, _ = _next_reconciliation(60, after_slot=11, now=3600 * 11 - 1)
+        
+        assert slot == 12 and task_name.endswith("-12")
+    
+    def test_memory_queue_deduplicates_named_tasks(self):
+        """Test enqueueing a pending named task again is a no-op until it runs."""
+        with patch("app.task_queue.CLOUD_TASKS_AVAILABLE", False), patch("app.task_queue.threading.Thread"):
+            task_queue = TaskQueue()
+        
+        assert task_queue.enqueue_task("noop", {}, task_name="job-1") is True
+        assert task_queue.enqueue_task("noop", {}, task_name="job-1") is True
+        assert task_queue._memory_queue.qsize() == 1
+        
+        task_queue._process_memory_task(task_queue._memory_queue.get_nowait())
+        assert task_queue.enqueue_task("noop", {}, task_name="job-1") is True
+        assert task_queue._memory_queue.qsize() == 1
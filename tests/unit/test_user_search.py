@@ -0,0 +1,58 @@
+"""
+Unit tests for the admin username search index.
+"""
+
+import pytest
+from unittest.mock import Mock
+
+from app.user_search import UsernameTrie, UserSearchIndex
+
+
+@pytest.mark.unit
+class TestUsernameTrie:
+    """Test prefix lookups in the username trie."""
+    
+    def test_prefix_returns_matches_in_username_order(self):
+        """Test a prefix finds every username under it, ordered, up to the limit."""
+        trie = UsernameTrie()
+        for user_id, username in [("u1", "ash"), ("u2", "ashley"), ("u3", "misty"), ("u4", "asher"), ("u5", "ash")]:
+            trie.insert(username, user_id)
+        
+        assert trie.prefix("ash", 10) == ["u1", "u5", "u4", "u2"]
+        assert trie.prefix("ash", 2) == ["u1", "u5"]
+        assert trie.prefix("brock", 10) == []
+    
+    def test_remove_prunes_empty_branches(self):
+        """Test removing the only user under a branch drops the branch."""
+        trie = UsernameTrie()
+        trie.insert("ashley", "u2")
+        trie.insert("ash", "u1")
+        trie.remove("ashley", "u2")
+        
+        assert trie.prefix("ashl", 10) == []
+        assert trie.prefix("as", 10) == ["u1"]
+        assert "l" not in trie._root.children["a"].children["s"].children["h"].children
+
+
+@pytest.mark.unit
+class TestUserSearchIndex:
+    """Test index build and incremental refresh."""
+    
+    def test_build_then_apply_renames(self):
+        """Test the index builds from the username projection and follows renames."""
+        db = Mock()
+        db.collection.return_value.select.return_value.stream.return_value = [
+            Mock(id="u1", to_dict=Mock(return_value={"username_lowercase": "ash"})),
+            Mock(id="u2", to_dict=Mock(return_value={"username_lowercase": ""})),
+        ]
+        changed = db.collection.return_value.where.return_value.select.return_value
+        changed.stream.return_value = [Mock(id="u1", to_dict=Mock(return_value={"username_lowercase": "gary"}))]
+        index = UserSearchIndex()
+        index.REFRESH_SECONDS = 0
+        
+        index._build(db)
+        assert index.ready and index.search("a", 10) == ["u1"]
+        
+        index.refresh(db)
+        assert index.search("a", 10) == [] and index.search("ga", 10) == ["u1"]
+        assert db.collection.return_value.where.call_args.args[:2] == ("username_updated_at", ">")